@@ -5,9 +5,26 @@ from fastapi import FastAPI
 from fastapi.templating import Jinja2Templates
 from typing import Optional
 from data_models import MinerConfig, BaseMiner, app
+from base.prefork import PreforkServer
+from base.health import add_health_routes
+from base.capture import CaptureMiddleware
+from base.debug import add_debug_routes
+from base.loop_monitor import add_loop_monitor, loop_monitor_enabled
+from base.memory_profiler import add_memory_profiler
 
 
 templates = Jinja2Templates(directory="templates")
+add_health_routes(app)
+add_debug_routes(app)
+if loop_monitor_enabled():
+    add_loop_monitor(app)
+add_memory_profiler(app)
+if os.getenv("MINER_CAPTURE_PATH"):
+    app.add_middleware(
+        CaptureMiddleware,
+        path=os.getenv("MINER_CAPTURE_PATH"),
+        sample_rate=float(os.getenv("MINER_CAPTURE_RATE", "0.01")),
+    )
 
 
 @app.get("/")
@@ -55,9 +72,19 @@ def serve_miner(
 
 
 if __name__ == "__main__":
-    uvicorn.run(
-        "base.api:app",
-        host=os.getenv("MINER_HOST"),
-        port=os.getenv("MINER_PORT"),
-        reload=True,
-    )
+    workers = int(os.getenv("MINER_WORKERS", "1"))
+    if workers > 1:
+        PreforkServer(
+            "api:app",
+            host=os.getenv("MINER_HOST", "0.0.0.0"),
+            port=int(os.getenv("MINER_PORT", "5757")),
+            workers=workers,
+            preload=[name for name in os.getenv("PRELOAD_MODULES", "").split(",") if name],
+        ).run()
+    else:
+        uvicorn.run(
+            "base.api:app",
+            host=os.getenv("MINER_HOST"),
+            port=os.getenv("MINER_PORT"),
+            reload=True,
+        )
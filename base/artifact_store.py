@@ -0,0 +1,172 @@
+import os
+import mmap
+import threading
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Union
+
+import numpy as np
+
+DEFAULT_ARTIFACT_ROOT = "modules"
+
+
+class Artifact:
+    """
+    A read-only memory map of one module file.
+
+    Buffers handed out by `buffer` and `array` point straight into the map, so no copy
+    is made. Pages are read from disk the first time they are touched, and pages of the
+    same file are shared through the page cache by every process that maps it.
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.size = path.stat().st_size
+        self._file = open(path, "rb")
+        # mmap cannot map an empty file.
+        self._map: Optional[mmap.mmap] = (
+            mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if self.size else None
+        )
+
+    @property
+    def closed(self) -> bool:
+        return self._file.closed
+
+    def buffer(self, offset: int = 0, length: Optional[int] = None) -> memoryview:
+        """
+        Returns a zero-copy, read-only view of `length` bytes starting at `offset`.
+
+        Raises:
+            ValueError: If the artifact is closed or the range is outside the file.
+        """
+        if self.closed:
+            raise ValueError(f"Artifact {self.path} is closed")
+        length = self.size - offset if length is None else length
+        if offset < 0 or length < 0 or offset + length > self.size:
+            raise ValueError(f"Range {offset}:{offset + length} is outside {self.path} ({self.size} bytes)")
+        if self._map is None:
+            return memoryview(b"")
+        return memoryview(self._map)[offset : offset + length]
+
+    def array(
+        self, dtype: Any = np.uint8, offset: int = 0, shape: Optional[Sequence[int]] = None
+    ) -> np.ndarray:
+        """
+        Returns a read-only NumPy view of the artifact, e.g. raw float32 weights.
+
+        Args:
+            dtype (Any): The element type. Defaults to uint8.
+            offset (int): Byte offset of the first element. Defaults to 0.
+            shape (Optional[Sequence[int]]): The array shape. Defaults to as many
+                elements as fit after `offset`.
+
+        Returns:
+            np.ndarray: A view backed by the memory map.
+        """
+        dtype = np.dtype(dtype)
+        count = -1 if shape is None else int(np.prod(shape))
+        length = None if shape is None else count * dtype.itemsize
+        view = np.frombuffer(self.buffer(offset, length), dtype=dtype, count=count)
+        return view if shape is None else view.reshape(shape)
+
+    def prefetch(self) -> None:
+        """
+        Asks the kernel to start reading the whole file in the background, for
+        artifacts that will certainly be used, so first requests do not fault.
+        """
+        if self._map is not None and hasattr(mmap, "MADV_WILLNEED"):
+            self._map.madvise(mmap.MADV_WILLNEED)
+
+    def close(self) -> None:
+        """
+        Unmaps the file. Fails with BufferError while views returned by `buffer` or
+        `array` are still referenced.
+        """
+        if self._map is not None:
+            self._map.close()
+        self._file.close()
+
+
+class ArtifactStore:
+    """
+    Process-wide registry of memory-mapped module artifacts.
+
+    Artifacts are looked up under `<root>/<module_name>/`, or under a module's own
+    `module_path`, and every path is mapped at most once per process. Paths that would
+    leave the module directory are rejected.
+    """
+
+    def __init__(self, root: Union[str, Path] = DEFAULT_ARTIFACT_ROOT):
+        self.root = Path(root)
+        self._artifacts: Dict[Path, Artifact] = {}
+        self._lock = threading.Lock()
+
+    def module_dir(self, module_name: str, module_path: Optional[Union[str, Path]] = None) -> Path:
+        return Path(module_path) if module_path else self.root / module_name
+
+    def resolve(
+        self, module_name: str, relative_path: Union[str, Path], module_path: Optional[Union[str, Path]] = None
+    ) -> Path:
+        """
+        Returns the absolute path of a module artifact.
+
+        Raises:
+            ValueError: If the path points outside the module directory.
+        """
+        base = self.module_dir(module_name, module_path).resolve()
+        path = (base / relative_path).resolve()
+        if path != base and base not in path.parents:
+            raise ValueError(f"Artifact path {relative_path} is outside module {module_name}")
+        return path
+
+    def open(
+        self, module_name: str, relative_path: Union[str, Path], module_path: Optional[Union[str, Path]] = None
+    ) -> Artifact:
+        """
+        Maps a module artifact, or returns the existing map.
+
+        Args:
+            module_name (str): The module name.
+            relative_path (Union[str, Path]): The file path inside the module directory.
+            module_path (Optional[Union[str, Path]]): The module directory. Defaults to
+                `<root>/<module_name>`.
+
+        Returns:
+            Artifact: The mapped artifact.
+
+        Raises:
+            FileNotFoundError: If the file does not exist.
+            ValueError: If the path points outside the module directory.
+        """
+        path = self.resolve(module_name, relative_path, module_path)
+        with self._lock:
+            artifact = self._artifacts.get(path)
+            if artifact is None or artifact.closed:
+                artifact = self._artifacts[path] = Artifact(path)
+            return artifact
+
+    def list(self, module_name: str, pattern: str = "**/*", module_path: Optional[Union[str, Path]] = None) -> List[str]:
+        """
+        Returns the artifact paths of a module matching a glob pattern, relative to the module.
+        """
+        base = self.module_dir(module_name, module_path)
+        return sorted(str(path.relative_to(base)) for path in base.glob(pattern) if path.is_file())
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            artifacts = [artifact for artifact in self._artifacts.values() if not artifact.closed]
+        return {"artifacts": len(artifacts), "mapped_bytes": sum(artifact.size for artifact in artifacts)}
+
+    def close(self) -> None:
+        with self._lock:
+            for artifact in self._artifacts.values():
+                artifact.close()
+            self._artifacts.clear()
+
+
+@lru_cache(maxsize=None)
+def get_artifact_store() -> ArtifactStore:
+    """
+    Returns the process-wide artifact store rooted at `ARTIFACT_ROOT`, or modules/.
+    """
+    return ArtifactStore(os.getenv("ARTIFACT_ROOT", DEFAULT_ARTIFACT_ROOT))
@@ -1,5 +1,6 @@
 import json
-import subprocess
+import asyncio
+import inspect
 import uvicorn
 from pathlib import Path
 from abc import ABC, abstractmethod
@@ -8,6 +9,12 @@ from pydantic import BaseModel
 from fastapi import APIRouter, FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from base.base_module import BaseModule
+from base.capture import DEFAULT_CAPTURE_PATH, CaptureMiddleware
+from base.dispatch import add_dispatch_routes, bind, load_dispatch_table
+from base.health import add_health_routes, get_readiness
+from base.prefork import PreforkServer
+from base.signing import SignatureMiddleware
+from chains.commune.registration import RegistrationResult, register_miners
 
 app = FastAPI()
 
@@ -81,16 +88,15 @@ class BaseMiner(ABC):
         path.write_text(json.dumps(configs, indent=4), encoding="utf-8")
         return configs
 
-    def add_route(self, module: BaseModule):
+    def add_route(self, module: BaseModule, app: FastAPI = app):
         """
         Adds a route to the FastAPI app for the specified module.
-        The route handles GET requests to '/modules/{request.module_name}/process'
-        and processes the request by instantiating the module with the provided configuration
-        and calling its 'process' method.
+        The route handles POST requests to '/modules/{module_name}/process'
+        and processes the request by calling the module's 'process' method.
 
         Parameters:
         - module: BaseModule - The module to be used for processing the request.
-        - app: FastAPI - The FastAPI application to add the route to.
+        - app: FastAPI - The FastAPI application to add the route to. Defaults to the shared app.
 
         Returns:
         - None
@@ -98,34 +104,144 @@ class BaseMiner(ABC):
         router = APIRouter()
         request_module = module
 
-        @router.get("/modules/{request.module_name}/process")
-        async def process_request(request: MinerRequest):
+        @router.post("/modules/{module_name}/process")
+        async def process_request(module_name: str, request: MinerRequest):
             """
             Process a request for a specific module.
 
-            This function is a route handler for GET requests to '/modules/{request.module_name}/process'.
-            It receives a `MinerRequest` object as a parameter, which contains information about the module to be processed.
-            The function creates a `module_config` dictionary with the necessary information from the request.
-            It then uses the `request_module` function to instantiate a module with the provided configuration.
-            Finally, it calls the `process` method of the module with the request as an argument and returns the result.
+            This function is a route handler for POST requests to '/modules/{module_name}/process'.
+            It receives a `MinerRequest` object as the request body and passes it to the `process`
+            method of the module, awaiting the result if the method is asynchronous.
 
             Parameters:
-            - request (MinerRequest): The request object containing information about the module to be processed.
+            - module_name (str): The name of the module in the request path.
+            - request (MinerRequest): The request object containing the data to be processed.
 
             Returns:
             - The result of calling the `process` method of the module with the request as an argument.
             """
-            module_config = {
-                "module_name": request.module_name,
-                "module_path": request.module_path,
-                "module_endpoint": request.module_endpoint,
-                "module_url": request.module_url,
-            }
-            module = request_module(**module_config)
-            return await module.process(request)
+            result = request_module.process(request)
+            if inspect.isawaitable(result):
+                result = await result
+            return result
 
         app.include_router(router)
 
+    def add_dispatch_routes(self, app: FastAPI = app, module_name: Optional[str] = None):
+        """
+        Serves each public method of the miner at POST '/modules/{module_name}/{method}'.
+
+        The methods and their arguments come from the dispatch table written when the
+        module was installed, or from analyzing the miner's source now if it is missing
+        or stale. Methods are bound and their validators built here, once, so a request
+        is a dict lookup straight to the bound method. `process` keeps taking the whole
+        `MinerRequest` body, as with `add_route`.
+
+        Parameters:
+        - app: FastAPI - The FastAPI application to add the routes to. Defaults to the shared app.
+        - module_name: Optional[str] - The module name in the path. Defaults to the miner's `module_name`.
+
+        Returns:
+        - None
+        """
+        miner_class = type(self)
+        module_name = module_name or getattr(self.miner_config, "module_name", None) or miner_class.__name__
+        table = load_dispatch_table(inspect.getsourcefile(miner_class), module_name, miner_class.__name__)
+        add_dispatch_routes(app, module_name, bind(table, self))
+
+    def warmup_requests(self) -> List[MinerRequest]:
+        """
+        Returns synthetic requests that `warmup` sends through `process`.
+
+        Parameters:
+        - None
+
+        Returns:
+        - List[MinerRequest]: The warm-up requests. Defaults to none.
+        """
+        return []
+
+    async def warmup(self):
+        """
+        Warms up the miner's module, then processes each of `warmup_requests()`, so the
+        first real requests do not pay for model loading, JIT compilation or cold caches.
+
+        Synchronous work runs in a thread so the server keeps answering health checks.
+
+        Parameters:
+        - None
+
+        Returns:
+        - None
+        """
+        module_warmup = getattr(self.module, "warmup", None)
+        if callable(module_warmup):
+            if inspect.iscoroutinefunction(module_warmup):
+                result = module_warmup()
+            else:
+                result = await asyncio.to_thread(module_warmup)
+            if inspect.isawaitable(result):
+                await result
+        for request in self.warmup_requests():
+            result = await asyncio.to_thread(self.process, request)
+            if inspect.isawaitable(result):
+                await result
+
+    def add_health_routes(self, app: FastAPI = app, name: Optional[str] = None):
+        """
+        Adds `/health/live` and `/health/ready` to the app and runs `warmup` in the
+        background when the app starts. The app reports ready once warm-up finishes.
+
+        Parameters:
+        - app: FastAPI - The FastAPI application. Defaults to the shared app.
+        - name: Optional[str] - The readiness component name. Defaults to the miner name.
+
+        Returns:
+        - None
+        """
+        name = name or getattr(self.miner_config, "miner_name", None) or type(self).__name__
+        readiness = get_readiness()
+        readiness.register(name)
+        add_health_routes(app, [name])
+        warmups = []
+
+        async def start_warmup():
+            warmups.append(asyncio.create_task(readiness.arun(name, self.warmup)))
+
+        app.add_event_handler("startup", start_warmup)
+
+    def add_signature_middleware(self, keypair: Any, app: FastAPI = app, **options: Any):
+        """
+        Requires signed requests on the FastAPI app and signs its responses with the miner key.
+
+        Parameters:
+        - keypair: Any - The miner key used to sign responses, e.g. a substrateinterface Keypair.
+        - app: FastAPI - The FastAPI application to protect. Defaults to the shared app.
+        - options: Any - Extra `SignatureMiddleware` options such as `window` or `backend`.
+
+        Returns:
+        - None
+        """
+        app.add_middleware(SignatureMiddleware, keypair=keypair, **options)
+
+    def add_capture_middleware(
+        self, path: str = DEFAULT_CAPTURE_PATH, sample_rate: float = 0.01, app: FastAPI = app, **options: Any
+    ):
+        """
+        Records a sample of module requests and responses to a compressed, append-only
+        file that `python -m utilities.replay` re-drives against a miner.
+
+        Parameters:
+        - path: str - The capture file. Defaults to data/instance_data/capture.jsonl.gz.
+        - sample_rate: float - Fraction of requests captured. Defaults to 0.01.
+        - app: FastAPI - The FastAPI application. Defaults to the shared app.
+        - options: Any - Extra `CaptureMiddleware` options such as `prefixes` or `max_body`.
+
+        Returns:
+        - None
+        """
+        app.add_middleware(CaptureMiddleware, path=path, sample_rate=sample_rate, **options)
+
     def _prompt_miner_config(self) -> MinerConfig:
         """
         Prompts the user to enter miner configuration details and returns a MinerConfig object.
@@ -156,21 +272,40 @@ class BaseMiner(ABC):
         miner_config: MinerConfig,
         reload: Optional[bool] = True,
         register: bool = False,
+        workers: int = 1,
+        preload: Optional[List[str]] = None,
     ):
         """
         Serves the miner with the specified miner configuration.
 
+        With more than one worker, the modules in `preload` (by default the miner's
+        `module_name`) are loaded once in a master process that then forks the workers,
+        so the loaded modules are shared between them. Reload is not available then.
+
         Parameters:
         - self: The BaseMiner object.
         - miner_config: MinerConfig - The configuration for the miner.
         - reload: Optional[bool] - Whether to reload the miner. Defaults to True.
         - register: bool - Whether to register the miner or not.
+        - workers: int - The number of worker processes. Defaults to 1.
+        - preload: Optional[List[str]] - Modules to load before forking workers.
 
         Returns:
         - None
         """
         if register:
             self.register_miner(miner_config)
+        if workers > 1:
+            if preload is None:
+                preload = [miner_config.module_name] if miner_config.module_name else []
+            PreforkServer(
+                "api:app",
+                host=miner_config.miner_host,
+                port=miner_config.miner_port,
+                workers=workers,
+                preload=preload,
+            ).run()
+            return
         uvicorn.run(
             "api:app",
             host=miner_config.miner_host,
@@ -178,7 +313,7 @@ class BaseMiner(ABC):
             reload=reload,
         )
 
-    def register_miner(self, miner_config: MinerConfig):
+    def register_miner(self, miner_config: MinerConfig) -> RegistrationResult:
         """
         Registers a new miner using the provided miner configuration.
 
@@ -187,22 +322,22 @@ class BaseMiner(ABC):
         - miner_config: MinerConfig - The configuration for the miner.
 
         Returns:
-        - None
+        - RegistrationResult: The outcome of the registration.
+        """
+        return self.register_miners([miner_config])[0]
+
+    def register_miners(self, miner_configs: List[MinerConfig]) -> List[RegistrationResult]:
+        """
+        Registers several miners at once, funding and registering them concurrently.
+
+        Parameters:
+        - self: The BaseMiner object.
+        - miner_configs: List[MinerConfig] - The configurations of the miners.
+
+        Returns:
+        - List[RegistrationResult]: One result per configuration, in order.
         """
-        command = [
-            "bash",
-            "chains/commune/register_miner.sh",
-            "register",
-            f"{miner_config.miner_name}",
-            f"{miner_config.miner_keypath}",
-            f"{miner_config.miner_host}",
-            f"{miner_config.port}",
-            f"{miner_config.netuid}",
-            f"{miner_config.stake}",
-            f"{miner_config.funding_key}",
-            f"{miner_config.modifier}",
-        ]
-        subprocess.run(command, check=True)
+        return register_miners(miner_configs)
 
     @abstractmethod
     def process(self, miner_request: MinerRequest) -> Any:
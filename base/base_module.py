@@ -1,10 +1,10 @@
 import os
 import base64
 import requests
-import subprocess
 from pydantic import BaseModel
 from pathlib import Path
-from typing import Optional
+from typing import Any, List, Optional
+from base.artifact_store import Artifact, get_artifact_store
 
 
 class ModuleConfig(BaseModel):
@@ -104,6 +104,54 @@ class BaseModule(BaseModel):
         )
         return self._check_and_prompt(module_setup_path, "Module exists.")
 
+    def open_artifact(self, relative_path: str) -> Artifact:
+        """
+        Memory-maps a file from the module directory, read-only.
+
+        The map is shared by everything in the process that opens the same file, and its
+        pages are shared with other processes through the page cache. Nothing is read
+        from disk until the data is touched.
+
+        Args:
+            relative_path (str): The file path inside the module directory, e.g. "weights/model.bin".
+
+        Returns:
+            Artifact: The mapped file, see `Artifact.buffer` and `Artifact.array`.
+        """
+        return get_artifact_store().open(
+            self.module_config.module_name, relative_path, self.module_config.module_path
+        )
+
+    def get_artifact(self, relative_path: str) -> memoryview:
+        """
+        Returns a zero-copy, read-only buffer over a file in the module directory.
+
+        Args:
+            relative_path (str): The file path inside the module directory.
+
+        Returns:
+            memoryview: The file contents, backed by a shared memory map.
+        """
+        return self.open_artifact(relative_path).buffer()
+
+    def warmup_inputs(self) -> List[Any]:
+        """
+        Returns synthetic inputs that `warmup` passes to the module's `process` method.
+        Override to exercise the code paths real requests take. Defaults to none.
+        """
+        return []
+
+    def warmup(self) -> None:
+        """
+        Prepares the module before it serves traffic: loads models, fills caches and runs
+        `process` on each of `warmup_inputs()` so lazy initialization and compilation
+        happen before the first real request. Override to add module-specific steps.
+        """
+        process = getattr(self, "process", None)
+        if callable(process):
+            for warmup_input in self.warmup_inputs():
+                process(warmup_input)
+
     def get_module(self):
         """
         A description of the entire function, its parameters, and its return types.
@@ -157,22 +205,19 @@ class BaseModule(BaseModel):
 
     def setup_module(self):
         """
-        Executes the setup module command using the `subprocess.run` function.
-
-        This function takes no parameters.
+        Sets up the module through the `ModuleSetupEngine`.
 
-        It uses the `subprocess.run` function to execute the setup module command. The command is constructed using the `module_config.module_path` and `module_config.module_name` attributes. The `module_path` is replaced with dots ('.') to match the Python module naming convention. The command is passed to `subprocess.run` with the `check=True` parameter to raise an exception if the command fails.
+        The module's `setup_<name>.py` and `install_<name>.sh` run inside a cached
+        virtualenv keyed by the module's lockfile, or with the shared interpreter if it
+        has none. Setup is skipped entirely when neither the lockfile nor the scripts
+        changed since the last successful run.
 
-        This function does not return anything.
+        Returns:
+            SetupResult: Whether setup was skipped and which environment the module uses.
         """
-        subprocess.run(
-            [
-                "python",
-                "-m",
-                f"{self.module_config.module_path.replace('/', '.')}.setup_{self.module_config.module_name}",
-            ],
-            check=True,
-        )
+        from base.setup_engine import get_setup_engine
+
+        return get_setup_engine().setup(self.module_config)
 
     def update_module(self, module_config: ModuleConfig):
         """
@@ -189,14 +234,7 @@ class BaseModule(BaseModel):
     def install_module(self, module_config: ModuleConfig):
         self.module_config = module_config
         self.get_module()
-        self.setup_module()
-        subprocess.run(
-            [
-                "bash",
-                f"{self.module_config.module_path}/install_{self.module_config.module_name}.sh",
-            ],
-            check=True,
-        )
+        return self.setup_module()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,289 @@
+import os
+import gzip
+import json
+import time
+import queue
+import base64
+import random
+import threading
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+from loguru import logger
+from pydantic import BaseModel
+
+DEFAULT_CAPTURE_PATH = "data/instance_data/capture.jsonl.gz"
+DEFAULT_PREFIXES = ("/modules/",)
+# Request headers worth keeping; signatures cannot be replayed and are dropped.
+CAPTURED_HEADERS = frozenset({"content-type", "x-key"})
+
+
+class CapturedRequest(BaseModel):
+    # Wall clock time the request arrived, and how long the miner took to answer.
+    t: float
+    duration: float
+    method: str
+    path: str
+    query: str = ""
+    headers: Dict[str, str] = {}
+    body: str = ""
+    body_encoding: str = "utf-8"
+    status: int = 0
+    response: Optional[str] = None
+    response_encoding: str = "utf-8"
+    truncated: bool = False
+    # Requests in flight in the capturing process when this one arrived, itself included.
+    in_flight: int = 1
+    pid: int = 0
+
+    @property
+    def route(self) -> str:
+        return self.path.removeprefix("/modules/")
+
+    def body_bytes(self) -> bytes:
+        return base64.b64decode(self.body) if self.body_encoding == "base64" else self.body.encode("utf-8")
+
+
+def _encode(data: bytes) -> Tuple[str, str]:
+    try:
+        return data.decode("utf-8"), "utf-8"
+    except UnicodeDecodeError:
+        return base64.b64encode(data).decode("ascii"), "base64"
+
+
+class CaptureWriter:
+    """
+    Appends captured requests to a gzip file from a background thread.
+
+    Records are JSON lines. Each flush compresses the pending lines into one gzip member
+    and appends it with a single `write` on an `O_APPEND` descriptor, so the file is a
+    valid multi-member gzip stream that several worker processes can append to at once,
+    and a crash loses at most the last unflushed batch. Requests never wait on disk:
+    when the queue is full, records are dropped and counted.
+    """
+
+    def __init__(
+        self,
+        path: Union[str, Path] = DEFAULT_CAPTURE_PATH,
+        flush_interval: float = 1.0,
+        flush_records: int = 256,
+        max_queue: int = 10000,
+    ):
+        """
+        Args:
+            path (Union[str, Path]): The capture file. Defaults to data/instance_data/capture.jsonl.gz.
+            flush_interval (float): Longest time in seconds a record waits before being written.
+            flush_records (int): Records per gzip member at most.
+            max_queue (int): Records waiting to be written before new ones are dropped.
+        """
+        self.path = Path(path)
+        self.flush_interval = flush_interval
+        self.flush_records = flush_records
+        self.max_queue = max_queue
+        self.written = 0
+        self.dropped = 0
+        self._queue: Optional[queue.Queue] = None
+        self._thread: Optional[threading.Thread] = None
+        self._pid: Optional[int] = None
+        self._lock = threading.Lock()
+
+    def _start(self) -> None:
+        # Started lazily, and again after a fork, since threads do not survive forking.
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._queue = queue.Queue(self.max_queue)
+            self._thread = threading.Thread(target=self._run, args=(self._queue,), name="capture-writer", daemon=True)
+            self._pid = os.getpid()
+            self._thread.start()
+
+    def write(self, record: Dict[str, Any]) -> None:
+        if self._pid != os.getpid():
+            self._start()
+        try:
+            self._queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+    def _run(self, records: queue.Queue) -> None:
+        descriptor = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o600)
+        try:
+            closing = False
+            while not closing:
+                try:
+                    batch = [records.get(timeout=self.flush_interval)]
+                except queue.Empty:
+                    continue
+                deadline = time.monotonic() + self.flush_interval
+                while len(batch) < self.flush_records:
+                    try:
+                        batch.append(records.get(timeout=max(0.0, deadline - time.monotonic())))
+                    except queue.Empty:
+                        break
+                if None in batch:
+                    batch = [record for record in batch if record is not None]
+                    closing = True
+                if batch:
+                    lines = "".join(json.dumps(record, separators=(",", ":")) + "\n" for record in batch)
+                    os.write(descriptor, gzip.compress(lines.encode("utf-8"), mtime=0))
+                    self.written += len(batch)
+        except OSError as e:
+            logger.error(f"Request capture to {self.path} stopped: {e}")
+        finally:
+            os.close(descriptor)
+
+    def close(self, timeout: float = 5.0) -> None:
+        """
+        Writes the queued records and stops the writer thread.
+        """
+        if self._pid != os.getpid() or self._thread is None:
+            return
+        self._queue.put(None)
+        self._thread.join(timeout)
+        self._pid = None
+
+
+class CaptureMiddleware:
+    """
+    ASGI middleware that records a sample of requests and their responses for replay.
+
+    Only paths under `prefixes` are considered. Each is captured with probability
+    `sample_rate`. Captured bodies are buffered while passing through unchanged, and
+    the record is handed to a `CaptureWriter`, so disk I/O stays off the request path.
+    Requests that are not sampled only update the in-flight count, which is recorded
+    with each captured request so replays can reproduce the concurrency.
+    """
+
+    def __init__(
+        self,
+        app: Callable,
+        path: Union[str, Path] = DEFAULT_CAPTURE_PATH,
+        sample_rate: float = 0.01,
+        prefixes: Iterable[str] = DEFAULT_PREFIXES,
+        capture_responses: bool = True,
+        max_body: int = 1 << 20,
+        writer: Optional[CaptureWriter] = None,
+    ):
+        """
+        Args:
+            app (Callable): The wrapped ASGI application.
+            path (Union[str, Path]): The capture file, when `writer` is not given.
+            sample_rate (float): Fraction of requests captured, 0 to 1. Defaults to 0.01.
+            prefixes (Iterable[str]): Path prefixes to capture. Defaults to "/modules/".
+            capture_responses (bool): Record response bodies too. Defaults to True.
+            max_body (int): Bodies longer than this many bytes are truncated and the record
+                marked `truncated`; such requests cannot be replayed. Defaults to 1 MiB.
+            writer (Optional[CaptureWriter]): Where records go. Defaults to a writer for `path`.
+        """
+        self.app = app
+        self.sample_rate = sample_rate
+        self.prefixes = tuple(prefixes)
+        self.capture_responses = capture_responses
+        self.max_body = max_body
+        self.writer = writer or CaptureWriter(path)
+        self.in_flight = 0
+
+    async def __call__(self, scope: Dict[str, Any], receive: Callable, send: Callable) -> None:
+        if scope["type"] != "http" or not scope["path"].startswith(self.prefixes):
+            await self.app(scope, receive, send)
+            return
+        self.in_flight += 1
+        try:
+            if random.random() >= self.sample_rate:
+                await self.app(scope, receive, send)
+            else:
+                await self._capture(scope, receive, send)
+        finally:
+            self.in_flight -= 1
+
+    async def _capture(self, scope: Dict[str, Any], receive: Callable, send: Callable) -> None:
+        arrived = time.time()
+        start = time.perf_counter()
+        in_flight = self.in_flight
+        request_body: List[bytes] = []
+        response_body: List[bytes] = []
+        status = [0]
+        sizes = [0, 0]
+
+        async def capturing_receive() -> Dict[str, Any]:
+            message = await receive()
+            if message["type"] == "http.request":
+                chunk = message.get("body", b"")
+                if sizes[0] < self.max_body:
+                    request_body.append(chunk)
+                sizes[0] += len(chunk)
+            return message
+
+        async def capturing_send(message: Dict[str, Any]) -> None:
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+            elif message["type"] == "http.response.body" and self.capture_responses:
+                chunk = message.get("body", b"")
+                if sizes[1] < self.max_body:
+                    response_body.append(chunk)
+                sizes[1] += len(chunk)
+            await send(message)
+
+        try:
+            await self.app(scope, capturing_receive, capturing_send)
+        finally:
+            duration = time.perf_counter() - start
+            body, body_encoding = _encode(b"".join(request_body)[: self.max_body])
+            record = {
+                "t": arrived,
+                "duration": duration,
+                "method": scope["method"],
+                "path": scope["path"],
+                "query": scope.get("query_string", b"").decode("latin-1"),
+                "headers": {
+                    name.decode("latin-1"): value.decode("latin-1")
+                    for name, value in scope["headers"]
+                    if name.decode("latin-1").lower() in CAPTURED_HEADERS
+                },
+                "body": body,
+                "body_encoding": body_encoding,
+                "status": status[0] or 500,
+                "truncated": max(sizes) > self.max_body,
+                "in_flight": in_flight,
+                "pid": os.getpid(),
+            }
+            if self.capture_responses:
+                record["response"], record["response_encoding"] = _encode(b"".join(response_body)[: self.max_body])
+            self.writer.write(record)
+
+
+def read_capture(path: Union[str, Path]) -> Iterator[CapturedRequest]:
+    """
+    Yields the captured requests in file order. A batch cut short by a crash ends the
+    iteration instead of raising.
+    """
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        try:
+            for line in f:
+                if line.strip():
+                    yield CapturedRequest.model_validate_json(line)
+        except (EOFError, gzip.BadGzipFile) as e:
+            logger.warning(f"Capture {path} ends with an incomplete batch: {e}")
+
+
+def load_capture(
+    path: Union[str, Path], prefixes: Iterable[str] = (), limit: Optional[int] = None
+) -> List[CapturedRequest]:
+    """
+    Returns the replayable requests of a capture, in arrival order.
+
+    Args:
+        path (Union[str, Path]): The capture file.
+        prefixes (Iterable[str]): Keep only paths starting with one of these. Defaults to all.
+        limit (Optional[int]): Keep only the first `limit` requests.
+    """
+    prefixes = tuple(prefixes)
+    records = [
+        record
+        for record in read_capture(path)
+        if not record.truncated and (not prefixes or record.path.startswith(prefixes))
+    ]
+    # Worker processes flush in batches, so their records interleave out of order.
+    records.sort(key=lambda record: record.t)
+    return records[:limit] if limit is not None else records
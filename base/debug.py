@@ -0,0 +1,156 @@
+import os
+import hmac
+import asyncio
+from typing import Optional
+
+from fastapi import Depends, FastAPI, HTTPException, Request
+from fastapi.responses import JSONResponse, PlainTextResponse
+
+from base.loop_monitor import LoopMonitor
+from base.memory_profiler import MemoryProfiler
+from base.profiler import (
+    DEFAULT_INTERVAL,
+    MAX_SECONDS,
+    ProfileBusy,
+    install_signal_handler,
+    merge_stacks,
+    profile_workers,
+    to_collapsed,
+    to_speedscope,
+)
+
+TOKEN_ENV = "MINER_DEBUG_TOKEN"
+
+
+def require_debug_token(request: Request) -> None:
+    """
+    Admits requests carrying the `MINER_DEBUG_TOKEN` as a bearer token or an
+    X-Debug-Token header. Without the variable set the debug routes do not exist (404).
+    """
+    token = os.getenv(TOKEN_ENV)
+    if not token:
+        raise HTTPException(status_code=404, detail="Not Found")
+    supplied = request.headers.get("X-Debug-Token")
+    authorization = request.headers.get("Authorization", "")
+    if supplied is None and authorization.startswith("Bearer "):
+        supplied = authorization[len("Bearer "):]
+    if supplied is None or not hmac.compare_digest(supplied.encode("utf-8"), token.encode("utf-8")):
+        raise HTTPException(status_code=401, detail="Invalid debug token")
+
+
+def add_debug_routes(app: FastAPI) -> None:
+    """
+    Adds the token protected `/debug/` routes to an app:
+
+    - `GET /debug/profile?seconds=10&interval=0.005&format=collapsed|speedscope&module=NAME&workers=true&idle=false`
+      samples every thread of every worker for `seconds` and returns collapsed stacks or
+      a speedscope file, optionally only the stacks through `module`.
+    - `GET /debug/loop?limit=20` returns the event-loop lag and blocking summaries, the
+      top blocking call sites and recent blocking stacks, when `add_loop_monitor` runs.
+    - `GET /debug/metrics` returns the same as Prometheus metrics.
+    - `GET /debug/memory` returns the memory profiling mode, RSS/PSS samples of this
+      worker, the memory of every worker and per-module accounting, when
+      `add_memory_profiler` runs. `POST /debug/memory/mode?mode=off|rss|sampled|full`
+      switches the overhead level.
+    - `POST /debug/memory/snapshot` takes a tracemalloc snapshot and returns its id, and
+      `GET /debug/memory/diff?base=ID&current=ID&group_by=lineno&limit=20` compares two
+      snapshots, or one with the present.
+    - `GET /debug/memory/leaks?min_growth=65536` returns the allocation sites that kept
+      growing across the periodic summaries, and the RSS trend.
+
+    Also installs the SIGUSR2 handler that lets one worker profile the others, which
+    every worker inherits when this runs before forking.
+    """
+    if getattr(app.state, "debug_routes", False):
+        return
+    app.state.debug_routes = True
+    install_signal_handler()
+
+    @app.get("/debug/profile", dependencies=[Depends(require_debug_token)])
+    async def profile(
+        seconds: float = 10.0,
+        interval: float = DEFAULT_INTERVAL,
+        format: str = "collapsed",
+        module: Optional[str] = None,
+        workers: bool = True,
+        idle: bool = False,
+    ):
+        if format not in ("collapsed", "speedscope"):
+            raise HTTPException(status_code=422, detail="format must be collapsed or speedscope")
+        if not 0 < seconds <= MAX_SECONDS or not 0.0005 <= interval <= 1.0:
+            raise HTTPException(status_code=422, detail=f"seconds must be in (0, {MAX_SECONDS:g}] and interval in [0.0005, 1]")
+        try:
+            profiles = await profile_workers(seconds, interval, workers)
+        except ProfileBusy as e:
+            raise HTTPException(status_code=409, detail=str(e))
+        headers = {"X-Profile-Processes": ",".join(str(profile.pid) for profile in profiles)}
+        if format == "speedscope":
+            return JSONResponse(to_speedscope(profiles, module, idle), headers=headers)
+        return PlainTextResponse(to_collapsed(merge_stacks(profiles, module, idle)), headers=headers)
+
+    @app.get("/debug/loop", dependencies=[Depends(require_debug_token)])
+    async def loop(request: Request, limit: int = 20):
+        return _loop_monitor(request).report(limit)
+
+    @app.get("/debug/metrics", dependencies=[Depends(require_debug_token)])
+    async def metrics(request: Request):
+        return PlainTextResponse(_loop_monitor(request).prometheus(), media_type="text/plain; version=0.0.4")
+
+    @app.get("/debug/memory", dependencies=[Depends(require_debug_token)])
+    async def memory(request: Request):
+        return await asyncio.to_thread(_memory_profiler(request).report)
+
+    @app.post("/debug/memory/mode", dependencies=[Depends(require_debug_token)])
+    async def memory_mode(request: Request, mode: str, sample_rate: Optional[float] = None):
+        profiler = _memory_profiler(request)
+        if sample_rate is not None:
+            profiler.sample_rate = sample_rate
+        try:
+            profiler.set_mode(mode)
+        except ValueError as e:
+            raise HTTPException(status_code=422, detail=str(e))
+        return {"mode": profiler.mode, "sample_rate": profiler.sample_rate}
+
+    @app.post("/debug/memory/snapshot", dependencies=[Depends(require_debug_token)])
+    async def memory_snapshot(request: Request):
+        profiler = _memory_profiler(request)
+        try:
+            return {"snapshot": await asyncio.to_thread(profiler.snapshot), "snapshots": list(profiler.snapshots)}
+        except RuntimeError as e:
+            raise HTTPException(status_code=409, detail=str(e))
+
+    @app.get("/debug/memory/diff", dependencies=[Depends(require_debug_token)])
+    async def memory_diff(
+        request: Request, base: str, current: Optional[str] = None, group_by: str = "lineno", limit: int = 20
+    ):
+        if group_by not in ("lineno", "filename", "traceback"):
+            raise HTTPException(status_code=422, detail="group_by must be lineno, filename or traceback")
+        try:
+            return await asyncio.to_thread(_memory_profiler(request).diff, base, current, group_by, limit)
+        except KeyError as e:
+            raise HTTPException(status_code=404, detail=e.args[0])
+        except RuntimeError as e:
+            raise HTTPException(status_code=409, detail=str(e))
+
+    @app.get("/debug/memory/leaks", dependencies=[Depends(require_debug_token)])
+    async def memory_leaks(request: Request, min_growth: int = 64 * 1024, limit: int = 20):
+        profiler = _memory_profiler(request)
+        return {
+            "suspects": [suspect.model_dump() for suspect in profiler.leak_suspects(min_growth, limit)],
+            "summaries": len(profiler.summaries),
+            "rss_trend": profiler.rss_trend(),
+        }
+
+
+def _memory_profiler(request: Request) -> MemoryProfiler:
+    profiler = getattr(request.app.state, "memory_profiler", None)
+    if profiler is None:
+        raise HTTPException(status_code=404, detail="The memory profiler is not enabled")
+    return profiler
+
+
+def _loop_monitor(request: Request) -> LoopMonitor:
+    monitor = getattr(request.app.state, "loop_monitor", None)
+    if monitor is None:
+        raise HTTPException(status_code=404, detail="The loop monitor is not enabled (MINER_LOOP_MONITOR=true)")
+    return monitor
@@ -0,0 +1,331 @@
+import ast
+import sys
+import json
+import inspect
+import hashlib
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+
+from fastapi import FastAPI, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel, ValidationError
+
+DISPATCH_FILE = "dispatch.json"
+# Methods every miner inherits from BaseMiner that are not request handlers.
+MINER_METHODS = {
+    "add_route",
+    "add_dispatch_routes",
+    "add_signature_middleware",
+    "add_capture_middleware",
+    "add_health_routes",
+    "serve_miner",
+    "register_miner",
+    "register_miners",
+    "warmup",
+    "warmup_requests",
+}
+SKIPPED_DECORATORS = {"staticmethod", "classmethod", "property", "abstractmethod"}
+# JSON types a keyword argument annotated with the key is checked against.
+SIMPLE_TYPES = {"int": (int,), "float": (int, float), "str": (str,), "bool": (bool,), "list": (list,), "dict": (dict,)}
+
+
+class DispatchError(Exception):
+    """Exception raised when a request does not match the method it is dispatched to."""
+
+    def __init__(self, message: str, status_code: int = 422):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+class ParameterSpec(BaseModel):
+    name: str
+    annotation: Optional[str] = None
+    required: bool = True
+
+
+class MethodSpec(BaseModel):
+    name: str
+    is_async: bool = False
+    params: List[ParameterSpec] = []
+    var_keyword: bool = False
+    # "model": the whole JSON body is validated into one model argument.
+    # "kwargs": the JSON body is an object of keyword arguments.
+    body: str = "kwargs"
+    line: int = 0
+
+
+class DispatchTable(BaseModel):
+    module_name: str
+    target: Optional[str] = None
+    source_hash: str
+    methods: Dict[str, MethodSpec] = {}
+
+    def save(self, path: Union[str, Path]) -> None:
+        Path(path).write_text(self.model_dump_json(indent=4), encoding="utf-8")
+
+    @classmethod
+    def load(cls, path: Union[str, Path]) -> "DispatchTable":
+        return cls.model_validate_json(Path(path).read_text(encoding="utf-8"))
+
+
+def _annotation(node: Optional[ast.expr]) -> Optional[str]:
+    return ast.unparse(node) if node is not None else None
+
+
+def _method_spec(node: Union[ast.FunctionDef, ast.AsyncFunctionDef], is_method: bool) -> MethodSpec:
+    arguments = node.args
+    positional = arguments.posonlyargs + arguments.args
+    if is_method:
+        positional = positional[1:]
+    first_default = len(positional) - len(arguments.defaults)
+    params = [
+        ParameterSpec(name=arg.arg, annotation=_annotation(arg.annotation), required=index < first_default)
+        for index, arg in enumerate(positional)
+    ]
+    params += [
+        ParameterSpec(name=arg.arg, annotation=_annotation(arg.annotation), required=default is None)
+        for arg, default in zip(arguments.kwonlyargs, arguments.kw_defaults)
+    ]
+    spec = MethodSpec(
+        name=node.name,
+        is_async=isinstance(node, ast.AsyncFunctionDef),
+        params=params,
+        var_keyword=arguments.kwarg is not None,
+        line=node.lineno,
+    )
+    single = params[0] if len(params) == 1 else None
+    # `process` takes the whole MinerRequest body by the BaseMiner contract; other
+    # single-argument methods may, if their argument's class resolves to a model at bind time.
+    annotation = (single.annotation or "") if single is not None else ""
+    if single is not None and (node.name == "process" or (annotation[:1].isupper() and "[" not in annotation)):
+        spec.body = "model"
+    return spec
+
+
+def analyze_source(code: str, module_name: str, target: Optional[str] = None) -> DispatchTable:
+    """
+    Finds the methods a module exposes, and their arguments, by parsing its source.
+
+    The exposed methods are the public methods of `target`, by default the first
+    class deriving from a `...Miner` or `...Module` base, without the lifecycle
+    methods inherited from BaseMiner. Modules without such a class expose their
+    public module-level functions.
+
+    Args:
+        code (str): The module source.
+        module_name (str): The module name routes are served under.
+        target (Optional[str]): The class to expose. Defaults to the first miner or module class.
+
+    Returns:
+        DispatchTable: The methods and their parameters, with a hash of the source.
+    """
+    tree = ast.parse(code)
+    function_types = (ast.FunctionDef, ast.AsyncFunctionDef)
+    classes = [node for node in tree.body if isinstance(node, ast.ClassDef)]
+    if target is None:
+        for node in classes:
+            bases = [ast.unparse(base).split(".")[-1] for base in node.bases]
+            if any(base.endswith(("Miner", "Module")) for base in bases):
+                target = node.name
+                break
+    if target is not None:
+        body = next((node.body for node in classes if node.name == target), None)
+        if body is None:
+            raise LookupError(f"Module {module_name} defines no class {target}")
+        is_method, excluded = True, MINER_METHODS
+    else:
+        body, is_method, excluded = tree.body, False, set()
+
+    methods = {
+        node.name: _method_spec(node, is_method)
+        for node in body
+        if isinstance(node, function_types)
+        and not node.name.startswith("_")
+        and node.name not in excluded
+        and not {ast.unparse(decorator) for decorator in node.decorator_list} & SKIPPED_DECORATORS
+    }
+    return DispatchTable(
+        module_name=module_name,
+        target=target,
+        source_hash=hashlib.sha256(code.encode("utf-8")).hexdigest(),
+        methods=methods,
+    )
+
+
+def find_miner_class(code: str) -> Optional[str]:
+    """
+    Returns the name of the first class in a module source deriving from a `...Miner`
+    base, the class `BaseMiner.add_dispatch_routes` loads the table for, or None.
+    """
+    for node in ast.parse(code).body:
+        if isinstance(node, ast.ClassDef):
+            if any(ast.unparse(base).split(".")[-1].endswith("Miner") for base in node.bases):
+                return node.name
+    return None
+
+
+def write_dispatch_table(
+    source_path: Union[str, Path],
+    module_name: str,
+    target: Optional[str] = None,
+    output: Optional[Union[str, Path]] = None,
+) -> DispatchTable:
+    """
+    Analyzes a module source file and writes its dispatch table, by default to
+    `dispatch.json` next to it. Run at install time.
+    """
+    source_path = Path(source_path)
+    table = analyze_source(source_path.read_text(encoding="utf-8"), module_name, target)
+    table.save(output or source_path.parent / DISPATCH_FILE)
+    return table
+
+
+def load_dispatch_table(source_path: Union[str, Path], module_name: str, target: Optional[str] = None) -> DispatchTable:
+    """
+    Returns the dispatch table written next to a module at install time, or analyzes
+    the source now if there is none or the source changed since.
+    """
+    source_path = Path(source_path)
+    code = source_path.read_text(encoding="utf-8")
+    table_path = source_path.parent / DISPATCH_FILE
+    if table_path.is_file():
+        table = DispatchTable.load(table_path)
+        fresh = table.source_hash == hashlib.sha256(code.encode("utf-8")).hexdigest()
+        if fresh and table.module_name == module_name and (target is None or table.target == target):
+            return table
+    return analyze_source(code, module_name, target)
+
+
+def _resolve_model(spec: MethodSpec, namespace: Dict[str, Any]) -> Any:
+    """
+    Returns the model class a "model" body method takes, or None if it takes keyword arguments.
+    """
+    annotation = spec.params[0].annotation
+    if annotation is not None:
+        value: Any = namespace
+        for part in annotation.split("."):
+            value = value.get(part) if isinstance(value, dict) else getattr(value, part, None)
+        if inspect.isclass(value) and issubclass(value, BaseModel):
+            return value
+    if spec.name == "process":
+        from base.base_miner import MinerRequest
+
+        return MinerRequest
+    return None
+
+
+def _kwargs_validator(spec: MethodSpec) -> Callable[[Any], Tuple[Tuple[Any, ...], Dict[str, Any]]]:
+    required = frozenset(param.name for param in spec.params if param.required)
+    allowed = frozenset(param.name for param in spec.params)
+    checks = tuple(
+        (param.name, SIMPLE_TYPES[param.annotation], param.annotation)
+        for param in spec.params
+        if param.annotation in SIMPLE_TYPES
+    )
+    var_keyword = spec.var_keyword
+
+    def validate(body: Any) -> Tuple[Tuple[Any, ...], Dict[str, Any]]:
+        if body is None:
+            body = {}
+        if not isinstance(body, dict):
+            raise DispatchError(f"{spec.name} expects a JSON object of arguments")
+        missing = required.difference(body)
+        if missing:
+            raise DispatchError(f"{spec.name} is missing arguments: {', '.join(sorted(missing))}")
+        if not var_keyword:
+            unknown = set(body).difference(allowed)
+            if unknown:
+                raise DispatchError(f"{spec.name} got unexpected arguments: {', '.join(sorted(unknown))}")
+        for name, types, annotation in checks:
+            value = body.get(name)
+            if name in body and (not isinstance(value, types) or (annotation != "bool" and isinstance(value, bool))):
+                raise DispatchError(f"{spec.name} argument {name} must be {annotation}")
+        return (), body
+
+    return validate
+
+
+def _model_validator(spec: MethodSpec, model: Any) -> Callable[[Any], Tuple[Tuple[Any, ...], Dict[str, Any]]]:
+    model_validate = model.model_validate
+
+    def validate(body: Any) -> Tuple[Tuple[Any, ...], Dict[str, Any]]:
+        try:
+            return (model_validate(body if body is not None else {}),), {}
+        except ValidationError as e:
+            raise DispatchError(f"{spec.name}: {e.errors(include_url=False)}") from None
+
+    return validate
+
+
+class Endpoint:
+    """
+    A bound callable with its pre-built validator.
+    """
+
+    __slots__ = ("function", "validate", "is_async")
+
+    def __init__(self, function: Callable[..., Any], validate: Callable[[Any], Any], is_async: bool):
+        self.function = function
+        self.validate = validate
+        self.is_async = is_async
+
+
+def bind(table: DispatchTable, target: Any) -> Dict[str, Endpoint]:
+    """
+    Binds a dispatch table to a miner, module instance or module object.
+
+    All lookups happen here, once: bound methods are fetched and validators are
+    built, so dispatching a request is a dict lookup, a validator call and a call.
+
+    Raises:
+        LookupError: If the target lacks a method listed in the table.
+    """
+    module = target if inspect.ismodule(target) else sys.modules.get(type(target).__module__)
+    namespace = vars(module) if module is not None else {}
+    endpoints = {}
+    for name, spec in table.methods.items():
+        function = getattr(target, name, None)
+        if not callable(function):
+            raise LookupError(f"{table.module_name} has no method {name}")
+        model = _resolve_model(spec, namespace) if spec.body == "model" else None
+        validate = _model_validator(spec, model) if model is not None else _kwargs_validator(spec)
+        endpoints[name] = Endpoint(function, validate, spec.is_async or inspect.iscoroutinefunction(function))
+    return endpoints
+
+
+def add_dispatch_routes(app: FastAPI, module_name: str, endpoints: Dict[str, Endpoint]) -> None:
+    """
+    Serves `POST /modules/{module_name}/{method}` for every endpoint of a module.
+
+    All modules on an app share one route, which looks the module and method up in
+    `app.state.dispatch`. Requests to unknown modules or methods get 404, and requests
+    the validator rejects get 422. Synchronous methods run in the threadpool.
+    """
+    if hasattr(app.state, "dispatch"):
+        app.state.dispatch[module_name] = endpoints
+        return
+    app.state.dispatch = {module_name: endpoints}
+    tables = app.state.dispatch
+
+    @app.post("/modules/{module_name}/{method}")
+    async def dispatch(module_name: str, method: str, request: Request):
+        endpoint = tables.get(module_name, {}).get(method)
+        if endpoint is None:
+            return JSONResponse({"detail": f"Unknown method {module_name}/{method}"}, status_code=404)
+        raw = await request.body()
+        try:
+            body = json.loads(raw) if raw else None
+            args, kwargs = endpoint.validate(body)
+        except ValueError:
+            return JSONResponse({"detail": "Request body is not valid JSON"}, status_code=400)
+        except DispatchError as e:
+            return JSONResponse({"detail": str(e)}, status_code=e.status_code)
+        if endpoint.is_async:
+            return await endpoint.function(*args, **kwargs)
+        # Sync methods run in the threadpool so a slow one does not stall the loop,
+        # which the supervisor shares between all miners.
+        result = await run_in_threadpool(endpoint.function, *args, **kwargs)
+        if inspect.isawaitable(result):
+            result = await result
+        return result
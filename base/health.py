@@ -0,0 +1,161 @@
+import time
+import asyncio
+import inspect
+import threading
+from functools import lru_cache
+from typing import Any, Callable, Dict, Iterable, Optional
+
+from fastapi import FastAPI
+from fastapi.responses import JSONResponse
+from loguru import logger
+from pydantic import BaseModel
+
+PENDING, RUNNING, READY, FAILED = "pending", "running", "ready", "failed"
+
+
+class WarmupStatus(BaseModel):
+    name: str
+    state: str = PENDING
+    duration: Optional[float] = None
+    error: Optional[str] = None
+
+
+class Readiness:
+    """
+    Tracks the warm-up of every component (module or miner) served by the process.
+
+    A component is ready once its warm-up has finished. A process, or an app serving a
+    subset of components, is ready when all its components are. A failed warm-up keeps
+    the component out of rotation until it is run again successfully.
+    """
+
+    def __init__(self):
+        self._components: Dict[str, WarmupStatus] = {}
+        self._lock = threading.Lock()
+
+    def register(self, name: str) -> WarmupStatus:
+        """
+        Adds a component that is not ready until its warm-up runs.
+        """
+        with self._lock:
+            return self._components.setdefault(name, WarmupStatus(name=name))
+
+    def _start(self, name: str) -> WarmupStatus:
+        status = self.register(name)
+        status.state, status.duration, status.error = RUNNING, None, None
+        return status
+
+    def _finish(self, status: WarmupStatus, started: float, error: Optional[BaseException]) -> None:
+        status.duration = time.perf_counter() - started
+        if error is None:
+            status.state = READY
+            logger.info(f"Warmed up {status.name} in {status.duration:.3f}s")
+        else:
+            status.state, status.error = FAILED, repr(error)
+            logger.error(f"Warm-up of {status.name} failed after {status.duration:.3f}s: {error!r}")
+
+    def run(self, name: str, warmup: Optional[Callable[[], Any]] = None) -> WarmupStatus:
+        """
+        Runs a warm-up in the calling thread and records its outcome and duration.
+        Awaitable results are run to completion on a new event loop.
+
+        Args:
+            name (str): The component name.
+            warmup (Optional[Callable[[], Any]]): The warm-up. Without one the component
+                is marked ready immediately.
+
+        Returns:
+            WarmupStatus: The component's status. Errors are recorded, not raised.
+        """
+        status = self._start(name)
+        started, error = time.perf_counter(), None
+        try:
+            result = warmup() if warmup is not None else None
+            if inspect.isawaitable(result):
+                asyncio.run(_awaited(result))
+        except Exception as e:
+            error = e
+        self._finish(status, started, error)
+        return status
+
+    async def arun(self, name: str, warmup: Optional[Callable[[], Any]] = None) -> WarmupStatus:
+        """
+        Async variant of `run`. Coroutine functions are awaited on the running loop and
+        other warm-ups run in a thread, so the server keeps answering liveness probes.
+        """
+        status = self._start(name)
+        started, error = time.perf_counter(), None
+        try:
+            if warmup is not None:
+                result = warmup() if inspect.iscoroutinefunction(warmup) else await asyncio.to_thread(warmup)
+                if inspect.isawaitable(result):
+                    await result
+        except Exception as e:
+            error = e
+        self._finish(status, started, error)
+        return status
+
+    def status(self, names: Optional[Iterable[str]] = None) -> Dict[str, WarmupStatus]:
+        with self._lock:
+            if names is None:
+                return dict(self._components)
+            return {name: self._components.get(name, WarmupStatus(name=name)) for name in names}
+
+    def is_ready(self, names: Optional[Iterable[str]] = None) -> bool:
+        return all(status.state == READY for status in self.status(names).values())
+
+
+async def _awaited(awaitable: Any) -> Any:
+    return await awaitable
+
+
+@lru_cache(maxsize=None)
+def get_readiness() -> Readiness:
+    """
+    Returns the process-wide readiness tracker. Forked workers inherit the state of
+    warm-ups run in the master before forking.
+    """
+    return Readiness()
+
+
+def add_health_routes(
+    app: FastAPI, names: Optional[Iterable[str]] = None, readiness: Optional[Readiness] = None
+) -> None:
+    """
+    Adds `GET /health/live` and `GET /health/ready` to an app.
+
+    `/health/live` answers 200 whenever the server can handle requests. `/health/ready`
+    answers 200 once every component of the app has warmed up and 503 before that, with
+    the state and warm-up duration of each component in both cases.
+
+    Calling it again on the same app adds components instead of routes.
+
+    Args:
+        app (FastAPI): The app to add the routes to.
+        names (Optional[Iterable[str]]): The components the app depends on. Defaults to
+            every registered component.
+        readiness (Optional[Readiness]): The tracker. Defaults to `get_readiness()`.
+    """
+    if hasattr(app.state, "health_components"):
+        if names is None or app.state.health_components is None:
+            app.state.health_components = None
+        else:
+            app.state.health_components.update(names)
+        return
+    app.state.health_components = None if names is None else set(names)
+    readiness = readiness or get_readiness()
+
+    @app.get("/health/live")
+    async def live():
+        return {"status": "alive"}
+
+    @app.get("/health/ready")
+    async def ready():
+        components = app.state.health_components
+        components = None if components is None else sorted(components)
+        status, is_ready = readiness.status(components), readiness.is_ready(components)
+        body = {
+            "status": "ready" if is_ready else "warming",
+            "components": {name: component.model_dump(exclude={"name"}) for name, component in status.items()},
+        }
+        return JSONResponse(body, status_code=200 if is_ready else 503)
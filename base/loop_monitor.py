@@ -0,0 +1,342 @@
+import os
+import sys
+import time
+import asyncio
+import sysconfig
+import threading
+from collections import deque
+from functools import lru_cache
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
+from fastapi import FastAPI
+from loguru import logger
+from pydantic import BaseModel
+
+from utilities.histogram import Histogram
+
+DEFAULT_INTERVAL = 0.05
+DEFAULT_THRESHOLD = 0.1
+# Prometheus histogram buckets, in seconds.
+LAG_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+UNATTRIBUTED = "<loop>"
+# Frames under these directories are the standard library or installed packages, not the caller.
+LIBRARY_PATHS = tuple(
+    {os.path.realpath(path) + os.sep for path in (sysconfig.get_paths()["stdlib"], sysconfig.get_paths()["purelib"])}
+)
+
+
+class BlockingEvent(BaseModel):
+    # Wall clock time the loop stopped answering, and for how long.
+    started: float
+    duration: Optional[float] = None
+    route: str
+    module: Optional[str] = None
+    # The innermost application frame, "module:function:line", or the innermost frame.
+    call_site: str
+    # Innermost frame last, as "module:function:line".
+    stack: List[str] = []
+
+
+class CallSite(BaseModel):
+    route: str
+    module: Optional[str] = None
+    call_site: str
+    count: int = 0
+    seconds: float = 0.0
+
+
+def _frame_label(frame: Any) -> str:
+    code = frame.f_code
+    return f"{frame.f_globals.get('__name__', '?')}:{getattr(code, 'co_qualname', code.co_name)}:{frame.f_lineno}"
+
+
+def _is_library(frame: Any) -> bool:
+    return os.path.realpath(frame.f_code.co_filename).startswith(LIBRARY_PATHS)
+
+
+def module_of(path: str) -> Optional[str]:
+    """
+    Returns the module name of a `/modules/{module_name}/...` path.
+    """
+    parts = path.split("/")
+    return parts[2] if len(parts) > 2 and parts[1] == "modules" and parts[2] else None
+
+
+class LoopMonitor:
+    """
+    Measures event-loop lag continuously and catches the code that blocks the loop.
+
+    A heartbeat task sleeps `interval` seconds at a time on the loop and records how late
+    it wakes up in a lag histogram. A watchdog thread checks the heartbeat; when it is
+    more than `threshold` seconds overdue, the loop is blocked, and the watchdog captures
+    the loop thread's stack and the request task running on the loop. Each block is
+    attributed to that task's route and module and to its call site, the innermost frame
+    outside the standard library and installed packages. So a blocking `requests.get`
+    is charged to the line of the module that called it.
+
+    Tasks are mapped to routes by `LoopMonitorMiddleware`. Blocks in tasks it did not
+    see are attributed to "<loop>".
+    """
+
+    def __init__(
+        self,
+        interval: float = DEFAULT_INTERVAL,
+        threshold: float = DEFAULT_THRESHOLD,
+        max_events: int = 100,
+    ):
+        """
+        Args:
+            interval (float): Seconds between heartbeats. Defaults to 0.05.
+            threshold (float): Lag in seconds that counts as blocking. Defaults to 0.1.
+            max_events (int): Recent blocking events kept with their stacks. Defaults to 100.
+        """
+        self.interval = interval
+        self.threshold = threshold
+        self.lag = Histogram()
+        self.blocked: Dict[str, Histogram] = {}
+        self.call_sites: Dict[Tuple[str, str], CallSite] = {}
+        self.events: Deque[BlockingEvent] = deque(maxlen=max_events)
+        self.tasks: Dict[asyncio.Task, Tuple[str, Optional[str]]] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_thread: Optional[int] = None
+        self._heartbeat: Optional[asyncio.Task] = None
+        self._watchdog: Optional[threading.Thread] = None
+        self._stopping = threading.Event()
+        self._lock = threading.Lock()
+        self._beat = 0.0
+        self._stall: Optional[Tuple[float, BlockingEvent]] = None
+
+    @property
+    def running(self) -> bool:
+        return self._heartbeat is not None and not self._heartbeat.done()
+
+    def start(self) -> None:
+        """
+        Starts monitoring the running loop. Does nothing if already started on it.
+        """
+        loop = asyncio.get_running_loop()
+        if self.running and self._loop is loop:
+            return
+        self._loop, self._loop_thread = loop, threading.get_ident()
+        self._beat = time.perf_counter()
+        self._stopping.clear()
+        self._heartbeat = loop.create_task(self._run_heartbeat(), name="loop-monitor")
+        self._watchdog = threading.Thread(target=self._run_watchdog, name="loop-watchdog", daemon=True)
+        self._watchdog.start()
+
+    async def stop(self) -> None:
+        self._stopping.set()
+        if self._heartbeat is not None:
+            self._heartbeat.cancel()
+            try:
+                await self._heartbeat
+            except asyncio.CancelledError:
+                pass
+        if self._watchdog is not None:
+            await asyncio.to_thread(self._watchdog.join)
+
+    async def _run_heartbeat(self) -> None:
+        expected = time.perf_counter() + self.interval
+        while True:
+            await asyncio.sleep(self.interval)
+            now = time.perf_counter()
+            lag = max(0.0, now - expected)
+            self.lag.record(lag * 1e6)
+            with self._lock:
+                self._beat = now
+                stall, self._stall = self._stall, None
+            if stall is not None:
+                self._finish(stall[1], now - stall[0])
+            elif lag > self.threshold:
+                # Blocked and resumed between two watchdog checks: no stack, only the time.
+                event = self._event(None, time.time() - lag)
+                self._finish(event, lag)
+            expected = now + self.interval
+
+    def _run_watchdog(self) -> None:
+        period = max(self.threshold / 4, 0.001)
+        while not self._stopping.wait(period):
+            now = time.perf_counter()
+            with self._lock:
+                overdue = now - self._beat - self.interval
+                if self._stall is not None or overdue <= self.threshold:
+                    continue
+                frame = sys._current_frames().get(self._loop_thread)
+                self._stall = (self._beat + self.interval, self._event(frame, time.time() - overdue))
+
+    def _event(self, frame: Any, started: float) -> BlockingEvent:
+        task = asyncio.current_task(self._loop) if self._loop is not None else None
+        route, module = self.tasks.get(task, (UNATTRIBUTED, None))
+        stack, call_site = [], None
+        while frame is not None:
+            stack.append(_frame_label(frame))
+            if call_site is None and not _is_library(frame):
+                call_site = stack[-1]
+            frame = frame.f_back
+        stack.reverse()
+        return BlockingEvent(
+            started=started,
+            route=route,
+            module=module,
+            call_site=call_site or (stack[-1] if stack else "<unknown>"),
+            stack=stack,
+        )
+
+    def _finish(self, event: BlockingEvent, duration: float) -> None:
+        event.duration = duration
+        with self._lock:
+            self.blocked.setdefault(event.module or UNATTRIBUTED, Histogram()).record(duration * 1e6)
+            site = self.call_sites.setdefault(
+                (event.route, event.call_site), CallSite(route=event.route, module=event.module, call_site=event.call_site)
+            )
+            site.count += 1
+            site.seconds += duration
+            self.events.append(event)
+        logger.warning(f"Event loop blocked for {duration * 1000:.0f} ms in {event.route} at {event.call_site}")
+
+    def top_call_sites(self, limit: int = 20) -> List[CallSite]:
+        with self._lock:
+            sites = list(self.call_sites.values())
+        return sorted(sites, key=lambda site: site.seconds, reverse=True)[:limit]
+
+    def report(self, limit: int = 20) -> Dict[str, Any]:
+        """
+        Returns the lag and blocking summaries in milliseconds, the top call sites by
+        blocked time and the recent events with their stacks.
+        """
+        with self._lock:
+            blocked = {module: _milliseconds(histogram) for module, histogram in sorted(self.blocked.items())}
+            events = [event.model_dump() for event in self.events]
+        return {
+            "interval": self.interval,
+            "threshold": self.threshold,
+            "lag_ms": _milliseconds(self.lag),
+            "blocked_ms": blocked,
+            "top_call_sites": [site.model_dump() for site in self.top_call_sites(limit)],
+            "events": events,
+        }
+
+    def prometheus(self) -> str:
+        """
+        Returns the metrics in the Prometheus text exposition format.
+        """
+        lines = [
+            "# HELP miner_event_loop_lag_seconds How late the event loop heartbeat ran.",
+            "# TYPE miner_event_loop_lag_seconds histogram",
+        ]
+        lines += _prometheus_histogram("miner_event_loop_lag_seconds", self.lag, "")
+        lines += [
+            "# HELP miner_event_loop_blocked_seconds Duration of event loop blocks by module.",
+            "# TYPE miner_event_loop_blocked_seconds histogram",
+        ]
+        with self._lock:
+            for module, histogram in sorted(self.blocked.items()):
+                lines += _prometheus_histogram("miner_event_loop_blocked_seconds", histogram, f'module="{_escape(module)}"')
+        lines += [
+            "# HELP miner_event_loop_blocking_calls_total Event loop blocks by route and call site.",
+            "# TYPE miner_event_loop_blocking_calls_total counter",
+        ]
+        sites = self.top_call_sites(limit=len(self.call_sites))
+        for site in sites:
+            lines.append(f"miner_event_loop_blocking_calls_total{{{_site_labels(site)}}} {site.count}")
+        lines += [
+            "# HELP miner_event_loop_blocking_seconds_total Seconds the event loop was blocked by route and call site.",
+            "# TYPE miner_event_loop_blocking_seconds_total counter",
+        ]
+        for site in sites:
+            lines.append(f"miner_event_loop_blocking_seconds_total{{{_site_labels(site)}}} {site.seconds:.6f}")
+        return "\n".join(lines) + "\n"
+
+
+def _milliseconds(histogram: Histogram) -> Dict[str, float]:
+    summary = histogram.summary()
+    return {name: value if name == "count" else value / 1000 for name, value in summary.items()}
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _site_labels(site: CallSite) -> str:
+    return f'route="{_escape(site.route)}",module="{_escape(site.module or "")}",call_site="{_escape(site.call_site)}"'
+
+
+def _prometheus_histogram(name: str, histogram: Histogram, labels: str) -> List[str]:
+    separator = "," if labels else ""
+    lines = [
+        f'{name}_bucket{{{labels}{separator}le="{bound:g}"}} {histogram.count_at_or_below(bound * 1e6)}'
+        for bound in LAG_BUCKETS
+    ]
+    lines.append(f'{name}_bucket{{{labels}{separator}le="+Inf"}} {histogram.total_count}')
+    suffix = f"{{{labels}}}" if labels else ""
+    lines.append(f"{name}_sum{suffix} {histogram.mean * histogram.total_count / 1e6:.6f}")
+    lines.append(f"{name}_count{suffix} {histogram.total_count}")
+    return lines
+
+
+class LoopMonitorMiddleware:
+    """
+    ASGI middleware that tells the monitor which route each request task is serving.
+    """
+
+    def __init__(self, app: Callable, monitor: Optional[LoopMonitor] = None):
+        self.app = app
+        self.monitor = monitor or get_loop_monitor()
+
+    async def __call__(self, scope: Dict[str, Any], receive: Callable, send: Callable) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        task = asyncio.current_task()
+        self.monitor.tasks[task] = (scope["path"], module_of(scope["path"]))
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.monitor.tasks.pop(task, None)
+
+
+@lru_cache(maxsize=None)
+def get_loop_monitor() -> LoopMonitor:
+    """
+    Returns the process-wide loop monitor, configured by `MINER_LOOP_INTERVAL` and
+    `MINER_LOOP_BLOCK_THRESHOLD` (seconds).
+    """
+    return LoopMonitor(
+        interval=float(os.getenv("MINER_LOOP_INTERVAL", DEFAULT_INTERVAL)),
+        threshold=float(os.getenv("MINER_LOOP_BLOCK_THRESHOLD", DEFAULT_THRESHOLD)),
+    )
+
+
+def loop_monitor_enabled() -> bool:
+    return os.getenv("MINER_LOOP_MONITOR", "false").lower() == "true"
+
+
+def add_loop_monitor(app: FastAPI, monitor: Optional[LoopMonitor] = None) -> LoopMonitor:
+    """
+    Monitors the loop serving an app from startup to shutdown and attributes blocking to
+    the app's routes. The monitor is stored as `app.state.loop_monitor` for the
+    `/debug/loop` and `/debug/metrics` routes.
+
+    Args:
+        app (FastAPI): The app.
+        monitor (Optional[LoopMonitor]): The monitor. Defaults to `get_loop_monitor()`,
+            which apps served by the same process share.
+
+    Returns:
+        LoopMonitor: The monitor.
+    """
+    monitor = monitor or get_loop_monitor()
+    if getattr(app.state, "loop_monitor", None) is monitor:
+        return monitor
+    app.state.loop_monitor = monitor
+    app.add_middleware(LoopMonitorMiddleware, monitor=monitor)
+
+    async def start_monitor():
+        monitor.start()
+
+    async def stop_monitor():
+        await monitor.stop()
+
+    app.add_event_handler("startup", start_monitor)
+    app.add_event_handler("shutdown", stop_monitor)
+    return monitor
@@ -0,0 +1,410 @@
+import os
+import time
+import random
+import threading
+import tracemalloc
+from collections import OrderedDict, deque
+from functools import lru_cache
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
+import numpy as np
+from fastapi import FastAPI
+from loguru import logger
+from pydantic import BaseModel
+
+from base.loop_monitor import module_of
+from base.prefork import memory_report, memory_usage
+from base.profiler import worker_pids
+
+OFF, RSS, SAMPLED, FULL = "off", "rss", "sampled", "full"
+MODES = (OFF, RSS, SAMPLED, FULL)
+# Frames kept per allocation: one is enough for line-level statistics and cheapest.
+SAMPLED_FRAMES = 1
+DEFAULT_FULL_FRAMES = 16
+# Allocation sites summarized in each periodic snapshot for leak detection.
+SUMMARY_SITES = 500
+IGNORED_FILES = (
+    "<frozen importlib._bootstrap>",
+    "<frozen importlib._bootstrap_external>",
+    "<unknown>",
+    tracemalloc.__file__,
+)
+
+
+class MemorySample(BaseModel):
+    t: float
+    rss: int
+    pss: int
+
+
+class ModuleMemory(BaseModel):
+    # Requests measured, and those skipped because others ran at the same time.
+    calls: int = 0
+    contended: int = 0
+    # Traced bytes still allocated after the measured requests, in total and the largest.
+    retained: int = 0
+    max_retained: int = 0
+
+
+class LeakSuspect(BaseModel):
+    location: str
+    module: Optional[str] = None
+    size: int
+    growth: int
+    # Bytes per hour over the compared snapshots.
+    rate: float
+    snapshots: int
+
+
+class MemoryProfiler:
+    """
+    Memory instrumentation with switchable overhead.
+
+    - `rss`: samples the process RSS and PSS every `rss_interval` seconds, at the cost of
+      reading /proc/self/smaps_rollup.
+    - `sampled`: also traces allocations with `tracemalloc`, keeping one frame per
+      allocation. A `sample_rate` fraction of module requests is measured for the traced
+      bytes it leaves allocated, charged to the module. Every `snapshot_interval` seconds
+      the largest allocation sites are summarized, and sites that keep growing across
+      summaries are reported as leak suspects.
+    - `full`: like `sampled`, with `frames` frames per allocation and every request measured.
+    - `off`: none of it; switching to it stops tracing and frees the traces.
+
+    Snapshots for `snapshot`/`diff` can be taken on demand in the tracing modes.
+
+    A request is only charged to its module when no other module request ran while it
+    did, since traced memory is process-wide. Requests that overlapped are counted as
+    contended instead.
+    """
+
+    def __init__(
+        self,
+        mode: str = OFF,
+        sample_rate: float = 0.01,
+        frames: int = DEFAULT_FULL_FRAMES,
+        rss_interval: float = 10.0,
+        snapshot_interval: float = 60.0,
+        max_samples: int = 360,
+        max_snapshots: int = 8,
+        max_summaries: int = 12,
+    ):
+        """
+        Args:
+            mode (str): One of "off", "rss", "sampled" and "full". Defaults to "off".
+            sample_rate (float): Fraction of requests measured in "sampled" mode. Defaults to 0.01.
+            frames (int): Frames kept per allocation in "full" mode. Defaults to 16.
+            rss_interval (float): Seconds between RSS/PSS samples. Defaults to 10.
+            snapshot_interval (float): Seconds between leak detection summaries. Defaults to 60.
+            max_samples (int): RSS/PSS samples kept. Defaults to 360, an hour at 10 s.
+            max_snapshots (int): On-demand snapshots kept for `diff`. Defaults to 8.
+            max_summaries (int): Periodic summaries kept for leak detection. Defaults to 12.
+        """
+        self.mode = OFF
+        self.sample_rate = sample_rate
+        self.frames = frames
+        self.rss_interval = rss_interval
+        self.snapshot_interval = snapshot_interval
+        self.samples: Deque[MemorySample] = deque(maxlen=max_samples)
+        self.snapshots: "OrderedDict[str, tracemalloc.Snapshot]" = OrderedDict()
+        self.max_snapshots = max_snapshots
+        self.summaries: Deque[Tuple[float, Dict[str, int]]] = deque(maxlen=max_summaries)
+        self.modules: Dict[str, ModuleMemory] = {}
+        self.in_flight = 0
+        self.started_requests = 0
+        self._snapshot_id = 0
+        self._started_tracing = False
+        self._thread: Optional[threading.Thread] = None
+        self._pid: Optional[int] = None
+        self._wake = threading.Event()
+        self._lock = threading.Lock()
+        self.set_mode(mode)
+
+    @property
+    def tracing(self) -> bool:
+        return self.mode in (SAMPLED, FULL) and tracemalloc.is_tracing()
+
+    def set_mode(self, mode: str) -> None:
+        """
+        Switches the overhead level, starting or stopping allocation tracing as needed.
+
+        Raises:
+            ValueError: If the mode is unknown.
+        """
+        if mode not in MODES:
+            raise ValueError(f"Unknown memory profiling mode {mode}; choose from {', '.join(MODES)}")
+        frames = self.frames if mode == FULL else SAMPLED_FRAMES
+        with self._lock:
+            if mode in (SAMPLED, FULL):
+                if tracemalloc.is_tracing() and self._started_tracing and tracemalloc.get_traceback_limit() != frames:
+                    tracemalloc.stop()
+                    self.summaries.clear()
+                if not tracemalloc.is_tracing():
+                    tracemalloc.start(frames)
+                    self._started_tracing = True
+            elif self._started_tracing:
+                tracemalloc.stop()
+                self._started_tracing = False
+                self.snapshots.clear()
+                self.summaries.clear()
+            previous, self.mode = self.mode, mode
+        if mode != previous:
+            logger.info(f"Memory profiling mode {mode}")
+        self._wake.set()
+
+    def start(self) -> None:
+        """
+        Starts the sampling thread in this process, again after a fork. It sleeps while
+        the mode is "off".
+        """
+        if self._pid == os.getpid() and self._thread is not None and self._thread.is_alive():
+            return
+        self._pid = os.getpid()
+        self._thread = threading.Thread(target=self._run, name="memory-sampler", daemon=True)
+        self._thread.start()
+
+    def _run(self) -> None:
+        next_sample = next_summary = time.monotonic()
+        while self._pid == os.getpid():
+            if self.mode == OFF:
+                self._wake.wait()
+                self._wake.clear()
+                next_sample = next_summary = time.monotonic()
+                continue
+            now = time.monotonic()
+            if now >= next_sample:
+                self.sample_rss()
+                next_sample = now + self.rss_interval
+            if now >= next_summary:
+                if self.tracing:
+                    self.summarize()
+                next_summary = now + self.snapshot_interval
+            self._wake.wait(max(0.0, min(next_sample, next_summary) - time.monotonic()))
+            self._wake.clear()
+
+    def sample_rss(self) -> MemorySample:
+        usage = memory_usage(os.getpid())
+        sample = MemorySample(t=time.time(), rss=usage["rss"], pss=usage["pss"])
+        self.samples.append(sample)
+        return sample
+
+    def _snapshot(self) -> tracemalloc.Snapshot:
+        if not self.tracing:
+            raise RuntimeError("Allocations are not traced; switch to the sampled or full mode")
+        snapshot = tracemalloc.take_snapshot()
+        return snapshot.filter_traces([tracemalloc.Filter(False, filename) for filename in IGNORED_FILES])
+
+    def summarize(self) -> Dict[str, int]:
+        """
+        Records the traced size of the largest allocation sites for leak detection.
+        """
+        statistics = self._snapshot().statistics("lineno")[:SUMMARY_SITES]
+        summary = {_location(statistic.traceback[0]): statistic.size for statistic in statistics}
+        self.summaries.append((time.time(), summary))
+        return summary
+
+    def snapshot(self) -> str:
+        """
+        Takes a snapshot for `diff` and returns its id. The oldest snapshots are dropped.
+        """
+        snapshot = self._snapshot()
+        with self._lock:
+            self._snapshot_id += 1
+            snapshot_id = str(self._snapshot_id)
+            self.snapshots[snapshot_id] = snapshot
+            while len(self.snapshots) > self.max_snapshots:
+                self.snapshots.popitem(last=False)
+        return snapshot_id
+
+    def diff(
+        self, base: str, current: Optional[str] = None, group_by: str = "lineno", limit: int = 20
+    ) -> List[Dict[str, Any]]:
+        """
+        Returns the allocation sites that changed most between two snapshots.
+
+        Args:
+            base (str): The id of the earlier snapshot.
+            current (Optional[str]): The id of the later snapshot. Defaults to a new one.
+            group_by (str): "lineno", "filename" or "traceback". Defaults to "lineno".
+            limit (int): Sites returned, largest absolute change first. Defaults to 20.
+
+        Raises:
+            KeyError: If a snapshot id is unknown.
+        """
+        if base not in self.snapshots or (current is not None and current not in self.snapshots):
+            raise KeyError(f"Unknown snapshot; known snapshots are {', '.join(self.snapshots) or 'none'}")
+        later = self.snapshots[current] if current is not None else self._snapshot()
+        differences = later.compare_to(self.snapshots[base], group_by)[:limit]
+        return [
+            {
+                "location": _location(difference.traceback[0]),
+                "module": _module_of_file(difference.traceback[0].filename),
+                "traceback": [_location(frame) for frame in difference.traceback] if group_by == "traceback" else None,
+                "size": difference.size,
+                "size_diff": difference.size_diff,
+                "count": difference.count,
+                "count_diff": difference.count_diff,
+            }
+            for difference in differences
+        ]
+
+    def leak_suspects(self, min_growth: int = 64 * 1024, limit: int = 20) -> List[LeakSuspect]:
+        """
+        Returns the allocation sites whose traced size never shrank across the periodic
+        summaries and grew by at least `min_growth` bytes, fastest growing first.
+        """
+        summaries = list(self.summaries)
+        if len(summaries) < 3:
+            return []
+        (first_time, first), (last_time, last) = summaries[0], summaries[-1]
+        hours = max(last_time - first_time, 1e-9) / 3600
+        suspects = []
+        for location, size in last.items():
+            sizes = [summary.get(location, 0) for _, summary in summaries]
+            growth = size - sizes[0]
+            if growth < min_growth or any(later < earlier for earlier, later in zip(sizes, sizes[1:])):
+                continue
+            suspects.append(
+                LeakSuspect(
+                    location=location,
+                    module=_module_of_file(location.rpartition(":")[0]),
+                    size=size,
+                    growth=growth,
+                    rate=growth / hours,
+                    snapshots=len(summaries),
+                )
+            )
+        return sorted(suspects, key=lambda suspect: suspect.growth, reverse=True)[:limit]
+
+    def rss_trend(self) -> Optional[float]:
+        """
+        Returns the RSS growth in bytes per hour, fitted over the kept samples.
+        """
+        samples = list(self.samples)
+        if len(samples) < 2 or samples[-1].t == samples[0].t:
+            return None
+        slope = np.polyfit([sample.t - samples[0].t for sample in samples], [sample.rss for sample in samples], 1)[0]
+        return float(slope * 3600)
+
+    def should_measure(self) -> bool:
+        if not self.tracing:
+            return False
+        return self.mode == FULL or random.random() < self.sample_rate
+
+    def record(self, module: str, retained: Optional[int]) -> None:
+        """
+        Charges the traced bytes a request left allocated to its module, or counts the
+        request as contended when `retained` is None.
+        """
+        with self._lock:
+            stats = self.modules.setdefault(module, ModuleMemory())
+            if retained is None:
+                stats.contended += 1
+                return
+            stats.calls += 1
+            stats.retained += retained
+            stats.max_retained = max(stats.max_retained, retained)
+
+    def report(self) -> Dict[str, Any]:
+        """
+        Returns the mode, traced memory, this worker's RSS/PSS samples and trend, every
+        worker's current memory, and the per-module accounting.
+        """
+        traced, peak = tracemalloc.get_traced_memory() if tracemalloc.is_tracing() else (0, 0)
+        with self._lock:
+            modules = {name: stats.model_dump() for name, stats in sorted(self.modules.items())}
+        return {
+            "mode": self.mode,
+            "sample_rate": self.sample_rate,
+            "pid": os.getpid(),
+            "traced": traced,
+            "traced_peak": peak,
+            "tracemalloc_overhead": tracemalloc.get_tracemalloc_memory() if tracemalloc.is_tracing() else 0,
+            "samples": [sample.model_dump() for sample in self.samples],
+            "rss_trend": self.rss_trend(),
+            "workers": memory_report(worker_pids()),
+            "modules": modules,
+            "snapshots": list(self.snapshots),
+        }
+
+
+def _location(frame: tracemalloc.Frame) -> str:
+    return f"{frame.filename}:{frame.lineno}"
+
+
+def _module_of_file(filename: str) -> Optional[str]:
+    parts = os.path.normpath(filename).split(os.sep)
+    if "modules" in parts:
+        index = len(parts) - 1 - parts[::-1].index("modules")
+        if index + 2 < len(parts):
+            return parts[index + 1]
+    return None
+
+
+class MemoryMiddleware:
+    """
+    ASGI middleware that measures the traced bytes module requests leave allocated.
+    """
+
+    def __init__(self, app: Callable, profiler: Optional["MemoryProfiler"] = None):
+        self.app = app
+        self.profiler = profiler or get_memory_profiler()
+
+    async def __call__(self, scope: Dict[str, Any], receive: Callable, send: Callable) -> None:
+        module = module_of(scope["path"]) if scope["type"] == "http" else None
+        if module is None:
+            await self.app(scope, receive, send)
+            return
+        profiler = self.profiler
+        profiler.in_flight += 1
+        profiler.started_requests += 1
+        started = profiler.started_requests
+        overlapped = profiler.in_flight > 1
+        measure = profiler.should_measure()
+        before = tracemalloc.get_traced_memory()[0] if measure else 0
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            profiler.in_flight -= 1
+            if measure and profiler.tracing:
+                alone = not overlapped and profiler.in_flight == 0 and profiler.started_requests == started
+                profiler.record(module, tracemalloc.get_traced_memory()[0] - before if alone else None)
+
+
+@lru_cache(maxsize=None)
+def get_memory_profiler() -> MemoryProfiler:
+    """
+    Returns the process-wide memory profiler, configured by `MINER_MEMORY_PROFILE` (off,
+    rss, sampled or full), `MINER_MEMORY_SAMPLE_RATE` and `MINER_MEMORY_FRAMES`.
+    """
+    return MemoryProfiler(
+        mode=os.getenv("MINER_MEMORY_PROFILE", OFF),
+        sample_rate=float(os.getenv("MINER_MEMORY_SAMPLE_RATE", "0.01")),
+        frames=int(os.getenv("MINER_MEMORY_FRAMES", DEFAULT_FULL_FRAMES)),
+    )
+
+
+def add_memory_profiler(app: FastAPI, profiler: Optional[MemoryProfiler] = None) -> MemoryProfiler:
+    """
+    Measures the app's module requests and starts the sampling thread when the app
+    starts, in each worker. The profiler is stored as `app.state.memory_profiler` for
+    the `/debug/memory` routes. Its mode can be switched at runtime, so it can be added
+    while off.
+
+    Args:
+        app (FastAPI): The app.
+        profiler (Optional[MemoryProfiler]): The profiler. Defaults to `get_memory_profiler()`.
+
+    Returns:
+        MemoryProfiler: The profiler.
+    """
+    profiler = profiler or get_memory_profiler()
+    if getattr(app.state, "memory_profiler", None) is profiler:
+        return profiler
+    app.state.memory_profiler = profiler
+    app.add_middleware(MemoryMiddleware, profiler=profiler)
+
+    async def start_profiler():
+        profiler.start()
+
+    app.add_event_handler("startup", start_profiler)
+    return profiler
@@ -0,0 +1,519 @@
+import os
+import sys
+import time
+import pickle
+import signal
+import asyncio
+import inspect
+import threading
+import multiprocessing
+from collections import deque
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+from importlib import import_module
+from multiprocessing import shared_memory
+from typing import Any, Deque, Dict, List, Optional, Sequence, Tuple
+from loguru import logger
+
+DEFAULT_RING_SIZE = 4 * 2**20
+
+
+class SandboxError(Exception):
+    """Exception raised when a sandboxed call fails outside the module's own code."""
+
+
+class SandboxTimeout(SandboxError):
+    """Exception raised when a sandboxed call exceeds its timeout. The worker is restarted."""
+
+
+class SandboxCpuLimit(SandboxError):
+    """Exception raised when a sandboxed call exceeds its CPU time limit. The worker keeps running."""
+
+
+class RingAllocator:
+    """
+    Hands out contiguous regions of a fixed-size ring buffer in FIFO order.
+
+    Only the writing side uses the allocator. Regions are released oldest first, once
+    the reader is known to be done with them. A payload that does not fit is sent
+    inline over the pipe instead.
+    """
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self.regions: Deque[Tuple[int, int]] = deque()
+
+    def allocate(self, size: int) -> Optional[int]:
+        if size > self.capacity or size == 0:
+            return None
+        if not self.regions:
+            offset = 0
+        else:
+            first = self.regions[0][0]
+            last_end = self.regions[-1][0] + self.regions[-1][1]
+            if last_end > first:
+                if self.capacity - last_end >= size:
+                    offset = last_end
+                elif first >= size:
+                    offset = 0
+                else:
+                    return None
+            elif first - last_end >= size:
+                offset = last_end
+            else:
+                return None
+        self.regions.append((offset, size))
+        return offset
+
+    def release(self, count: int = 1) -> None:
+        for _ in range(min(count, len(self.regions))):
+            self.regions.popleft()
+
+
+def _attach(name: str) -> shared_memory.SharedMemory:
+    # The parent owns and unlinks the segment; keep the child's resource tracker from
+    # unlinking it when the child exits.
+    from multiprocessing import resource_tracker
+
+    register = resource_tracker.register
+    resource_tracker.register = lambda *args, **kwargs: None
+    try:
+        return shared_memory.SharedMemory(name=name)
+    finally:
+        resource_tracker.register = register
+
+
+def resolve_target(target: str) -> Any:
+    """
+    Resolves "package.module" to the module, or "package.module:attribute" to the
+    attribute. A class attribute is instantiated without arguments.
+    """
+    module_name, _, attribute = target.partition(":")
+    resolved = import_module(module_name)
+    if attribute:
+        resolved = getattr(resolved, attribute)
+        if inspect.isclass(resolved):
+            resolved = resolved()
+    return resolved
+
+
+def _apply_memory_limit(memory_limit: Optional[int]) -> None:
+    import resource
+
+    if memory_limit:
+        resource.setrlimit(resource.RLIMIT_AS, (memory_limit, memory_limit))
+
+
+def _limit_call_cpu(cpu_limit: int) -> None:
+    # RLIMIT_CPU counts the process's lifetime CPU time, so the soft limit is moved to
+    # `cpu_limit` seconds past what the worker has used so far before every call. Only
+    # the soft limit moves: it raises SIGXCPU, which fails the running call, while the
+    # hard limit, which kills the process, cannot be raised again once lowered.
+    import math
+    import resource
+
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    _, hard = resource.getrlimit(resource.RLIMIT_CPU)
+    soft = math.ceil(usage.ru_utime + usage.ru_stime) + cpu_limit
+    if hard != resource.RLIM_INFINITY:
+        soft = min(soft, hard)
+    resource.setrlimit(resource.RLIMIT_CPU, (soft, hard))
+
+
+def _worker_main(
+    target: str,
+    conn: Any,
+    request_name: str,
+    response_name: str,
+    memory_limit: Optional[int],
+    cpu_limit: Optional[int],
+    paths: List[str],
+) -> None:
+    """
+    Worker process loop: reads requests in order, calls the target and writes results
+    to the response ring, or inline when the ring is full.
+    """
+    _apply_memory_limit(memory_limit)
+    in_call = False
+
+    def on_cpu_limit(signum: int, frame: Any) -> None:
+        # SIGXCPU repeats every CPU second past the soft limit; outside a call, e.g.
+        # while the result is pickled, it is ignored until the next call moves the limit.
+        if in_call:
+            raise SandboxCpuLimit(f"Call exceeded its CPU time limit of {cpu_limit}s")
+
+    if cpu_limit:
+        signal.signal(signal.SIGXCPU, on_cpu_limit)
+    sys.path[:0] = paths
+    request_memory, response_memory = _attach(request_name), _attach(response_name)
+    responses = RingAllocator(response_memory.size)
+    released = 0
+    loop = asyncio.new_event_loop()
+    try:
+        instance = resolve_target(target)
+        conn.send(("ready", os.getpid(), None))
+    except BaseException as e:
+        conn.send(("failed", os.getpid(), repr(e)))
+        return
+
+    while True:
+        try:
+            message = conn.recv()
+        except EOFError:
+            break
+        if message is None:
+            break
+        request_id, offset, length, inline, consumed = message
+        responses.release(consumed - released)
+        released = consumed
+        try:
+            payload = inline if inline is not None else request_memory.buf[offset : offset + length]
+            method, args, kwargs = pickle.loads(payload)
+            del payload
+            if cpu_limit:
+                _limit_call_cpu(cpu_limit)
+            in_call = True
+            result = getattr(instance, method)(*args, **kwargs)
+            if inspect.isawaitable(result):
+                result = loop.run_until_complete(result)
+            in_call = False
+            status = "ok"
+        except BaseException as e:
+            in_call = False
+            result, status = e, "error"
+        try:
+            data = pickle.dumps(result, protocol=pickle.HIGHEST_PROTOCOL)
+        except Exception as e:
+            data = pickle.dumps(SandboxError(f"Unpicklable {status} result: {e!r}"))
+            status = "error"
+        offset = responses.allocate(len(data))
+        if offset is None:
+            conn.send((request_id, status, None, None, data))
+        else:
+            response_memory.buf[offset : offset + len(data)] = data
+            conn.send((request_id, status, offset, len(data), None))
+    request_memory.close()
+    response_memory.close()
+
+
+class SandboxWorker:
+    """
+    One long-lived worker subprocess with its pipe and request/response rings.
+    A reader thread completes call futures and restarts the worker if it dies.
+    """
+
+    def __init__(self, sandbox: "ModuleSandbox", index: int):
+        self.sandbox = sandbox
+        self.index = index
+        self.process: Optional[multiprocessing.Process] = None
+        self.pid: Optional[int] = None
+        self.restarts = 0
+        self._lock = threading.Lock()
+        self._send_lock = threading.Lock()
+        self._pending: Dict[int, Tuple[Future, float, bool]] = {}
+        self._reader: Optional[threading.Thread] = None
+        self._closed = False
+
+    @property
+    def in_flight(self) -> int:
+        return len(self._pending)
+
+    @property
+    def available(self) -> bool:
+        return not self._closed
+
+    def start(self) -> None:
+        sandbox = self.sandbox
+        self.request_memory = shared_memory.SharedMemory(create=True, size=sandbox.ring_size)
+        self.response_memory = shared_memory.SharedMemory(create=True, size=sandbox.ring_size)
+        self.requests = RingAllocator(sandbox.ring_size)
+        self.consumed = 0
+        self.conn, child = sandbox.context.Pipe()
+        self.process = sandbox.context.Process(
+            target=_worker_main,
+            args=(
+                sandbox.target,
+                child,
+                self.request_memory.name,
+                self.response_memory.name,
+                sandbox.memory_limit,
+                sandbox.cpu_limit,
+                sandbox.paths,
+            ),
+            daemon=True,
+            name=f"sandbox-{sandbox.name}-{self.index}",
+        )
+        self.process.start()
+        child.close()
+        status, self.pid, error = self.conn.recv()
+        if status != "ready":
+            self.process.join()
+            self._release_memory()
+            raise SandboxError(f"Sandbox worker for {sandbox.target} failed to start: {error}")
+        self._reader = threading.Thread(target=self._read, args=(self.conn,), daemon=True)
+        self._reader.start()
+
+    def submit(self, method: str, args: Tuple[Any, ...], kwargs: Dict[str, Any]) -> Future:
+        future: Future = Future()
+        data = pickle.dumps((method, args, kwargs), protocol=pickle.HIGHEST_PROTOCOL)
+        # Messages are sent in allocation order so the worker frees request regions
+        # in FIFO order. Sending happens outside `_lock`, which the reader thread needs
+        # to drain responses while a large send is blocked on a full pipe.
+        with self._send_lock:
+            with self._lock:
+                if self._closed:
+                    raise SandboxError(f"Sandbox {self.sandbox.name} is closed")
+                request_id = self.sandbox.next_id()
+                offset = self.requests.allocate(len(data))
+                if offset is None:
+                    message = (request_id, None, None, data, self.consumed)
+                else:
+                    self.request_memory.buf[offset : offset + len(data)] = data
+                    message = (request_id, offset, len(data), None, self.consumed)
+                self._pending[request_id] = (future, time.perf_counter(), offset is not None)
+                conn = self.conn
+            try:
+                conn.send(message)
+            except OSError as e:
+                # The worker died; the reader thread fails its other calls and restarts it.
+                with self._lock:
+                    self._pending.pop(request_id, None)
+                raise SandboxError(f"Sandbox worker {self.pid} is unavailable: {e}") from e
+        return future
+
+    def _read(self, conn: Any) -> None:
+        # `_on_exit` must run however the loop ends, or the worker is never restarted.
+        try:
+            while True:
+                try:
+                    request_id, status, offset, length, inline = conn.recv()
+                except (EOFError, OSError):
+                    break
+                try:
+                    payload = inline if inline is not None else self.response_memory.buf[offset : offset + length]
+                    result = pickle.loads(payload)
+                    del payload
+                except Exception as e:
+                    result, status = SandboxError(f"Cannot decode sandbox result: {e!r}"), "error"
+                with self._lock:
+                    if inline is None:
+                        self.consumed += 1
+                    future, start, in_ring = self._pending.pop(request_id)
+                    if in_ring:
+                        self.requests.release()
+                self.sandbox.record(time.perf_counter() - start, status == "ok")
+                # The caller may have cancelled the call, e.g. an `acall` that was cancelled.
+                if not future.set_running_or_notify_cancel():
+                    continue
+                if status == "ok":
+                    future.set_result(result)
+                else:
+                    future.set_exception(result)
+        finally:
+            self._on_exit(conn)
+
+    def _on_exit(self, conn: Any) -> None:
+        # The restart happens under the lock, so new calls wait for the new worker
+        # instead of writing to the dead one's pipe.
+        with self._lock:
+            if conn is not self.conn:
+                return
+            pending, self._pending = self._pending, {}
+            self.process.join(timeout=1)
+            code = self.process.exitcode
+            self._release_memory()
+            for future, _, _ in pending.values():
+                if not future.done():
+                    future.set_exception(SandboxError(f"Sandbox worker {self.pid} exited with code {code}"))
+            if self._closed:
+                return
+            logger.warning(f"Sandbox worker {self.pid} for {self.sandbox.name} exited with code {code}, restarting")
+            self.restarts += 1
+            self.sandbox.restarts += 1
+            try:
+                self.start()
+            except SandboxError as e:
+                self._closed = True
+                logger.error(str(e))
+
+    def _release_memory(self) -> None:
+        for memory in (self.request_memory, self.response_memory):
+            try:
+                memory.close()
+                memory.unlink()
+            except (BufferError, FileNotFoundError):
+                pass
+
+    def kill(self, wait: bool = False) -> None:
+        """
+        Kills the worker process. With `wait`, returns once the worker has been restarted.
+        """
+        reader = self._reader
+        if self.process is not None and self.process.is_alive():
+            self.process.kill()
+        if wait and reader is not None and reader is not threading.current_thread():
+            reader.join()
+
+    def close(self, timeout: float = 5.0) -> None:
+        with self._lock:
+            self._closed = True
+            try:
+                self.conn.send(None)
+            except OSError:
+                pass
+        self.process.join(timeout)
+        self.kill()
+        if self._reader is not None:
+            self._reader.join(timeout)
+
+
+class ModuleSandbox:
+    """
+    Runs a module in a pool of long-lived worker subprocesses.
+
+    A call is pickled into a shared-memory ring owned by one worker, and only a short
+    header (offset and length) goes over the worker's pipe; results come back the same
+    way. Payloads too large for the ring are sent inline over the pipe. Calls go to the
+    worker with the fewest calls in flight.
+
+    Workers that crash or exceed their limits are restarted, failing only the calls
+    they were running. Each worker can be limited in address space (`memory_limit`,
+    bytes, which must leave room for the two rings), and each call in CPU time
+    (`cpu_limit`, seconds); a call over its CPU time fails with `SandboxCpuLimit` and
+    its worker stays up. Calls that exceed `timeout` kill and restart their worker.
+
+    Attribute access returns coroutine functions, so a sandbox can stand in for a
+    module whose methods are awaited, e.g. `await sandbox.process(request)`.
+    """
+
+    def __init__(
+        self,
+        target: str,
+        workers: int = 2,
+        memory_limit: Optional[int] = None,
+        cpu_limit: Optional[int] = None,
+        timeout: Optional[float] = 30.0,
+        ring_size: int = DEFAULT_RING_SIZE,
+        name: Optional[str] = None,
+        start_method: str = "spawn",
+        paths: Sequence[str] = (),
+    ):
+        """
+        Initializes the pool and starts its workers.
+
+        Args:
+            target (str): "package.module" or "package.module:attribute" to call into.
+            workers (int): Number of worker processes. Defaults to 2.
+            memory_limit (Optional[int]): Address space limit per worker in bytes.
+            cpu_limit (Optional[int]): CPU time limit per call in seconds.
+            timeout (Optional[float]): Per call timeout in seconds. Defaults to 30.
+            ring_size (int): Size of each request and response ring. Defaults to 4 MiB.
+            name (Optional[str]): Name used in logs and stats. Defaults to `target`.
+            start_method (str): multiprocessing start method. Defaults to "spawn", so
+                workers do not inherit the server's threads and state.
+            paths (Sequence[str]): Directories put first on the workers' `sys.path`, e.g.
+                the site-packages of the module's environment.
+
+        Raises:
+            SandboxError: If a worker fails to import the target.
+        """
+        self.target = target
+        self.name = name or target
+        self.memory_limit = memory_limit
+        self.cpu_limit = cpu_limit
+        self.timeout = timeout
+        self.ring_size = ring_size
+        self.paths = [str(path) for path in paths]
+        self.context = multiprocessing.get_context(start_method)
+        self.restarts = 0
+        self.calls = 0
+        self.errors = 0
+        self.latencies: Deque[float] = deque(maxlen=4096)
+        self._ids = 0
+        self._ids_lock = threading.Lock()
+        self.workers: List[SandboxWorker] = [SandboxWorker(self, index) for index in range(workers)]
+        try:
+            for worker in self.workers:
+                worker.start()
+        except BaseException:
+            self.close()
+            raise
+
+    def next_id(self) -> int:
+        with self._ids_lock:
+            self._ids += 1
+            return self._ids
+
+    def record(self, latency: float, ok: bool) -> None:
+        self.calls += 1
+        self.errors += not ok
+        self.latencies.append(latency)
+
+    def submit(self, method: str, *args: Any, **kwargs: Any) -> Future:
+        workers = [worker for worker in self.workers if worker.available]
+        if not workers:
+            raise SandboxError(f"Sandbox {self.name} has no running workers")
+        return min(workers, key=lambda worker: worker.in_flight).submit(method, args, kwargs)
+
+    def _timed_out(self, future: Future) -> SandboxTimeout:
+        for worker in self.workers:
+            if any(pending is future for pending, _, _ in list(worker._pending.values())):
+                worker.kill(wait=True)
+        return SandboxTimeout(f"Call into {self.name} timed out after {self.timeout}s")
+
+    def call(self, method: str, *args: Any, **kwargs: Any) -> Any:
+        """
+        Calls `method` on the sandboxed target and waits for the result.
+
+        Raises:
+            SandboxTimeout: If the call exceeds the timeout.
+            SandboxCpuLimit: If the call exceeds the CPU time limit.
+            SandboxError: If the worker died during the call.
+            Exception: Whatever the method itself raised.
+        """
+        future = self.submit(method, *args, **kwargs)
+        try:
+            return future.result(self.timeout)
+        except FutureTimeoutError:
+            raise self._timed_out(future) from None
+
+    async def acall(self, method: str, *args: Any, **kwargs: Any) -> Any:
+        """
+        Async variant of `call` that does not block the event loop.
+        """
+        future = self.submit(method, *args, **kwargs)
+        try:
+            return await asyncio.wait_for(asyncio.wrap_future(future), self.timeout)
+        except asyncio.TimeoutError:
+            raise self._timed_out(future) from None
+
+    def __getattr__(self, name: str) -> Any:
+        if name.startswith("_"):
+            raise AttributeError(name)
+
+        async def method(*args: Any, **kwargs: Any) -> Any:
+            return await self.acall(name, *args, **kwargs)
+
+        return method
+
+    def stats(self) -> Dict[str, Any]:
+        latencies = sorted(self.latencies)
+
+        def percentile(fraction: float) -> float:
+            return latencies[min(len(latencies) - 1, int(fraction * len(latencies)))] if latencies else 0.0
+
+        return {
+            "name": self.name,
+            "workers": [worker.pid for worker in self.workers],
+            "calls": self.calls,
+            "errors": self.errors,
+            "restarts": self.restarts,
+            "in_flight": sum(worker.in_flight for worker in self.workers),
+            "latency_mean": sum(latencies) / len(latencies) if latencies else 0.0,
+            "latency_p50": percentile(0.5),
+            "latency_p99": percentile(0.99),
+        }
+
+    def close(self) -> None:
+        for worker in self.workers:
+            if worker.process is not None:
+                worker.close()
@@ -0,0 +1,334 @@
+import gc
+import os
+import sys
+import json
+import time
+import signal
+import socket
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Union
+
+import uvicorn
+from loguru import logger
+
+from base.health import get_readiness
+
+DEFAULT_PID_FILE = "data/instance_data/workers.json"
+
+
+def get_pid_file() -> Path:
+    return Path(os.getenv("PREFORK_PID_FILE", DEFAULT_PID_FILE))
+
+
+def memory_usage(pid: int) -> Dict[str, int]:
+    """
+    Returns the memory usage of a process in bytes, read from /proc.
+
+    `pss` (proportional set size) charges each shared page to the processes sharing
+    it in equal parts, so summing `pss` over workers gives their real combined
+    footprint, while summing `rss` counts shared pages once per worker.
+
+    Args:
+        pid (int): The process id.
+
+    Returns:
+        Dict[str, int]: `rss`, `pss`, `shared`, `private` and `anonymous` (heap, not file
+            backed) bytes. All but `rss` are 0 where /proc/<pid>/smaps_rollup is unavailable.
+    """
+    fields = {
+        "Rss": 0,
+        "Pss": 0,
+        "Shared_Clean": 0,
+        "Shared_Dirty": 0,
+        "Private_Clean": 0,
+        "Private_Dirty": 0,
+        "Anonymous": 0,
+    }
+    try:
+        with open(f"/proc/{pid}/smaps_rollup", encoding="utf-8") as f:
+            for line in f:
+                name, _, value = line.partition(":")
+                if name in fields:
+                    fields[name] = int(value.split()[0]) * 1024
+    except OSError:
+        try:
+            with open(f"/proc/{pid}/status", encoding="utf-8") as f:
+                for line in f:
+                    if line.startswith("VmRSS:"):
+                        fields["Rss"] = int(line.split()[1]) * 1024
+        except OSError:
+            pass
+    return {
+        "rss": fields["Rss"],
+        "pss": fields["Pss"],
+        "shared": fields["Shared_Clean"] + fields["Shared_Dirty"],
+        "private": fields["Private_Clean"] + fields["Private_Dirty"],
+        "anonymous": fields["Anonymous"],
+    }
+
+
+def memory_report(pids: Iterable[int]) -> Dict[str, Any]:
+    """
+    Returns `memory_usage` per process plus `rss` and `pss` totals.
+    """
+    processes = {pid: memory_usage(pid) for pid in pids}
+    return {
+        "processes": processes,
+        "total_rss": sum(usage["rss"] for usage in processes.values()),
+        "total_pss": sum(usage["pss"] for usage in processes.values()),
+    }
+
+
+def preload_modules(module_names: Iterable[str], module_cache: Any = None) -> List[Any]:
+    """
+    Imports modules in the current process and calls their `warmup()` if they define one,
+    recording each module's warm-up in the process readiness tracker.
+
+    Args:
+        module_names (Iterable[str]): Module names served from the `modules` package.
+        module_cache (Any): The `ModuleCache` to load through. Defaults to a new cache.
+
+    Returns:
+        List[Any]: The loaded modules.
+    """
+    from base.supervisor import ModuleCache
+
+    module_cache = module_cache or ModuleCache()
+    readiness = get_readiness()
+    loaded = []
+    for module_name in module_names:
+        start = time.perf_counter()
+        module = module_cache.get(module_name)
+        warmup = getattr(module, "warmup", None)
+        readiness.run(module_name, warmup if callable(warmup) else None)
+        loaded.append(module)
+        logger.info(f"Preloaded {module_name} in {time.perf_counter() - start:.3f}s")
+    return loaded
+
+
+class PreforkServer:
+    """
+    Serves an ASGI app from several forked worker processes that share preloaded memory.
+
+    The master binds the listening socket, imports the app, preloads and warms the
+    modules, and runs `gc.freeze()` before forking. Frozen objects are never visited by
+    the cycle collector again, so the workers do not write to them while collecting,
+    and the pages holding loaded modules stay shared copy-on-write between workers
+    instead of being copied into each.
+
+    The master restarts workers that exit unexpectedly, after a delay that doubles with
+    each crash of the same worker slot, and gives up on a slot that keeps crashing
+    within `stable_after` seconds of starting. It forwards SIGINT and SIGTERM to
+    the workers, logs a per-worker RSS/PSS report shortly after start and on SIGUSR1,
+    and keeps its own and the workers' pids in a JSON pid file.
+    """
+
+    def __init__(
+        self,
+        app: Union[str, Any],
+        host: str = "0.0.0.0",
+        port: int = 5757,
+        workers: int = 2,
+        preload: Iterable[str] = (),
+        module_cache: Any = None,
+        pid_file: Optional[Union[str, Path]] = None,
+        report_after: float = 5.0,
+        on_worker_start: Optional[Callable[[int], None]] = None,
+        restart_delay: float = 1.0,
+        max_restart_delay: float = 30.0,
+        max_restarts: int = 5,
+        stable_after: float = 60.0,
+        **uvicorn_options: Any,
+    ):
+        """
+        Initializes the server without binding or forking.
+
+        Args:
+            app (Union[str, Any]): The ASGI app or its "module:attribute" import string.
+            host (str): The bind host. Defaults to "0.0.0.0".
+            port (int): The bind port. Defaults to 5757.
+            workers (int): The number of worker processes. Defaults to 2.
+            preload (Iterable[str]): Module names to load and warm in the master.
+            module_cache (Any): The `ModuleCache` used for preloading.
+            pid_file (Optional[Union[str, Path]]): Where pids are written. Defaults to
+                `PREFORK_PID_FILE` or data/instance_data/workers.json.
+            report_after (float): Seconds after start to log the memory report. Defaults to 5.
+            on_worker_start (Optional[Callable[[int], None]]): Called in each worker with
+                its index after forking.
+            restart_delay (float): Seconds before restarting a worker after its first
+                crash, doubled for each further crash. Defaults to 1.
+            max_restart_delay (float): Upper bound of the restart delay. Defaults to 30.
+            max_restarts (int): Crashes in a row after which a worker slot is not
+                restarted again. Defaults to 5.
+            stable_after (float): Seconds a worker must run for its crash count to reset.
+                Defaults to 60.
+            **uvicorn_options: Extra `uvicorn.Config` options such as `log_level`.
+        """
+        self.app = app
+        self.host = host
+        self.port = port
+        self.workers = workers
+        self.preload = list(preload)
+        self.module_cache = module_cache
+        self.pid_file = Path(pid_file) if pid_file else get_pid_file()
+        self.report_after = report_after
+        self.on_worker_start = on_worker_start
+        self.restart_delay = restart_delay
+        self.max_restart_delay = max_restart_delay
+        self.max_restarts = max_restarts
+        self.stable_after = stable_after
+        self.uvicorn_options = uvicorn_options
+        self.worker_pids: Dict[int, int] = {}
+        # Per worker slot: when its process started, its crashes in a row, and when a
+        # crashed slot is due to be restarted.
+        self._started: Dict[int, float] = {}
+        self._crashes: Dict[int, int] = {}
+        self._restart_at: Dict[int, float] = {}
+        self.socket: Optional[socket.socket] = None
+        self._stopping = False
+        self._report_requested = False
+
+    def bind(self) -> socket.socket:
+        sock = socket.socket(socket.AF_INET6 if ":" in self.host else socket.AF_INET, socket.SOCK_STREAM)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        sock.bind((self.host, self.port))
+        sock.listen(2048)
+        sock.set_inheritable(True)
+        self.port = sock.getsockname()[1]
+        self.socket = sock
+        return sock
+
+    def prepare(self) -> None:
+        """
+        Binds the socket, loads the app and preloaded modules, then freezes the GC.
+        """
+        self.bind()
+        if isinstance(self.app, str):
+            from uvicorn.importer import import_from_string
+
+            self.app = import_from_string(self.app)
+        preload_modules(self.preload, self.module_cache)
+        gc.collect()
+        gc.freeze()
+        logger.info(f"Froze {gc.get_freeze_count()} objects before forking {self.workers} workers")
+
+    def _spawn(self, index: int) -> int:
+        pid = os.fork()
+        if pid:
+            self.worker_pids[index] = pid
+            self._started[index] = time.monotonic()
+            return pid
+        # Worker process.
+        for signum in (signal.SIGINT, signal.SIGTERM, signal.SIGUSR1, signal.SIGCHLD):
+            signal.signal(signum, signal.SIG_DFL)
+        code = 0
+        try:
+            if self.on_worker_start is not None:
+                self.on_worker_start(index)
+            config = uvicorn.Config(self.app, **self.uvicorn_options)
+            uvicorn.Server(config).run(sockets=[self.socket])
+        except BaseException:
+            logger.exception(f"Worker {index} failed")
+            code = 1
+        finally:
+            os._exit(code)
+
+    def write_pid_file(self) -> None:
+        self.pid_file.parent.mkdir(parents=True, exist_ok=True)
+        temporary = self.pid_file.with_suffix(".tmp")
+        temporary.write_text(
+            json.dumps({"master": os.getpid(), "port": self.port, "workers": list(self.worker_pids.values())}),
+            encoding="utf-8",
+        )
+        os.replace(temporary, self.pid_file)
+
+    def report(self) -> Dict[str, Any]:
+        """
+        Returns the memory report of the master and every worker and logs it.
+        """
+        report = memory_report([os.getpid(), *self.worker_pids.values()])
+        for pid, usage in report["processes"].items():
+            role = "master" if pid == os.getpid() else "worker"
+            logger.info(
+                f"{role} {pid}: rss {usage['rss'] / 2**20:.1f} MiB, pss {usage['pss'] / 2**20:.1f} MiB, "
+                f"shared {usage['shared'] / 2**20:.1f} MiB"
+            )
+        logger.info(
+            f"total rss {report['total_rss'] / 2**20:.1f} MiB, total pss {report['total_pss'] / 2**20:.1f} MiB"
+        )
+        return report
+
+    def stop(self, signum: int = signal.SIGTERM, frame: Any = None) -> None:
+        self._stopping = True
+        for pid in self.worker_pids.values():
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    def _request_report(self, signum: int, frame: Any) -> None:
+        self._report_requested = True
+
+    def _schedule_restart(self, index: int, pid: int, status: int) -> None:
+        now = time.monotonic()
+        if now - self._started.get(index, now) >= self.stable_after:
+            self._crashes[index] = 0
+        crashes = self._crashes.get(index, 0) + 1
+        self._crashes[index] = crashes
+        if crashes > self.max_restarts:
+            logger.error(f"Worker {index} crashed {crashes} times in a row, not restarting it")
+            return
+        delay = min(self.restart_delay * 2 ** (crashes - 1), self.max_restart_delay)
+        logger.warning(f"Worker {pid} exited with status {status}, restarting in {delay:g}s")
+        self._restart_at[index] = now + delay
+
+    def run(self) -> None:
+        """
+        Prepares the master, forks the workers and supervises them until stopped.
+        """
+        self.prepare()
+        for index in range(self.workers):
+            self._spawn(index)
+        self.write_pid_file()
+        signal.signal(signal.SIGINT, self.stop)
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGUSR1, self._request_report)
+        started = time.monotonic()
+        reported = False
+        try:
+            while self.worker_pids or (self._restart_at and not self._stopping):
+                pid, status = os.waitpid(-1, os.WNOHANG) if self.worker_pids else (0, 0)
+                if pid:
+                    index = next((index for index, worker in self.worker_pids.items() if worker == pid), None)
+                    if index is None:
+                        continue
+                    del self.worker_pids[index]
+                    if not self._stopping:
+                        self._schedule_restart(index, pid, status)
+                    self.write_pid_file()
+                    continue
+                now = time.monotonic()
+                for index, restart_at in list(self._restart_at.items()):
+                    if restart_at <= now and not self._stopping:
+                        del self._restart_at[index]
+                        self._spawn(index)
+                        self.write_pid_file()
+                if self._report_requested or (not reported and time.monotonic() - started >= self.report_after):
+                    self.report()
+                    reported, self._report_requested = True, False
+                time.sleep(0.1)
+        finally:
+            self.pid_file.unlink(missing_ok=True)
+            gc.unfreeze()
+            if self.socket is not None:
+                self.socket.close()
+
+
+if __name__ == "__main__":
+    PreforkServer(
+        os.getenv("MINER_APP", "api:app"),
+        host=os.getenv("MINER_HOST", "0.0.0.0"),
+        port=int(os.getenv("MINER_PORT", "5757")),
+        workers=int(os.getenv("MINER_WORKERS", "2")),
+        preload=[name for name in sys.argv[1:]],
+    ).run()
@@ -0,0 +1,339 @@
+import os
+import sys
+import json
+import time
+import signal
+import asyncio
+import threading
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from loguru import logger
+from pydantic import BaseModel
+
+from base.prefork import get_pid_file
+
+DEFAULT_PROFILE_DIR = "data/instance_data/profiles"
+DEFAULT_INTERVAL = 0.005
+MAX_SECONDS = 120.0
+# Seconds to wait for other workers' profiles after sampling ends.
+COLLECT_GRACE = 2.0
+# Frames a thread sits in while it has nothing to do.
+IDLE_FRAMES = frozenset(
+    {
+        "selectors:EpollSelector.select",
+        "selectors:PollSelector.select",
+        "selectors:KqueueSelector.select",
+        "selectors:SelectSelector.select",
+        "threading:Condition.wait",
+        "threading:Event.wait",
+        "threading:Thread.join",
+        "queue:Queue.get",
+        "socket:socket.accept",
+        "concurrent.futures.thread:_worker",
+    }
+)
+
+
+class ProfileBusy(Exception):
+    """Exception raised when a profile is already being taken."""
+
+
+class Profile(BaseModel):
+    pid: int
+    duration: float
+    interval: float
+    samples: int
+    # Collapsed stacks, "thread;root frame;...;leaf frame", and their sample counts.
+    stacks: Dict[str, int] = {}
+
+
+def _label(frame: Any) -> str:
+    code = frame.f_code
+    return f"{frame.f_globals.get('__name__', '?')}:{getattr(code, 'co_qualname', code.co_name)}"
+
+
+class StackSampler:
+    """
+    Samples the Python stack of every thread of the process at a fixed interval from a
+    background thread, counting identical stacks.
+
+    Each sample reads `sys._current_frames()` and walks each frame chain, so the
+    overhead is a few microseconds per thread per sample and nothing is traced between
+    samples. Frames are labelled `module:qualified name`.
+    """
+
+    def __init__(self, interval: float = DEFAULT_INTERVAL):
+        self.interval = interval
+        self.stacks: Dict[Tuple[str, ...], int] = {}
+        self.samples = 0
+        self.duration = 0.0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def sample(self) -> None:
+        names = {thread.ident: thread.name for thread in threading.enumerate()}
+        own = threading.get_ident()
+        for ident, frame in sys._current_frames().items():
+            if ident == own:
+                continue
+            labels = []
+            while frame is not None:
+                labels.append(_label(frame))
+                frame = frame.f_back
+            labels.append(names.get(ident, f"thread-{ident}"))
+            stack = tuple(reversed(labels))
+            self.stacks[stack] = self.stacks.get(stack, 0) + 1
+        self.samples += 1
+
+    def _run(self) -> None:
+        start = time.perf_counter()
+        next_sample = start
+        while not self._stop.is_set():
+            self.sample()
+            next_sample += self.interval
+            delay = next_sample - time.perf_counter()
+            if delay > 0:
+                self._stop.wait(delay)
+            else:
+                # Fell behind; skip the missed samples instead of bursting.
+                next_sample = time.perf_counter()
+        self.duration = time.perf_counter() - start
+
+    def start(self) -> "StackSampler":
+        self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> Profile:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        return Profile(
+            pid=os.getpid(),
+            duration=self.duration,
+            interval=self.interval,
+            samples=self.samples,
+            stacks={";".join(stack): count for stack, count in self.stacks.items()},
+        )
+
+
+def profile_for(seconds: float, interval: float = DEFAULT_INTERVAL) -> Profile:
+    """
+    Samples the current process for `seconds` and returns the profile.
+    """
+    sampler = StackSampler(interval).start()
+    time.sleep(seconds)
+    return sampler.stop()
+
+
+def _matches(label: str, module: str) -> bool:
+    name = label.partition(":")[0]
+    return any(name == prefix or name.startswith(prefix + ".") for prefix in (module, f"modules.{module}"))
+
+
+def filter_stacks(
+    stacks: Dict[str, int], module: Optional[str] = None, include_idle: bool = False
+) -> Dict[str, int]:
+    """
+    Returns the stacks with a frame in `module` (a dotted module name, or a module under
+    the `modules` package such as "echo"), dropping stacks whose leaf frame is idle.
+    """
+    filtered = {}
+    for stack, count in stacks.items():
+        frames = stack.split(";")
+        if not include_idle and frames[-1] in IDLE_FRAMES:
+            continue
+        if module and not any(_matches(frame, module) for frame in frames[1:]):
+            continue
+        filtered[stack] = count
+    return filtered
+
+
+def merge_stacks(profiles: Iterable[Profile], module: Optional[str] = None, include_idle: bool = False) -> Dict[str, int]:
+    """
+    Returns the filtered stacks of several processes, each prefixed with "pid N" when
+    there is more than one process.
+    """
+    profiles = list(profiles)
+    merged: Dict[str, int] = {}
+    for profile in profiles:
+        prefix = f"pid {profile.pid};" if len(profiles) > 1 else ""
+        for stack, count in filter_stacks(profile.stacks, module, include_idle).items():
+            merged[prefix + stack] = merged.get(prefix + stack, 0) + count
+    return merged
+
+
+def to_collapsed(stacks: Dict[str, int]) -> str:
+    """
+    Returns the stacks in the collapsed format read by flamegraph.pl, inferno and speedscope.
+    """
+    return "".join(f"{stack} {count}\n" for stack, count in sorted(stacks.items()))
+
+
+def to_speedscope(profiles: Iterable[Profile], module: Optional[str] = None, include_idle: bool = False) -> Dict[str, Any]:
+    """
+    Returns the profiles as a speedscope file with one sampled profile per process and
+    thread, weighted in seconds.
+    """
+    frames: List[Dict[str, str]] = []
+    frame_indexes: Dict[str, int] = {}
+    speedscope_profiles = []
+    for profile in profiles:
+        threads: Dict[str, Tuple[List[List[int]], List[float]]] = {}
+        for stack, count in filter_stacks(profile.stacks, module, include_idle).items():
+            thread, *labels = stack.split(";")
+            indexes = []
+            for label in labels:
+                if label not in frame_indexes:
+                    frame_indexes[label] = len(frames)
+                    name, _, function = label.partition(":")
+                    frames.append({"name": function, "file": name})
+                indexes.append(frame_indexes[label])
+            samples, weights = threads.setdefault(thread, ([], []))
+            samples.append(indexes)
+            weights.append(count * profile.interval)
+        for thread, (samples, weights) in sorted(threads.items()):
+            speedscope_profiles.append(
+                {
+                    "type": "sampled",
+                    "name": f"pid {profile.pid} {thread}",
+                    "unit": "seconds",
+                    "startValue": 0,
+                    "endValue": sum(weights),
+                    "samples": samples,
+                    "weights": weights,
+                }
+            )
+    return {
+        "$schema": "https://www.speedscope.app/file-format-schema.json",
+        "shared": {"frames": frames},
+        "profiles": speedscope_profiles,
+        "name": "miner profile",
+        "exporter": "base.profiler",
+    }
+
+
+def get_profile_dir() -> Path:
+    return Path(os.getenv("MINER_PROFILE_DIR", DEFAULT_PROFILE_DIR))
+
+
+def worker_pids() -> List[int]:
+    """
+    Returns the pids of the prefork workers serving with this process, or only this
+    process when it is not one of them.
+    """
+    try:
+        workers = json.loads(get_pid_file().read_text(encoding="utf-8")).get("workers", [])
+    except (OSError, ValueError):
+        return [os.getpid()]
+    return workers if os.getpid() in workers else [os.getpid()]
+
+
+def _on_profile_signal(signum: int, frame: Any) -> None:
+    # Runs in the worker's main thread between bytecodes, so only starts a thread.
+    threading.Thread(target=_answer_profile_request, name="profile-request", daemon=True).start()
+
+
+def _answer_profile_request() -> None:
+    directory = get_profile_dir()
+    try:
+        request = json.loads((directory / "request.json").read_text(encoding="utf-8"))
+        profile = profile_for(min(float(request["seconds"]), MAX_SECONDS), float(request["interval"]))
+        output = directory / request["session"] / f"{os.getpid()}.json"
+        temporary = output.with_suffix(".tmp")
+        temporary.write_text(profile.model_dump_json(), encoding="utf-8")
+        os.replace(temporary, output)
+    except (OSError, ValueError, KeyError) as e:
+        logger.error(f"Profile request failed in worker {os.getpid()}: {e}")
+
+
+def install_signal_handler() -> bool:
+    """
+    Makes SIGUSR2 start a profile in this process, as requested by `profile_workers` in
+    another worker. Installed before forking, the handler is inherited by every worker.
+
+    Returns:
+        bool: False when called outside the main thread, where handlers cannot be set.
+    """
+    if threading.current_thread() is not threading.main_thread():
+        return False
+    signal.signal(signal.SIGUSR2, _on_profile_signal)
+    return True
+
+
+class _ProfileLock:
+    """
+    An exclusive lock file shared by the workers, so one profile runs at a time. Locks
+    older than the longest profile are left over from a crash and taken over.
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+
+    def __enter__(self) -> "_ProfileLock":
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        try:
+            if time.time() - self.path.stat().st_mtime > MAX_SECONDS + COLLECT_GRACE + 10:
+                self.path.unlink(missing_ok=True)
+        except FileNotFoundError:
+            pass
+        try:
+            os.close(os.open(self.path, os.O_CREAT | os.O_EXCL | os.O_WRONLY, 0o600))
+        except FileExistsError:
+            raise ProfileBusy("A profile is already running") from None
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.path.unlink(missing_ok=True)
+
+
+async def profile_workers(
+    seconds: float, interval: float = DEFAULT_INTERVAL, all_workers: bool = True
+) -> List[Profile]:
+    """
+    Samples this process and, with `all_workers`, every other prefork worker for
+    `seconds`, and returns one profile per process.
+
+    The other workers are sent SIGUSR2 after the request is written to the profile
+    directory, and write their profiles next to it. Workers that do not answer within
+    a short grace period are left out.
+
+    Raises:
+        ProfileBusy: If another profile is running.
+    """
+    seconds = min(max(seconds, interval), MAX_SECONDS)
+    directory = get_profile_dir()
+    with _ProfileLock(directory / "active.lock"):
+        session = f"{int(time.time() * 1000)}-{os.getpid()}"
+        session_dir = directory / session
+        session_dir.mkdir(parents=True)
+        others = [pid for pid in worker_pids() if pid != os.getpid()] if all_workers else []
+        if others:
+            temporary = directory / "request.tmp"
+            temporary.write_text(json.dumps({"session": session, "seconds": seconds, "interval": interval}), encoding="utf-8")
+            os.replace(temporary, directory / "request.json")
+            for pid in others:
+                try:
+                    os.kill(pid, signal.SIGUSR2)
+                except ProcessLookupError:
+                    pass
+        sampler = StackSampler(interval).start()
+        try:
+            await asyncio.sleep(seconds)
+        finally:
+            profiles = [await asyncio.to_thread(sampler.stop)]
+        deadline = time.monotonic() + COLLECT_GRACE
+        expected = {session_dir / f"{pid}.json" for pid in others}
+        while others and time.monotonic() < deadline and not all(path.exists() for path in expected):
+            await asyncio.sleep(0.05)
+        for path in sorted(expected):
+            if path.exists():
+                profiles.append(Profile.model_validate_json(path.read_text(encoding="utf-8")))
+                path.unlink()
+            else:
+                logger.warning(f"Worker {path.stem} did not return a profile")
+        for leftover in session_dir.iterdir():
+            leftover.unlink()
+        session_dir.rmdir()
+    return profiles
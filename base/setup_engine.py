@@ -0,0 +1,297 @@
+import os
+import sys
+import json
+import fcntl
+import shutil
+import hashlib
+import importlib
+import platform
+import subprocess
+from contextlib import contextmanager
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Union
+from loguru import logger
+from pydantic import BaseModel
+
+from base.base_module import ModuleConfig
+
+DEFAULT_CACHE_DIR = "~/.cache/module_miner"
+LOCKFILES = ("requirements.lock", "requirements.txt")
+STAMP_FILE = ".setup_stamp.json"
+COMPLETE_MARKER = ".complete"
+
+
+class SetupError(Exception):
+    """Exception raised when a module's environment or setup scripts fail."""
+
+
+class SetupResult(BaseModel):
+    module_name: str
+    skipped: bool
+    env_path: Optional[str] = None
+    env_reused: bool = False
+    fingerprint: str
+
+
+def module_path(module_config: ModuleConfig) -> Path:
+    return Path(module_config.module_path or f"modules/{module_config.module_name}")
+
+
+def find_lockfile(directory: Union[str, Path]) -> Optional[Path]:
+    """
+    Returns the first of `LOCKFILES` present in a module directory, or None.
+    """
+    for name in LOCKFILES:
+        path = Path(directory) / name
+        if path.is_file():
+            return path
+    return None
+
+
+def dependency_hash(lockfile: Union[str, Path]) -> str:
+    """
+    Hashes a pip requirements lockfile together with the interpreter it is installed for.
+
+    Comments, blank lines, whitespace and line order are ignored, so two modules pinning
+    the same dependency set get the same hash and share one environment.
+
+    Args:
+        lockfile (Union[str, Path]): The requirements file.
+
+    Returns:
+        str: A hex digest, stable across machines with the same Python and platform.
+    """
+    lines = set()
+    for line in Path(lockfile).read_text(encoding="utf-8").splitlines():
+        line = line.split(" #", 1)[0].strip()
+        if line and not line.startswith("#"):
+            lines.add(" ".join(line.split()))
+    digest = hashlib.sha256()
+    digest.update(f"{sys.implementation.cache_tag}-{platform.machine()}-{sys.platform}\n".encode())
+    for line in sorted(lines):
+        digest.update(line.encode() + b"\n")
+    return digest.hexdigest()[:32]
+
+
+class ModuleSetupEngine:
+    """
+    Installs module dependencies into cached virtualenvs keyed by their lockfile.
+
+    A module with a lockfile (`requirements.lock` or `requirements.txt`) gets the
+    environment `<cache>/envs/<dependency hash>`. It is built once, and then reused by every
+    module with the same dependency set. Wheels are built into a shared `<cache>/wheels`
+    directory and installed from there without touching the index, so a dependency
+    already built for one environment is not downloaded or compiled again for another.
+
+    A module's setup script and install script run inside its environment. A stamp
+    file records what they ran against: a fingerprint of the lockfile and the scripts.
+    While the fingerprint is unchanged and the environment exists, setup is skipped.
+
+    Modules without a lockfile keep running their scripts with the shared interpreter,
+    with the same stamp-based skipping.
+    """
+
+    def __init__(
+        self,
+        cache_dir: Union[str, Path, None] = None,
+        python: str = sys.executable,
+        runner: Callable[..., Any] = subprocess.run,
+    ):
+        """
+        Initializes the engine.
+
+        Args:
+            cache_dir (Union[str, Path, None]): Holds `envs/` and `wheels/`. Defaults to
+                `MODULE_ENV_CACHE` or ~/.cache/module_miner.
+            python (str): The interpreter new environments are created from.
+            runner (Callable[..., Any]): Runs commands, with the `subprocess.run` signature.
+        """
+        self.cache_dir = Path(cache_dir or os.getenv("MODULE_ENV_CACHE", DEFAULT_CACHE_DIR)).expanduser()
+        self.python = python
+        self.runner = runner
+
+    @property
+    def envs_dir(self) -> Path:
+        return self.cache_dir / "envs"
+
+    @property
+    def wheels_dir(self) -> Path:
+        return self.cache_dir / "wheels"
+
+    def env_path(self, env_hash: str) -> Path:
+        return self.envs_dir / env_hash
+
+    def env_python(self, env: Path) -> Path:
+        return env / ("Scripts/python.exe" if os.name == "nt" else "bin/python")
+
+    def site_packages(self, module_config: ModuleConfig) -> Optional[Path]:
+        """
+        Returns the site-packages directory of a module's environment, if it has one.
+        """
+        lockfile = find_lockfile(module_path(module_config))
+        if lockfile is None:
+            return None
+        env = self.env_path(dependency_hash(lockfile))
+        return next(iter(env.glob("lib/python*/site-packages")), None)
+
+    def activate(self, module_config: ModuleConfig) -> Optional[Path]:
+        """
+        Appends a module's environment to this process's `sys.path`, so that importing
+        the module in-process finds the dependencies installed for it. Packages the host
+        already has take precedence, so an environment cannot shadow them; modules that
+        need their own versions of those run sandboxed, with the environment first on
+        the workers' path through `ModuleSandbox(paths=...)`.
+
+        Returns:
+            Optional[Path]: The site-packages directory, or None for modules without a lockfile.
+        """
+        site_packages = self.site_packages(module_config)
+        if site_packages is not None and str(site_packages) not in sys.path:
+            sys.path.append(str(site_packages))
+            importlib.invalidate_caches()
+        return site_packages
+
+    def fingerprint(self, module_config: ModuleConfig, env_hash: Optional[str]) -> str:
+        directory = module_path(module_config)
+        digest = hashlib.sha256((env_hash or "system").encode())
+        for script in self._scripts(module_config):
+            digest.update(script.name.encode() + b"\0" + script.read_bytes())
+        for name in LOCKFILES:
+            if (directory / name).is_file():
+                digest.update(name.encode())
+        return digest.hexdigest()[:32]
+
+    def _scripts(self, module_config: ModuleConfig) -> List[Path]:
+        directory = module_path(module_config)
+        names = [f"setup_{module_config.module_name}.py", f"install_{module_config.module_name}.sh"]
+        return [directory / name for name in names if (directory / name).is_file()]
+
+    def _run(self, command: List[str], **kwargs: Any) -> None:
+        try:
+            self.runner(command, check=True, **kwargs)
+        except subprocess.CalledProcessError as e:
+            raise SetupError(f"{' '.join(command)} failed with exit code {e.returncode}") from e
+
+    @contextmanager
+    def _locked(self, name: str) -> Iterator[None]:
+        self.envs_dir.mkdir(parents=True, exist_ok=True)
+        with open(self.envs_dir / f"{name}.lock", "w", encoding="utf-8") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def env_ready(self, env: Path) -> bool:
+        return (env / COMPLETE_MARKER).is_file()
+
+    def ensure_env(self, lockfile: Union[str, Path]) -> Path:
+        """
+        Returns the environment for a lockfile, building it first if it does not exist.
+
+        Building happens under a file lock, so concurrent setups of the same dependency
+        set build it once. The environment only counts as built once a completion marker
+        is written, so a failed or interrupted build is rebuilt from scratch next time.
+        (Virtualenvs are not relocatable, so they are built in place.)
+
+        Raises:
+            SetupError: If creating the environment or installing dependencies fails.
+        """
+        env_hash = dependency_hash(lockfile)
+        env = self.env_path(env_hash)
+        if self.env_ready(env):
+            return env
+        with self._locked(env_hash):
+            if self.env_ready(env):
+                return env
+            shutil.rmtree(env, ignore_errors=True)
+            self.wheels_dir.mkdir(parents=True, exist_ok=True)
+            python, wheels = str(self.env_python(env)), str(self.wheels_dir)
+            self._run([self.python, "-m", "venv", str(env)])
+            self._run([python, "-m", "pip", "wheel", "-q", "-r", str(lockfile), "-w", wheels, "--find-links", wheels])
+            self._run([python, "-m", "pip", "install", "-q", "--no-index", "--find-links", wheels, "-r", str(lockfile)])
+            (env / COMPLETE_MARKER).write_text(str(lockfile), encoding="utf-8")
+            logger.info(f"Built environment {env_hash} from {lockfile}")
+        return env
+
+    def _environment(self, env: Optional[Path]) -> Optional[Dict[str, str]]:
+        if env is None:
+            return None
+        bin_dir = self.env_python(env).parent
+        return {**os.environ, "VIRTUAL_ENV": str(env), "PATH": f"{bin_dir}{os.pathsep}{os.environ.get('PATH', '')}"}
+
+    def setup(self, module_config: ModuleConfig, force: bool = False) -> SetupResult:
+        """
+        Sets up a module: its environment first, then its setup and install scripts,
+        unless nothing changed since the last successful setup.
+
+        Args:
+            module_config (ModuleConfig): The module to set up.
+            force (bool): Run the scripts even if the module is unchanged. Defaults to False.
+
+        Returns:
+            SetupResult: Whether setup was skipped and which environment the module uses.
+
+        Raises:
+            SetupError: If building the environment or running a script fails.
+        """
+        directory = module_path(module_config)
+        lockfile = find_lockfile(directory)
+        env_hash = dependency_hash(lockfile) if lockfile else None
+        fingerprint = self.fingerprint(module_config, env_hash)
+        stamp = directory / STAMP_FILE
+        env = self.env_path(env_hash) if env_hash else None
+        env_ready = env is None or self.env_ready(env)
+
+        if not force and env_ready and stamp.is_file():
+            if json.loads(stamp.read_text(encoding="utf-8")).get("fingerprint") == fingerprint:
+                logger.info(f"Module {module_config.module_name} is unchanged, skipping setup")
+                return SetupResult(
+                    module_name=module_config.module_name,
+                    skipped=True,
+                    env_path=str(env) if env else None,
+                    env_reused=env is not None,
+                    fingerprint=fingerprint,
+                )
+
+        if lockfile is not None:
+            env = self.ensure_env(lockfile)
+        python = str(self.env_python(env)) if env else "python"
+        environment = self._environment(env)
+        for script in self._scripts(module_config):
+            if script.suffix == ".py" and not directory.is_absolute():
+                self._run([python, "-m", ".".join(directory.parts + (script.stem,))], env=environment)
+            elif script.suffix == ".py":
+                self._run([python, str(script)], env=environment)
+            else:
+                self._run(["bash", str(script)], env=environment)
+
+        stamp.write_text(json.dumps({"fingerprint": fingerprint, "env": env_hash}), encoding="utf-8")
+        return SetupResult(
+            module_name=module_config.module_name,
+            skipped=False,
+            env_path=str(env) if env else None,
+            env_reused=env_ready and env is not None,
+            fingerprint=fingerprint,
+        )
+
+    def prune(self, keep: List[str]) -> List[str]:
+        """
+        Removes cached environments whose hash is not in `keep` and returns their hashes.
+        """
+        removed = []
+        if self.envs_dir.is_dir():
+            for env in self.envs_dir.iterdir():
+                if env.is_dir() and env.name not in keep:
+                    shutil.rmtree(env)
+                    removed.append(env.name)
+        return removed
+
+
+@lru_cache(maxsize=None)
+def get_setup_engine() -> ModuleSetupEngine:
+    """
+    Returns the process-wide setup engine using `MODULE_ENV_CACHE`.
+    """
+    return ModuleSetupEngine()
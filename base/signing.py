@@ -0,0 +1,421 @@
+import time
+import asyncio
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache, partial
+from hashlib import sha256
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple, Union
+
+from fastapi.responses import JSONResponse
+
+from chains.backends import ChainKeyBackend, get_backend
+
+HEADER_KEY = "x-key"
+HEADER_SIGNATURE = "x-signature"
+HEADER_TIMESTAMP = "x-timestamp"
+DEFAULT_EXEMPT_PATHS = ("/", "/docs", "/openapi.json", "/health/live", "/health/ready")
+# The /debug/ routes check their own token.
+DEFAULT_EXEMPT_PREFIXES = ("/debug/",)
+
+
+def build_message(kind: Union[str, int], path: str, timestamp: str, body: bytes, query: str = "") -> bytes:
+    """
+    Builds the byte string that is signed for a request or a response.
+
+    Args:
+        kind (Union[str, int]): The HTTP method of a request, or the status code of a response.
+        path (str): The request path.
+        timestamp (str): The X-Timestamp header value.
+        body (bytes): The request or response body.
+        query (str): The raw query string of a request, without the "?". Defaults to "".
+
+    Returns:
+        bytes: The message to sign.
+    """
+    target = f"{path}?{query}" if query else path
+    return "\n".join([str(kind), target, timestamp, sha256(body).hexdigest()]).encode("utf-8")
+
+
+def sign_request_headers(
+    keypair: Any,
+    method: str,
+    path: str,
+    body: bytes = b"",
+    backend: Union[str, ChainKeyBackend] = "commune",
+    timestamp: Optional[float] = None,
+    query: str = "",
+) -> Dict[str, str]:
+    """
+    Returns the X-Key, X-Signature and X-Timestamp headers for a signed request.
+
+    Args:
+        keypair (Any): The caller's key object for `backend`, e.g. a substrateinterface Keypair.
+        method (str): The HTTP method.
+        path (str): The request path.
+        body (bytes): The request body. Defaults to b"".
+        backend (Union[str, ChainKeyBackend]): The chain backend or its name. Defaults to "commune".
+        timestamp (Optional[float]): Signing time. Defaults to now.
+        query (str): The query string exactly as sent, without the "?". Defaults to "".
+
+    Returns:
+        Dict[str, str]: The headers to send with the request.
+    """
+    backend = get_backend(backend) if isinstance(backend, str) else backend
+    timestamp = f"{time.time() if timestamp is None else timestamp:.6f}"
+    public_key = backend.public_key(keypair)
+    signature = backend.sign(keypair, build_message(method.upper(), path, timestamp, body, query))
+    return {
+        "X-Key": backend.encode_address(public_key),
+        "X-Signature": signature.hex(),
+        "X-Timestamp": timestamp,
+    }
+
+
+@lru_cache(maxsize=65536)
+def _public_key(address: str) -> bytes:
+    from utilities.ss58 import decode_ss58_addresses
+
+    return decode_ss58_addresses([address])[0].tobytes()
+
+
+class SignatureCacheFull(Exception):
+    """Exception raised when the replay cache cannot take a signature without evicting a live one."""
+
+
+def cache_key(public_key: bytes, message: bytes, signature: bytes) -> bytes:
+    """
+    Returns the `SignatureCache` entry for a request: a digest of the signer, the signed
+    message and the signature, so a cached signature says nothing about other keys or bodies.
+    """
+    digest = sha256()
+    for part in (public_key, message, signature):
+        digest.update(len(part).to_bytes(4, "big"))
+        digest.update(part)
+    return digest.digest()
+
+
+class SignatureCache:
+    """
+    Remembers verified signatures until their replay window closes.
+
+    Entries are `cache_key` digests. One seen again inside the window is either a replay,
+    which is rejected, or when replays are allowed, a request whose verification can be
+    skipped. Live entries are never evicted to make room: a full cache refuses new ones.
+    """
+
+    def __init__(self, window: float = 30.0, maxsize: int = 100000):
+        self.window = window
+        self.maxsize = maxsize
+        self._expiry: "OrderedDict[bytes, float]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _purge(self, now: float) -> None:
+        # Entries are roughly in expiry order; when full, sweep the stragglers too.
+        # Live entries are never evicted, or their requests would become replayable.
+        while self._expiry and next(iter(self._expiry.values())) <= now:
+            self._expiry.popitem(last=False)
+        if len(self._expiry) >= self.maxsize:
+            for entry in [entry for entry, expiry in self._expiry.items() if expiry <= now]:
+                del self._expiry[entry]
+
+    def contains(self, signature: bytes, now: Optional[float] = None) -> bool:
+        now = time.time() if now is None else now
+        with self._lock:
+            expiry = self._expiry.get(signature)
+            return expiry is not None and expiry > now
+
+    def add(self, signature: bytes, timestamp: float, now: Optional[float] = None) -> bool:
+        """
+        Caches `signature`, unless the cache is full of live entries. Returns True if added.
+        """
+        now = time.time() if now is None else now
+        with self._lock:
+            self._purge(now)
+            if len(self._expiry) >= self.maxsize:
+                return False
+            self._expiry[signature] = timestamp + self.window
+            return True
+
+    def reserve(self, signature: bytes, timestamp: float, now: Optional[float] = None) -> bool:
+        """
+        Adds `signature` unless it is already cached, in one step, so that concurrent
+        copies of a request cannot all pass the replay check. Returns False if it was cached.
+
+        Raises:
+            SignatureCacheFull: If the cache is full of live entries.
+        """
+        now = time.time() if now is None else now
+        with self._lock:
+            expiry = self._expiry.get(signature)
+            if expiry is not None and expiry > now:
+                return False
+            self._purge(now)
+            if len(self._expiry) >= self.maxsize:
+                raise SignatureCacheFull(f"The replay cache holds {self.maxsize} live signatures")
+            self._expiry[signature] = timestamp + self.window
+            return True
+
+    def discard(self, signature: bytes) -> None:
+        with self._lock:
+            self._expiry.pop(signature, None)
+
+    def __len__(self) -> int:
+        return len(self._expiry)
+
+
+class BatchVerifier:
+    """
+    Verifies signatures on a thread pool, grouping requests that arrive while the pool
+    is busy into a single `verify_batch` call.
+
+    When idle every verification is dispatched immediately, so batching adds no latency
+    at low load; under load, one executor hop covers a whole batch.
+    """
+
+    def __init__(
+        self,
+        backend: ChainKeyBackend,
+        executor: Optional[ThreadPoolExecutor] = None,
+        max_batch: int = 64,
+        max_in_flight: Optional[int] = None,
+    ):
+        self.backend = backend
+        self.executor = executor or ThreadPoolExecutor(thread_name_prefix="signature-verify")
+        self.max_batch = max_batch
+        self.max_in_flight = max_in_flight or getattr(self.executor, "_max_workers", 4)
+        self.batches = 0
+        self.verified = 0
+        self._pending: List[Tuple[Tuple[bytes, bytes, bytes], asyncio.Future]] = []
+        self._in_flight = 0
+
+    async def verify(self, public_key: bytes, message: bytes, signature: bytes) -> bool:
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append(((public_key, message, signature), future))
+        self._dispatch()
+        return await future
+
+    def _dispatch(self) -> None:
+        loop = asyncio.get_running_loop()
+        while self._pending and self._in_flight < self.max_in_flight:
+            batch, self._pending = self._pending[: self.max_batch], self._pending[self.max_batch :]
+            self._in_flight += 1
+            self.batches += 1
+            items = [item for item, _ in batch]
+            task = loop.run_in_executor(self.executor, self.backend.verify_batch, items)
+            task.add_done_callback(partial(self._complete, [future for _, future in batch]))
+
+    def _complete(self, futures: List[asyncio.Future], task: asyncio.Future) -> None:
+        self._in_flight -= 1
+        error = task.exception()
+        results = task.result() if error is None else [error] * len(futures)
+        for future, result in zip(futures, results):
+            if future.done():
+                continue
+            if isinstance(result, BaseException):
+                future.set_exception(result)
+            else:
+                future.set_result(bool(result))
+        self.verified += len(futures)
+        self._dispatch()
+
+
+class SignatureMiddleware:
+    """
+    ASGI middleware that authenticates callers by signature and signs responses.
+
+    Requests must carry X-Key (caller ss58 address), X-Timestamp and X-Signature (hex) over
+    `build_message(method, path, timestamp, body, query)`. Timestamps outside the replay window
+    and signatures already seen inside it are rejected. The verified caller address is
+    stored as `request.state.caller`. An optional `authorize` check then decides whether
+    the verified caller may use the miner at all.
+
+    With a `keypair`, responses get the same three headers, signed by the miner over
+    `build_message(status, path, timestamp, body)`. Signed responses are buffered, so
+    streaming responses are sent in one piece.
+    """
+
+    def __init__(
+        self,
+        app: Callable,
+        keypair: Any = None,
+        backend: Union[str, ChainKeyBackend] = "commune",
+        window: float = 30.0,
+        reject_replays: bool = True,
+        require_signature: bool = True,
+        exempt_paths: Iterable[str] = DEFAULT_EXEMPT_PATHS,
+        exempt_prefixes: Iterable[str] = DEFAULT_EXEMPT_PREFIXES,
+        executor: Optional[ThreadPoolExecutor] = None,
+        max_batch: int = 64,
+        authorize: Optional[Callable[[str], bool]] = None,
+    ):
+        """
+        Initializes the middleware.
+
+        Args:
+            app (Callable): The wrapped ASGI application.
+            keypair (Any): The miner key used to sign responses. Responses are not signed if None.
+            backend (Union[str, ChainKeyBackend]): Chain backend or its name. Defaults to "commune".
+            window (float): Accepted clock skew and replay window in seconds. Defaults to 30.
+            reject_replays (bool): Reject signatures already seen in the window. If False they
+                are accepted from the cache without verifying again. Defaults to True.
+            require_signature (bool): Reject unsigned requests. If False they pass through
+                unauthenticated. Defaults to True.
+            exempt_paths (Iterable[str]): Paths that are never verified.
+            exempt_prefixes (Iterable[str]): Path prefixes that are never verified.
+            executor (Optional[ThreadPoolExecutor]): Pool for signing and verification.
+            max_batch (int): Largest verification batch. Defaults to 64.
+            authorize (Optional[Callable[[str], bool]]): Called with each verified caller
+                address; callers it rejects get a 403, e.g.
+                `MetagraphService.require_validator()`. Defaults to None, admitting every caller.
+        """
+        self.app = app
+        self.keypair = keypair
+        self.backend = get_backend(backend) if isinstance(backend, str) else backend
+        self.window = window
+        self.reject_replays = reject_replays
+        self.require_signature = require_signature
+        self.exempt_paths = frozenset(exempt_paths)
+        self.exempt_prefixes = tuple(exempt_prefixes)
+        self.executor = executor or ThreadPoolExecutor(thread_name_prefix="signature")
+        self.cache = SignatureCache(window)
+        self.verifier = BatchVerifier(self.backend, self.executor, max_batch)
+        self.authorize = authorize
+        self.miner_address = (
+            self.backend.encode_address(self.backend.public_key(keypair)) if keypair is not None else None
+        )
+
+    async def __call__(self, scope: Dict[str, Any], receive: Callable, send: Callable) -> None:
+        if scope["type"] != "http" or self._exempt(scope["path"]):
+            await self.app(scope, receive, send)
+            return
+
+        headers = {name.decode("latin-1"): value.decode("latin-1") for name, value in scope["headers"]}
+        if HEADER_SIGNATURE not in headers:
+            if self.require_signature:
+                await self._reject(scope, receive, send, "Missing request signature")
+                return
+            await self.app(scope, receive, send)
+            return
+
+        body = await self._read_body(receive)
+        try:
+            error = await self._authenticate(scope, headers, body)
+        except SignatureCacheFull:
+            await self._reject(scope, receive, send, "Too many signed requests, retry later", status_code=503)
+            return
+        if error is not None:
+            await self._reject(scope, receive, send, error)
+            return
+        if self.authorize is not None and not self.authorize(headers[HEADER_KEY]):
+            await self._reject(scope, receive, send, "Caller is not authorized", status_code=403)
+            return
+        scope.setdefault("state", {})["caller"] = headers[HEADER_KEY]
+
+        replayed = False
+
+        async def replay_receive() -> Dict[str, Any]:
+            nonlocal replayed
+            if not replayed:
+                replayed = True
+                return {"type": "http.request", "body": body, "more_body": False}
+            return await receive()
+
+        await self.app(scope, replay_receive, self._signing_send(scope, send) if self.keypair is not None else send)
+
+    def _exempt(self, path: str) -> bool:
+        return path in self.exempt_paths or path.startswith(self.exempt_prefixes)
+
+    async def _authenticate(self, scope: Dict[str, Any], headers: Dict[str, str], body: bytes) -> Optional[str]:
+        """
+        Returns None if the request signature is valid, otherwise the rejection reason.
+        """
+        try:
+            timestamp = headers[HEADER_TIMESTAMP]
+            now = time.time()
+            if abs(now - float(timestamp)) > self.window:
+                return "Request timestamp outside the replay window"
+            signature = bytes.fromhex(headers[HEADER_SIGNATURE])
+            public_key = _public_key(headers[HEADER_KEY])
+        except (KeyError, ValueError):
+            return "Malformed signature headers"
+
+        message = build_message(
+            scope["method"], scope["path"], timestamp, body, scope.get("query_string", b"").decode("latin-1")
+        )
+        entry = cache_key(public_key, message, signature)
+        if self.reject_replays:
+            # Reserve the signature before verifying, so concurrent copies are rejected.
+            if not self.cache.reserve(entry, float(timestamp), now):
+                return "Replayed request signature"
+            try:
+                valid = await self.verifier.verify(public_key, message, signature)
+            except BaseException:
+                self.cache.discard(entry)
+                raise
+            if not valid:
+                self.cache.discard(entry)
+                return "Invalid request signature"
+            return None
+
+        if self.cache.contains(entry, now):
+            return None
+        if not await self.verifier.verify(public_key, message, signature):
+            return "Invalid request signature"
+        self.cache.add(entry, float(timestamp), now)
+        return None
+
+    def _signing_send(self, scope: Dict[str, Any], send: Callable) -> Callable:
+        start: Dict[str, Any] = {}
+        chunks: List[bytes] = []
+
+        async def signing_send(message: Dict[str, Any]) -> None:
+            if message["type"] == "http.response.start":
+                start.update(message)
+                return
+            if message["type"] != "http.response.body":
+                await send(message)
+                return
+            chunks.append(message.get("body", b""))
+            if message.get("more_body", False):
+                return
+
+            body = b"".join(chunks)
+            timestamp = f"{time.time():.6f}"
+            signature = await asyncio.get_running_loop().run_in_executor(
+                self.executor,
+                self.backend.sign,
+                self.keypair,
+                build_message(start["status"], scope["path"], timestamp, body),
+            )
+            headers = [
+                (name, value)
+                for name, value in start.get("headers", [])
+                if name.lower() != b"content-length"
+            ]
+            headers += [
+                (b"content-length", str(len(body)).encode()),
+                (b"x-key", self.miner_address.encode()),
+                (b"x-signature", signature.hex().encode()),
+                (b"x-timestamp", timestamp.encode()),
+            ]
+            await send({**start, "headers": headers})
+            await send({"type": "http.response.body", "body": body, "more_body": False})
+
+        return signing_send
+
+    @staticmethod
+    async def _read_body(receive: Callable) -> bytes:
+        chunks = []
+        while True:
+            message = await receive()
+            chunks.append(message.get("body", b""))
+            if not message.get("more_body", False):
+                return b"".join(chunks)
+
+    @staticmethod
+    async def _reject(
+        scope: Dict[str, Any], receive: Callable, send: Callable, detail: str, status_code: int = 401
+    ) -> None:
+        response = JSONResponse({"detail": detail}, status_code=status_code)
+        await response(scope, receive, send)
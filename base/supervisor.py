@@ -0,0 +1,241 @@
+import sys
+import json
+import signal
+import asyncio
+import inspect
+import threading
+from contextlib import contextmanager
+from importlib import import_module
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple, Type, Union
+
+import uvicorn
+from fastapi import FastAPI
+from loguru import logger
+
+from base.base_miner import BaseMiner, MinerConfig
+from base.base_module import ModuleConfig
+from base.debug import add_debug_routes
+from base.loop_monitor import add_loop_monitor, loop_monitor_enabled
+from base.memory_profiler import add_memory_profiler
+from base.setup_engine import get_setup_engine
+from base.signing import SignatureMiddleware
+
+MINER_CONFIGS_PATH = "modules/miner_configs.json"
+
+
+def load_miner_configs(path: Union[str, Path] = MINER_CONFIGS_PATH) -> List[MinerConfig]:
+    """
+    Reads miner configs from a JSON file holding either a list of configs or a mapping
+    of miner names to configs. A missing file yields no configs.
+
+    Args:
+        path (Union[str, Path]): The JSON file. Defaults to modules/miner_configs.json.
+
+    Returns:
+        List[MinerConfig]: The configs, in file order.
+    """
+    path = Path(path)
+    if not path.exists():
+        return []
+    data = json.loads(path.read_text(encoding="utf-8") or "[]")
+    if isinstance(data, dict):
+        data = [{"miner_name": name, **config} for name, config in data.items()]
+    return [MinerConfig(**config) for config in data]
+
+
+class ModuleCache:
+    """
+    Imports each module package once and shares it between all miners that serve it.
+
+    A module package `modules/<name>/<name>_module.py` is imported on first use, so its
+    code and anything it loads at import time, such as model weights, exist once per
+    process however many miners serve it. A module with a lockfile is imported with its
+    environment on `sys.path`, see `ModuleSetupEngine.activate`.
+    """
+
+    def __init__(self, package: str = "modules"):
+        self.package = package
+        self.modules: Dict[str, Any] = {}
+        self._lock = threading.Lock()
+
+    def get(self, module_name: str) -> Any:
+        with self._lock:
+            if module_name not in self.modules:
+                directory = Path(*self.package.split("."), module_name)
+                get_setup_engine().activate(ModuleConfig(module_name=module_name, module_path=str(directory)))
+                self.modules[module_name] = import_module(f"{self.package}.{module_name}.{module_name}_module")
+            return self.modules[module_name]
+
+    def miner_class(self, module_name: str) -> Type[BaseMiner]:
+        """
+        Returns the first concrete BaseMiner subclass defined in the module.
+
+        Raises:
+            LookupError: If the module defines no miner class.
+        """
+        module = self.get(module_name)
+        for value in vars(module).values():
+            if (
+                inspect.isclass(value)
+                and issubclass(value, BaseMiner)
+                and value.__module__ == module.__name__
+                and not inspect.isabstract(value)
+            ):
+                return value
+        raise LookupError(f"Module {module_name} defines no BaseMiner subclass")
+
+    def create_miner(self, miner_config: MinerConfig) -> BaseMiner:
+        """
+        Builds a miner for `miner_config.module_name` from the shared module. The miner
+        class receives `module_config` (the module's `module_settings`) and/or `module`
+        (the shared module) when its constructor accepts them.
+        """
+        module = self.get(miner_config.module_name)
+        miner_class = self.miner_class(miner_config.module_name)
+        parameters = inspect.signature(miner_class.__init__).parameters
+        options: Dict[str, Any] = {}
+        if "module_config" in parameters:
+            options["module_config"] = getattr(module, "module_settings", None)
+        if "module" in parameters:
+            options["module"] = module
+        return miner_class(miner_config=miner_config, **options)
+
+
+class MinerServer(uvicorn.Server):
+    """
+    A uvicorn server that leaves signal handling to the supervisor, so several servers
+    can share one event loop.
+    """
+
+    @contextmanager
+    def capture_signals(self) -> Iterator[None]:
+        yield
+
+    def install_signal_handlers(self) -> None:
+        pass
+
+
+class MinerSupervisor:
+    """
+    Hosts many miners in one process and one event loop.
+
+    Each miner gets its own FastAPI app, port, and optionally its own signing key.
+    Miners serving the same module share that module through a `ModuleCache`.
+    The servers run concurrently on one event loop. SIGINT and SIGTERM stop all of them.
+    """
+
+    def __init__(
+        self,
+        miner_configs: List[MinerConfig],
+        module_cache: Optional[ModuleCache] = None,
+        miner_factory: Optional[Callable[[MinerConfig], BaseMiner]] = None,
+        key_loader: Optional[Callable[[str], Any]] = None,
+        log_level: str = "info",
+    ):
+        """
+        Initializes the supervisor and builds every miner and its app.
+
+        Args:
+            miner_configs (List[MinerConfig]): One config per miner.
+            module_cache (Optional[ModuleCache]): Shared module cache. Defaults to a new cache.
+            miner_factory (Optional[Callable[[MinerConfig], BaseMiner]]): Builds a miner from its
+                config. Defaults to `module_cache.create_miner`.
+            key_loader (Optional[Callable[[str], Any]]): Loads a miner's Keypair from its
+                `miner_keypath`. If given, each miner requires signed requests and signs
+                its responses with its own key.
+            log_level (str): uvicorn log level. Defaults to "info".
+
+        Raises:
+            ValueError: If two miners share a name or a host and port.
+        """
+        self.module_cache = module_cache or ModuleCache()
+        self.miner_factory = miner_factory or self.module_cache.create_miner
+        self.key_loader = key_loader
+        self.log_level = log_level
+        self.miners: Dict[str, BaseMiner] = {}
+        self.apps: Dict[str, FastAPI] = {}
+        self.servers: Dict[str, MinerServer] = {}
+
+        bound: Dict[Tuple[str, int], str] = {}
+        for miner_config in miner_configs:
+            name = miner_config.miner_name
+            address = (miner_config.miner_host or "0.0.0.0", miner_config.miner_port)
+            if name in self.miners:
+                raise ValueError(f"Duplicate miner name {name}")
+            if address in bound:
+                raise ValueError(f"Miners {bound[address]} and {name} both use {address[0]}:{address[1]}")
+            bound[address] = name
+            self.add_miner(miner_config)
+
+    @classmethod
+    def from_file(cls, path: Union[str, Path] = MINER_CONFIGS_PATH, **options: Any) -> "MinerSupervisor":
+        return cls(load_miner_configs(path), **options)
+
+    def add_miner(self, miner_config: MinerConfig) -> FastAPI:
+        """
+        Builds the miner, its app and its server.
+        """
+        miner = self.miner_factory(miner_config)
+        miner_app = FastAPI(title=miner_config.miner_name)
+        miner.add_dispatch_routes(miner_app, miner_config.module_name)
+        miner.add_health_routes(miner_app, miner_config.miner_name)
+        add_debug_routes(miner_app)
+        if loop_monitor_enabled():
+            add_loop_monitor(miner_app)
+        add_memory_profiler(miner_app)
+        if self.key_loader is not None:
+            miner_app.add_middleware(SignatureMiddleware, keypair=self.key_loader(miner_config.miner_keypath))
+
+        config = uvicorn.Config(
+            miner_app,
+            host=miner_config.miner_host or "0.0.0.0",
+            port=miner_config.miner_port,
+            log_level=self.log_level,
+        )
+        self.miners[miner_config.miner_name] = miner
+        self.apps[miner_config.miner_name] = miner_app
+        self.servers[miner_config.miner_name] = MinerServer(config)
+        return miner_app
+
+    def stop(self) -> None:
+        for server in self.servers.values():
+            server.should_exit = True
+
+    @property
+    def started(self) -> bool:
+        return bool(self.servers) and all(server.started for server in self.servers.values())
+
+    async def serve(self) -> None:
+        """
+        Serves every miner until `stop` is called or the process is signalled.
+        """
+        loop = asyncio.get_running_loop()
+        if threading.current_thread() is threading.main_thread():
+            for signum in (signal.SIGINT, signal.SIGTERM):
+                loop.add_signal_handler(signum, self.stop)
+        logger.info(f"Serving {len(self.servers)} miners: {', '.join(self.servers)}")
+        try:
+            await asyncio.gather(*[server.serve() for server in self.servers.values()])
+        finally:
+            if threading.current_thread() is threading.main_thread():
+                for signum in (signal.SIGINT, signal.SIGTERM):
+                    loop.remove_signal_handler(signum)
+
+    def run(self) -> None:
+        asyncio.run(self.serve())
+
+
+def serve_miners(path: Union[str, Path] = MINER_CONFIGS_PATH, **options: Any) -> None:
+    """
+    Serves every miner in the miner configs file from one process.
+    """
+    supervisor = MinerSupervisor.from_file(path, **options)
+    if not supervisor.servers:
+        logger.warning(f"No miners configured in {path}")
+        return
+    supervisor.run()
+
+
+if __name__ == "__main__":
+    serve_miners(sys.argv[1] if len(sys.argv) > 1 else MINER_CONFIGS_PATH)
@@ -0,0 +1,61 @@
+"""
+Compares loading a weight file with read_bytes against mapping it through ArtifactStore:
+startup time and heap (anonymous) memory of each.
+
+Usage:
+    python -m benchmarks.bench_artifact_store [size_mb]
+"""
+import os
+import sys
+import mmap
+import time
+import tempfile
+from pathlib import Path
+from typing import Dict
+
+from base.artifact_store import ArtifactStore
+from base.prefork import memory_usage
+from benchmarks.common import print_results
+
+
+def run(size_mb: int = 256) -> Dict[str, float]:
+    """
+    Returns the seconds to load the file each way, and the seconds to then touch
+    one byte per page of the mapped file.
+    """
+    with tempfile.TemporaryDirectory() as directory:
+        module_dir = Path(directory) / "bench"
+        module_dir.mkdir()
+        path = module_dir / "weights.bin"
+        with open(path, "wb") as f:
+            for _ in range(size_mb):
+                f.write(os.urandom(2**20))
+
+        results = {}
+        before = memory_usage(os.getpid())["anonymous"]
+        start = time.perf_counter()
+        data = path.read_bytes()
+        results["read_bytes_load"] = time.perf_counter() - start
+        read_heap = memory_usage(os.getpid())["anonymous"] - before
+        del data
+
+        store = ArtifactStore(directory)
+        before = memory_usage(os.getpid())["anonymous"]
+        start = time.perf_counter()
+        artifact = store.open("bench", "weights.bin")
+        buffer = artifact.buffer()
+        results["mmap_open"] = time.perf_counter() - start
+        start = time.perf_counter()
+        sum(buffer[offset] for offset in range(0, artifact.size, mmap.PAGESIZE))
+        results["mmap_touch_all_pages"] = time.perf_counter() - start
+        mapped_heap = memory_usage(os.getpid())["anonymous"] - before
+        del buffer
+        store.close()
+
+        print(f"  heap memory: read_bytes {read_heap / 2**20:.1f} MiB, mmap {mapped_heap / 2**20:.1f} MiB")
+        return results
+
+
+if __name__ == "__main__":
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else 256
+    print_results(f"artifact store ({size} MiB file)", run(size))
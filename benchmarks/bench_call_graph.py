@@ -0,0 +1,59 @@
+"""
+Times CallGraph queries on a random call graph.
+
+Usage:
+    python -m benchmarks.bench_call_graph [functions] [calls_per_function]
+"""
+import sys
+import time
+import random
+import tempfile
+from pathlib import Path
+from typing import Dict
+
+from chains.call_graph import CallGraph
+from benchmarks.common import best_of, print_results
+
+
+def run(functions: int = 50000, calls: int = 5) -> Dict[str, float]:
+    """
+    Returns the seconds to build, save and load the graph, and the seconds per query.
+    """
+    generator = random.Random(0)
+    names = [f"function_{index}" for index in range(functions)]
+    # Calls mostly go "down" to higher numbered functions, like layered code.
+    edges = [
+        (names[caller], names[min(functions - 1, caller + generator.randint(1, 200))])
+        for caller in range(functions)
+        for _ in range(calls)
+    ]
+    results = {}
+    start = time.perf_counter()
+    graph = CallGraph.from_edges(edges, names)
+    results["build"] = time.perf_counter() - start
+
+    samples = [names[generator.randrange(functions)] for _ in range(1000)]
+    results["callers_per_query"] = best_of(lambda: [graph.callers(name) for name in samples]) / len(samples)
+    results["callees_per_query"] = best_of(lambda: [graph.callees(name) for name in samples]) / len(samples)
+    deep = names[functions - 300 : functions - 200]
+    results["reachable_depth3_per_query"] = (
+        best_of(lambda: [graph.reachable(name, max_depth=3) for name in samples[:100]]) / 100
+    )
+    results["reachable_full_per_query"] = best_of(lambda: [graph.reachable(name) for name in deep], repeat=3) / len(deep)
+    results["path_per_query"] = best_of(lambda: [graph.path(name, names[-1]) for name in deep], repeat=3) / len(deep)
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = Path(directory) / "graph.npz"
+        start = time.perf_counter()
+        graph.save(path)
+        results["save"] = time.perf_counter() - start
+        start = time.perf_counter()
+        CallGraph.load(path)
+        results["load"] = time.perf_counter() - start
+    return results
+
+
+if __name__ == "__main__":
+    functions = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+    calls = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+    print_results(f"call graph ({functions} functions x {calls} calls)", run(functions, calls))
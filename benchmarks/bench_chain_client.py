@@ -0,0 +1,47 @@
+"""
+Compares sequential single-connection chain queries, the old `comx` pattern, with
+pipelined queries through ChainClientPool, against mock nodes with a simulated round trip.
+
+Usage:
+    python -m benchmarks.bench_chain_client [queries] [latency_ms]
+"""
+import sys
+import time
+import asyncio
+from typing import Dict
+
+from benchmarks.common import print_results
+from chains.commune.chain_client import ChainClientPool
+from chains.commune.mock_node import MockChainState, MockCommuneNode
+
+
+def run(queries: int = 200, latency: float = 0.005) -> Dict[str, float]:
+    """
+    Returns the total seconds to fetch `queries` balances in each configuration.
+    """
+    state = MockChainState()
+    addresses = [f"5Account{index}" for index in range(queries)]
+    for address in addresses:
+        state.balances[address] = 1
+
+    single = MockCommuneNode("mock://single", state, latency)
+    start = time.perf_counter()
+    for address in addresses:
+        single.get_balance(address)
+    results = {"sequential_single_connection": time.perf_counter() - start}
+
+    for nodes, connections in ((1, 4), (3, 4)):
+        urls = [f"mock://node{index}" for index in range(nodes)]
+        mocks = {url: MockCommuneNode(url, state, latency) for url in urls}
+        pool = ChainClientPool(urls, client_factory=mocks.__getitem__, connections_per_node=connections)
+        start = time.perf_counter()
+        asyncio.run(pool.pipeline([("get_balance", [address], {}) for address in addresses]))
+        results[f"pipelined_{nodes}_nodes_{connections}_connections"] = time.perf_counter() - start
+        pool.close()
+    return results
+
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    latency_ms = float(sys.argv[2]) if len(sys.argv) > 2 else 5.0
+    print_results(f"chain client ({count} balance queries, {latency_ms} ms round trip)", run(count, latency_ms / 1000))
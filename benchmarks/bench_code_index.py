@@ -0,0 +1,66 @@
+"""
+Times CodeIndex over a generated code base: a cold serial and parallel build, an
+update with nothing changed, and an update after one file changed.
+
+Usage:
+    python -m benchmarks.bench_code_index [files] [functions_per_file]
+"""
+import sys
+import time
+import tempfile
+from pathlib import Path
+from typing import Dict
+
+from chains.code_index import CodeIndex
+from benchmarks.common import print_results
+
+
+def write_tree(root: Path, files: int, functions: int) -> None:
+    for index in range(files):
+        lines = [f"class Module{index}:"]
+        for function in range(functions):
+            lines.append(f"    def f{function}(self, value):")
+            lines.append(f"        self.f{(function + 1) % functions}(value, mode='fast')")
+            lines.append(f"        return helper{function % 7}(value)")
+        package = root / f"package{index % 20}"
+        package.mkdir(exist_ok=True)
+        (package / f"module{index}.py").write_text("\n".join(lines) + "\n", encoding="utf-8")
+
+
+def run(files: int = 2000, functions: int = 40) -> Dict[str, float]:
+    """
+    Returns the seconds each update took.
+    """
+    results = {}
+    with tempfile.TemporaryDirectory() as directory:
+        root = Path(directory) / "tree"
+        root.mkdir()
+        write_tree(root, files, functions)
+        for label, workers in [("cold_serial", 1), ("cold_parallel", None)]:
+            index = CodeIndex(Path(directory) / f"{label}.db")
+            start = time.perf_counter()
+            index.update(root, workers=workers)
+            results[label] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        index.update(root)
+        results["unchanged"] = time.perf_counter() - start
+
+        changed = root / "package0" / "module0.py"
+        changed.write_text(changed.read_text(encoding="utf-8") + "\ndef extra():\n    pass\n", encoding="utf-8")
+        start = time.perf_counter()
+        index.update(root)
+        results["one_changed"] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        for function in range(100):
+            index.callers(f"f{function % functions}")
+        results["100_caller_queries"] = time.perf_counter() - start
+        index.close()
+    return results
+
+
+if __name__ == "__main__":
+    files = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    functions = int(sys.argv[2]) if len(sys.argv) > 2 else 40
+    print_results(f"code index ({files} files x {functions} functions)", run(files, functions))
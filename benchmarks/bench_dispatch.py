@@ -0,0 +1,80 @@
+"""
+Compares the per-request cost of `BaseMiner.add_route` with the precompiled dispatch
+routes of `BaseMiner.add_dispatch_routes`, through the ASGI app and for the dispatch
+step alone (validating the body and calling the bound method).
+
+Usage:
+    python -m benchmarks.bench_dispatch [requests]
+"""
+import sys
+from typing import Dict
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from base.base_miner import BaseMiner, MinerConfig, MinerRequest
+from base.dispatch import bind, load_dispatch_table
+from benchmarks.common import best_of, print_results
+
+
+class BenchMiner(BaseMiner):
+    def __init__(self, miner_config):
+        self.miner_config = miner_config
+        self.module = None
+
+    def process(self, miner_request):
+        return miner_request.data
+
+    def add(self, a: int, b: int = 1):
+        return a + b
+
+
+def run(requests: int = 500) -> Dict[str, float]:
+    """
+    Returns the seconds per request of each routing path.
+    """
+    miner = BenchMiner(MinerConfig(module_name="bench"))
+    route_app, dispatch_app = FastAPI(), FastAPI()
+    miner.add_route(miner, route_app)
+    miner.add_dispatch_routes(dispatch_app)
+    route_client, dispatch_client = TestClient(route_app), TestClient(dispatch_app)
+    body = {"data": "payload"}
+
+    def post(client, path, payload):
+        return lambda: [client.post(path, json=payload) for _ in range(requests)]
+
+    results = {
+        "add_route_http": best_of(post(route_client, "/modules/bench/process", body), 3) / requests,
+        "dispatch_http_process": best_of(post(dispatch_client, "/modules/bench/process", body), 3) / requests,
+        "dispatch_http_kwargs": best_of(post(dispatch_client, "/modules/bench/add", {"a": 1, "b": 2}), 3) / requests,
+    }
+
+    endpoints = bind(load_dispatch_table(__file__, "bench", "BenchMiner"), miner)
+    process, add = endpoints["process"], endpoints["add"]
+    calls = requests * 50
+
+    def reflective():
+        # What a generic handler does per request: build the model and look the method up.
+        for _ in range(calls):
+            getattr(miner, "process")(MinerRequest(**body))
+
+    def precompiled_model():
+        for _ in range(calls):
+            args, kwargs = process.validate(body)
+            process.function(*args, **kwargs)
+
+    def precompiled_kwargs():
+        payload = {"a": 1, "b": 2}
+        for _ in range(calls):
+            args, kwargs = add.validate(payload)
+            add.function(*args, **kwargs)
+
+    results["reflective_call"] = best_of(reflective) / calls
+    results["dispatch_call_process"] = best_of(precompiled_model) / calls
+    results["dispatch_call_kwargs"] = best_of(precompiled_kwargs) / calls
+    return results
+
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    print_results(f"dispatch ({count} requests)", run(count))
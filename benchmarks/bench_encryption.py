@@ -0,0 +1,53 @@
+"""
+Times the key derivation, RSA and ss58 functions of `utilities.encryption`.
+
+Usage:
+    python -m benchmarks.bench_encryption [payload_kb]
+"""
+import os
+import sys
+import tempfile
+from typing import Dict
+
+from utilities import encryption
+from benchmarks.common import best_of, print_results
+
+PASSWORD = b"benchmark password"
+
+
+def run(payload_kb: int = 64) -> Dict[str, float]:
+    """
+    Returns the seconds per call of each function.
+    """
+    payload = os.urandom(payload_kb * 1024)
+    salt = os.urandom(16)
+    public_keys = [os.urandom(32) for _ in range(1000)]
+    results = {
+        "derive_rsa_key": best_of(lambda: encryption.derive_rsa_key(PASSWORD, salt), repeat=3),
+    }
+    encrypted = encryption.ecrypt_with_password(payload, PASSWORD)
+    results["encrypt_with_password"] = best_of(lambda: encryption.ecrypt_with_password(payload, PASSWORD), repeat=3)
+    results["decrypt_with_password"] = best_of(lambda: encryption.decrypt_with_password(encrypted, PASSWORD), repeat=3)
+
+    with tempfile.TemporaryDirectory() as directory:
+        private_path = os.path.join(directory, "private_key.pem")
+        public_path = os.path.join(directory, "public_key.pem")
+        results["rsa_keypair"] = best_of(
+            lambda: encryption.derive_rsa_keypair_with_password(private_path, public_path, PASSWORD), repeat=3
+        )
+        with open(private_path, "rb") as f:
+            pem = f.read()
+        results["extract_private_key_from_pem"] = best_of(
+            lambda: encryption.extract_private_key_from_pem(pem, PASSWORD), repeat=3
+        )
+
+    encryption.encode_ss58_address(public_keys[0])
+    results["encode_ss58_address_per_key"] = (
+        best_of(lambda: [encryption.encode_ss58_address(key) for key in public_keys]) / len(public_keys)
+    )
+    return results
+
+
+if __name__ == "__main__":
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else 64
+    print_results(f"encryption ({size} KiB payload)", run(size))
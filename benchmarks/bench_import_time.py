@@ -0,0 +1,87 @@
+"""
+Measures the cold-start import cost of a module with `python -X importtime`.
+
+Usage:
+    python -m benchmarks.bench_import_time [module] [--budget-ms N]
+
+Exits non-zero when the cumulative import time exceeds the budget or a heavy chain
+SDK is imported eagerly.
+"""
+import os
+import re
+import sys
+import argparse
+import subprocess
+from pathlib import Path
+from typing import Dict, List
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+HEAVY_MODULES = (
+    "substrateinterface",
+    "solders",
+    "bitcoinlib",
+    "mnemonic",
+    "scalecodec",
+    "cryptography",
+)
+IMPORTTIME_LINE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+
+def measure_import(module: str, runs: int = 5) -> Dict[str, object]:
+    """
+    Imports `module` in fresh interpreters and parses the `-X importtime` report.
+
+    Args:
+        module (str): The dotted module name to import.
+        runs (int): Number of fresh interpreters; the fastest run is reported. Defaults to 5.
+
+    Returns:
+        Dict[str, object]: "cumulative_us" for the module, "imported" top-level packages
+            and "heavy" packages from HEAVY_MODULES that were imported.
+    """
+    env = {key: value for key, value in os.environ.items() if key != "PRIVATE_KEY_PASSWORD"}
+    best = None
+    for _ in range(runs):
+        result = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+            cwd=REPO_ROOT,
+            env=env,
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        cumulative = 0
+        imported: List[str] = []
+        for line in result.stderr.splitlines():
+            match = IMPORTTIME_LINE.match(line)
+            if not match:
+                continue
+            imported.append(match.group(4).split(".")[0])
+            if match.group(4) == module:
+                cumulative = int(match.group(2))
+        if best is None or cumulative < best["cumulative_us"]:
+            best = {"cumulative_us": cumulative, "imported": sorted(set(imported))}
+    best["heavy"] = [name for name in HEAVY_MODULES if name in best["imported"]]
+    return best
+
+
+def run(module: str = "utilities.encryption") -> Dict[str, float]:
+    """
+    Returns the cold-start import time of `module` in seconds.
+    """
+    return {f"import_{module}": measure_import(module)["cumulative_us"] / 1e6}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("module", nargs="?", default="utilities.encryption")
+    parser.add_argument("--budget-ms", type=float, default=None)
+    args = parser.parse_args()
+
+    report = measure_import(args.module)
+    milliseconds = report["cumulative_us"] / 1000
+    print(f"{args.module}: {milliseconds:.1f} ms cumulative import time")
+    if report["heavy"]:
+        print(f"eagerly imported: {', '.join(report['heavy'])}")
+    if report["heavy"] or (args.budget_ms is not None and milliseconds > args.budget_ms):
+        sys.exit(1)
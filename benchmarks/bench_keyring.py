@@ -0,0 +1,66 @@
+"""
+Compares importing a key folder one key at a time, rewriting the miner configs file
+after every add as CommuneKeyManager used to, with a parallel, lazy, batched Keyring import.
+
+Usage:
+    python -m benchmarks.bench_keyring [keys]
+"""
+import sys
+import json
+import time
+import tempfile
+from pathlib import Path
+from typing import Dict
+
+from benchmarks.common import print_results
+from chains.commune.keyring import Keyring, keypair_from_key_data, read_key_file
+
+
+def write_keys(folder: Path, count: int) -> None:
+    from substrateinterface import Keypair
+
+    keypair = Keypair.create_from_uri("//benchmark")
+    for index in range(count):
+        key_data = {
+            "path": f"key{index}",
+            "ss58_address": keypair.ss58_address,
+            "public_key": keypair.public_key.hex(),
+            "private_key": keypair.private_key.hex(),
+            "ss58_format": 42,
+            "crypto_type": 1,
+        }
+        body = {"data": json.dumps(key_data), "encrypted": False, "timestamp": 0}
+        (folder / f"key{index}.json").write_text(json.dumps(body), encoding="utf-8")
+
+
+def run(keys: int = 500) -> Dict[str, float]:
+    """
+    Returns the total seconds to import `keys` keys with their miner configs in each mode.
+    """
+    with tempfile.TemporaryDirectory() as directory:
+        folder = Path(directory)
+        write_keys(folder, keys)
+        configs_path = folder / "miner_configs.json"
+        results = {}
+
+        start = time.perf_counter()
+        keyring, configs = {}, {}
+        for path in sorted(folder.glob("key*.json")):
+            keyring[path.stem] = keypair_from_key_data(read_key_file(path))
+            configs[path.stem] = {"miner_name": path.stem}
+            configs_path.write_text(json.dumps(configs, indent=4), encoding="utf-8")
+        results["per_key_rewrite"] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        batched = Keyring(folder, configs_path)
+        batched.load_folder()
+        with batched.batch():
+            for name in batched:
+                batched.set_config(name, {"miner_name": name})
+        results["batched_lazy"] = time.perf_counter() - start
+        return results
+
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    print_results(f"keyring import ({count} keys)", run(count))
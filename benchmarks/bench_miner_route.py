@@ -0,0 +1,113 @@
+"""
+Times the miner request path end to end against a local stand-in registrar: fetching
+a module from the registrar with `BaseModule.get_module`, then serving requests to it
+through the FastAPI route of `BaseMiner.add_route`.
+
+Usage:
+    python -m benchmarks.bench_miner_route [requests] [payload_kb]
+"""
+import os
+import sys
+import base64
+import tempfile
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Dict
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from base.base_miner import BaseMiner, MinerConfig
+from base.base_module import BaseModule, ModuleConfig
+from benchmarks.common import best_of, print_results
+
+SETUP_SCRIPT = "def process(data):\n    return data\n"
+
+
+class StandInRegistrar(ThreadingHTTPServer):
+    """
+    Serves every GET with the base64 setup script a module registrar would return.
+    """
+
+    daemon_threads = True
+
+    def __init__(self):
+        body = base64.b64encode(SETUP_SCRIPT.encode("utf-8"))
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                self.send_response(200)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        super().__init__(("127.0.0.1", 0), Handler)
+        self.thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self.thread.start()
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+    def close(self) -> None:
+        self.shutdown()
+        self.server_close()
+
+
+class EchoMiner(BaseMiner):
+    def __init__(self, miner_config, module):
+        self.miner_config = miner_config
+        self.module = module
+
+    def process(self, miner_request):
+        return {"length": len(miner_request.data)}
+
+
+def run(requests: int = 500, payload_kb: int = 1) -> Dict[str, float]:
+    """
+    Returns the seconds per module fetch and per request.
+    """
+    cwd = os.getcwd()
+    registrar = StandInRegistrar()
+    with tempfile.TemporaryDirectory() as directory:
+        os.chdir(directory)
+        try:
+            config = ModuleConfig(
+                module_name="echo",
+                module_path="modules/echo",
+                module_url=registrar.url,
+                module_endpoint="/modules/echo",
+            )
+            os.makedirs(config.module_path)
+            module = BaseModule(config)
+            setup_path = Path(config.module_path, "setup_echo.py")
+
+            def fetch():
+                setup_path.unlink(missing_ok=True)
+                module.get_module()
+
+            results = {"registrar_get_module": best_of(fetch)}
+
+            app = FastAPI()
+            miner = EchoMiner(MinerConfig(miner_name="bench", module_name="echo"), module)
+            miner.add_route(miner, app)
+            client = TestClient(app)
+            body = {"data": "x" * (payload_kb * 1024)}
+            client.post("/modules/echo/process", json=body)
+            results["add_route_request"] = (
+                best_of(lambda: [client.post("/modules/echo/process", json=body) for _ in range(requests)], repeat=3)
+                / requests
+            )
+            return results
+        finally:
+            os.chdir(cwd)
+            registrar.close()
+
+
+if __name__ == "__main__":
+    arguments = [int(value) for value in sys.argv[1:3]]
+    print_results("miner request path", run(*arguments))
@@ -0,0 +1,79 @@
+"""
+Times ModuleManager config and registry operations on a temporary tree of modules:
+loading and saving module_configs.json, registering a module, importing every module
+and writing the registry.
+
+Usage:
+    python -m benchmarks.bench_module_manager [modules]
+"""
+import os
+import sys
+import tempfile
+import importlib
+from pathlib import Path
+from typing import Dict
+
+from base.base_module import ModuleConfig
+from module_manager import ModuleManager
+from benchmarks.common import best_of, print_results
+
+
+def run(modules: int = 200) -> Dict[str, float]:
+    """
+    Returns the seconds per operation.
+    """
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as directory:
+        os.chdir(directory)
+        sys.path.insert(0, directory)
+        try:
+            # A package of its own so the repository's modules/ package does not shadow it.
+            package = f"bench_modules_{os.getpid()}"
+            Path(package).mkdir()
+            Path(package, "__init__.py").write_text("", encoding="utf-8")
+            configs = [
+                ModuleConfig(
+                    module_name=f"module_{index}",
+                    module_path=f"{package}/module_{index}",
+                    module_url="http://localhost",
+                    module_endpoint="/modules",
+                )
+                for index in range(modules)
+            ]
+            for config in configs:
+                Path(config.module_path).mkdir()
+                Path(config.module_path, "__init__.py").write_text("", encoding="utf-8")
+                Path(config.module_path, f"{config.module_name}.py").write_text(
+                    "def process(data):\n    return data\n", encoding="utf-8"
+                )
+            os.makedirs("modules")
+            manager = ModuleManager(None, configs[0])
+            manager.module_configs = {config.module_name: config.model_dump() for config in configs}
+
+            results = {
+                "save_configs": best_of(manager.save_configs),
+                "get_configs": best_of(manager.get_configs),
+                "register_module": best_of(lambda: manager.register_module(configs[0])),
+            }
+
+            def import_all():
+                for config in configs:
+                    module_path = f"{package}.{config.module_name}.{config.module_name}"
+                    manager.modules[config.module_name] = importlib.import_module(module_path)
+                manager.save_registry()
+
+            importlib.invalidate_caches()
+            results["import_modules_cold"] = best_of(import_all, repeat=1)
+            results["import_modules_cached"] = best_of(import_all)
+            results["save_registry"] = best_of(manager.save_registry)
+            return results
+        finally:
+            sys.path.remove(directory)
+            for name in [name for name in sys.modules if name.startswith("bench_modules_")]:
+                del sys.modules[name]
+            os.chdir(cwd)
+
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    print_results(f"module manager ({count} modules)", run(count))
@@ -0,0 +1,53 @@
+"""
+Compares calling a module in-process against calling it through ModuleSandbox, with
+payloads going through the shared-memory rings or inline over the pipe.
+
+Usage:
+    python -m benchmarks.bench_module_sandbox [calls] [payload_kb]
+"""
+import sys
+import time
+import asyncio
+from typing import Dict
+
+from base.module_sandbox import ModuleSandbox
+from benchmarks.common import best_of, print_results
+
+TARGET = "benchmarks.bench_module_sandbox"
+
+
+def echo(value):
+    return value
+
+
+def run(calls: int = 2000, payload_kb: int = 64) -> Dict[str, float]:
+    """
+    Returns the seconds per call of each variant.
+    """
+    payload = b"x" * (payload_kb * 1024)
+    results = {"in_process": best_of(lambda: [echo(payload) for _ in range(calls)]) / calls}
+
+    for name, ring_size in [("ring", 16 * 2**20), ("pipe", 1)]:
+        sandbox = ModuleSandbox(TARGET, workers=2, ring_size=ring_size)
+        try:
+            results[f"sandbox_{name}_sync"] = (
+                best_of(lambda: [sandbox.call("echo", payload) for _ in range(calls)], repeat=3) / calls
+            )
+
+            async def concurrent():
+                await asyncio.gather(*(sandbox.acall("echo", payload) for _ in range(calls)))
+
+            start = time.perf_counter()
+            asyncio.run(concurrent())
+            results[f"sandbox_{name}_async"] = (time.perf_counter() - start) / calls
+            stats = sandbox.stats()
+            print(f"  {name}: p50 {stats['latency_p50'] * 1e6:.0f} us, p99 {stats['latency_p99'] * 1e6:.0f} us")
+        finally:
+            sandbox.close()
+    return results
+
+
+if __name__ == "__main__":
+    calls = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    payload_kb = int(sys.argv[2]) if len(sys.argv) > 2 else 64
+    print_results(f"module sandbox ({calls} calls, {payload_kb} KiB payload, per call)", run(calls, payload_kb))
@@ -0,0 +1,47 @@
+"""
+Times `chains.parse_function` on generated source: parsing one large file with
+`extract_function_calls` and building and saving its function map.
+
+Usage:
+    python -m benchmarks.bench_parse_function [functions]
+"""
+import os
+import sys
+import tempfile
+from typing import Dict
+
+from chains.parse_function import build_function_map, construct_function_map, extract_function_calls
+from benchmarks.common import best_of, print_results
+
+
+def generate_source(functions: int) -> str:
+    lines = ["class Module:"]
+    for function in range(functions):
+        lines.append(f"    def f{function}(self, value):")
+        lines.append(f"        self.f{(function + 1) % functions}(value, mode='fast')")
+        lines.append(f"        return helper{function % 7}(value)")
+    return "\n".join(lines) + "\n"
+
+
+def run(functions: int = 5000) -> Dict[str, float]:
+    """
+    Returns the seconds per call.
+    """
+    source = generate_source(functions)
+    calls = extract_function_calls(source)
+    results = {
+        "extract_function_calls": best_of(lambda: extract_function_calls(source)),
+        "build_function_map": best_of(lambda: build_function_map(calls)),
+    }
+    with tempfile.TemporaryDirectory() as directory:
+        code_path = os.path.join(directory, "module.py")
+        save_path = os.path.join(directory, "functions.json")
+        with open(code_path, "w", encoding="utf-8") as f:
+            f.write(source)
+        results["construct_function_map"] = best_of(lambda: construct_function_map(code_path, save_path))
+    return results
+
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    print_results(f"parse_function ({count} functions)", run(count))
@@ -0,0 +1,92 @@
+"""
+Compares the combined memory of prefork workers when a large module is loaded once in
+the master before forking with when every worker loads it after forking.
+
+Usage:
+    python -m benchmarks.bench_prefork [workers] [rows]
+"""
+import os
+import sys
+import json
+import time
+import signal
+import tempfile
+import textwrap
+import subprocess
+from pathlib import Path
+from typing import Dict
+
+from base.prefork import memory_report
+
+SERVER_SCRIPT = """
+import sys
+from fastapi import FastAPI
+from base.prefork import PreforkServer
+from base.supervisor import ModuleCache
+
+pid_file, workers, preload = sys.argv[1], int(sys.argv[2]), sys.argv[3] == "preload"
+cache = ModuleCache("bench_modules")
+app = FastAPI()
+PreforkServer(
+    app,
+    host="127.0.0.1",
+    port=0,
+    workers=workers,
+    preload=["big"] if preload else [],
+    module_cache=cache,
+    pid_file=pid_file,
+    report_after=3600,
+    on_worker_start=None if preload else lambda index: cache.get("big"),
+    log_level="warning",
+).run()
+"""
+
+
+def measure(directory: Path, workers: int, mode: str) -> Dict[str, float]:
+    pid_file = directory / f"{mode}.json"
+    environment = {**os.environ, "PYTHONPATH": os.pathsep.join([os.getcwd(), str(directory)])}
+    master = subprocess.Popen(
+        [sys.executable, str(directory / "server.py"), str(pid_file), str(workers), mode], env=environment
+    )
+    try:
+        while not pid_file.exists():
+            time.sleep(0.05)
+        # Give the workers time to finish loading after the fork.
+        time.sleep(3)
+        pids = json.loads(pid_file.read_text(encoding="utf-8"))
+        report = memory_report(pids["workers"])
+    finally:
+        master.send_signal(signal.SIGTERM)
+        master.wait(timeout=30)
+    return {f"{mode}_workers_rss": report["total_rss"], f"{mode}_workers_pss": report["total_pss"]}
+
+
+def run(workers: int = 4, rows: int = 1_000_000) -> Dict[str, float]:
+    """
+    Returns the summed RSS and PSS of the workers, in bytes, with and without preloading.
+
+    Raises:
+        ImportError: Where `os.fork` is unavailable, so the suite records the benchmark as skipped.
+    """
+    if not hasattr(os, "fork"):
+        raise ImportError("prefork workers require os.fork")
+    with tempfile.TemporaryDirectory() as name:
+        directory = Path(name)
+        package = directory / "bench_modules" / "big"
+        package.mkdir(parents=True)
+        (directory / "bench_modules" / "__init__.py").write_text("", encoding="utf-8")
+        (package / "__init__.py").write_text("", encoding="utf-8")
+        (package / "big_module.py").write_text(f"TABLE = [str(index) for index in range({rows})]\n", encoding="utf-8")
+        (directory / "server.py").write_text(textwrap.dedent(SERVER_SCRIPT), encoding="utf-8")
+        results = {}
+        for mode in ("lazy", "preload"):
+            results.update(measure(directory, workers, mode))
+        return results
+
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 4
+    table_rows = int(sys.argv[2]) if len(sys.argv) > 2 else 1_000_000
+    print(f"prefork worker memory ({count} workers, {table_rows} row module)")
+    for name, value in run(count, table_rows).items():
+        print(f"  {name:<22} {value / 2**20:10.1f} MiB")
@@ -0,0 +1,62 @@
+"""
+Compares registering miners one at a time with one batched MinerRegistrar call,
+against a mock node with a simulated round trip.
+
+Usage:
+    python -m benchmarks.bench_registration [miners] [latency_ms]
+"""
+import sys
+import time
+from types import SimpleNamespace
+from typing import Dict
+
+from base.base_miner import MinerConfig
+from benchmarks.common import print_results
+from chains.commune.chain_client import ChainClientPool
+from chains.commune.mock_node import MockChainState, MockCommuneNode
+from chains.commune.registration import NANO, register_miners
+
+
+def key_loader(name: str) -> SimpleNamespace:
+    return SimpleNamespace(ss58_address=f"5{name}")
+
+
+def run(miners: int = 32, latency: float = 0.005) -> Dict[str, float]:
+    """
+    Returns the total seconds to register `miners` miners in each mode.
+    """
+    results = {}
+    for mode in ("sequential", "batched"):
+        state = MockChainState(burn=10 * NANO)
+        state.add_subnet("Rootnet")
+        state.balances["5Funder"] = miners * 1000 * NANO
+        node = MockCommuneNode("mock://node", state, latency)
+        pool = ChainClientPool([node.url], client_factory=lambda url: node, connections_per_node=8)
+        configs = [
+            MinerConfig(
+                miner_name=f"{mode}{index}",
+                miner_keypath=f"{mode}{index}",
+                miner_host="0.0.0.0",
+                miner_port=5757,
+                stake=100.0,
+                netuid=0,
+                funding_key="Funder",
+                funding_modifier=5.0,
+            )
+            for index in range(miners)
+        ]
+        start = time.perf_counter()
+        if mode == "sequential":
+            for config in configs:
+                register_miners([config], pool, key_loader=key_loader)
+        else:
+            register_miners(configs, pool, key_loader=key_loader)
+        results[mode] = time.perf_counter() - start
+        pool.close()
+    return results
+
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 32
+    latency_ms = float(sys.argv[2]) if len(sys.argv) > 2 else 5.0
+    print_results(f"registration ({count} miners, {latency_ms} ms round trip)", run(count, latency_ms / 1000))
@@ -0,0 +1,51 @@
+"""
+Times module setup through ModuleSetupEngine: a cold environment build, a second module
+with the same lockfile reusing it, and a rerun of an unchanged module.
+
+Usage:
+    python -m benchmarks.bench_setup_engine [requirement ...]
+
+Without requirements the lockfile is empty, so only venv creation is measured and no
+network access is needed.
+"""
+import os
+import sys
+import time
+import tempfile
+from pathlib import Path
+from typing import Dict, Sequence
+
+from base.base_module import ModuleConfig
+from base.setup_engine import ModuleSetupEngine
+from benchmarks.common import print_results
+
+
+def run(requirements: Sequence[str] = ()) -> Dict[str, float]:
+    """
+    Returns the seconds each setup took. The default empty lockfile needs no network access.
+    """
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as directory:
+        os.chdir(directory)
+        try:
+            engine = ModuleSetupEngine(cache_dir=Path(directory) / "cache")
+            configs = []
+            for name in ("first", "second"):
+                module_dir = Path("modules") / name
+                module_dir.mkdir(parents=True)
+                (module_dir / "requirements.lock").write_text("\n".join(requirements) + "\n", encoding="utf-8")
+                (module_dir / f"install_{name}.sh").write_text("true\n", encoding="utf-8")
+                configs.append(ModuleConfig(module_name=name, module_path=str(module_dir)))
+
+            results = {}
+            for label, config in [("cold_build", configs[0]), ("shared_env", configs[1]), ("unchanged", configs[0])]:
+                start = time.perf_counter()
+                engine.setup(config)
+                results[label] = time.perf_counter() - start
+            return results
+        finally:
+            os.chdir(cwd)
+
+
+if __name__ == "__main__":
+    print_results(f"module setup ({len(sys.argv) - 1} requirements)", run(sys.argv[1:]))
@@ -0,0 +1,84 @@
+"""
+Measures the per-request overhead of SignatureMiddleware on an in-process FastAPI app.
+
+Usage:
+    python -m benchmarks.bench_signing [requests] [concurrency]
+"""
+import sys
+import time
+import asyncio
+from typing import Any, Dict, List, Optional
+
+import httpx
+from fastapi import FastAPI
+
+from base.signing import SignatureMiddleware, sign_request_headers
+from chains.backends import get_backend
+
+PATH = "/modules/echo/process"
+BODY = b'{"data": "benchmark payload"}'
+
+
+def build_app(middleware: Optional[Dict[str, Any]]) -> FastAPI:
+    app = FastAPI()
+
+    @app.post(PATH)
+    async def process():
+        return {"result": "ok"}
+
+    if middleware is not None:
+        app.add_middleware(SignatureMiddleware, **middleware)
+    return app
+
+
+async def drive(app: FastAPI, headers: List[Dict[str, str]], concurrency: int) -> float:
+    """
+    Sends one request per header set, `concurrency` at a time, and returns the elapsed seconds.
+    """
+    transport = httpx.ASGITransport(app=app)
+    semaphore = asyncio.Semaphore(concurrency)
+    async with httpx.AsyncClient(transport=transport, base_url="http://miner") as client:
+
+        async def send(request_headers: Dict[str, str]) -> None:
+            async with semaphore:
+                response = await client.post(PATH, content=BODY, headers=request_headers)
+                assert response.status_code == 200, response.text
+
+        start = time.perf_counter()
+        await asyncio.gather(*[send(request_headers) for request_headers in headers])
+        return time.perf_counter() - start
+
+
+def run(requests: int = 2000, concurrency: int = 32) -> Dict[str, float]:
+    """
+    Returns seconds per request for each middleware configuration, plus the added
+    overhead of each configuration over the unprotected app.
+    """
+    backend = get_backend("commune")
+    caller = backend.derive(b"\x01" * 32)
+    miner = backend.derive(b"\x02" * 32)
+    fresh = [sign_request_headers(caller, "POST", PATH, BODY) for _ in range(requests)]
+    repeated = [fresh[0]] * requests
+
+    cases = {
+        "no_middleware": (None, fresh),
+        "verify": ({}, fresh),
+        "verify_and_sign": ({"keypair": miner}, fresh),
+        "verify_cached": ({"reject_replays": False}, repeated),
+    }
+    results = {}
+    for name, (middleware, headers) in cases.items():
+        elapsed = asyncio.run(drive(build_app(middleware), headers, concurrency))
+        results[f"{name}_per_request"] = elapsed / requests
+    for name in ("verify", "verify_and_sign", "verify_cached"):
+        results[f"{name}_overhead"] = results[f"{name}_per_request"] - results["no_middleware_per_request"]
+    return results
+
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    parallel = int(sys.argv[2]) if len(sys.argv) > 2 else 32
+    results = run(count, parallel)
+    print(f"signature middleware ({count} requests, concurrency {parallel})")
+    for name, seconds in results.items():
+        print(f"  {name:<28} {seconds * 1e6:10.1f} us")
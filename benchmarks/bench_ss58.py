@@ -0,0 +1,51 @@
+"""
+Compares the per-call ss58 path against the bulk encode/decode/validate API.
+
+Usage:
+    python -m benchmarks.bench_ss58 [count]
+"""
+import os
+import sys
+from typing import Dict
+
+from scalecodec.utils.ss58 import ss58_decode, ss58_encode, is_valid_ss58_address
+
+from benchmarks.common import best_of, print_results
+from utilities.ss58 import (
+    Ss58AddressCache,
+    decode_ss58_addresses,
+    encode_ss58_addresses,
+    validate_ss58_addresses,
+)
+
+
+def run(count: int = 10000, repeat: int = 3) -> Dict[str, float]:
+    """
+    Times encoding, decoding and validation of `count` random public keys.
+
+    Args:
+        count (int): Number of public keys per batch. Defaults to 10000.
+        repeat (int): Runs per case; the fastest is reported. Defaults to 3.
+
+    Returns:
+        Dict[str, float]: Seconds per batch for each case.
+    """
+    public_keys = [os.urandom(32) for _ in range(count)]
+    addresses = encode_ss58_addresses(public_keys, cache=None)
+    warm_cache = Ss58AddressCache(maxsize=count)
+    encode_ss58_addresses(public_keys, cache=warm_cache)
+
+    return {
+        "encode_per_call": best_of(lambda: [ss58_encode(key, 42) for key in public_keys], repeat),
+        "encode_bulk": best_of(lambda: encode_ss58_addresses(public_keys, cache=None), repeat),
+        "encode_bulk_cached": best_of(lambda: encode_ss58_addresses(public_keys, cache=warm_cache), repeat),
+        "decode_per_call": best_of(lambda: [ss58_decode(address) for address in addresses], repeat),
+        "decode_bulk": best_of(lambda: decode_ss58_addresses(addresses), repeat),
+        "validate_per_call": best_of(lambda: [is_valid_ss58_address(address) for address in addresses], repeat),
+        "validate_bulk": best_of(lambda: validate_ss58_addresses(addresses), repeat),
+    }
+
+
+if __name__ == "__main__":
+    batch_size = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    print_results(f"ss58 ({batch_size} keys per batch)", run(batch_size))
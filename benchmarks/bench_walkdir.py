@@ -0,0 +1,72 @@
+"""
+Times bundling a synthetic tree with the old `os.walk` loop and with `walkdir.Bundler`:
+a cold build, a rerun with nothing changed, a rerun with one changed file, and a
+chunked, compressed build.
+
+Usage:
+    python -m benchmarks.bench_walkdir [files] [lines_per_file]
+"""
+import os
+import sys
+import time
+import tempfile
+from pathlib import Path
+from typing import Dict
+
+from walkdir import Bundler
+from benchmarks.common import print_results
+
+
+def legacy_bundle(root: str, output: str) -> None:
+    with open(output, "w", encoding="utf-8") as output_file:
+        for dirpath, _, filenames in os.walk(root):
+            for filename in filenames:
+                if filename.endswith(".py"):
+                    file_path = os.path.join(dirpath, filename)
+                    with open(file_path, "r", encoding="utf-8") as py_file:
+                        contents = py_file.read()
+                    output_file.write(f"File: {file_path}\n\n")
+                    output_file.write(contents)
+                    output_file.write("\n\n")
+
+
+def run(files: int = 5000, lines: int = 50) -> Dict[str, float]:
+    """
+    Returns the seconds each bundle took.
+    """
+    with tempfile.TemporaryDirectory() as directory:
+        root = Path(directory) / "tree"
+        source = "".join(f"value_{line} = {line} * 2\n" for line in range(lines))
+        for index in range(files):
+            package = root / f"package_{index // 100}"
+            package.mkdir(parents=True, exist_ok=True)
+            (package / f"module_{index}.py").write_text(source, encoding="utf-8")
+        # Ignored trees the old loop walks anyway.
+        for ignored in (".git", "venv", "data"):
+            (root / ignored).mkdir()
+            for index in range(files // 10):
+                (root / ignored / f"file_{index}.py").write_text(source, encoding="utf-8")
+
+        output = os.path.join(directory, "output.txt")
+        results = {}
+
+        def timed(label, function):
+            start = time.perf_counter()
+            function()
+            results[label] = time.perf_counter() - start
+
+        timed("legacy_walk", lambda: legacy_bundle(str(root), os.path.join(directory, "legacy.txt")))
+        bundler = Bundler(str(root), output)
+        timed("bundle_cold", bundler.bundle)
+        timed("bundle_unchanged", bundler.bundle)
+        changed = root / "package_0" / "module_0.py"
+        changed.write_text(source + "changed = True\n", encoding="utf-8")
+        timed("bundle_one_changed", bundler.bundle)
+        chunked = Bundler(str(root), os.path.join(directory, "chunked.txt"), chunk_size=1 << 20, compress=True)
+        timed("bundle_chunked_gzip", chunked.bundle)
+        return results
+
+
+if __name__ == "__main__":
+    arguments = [int(value) for value in sys.argv[1:3]]
+    print_results(f"bundle ({arguments[0] if arguments else 5000} files)", run(*arguments))
@@ -0,0 +1,24 @@
+import time
+from typing import Callable, Dict
+
+
+def best_of(function: Callable[[], object], repeat: int = 5) -> float:
+    """
+    Runs `function` `repeat` times and returns the fastest wall-clock duration in seconds.
+    """
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def print_results(title: str, results: Dict[str, float]) -> None:
+    """
+    Prints benchmark results as an aligned table of milliseconds.
+    """
+    print(title)
+    width = max(len(name) for name in results)
+    for name, seconds in results.items():
+        print(f"  {name:<{width}}  {seconds * 1000:10.3f} ms")
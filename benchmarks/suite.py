@@ -0,0 +1,239 @@
+"""
+Runs the benchmark suite offline, appends the results to a JSON-lines history and
+compares runs to flag regressions.
+
+Usage:
+    python -m benchmarks.suite run [--only NAME ...] [--label LABEL] [--full]
+    python -m benchmarks.suite compare [--baseline LABEL_OR_INDEX] [--threshold 0.2]
+    python -m benchmarks.suite list
+
+Each benchmark is a `benchmarks.bench_<name>` module whose `run()` returns seconds (or
+bytes) per metric, lower being better. `run` uses the reduced sizes in `SUITE` unless
+`--full` is given. Benchmarks whose dependencies are missing are recorded as skipped.
+`compare` exits with status 1 when a metric regressed by more than the threshold.
+"""
+import sys
+import time
+import argparse
+import platform
+import subprocess
+import traceback
+from datetime import datetime, timezone
+from importlib import import_module
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+from pydantic import BaseModel
+
+DEFAULT_HISTORY_PATH = "data/instance_data/benchmark_history.jsonl"
+DEFAULT_THRESHOLD = 0.2
+
+# Benchmark name: `run()` keyword arguments for a quick offline run.
+SUITE: Dict[str, Dict[str, Any]] = {
+    "module_manager": {"modules": 100},
+    "encryption": {"payload_kb": 16},
+    "ss58": {"count": 2000, "repeat": 3},
+    "parse_function": {"functions": 1000},
+    "miner_route": {"requests": 200},
+    "dispatch": {"requests": 100},
+    "signing": {"requests": 200, "concurrency": 8},
+    "code_index": {"files": 200, "functions": 20},
+    "call_graph": {"functions": 5000},
+    "walkdir": {"files": 500},
+    "keyring": {"keys": 50},
+    "chain_client": {"queries": 50},
+    "registration": {"miners": 8},
+    "artifact_store": {"size_mb": 16},
+    "module_sandbox": {"calls": 200, "payload_kb": 16},
+    "prefork": {"workers": 2, "rows": 100000},
+    "setup_engine": {"requirements": []},
+    "import_time": {},
+}
+
+
+class SuiteRun(BaseModel):
+    timestamp: str
+    label: Optional[str] = None
+    commit: Optional[str] = None
+    python: str
+    platform: str
+    results: Dict[str, Dict[str, float]] = {}
+    durations: Dict[str, float] = {}
+    skipped: Dict[str, str] = {}
+    failed: Dict[str, str] = {}
+
+
+class Comparison(BaseModel):
+    benchmark: str
+    metric: str
+    baseline: float
+    current: float
+    change: float
+    regression: bool
+
+
+def current_commit() -> Optional[str]:
+    try:
+        result = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, timeout=10)
+    except (OSError, subprocess.SubprocessError):
+        return None
+    return result.stdout.strip() or None
+
+
+def run_suite(names: Optional[List[str]] = None, full: bool = False, label: Optional[str] = None) -> SuiteRun:
+    """
+    Runs the named benchmarks, or the whole suite.
+
+    Args:
+        names (Optional[List[str]]): Benchmarks to run. Defaults to every benchmark in `SUITE`.
+        full (bool): Use each benchmark's default sizes instead of the quick ones.
+        label (Optional[str]): A label to find the run by later, e.g. "baseline".
+
+    Returns:
+        SuiteRun: The results, with skipped (missing dependency) and failed benchmarks.
+    """
+    suite_run = SuiteRun(
+        timestamp=datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        label=label,
+        commit=current_commit(),
+        python=platform.python_version(),
+        platform=platform.platform(),
+    )
+    for name in names or list(SUITE):
+        if name not in SUITE:
+            raise KeyError(f"Unknown benchmark {name}; choose from {', '.join(SUITE)}")
+        start = time.perf_counter()
+        try:
+            benchmark = import_module(f"benchmarks.bench_{name}")
+            results = benchmark.run() if full else benchmark.run(**SUITE[name])
+        except ImportError as e:
+            suite_run.skipped[name] = f"{type(e).__name__}: {e}"
+            print(f"{name}: skipped ({e})", file=sys.stderr)
+            continue
+        except Exception as e:
+            suite_run.failed[name] = "".join(traceback.format_exception_only(type(e), e)).strip()
+            print(f"{name}: failed ({e})", file=sys.stderr)
+            continue
+        suite_run.durations[name] = time.perf_counter() - start
+        suite_run.results[name] = {metric: float(value) for metric, value in results.items()}
+        print(f"{name}: {len(results)} metrics in {suite_run.durations[name]:.1f} s", file=sys.stderr)
+    return suite_run
+
+
+def append_history(suite_run: SuiteRun, path: str = DEFAULT_HISTORY_PATH) -> None:
+    history_path = Path(path)
+    history_path.parent.mkdir(parents=True, exist_ok=True)
+    with history_path.open("a", encoding="utf-8") as f:
+        f.write(suite_run.model_dump_json() + "\n")
+
+
+def load_history(path: str = DEFAULT_HISTORY_PATH) -> List[SuiteRun]:
+    history_path = Path(path)
+    if not history_path.exists():
+        return []
+    with history_path.open(encoding="utf-8") as f:
+        return [SuiteRun.model_validate_json(line) for line in f if line.strip()]
+
+
+def select_run(history: List[SuiteRun], reference: str) -> SuiteRun:
+    """
+    Returns the run with label `reference`, the latest if several, or the run at index
+    `reference` (negative counts from the end).
+
+    Raises:
+        LookupError: If there is no such run.
+    """
+    labelled = [suite_run for suite_run in history if suite_run.label == reference]
+    if labelled:
+        return labelled[-1]
+    try:
+        return history[int(reference)]
+    except (ValueError, IndexError):
+        raise LookupError(f"No benchmark run labelled or numbered {reference}") from None
+
+
+def compare_runs(baseline: SuiteRun, current: SuiteRun, threshold: float = DEFAULT_THRESHOLD) -> List[Comparison]:
+    """
+    Compares the metrics both runs measured. A metric regressed when it grew by more
+    than `threshold`, relative to the baseline.
+    """
+    comparisons = []
+    for name, metrics in current.results.items():
+        for metric, value in metrics.items():
+            reference = baseline.results.get(name, {}).get(metric)
+            if reference is None:
+                continue
+            change = (value - reference) / reference if reference else 0.0
+            comparisons.append(
+                Comparison(
+                    benchmark=name,
+                    metric=metric,
+                    baseline=reference,
+                    current=value,
+                    change=change,
+                    regression=change > threshold,
+                )
+            )
+    return comparisons
+
+
+def format_comparisons(comparisons: List[Comparison]) -> str:
+    if not comparisons:
+        return "No metrics in common."
+    rows: List[Tuple[str, ...]] = [("benchmark", "metric", "baseline", "current", "change", "")]
+    for comparison in comparisons:
+        rows.append(
+            (
+                comparison.benchmark,
+                comparison.metric,
+                f"{comparison.baseline:.6g}",
+                f"{comparison.current:.6g}",
+                f"{comparison.change:+.1%}",
+                "REGRESSION" if comparison.regression else "",
+            )
+        )
+    widths = [max(len(row[column]) for row in rows) for column in range(len(rows[0]))]
+    return "\n".join("  ".join(cell.ljust(width) for cell, width in zip(row, widths)).rstrip() for row in rows)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Run and compare the benchmark suite.")
+    parser.add_argument("--history", default=DEFAULT_HISTORY_PATH, help="JSON-lines file of past runs")
+    commands = parser.add_subparsers(dest="command", required=True)
+    run = commands.add_parser("run", help="run benchmarks and append the results to the history")
+    run.add_argument("--only", nargs="+", choices=list(SUITE), help="benchmarks to run")
+    run.add_argument("--label", help="label the run, e.g. baseline")
+    run.add_argument("--full", action="store_true", help="use each benchmark's default sizes")
+    compare = commands.add_parser("compare", help="compare a run against a baseline run")
+    compare.add_argument("--baseline", default="-2", help="label or index of the baseline run (default: the previous run)")
+    compare.add_argument("--current", default="-1", help="label or index of the run to check (default: the latest)")
+    compare.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD, help="relative slowdown that counts as a regression")
+    commands.add_parser("list", help="list the benchmarks in the suite")
+    args = parser.parse_args(argv)
+
+    if args.command == "list":
+        print("\n".join(SUITE))
+        return 0
+    if args.command == "run":
+        suite_run = run_suite(args.only, args.full, args.label)
+        append_history(suite_run, args.history)
+        print(suite_run.model_dump_json(indent=2))
+        return 1 if suite_run.failed else 0
+
+    history = load_history(args.history)
+    try:
+        baseline, current = select_run(history, args.baseline), select_run(history, args.current)
+    except LookupError as e:
+        print(e, file=sys.stderr)
+        return 2
+    comparisons = compare_runs(baseline, current, args.threshold)
+    print(f"baseline {baseline.timestamp} {baseline.commit or ''} -> current {current.timestamp} {current.commit or ''}")
+    print(format_comparisons(comparisons))
+    regressions = [comparison for comparison in comparisons if comparison.regression]
+    if regressions:
+        print(f"{len(regressions)} regressions above {args.threshold:.0%}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
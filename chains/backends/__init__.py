@@ -0,0 +1,16 @@
+from chains.backends.base import ChainKeyBackend, VerifyItem
+from chains.backends.registry import (
+    ENTRY_POINT_GROUP,
+    available_backends,
+    get_backend,
+    register_backend,
+)
+
+__all__ = [
+    "ChainKeyBackend",
+    "VerifyItem",
+    "ENTRY_POINT_GROUP",
+    "available_backends",
+    "get_backend",
+    "register_backend",
+]
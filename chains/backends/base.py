@@ -0,0 +1,53 @@
+from abc import ABC, abstractmethod
+from typing import Any, List, Sequence, Tuple
+
+VerifyItem = Tuple[bytes, bytes, bytes]
+
+
+class ChainKeyBackend(ABC):
+    """
+    Common derive/sign/verify/encode interface implemented by every chain backend.
+
+    Backends import their chain SDK inside their own module, so the SDK is only loaded
+    when the backend is first requested through `chains.backends.get_backend`.
+    """
+
+    name: str = ""
+
+    @abstractmethod
+    def derive(self, seed: bytes) -> Any:
+        """Derive a key object from a seed."""
+
+    @abstractmethod
+    def public_key(self, key: Any) -> bytes:
+        """Return the raw public key bytes of a key object."""
+
+    @abstractmethod
+    def sign(self, key: Any, message: bytes) -> bytes:
+        """Sign a message and return the raw signature bytes."""
+
+    @abstractmethod
+    def verify(self, public_key: bytes, message: bytes, signature: bytes) -> bool:
+        """Return True if `signature` is a valid signature of `message` by `public_key`."""
+
+    @abstractmethod
+    def encode_address(self, public_key: bytes) -> str:
+        """Encode a public key as a chain address."""
+
+    def sign_batch(self, key: Any, messages: Sequence[bytes]) -> List[bytes]:
+        """
+        Signs many messages with one key. Backends override this with their fastest native path.
+        """
+        return [self.sign(key, message) for message in messages]
+
+    def verify_batch(self, items: Sequence[VerifyItem]) -> List[bool]:
+        """
+        Verifies many (public_key, message, signature) triples, one at a time.
+        """
+        return [self.verify(public_key, message, signature) for public_key, message, signature in items]
+
+    def encode_addresses(self, public_keys: Sequence[bytes]) -> List[str]:
+        """
+        Encodes many public keys as chain addresses.
+        """
+        return [self.encode_address(public_key) for public_key in public_keys]
@@ -0,0 +1,48 @@
+from hashlib import sha256
+from typing import List, Sequence
+
+from bitcoinlib.keys import Key, sign, verify
+from bitcoinlib.wallets import Wallet
+
+from chains.backends.base import ChainKeyBackend
+
+
+class BitcoinBackend(ChainKeyBackend):
+    """
+    secp256k1 Bitcoin keys through `bitcoinlib`. Messages are signed as their SHA-256
+    digest and signatures are DER encoded.
+    """
+
+    name = "bitcoin"
+
+    def __init__(self, network: str = "bitcoin"):
+        self.network = network
+
+    def derive(self, seed: bytes) -> Key:
+        return Key(import_key=seed, network=self.network)
+
+    def create_wallet(self, name: str, seed: bytes) -> Wallet:
+        """
+        Creates a bitcoinlib wallet, persisted in bitcoinlib's database, from a seed.
+        """
+        return Wallet.create(name=name, keys=seed, network=self.network)
+
+    def public_key(self, key: Key) -> bytes:
+        return key.public_byte
+
+    def sign(self, key: Key, message: bytes) -> bytes:
+        return sign(sha256(message).digest(), key, network=self.network).as_der_encoded()
+
+    def sign_batch(self, key: Key, messages: Sequence[bytes]) -> List[bytes]:
+        network = self.network
+        return [sign(sha256(message).digest(), key, network=network).as_der_encoded() for message in messages]
+
+    def verify(self, public_key: bytes, message: bytes, signature: bytes) -> bool:
+        try:
+            return bool(verify(sha256(message).digest(), signature, public_key=Key(public_key, network=self.network)))
+        except Exception:
+            # bitcoinlib raises its own encoding and key errors for malformed input
+            return False
+
+    def encode_address(self, public_key: bytes) -> str:
+        return Key(public_key, network=self.network).address()
@@ -0,0 +1,103 @@
+from importlib import import_module
+from importlib.metadata import entry_points
+from threading import Lock
+from typing import Callable, Dict, List, Type, Union
+
+from chains.backends.base import ChainKeyBackend
+
+ENTRY_POINT_GROUP = "module_miner.chain_backends"
+
+BackendTarget = Union[str, Type[ChainKeyBackend], Callable[[], ChainKeyBackend]]
+
+# Built-in backends, as "module:attribute" targets so that nothing is imported until a
+# backend is requested. Third-party packages add backends through ENTRY_POINT_GROUP.
+_targets: Dict[str, BackendTarget] = {
+    "substrate": "chains.backends.substrate:SubstrateBackend",
+    "commune": "chains.backends.substrate:CommuneBackend",
+    "solana": "chains.backends.solana:SolanaBackend",
+    "bitcoin": "chains.backends.bitcoin:BitcoinBackend",
+}
+_instances: Dict[str, ChainKeyBackend] = {}
+_entry_points_loaded = False
+_lock = Lock()
+
+
+def register_backend(name: str, target: BackendTarget, replace: bool = False) -> None:
+    """
+    Registers a chain backend under `name`.
+
+    Args:
+        name (str): The backend name, e.g. "substrate".
+        target (BackendTarget): A "module:attribute" string, a ChainKeyBackend subclass or a
+            factory returning a backend instance. Strings are imported on first use.
+        replace (bool): Replace an existing registration. Defaults to False.
+
+    Raises:
+        ValueError: If `name` is already registered and `replace` is False.
+    """
+    with _lock:
+        if name in _targets and not replace:
+            raise ValueError(f"Chain backend '{name}' is already registered")
+        _targets[name] = target
+        _instances.pop(name, None)
+
+
+def _load_entry_points() -> None:
+    """
+    Adds backends advertised by installed packages. Only the entry point names are read
+    here; the backend modules are imported when requested.
+    """
+    global _entry_points_loaded
+    if _entry_points_loaded:
+        return
+    for entry_point in entry_points(group=ENTRY_POINT_GROUP):
+        _targets.setdefault(entry_point.name, entry_point.load)
+    _entry_points_loaded = True
+
+
+def _resolve(target: BackendTarget) -> ChainKeyBackend:
+    if isinstance(target, str):
+        module_name, attribute = target.split(":")
+        target = getattr(import_module(module_name), attribute)
+    backend = target()
+    if isinstance(backend, type):
+        # Entry points load to the backend class itself.
+        backend = backend()
+    if not isinstance(backend, ChainKeyBackend):
+        raise TypeError(f"{backend!r} is not a ChainKeyBackend")
+    return backend
+
+
+def get_backend(name: str) -> ChainKeyBackend:
+    """
+    Returns the shared instance of a chain backend, importing it on first use.
+
+    Args:
+        name (str): The backend name.
+
+    Returns:
+        ChainKeyBackend: The backend instance.
+
+    Raises:
+        KeyError: If no backend is registered under `name`.
+    """
+    backend = _instances.get(name)
+    if backend is not None:
+        return backend
+    with _lock:
+        if name not in _targets:
+            _load_entry_points()
+        if name not in _targets:
+            raise KeyError(f"Unknown chain backend '{name}'")
+        if name not in _instances:
+            _instances[name] = _resolve(_targets[name])
+        return _instances[name]
+
+
+def available_backends() -> List[str]:
+    """
+    Lists the names of all registered and installed backends without loading them.
+    """
+    with _lock:
+        _load_entry_points()
+        return sorted(_targets)
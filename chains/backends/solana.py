@@ -0,0 +1,37 @@
+from typing import List, Sequence
+
+from solders.keypair import Keypair
+from solders.pubkey import Pubkey
+from solders.signature import Signature
+
+from chains.backends.base import ChainKeyBackend
+
+
+class SolanaBackend(ChainKeyBackend):
+    """
+    ed25519 Solana keys through the `solders` bindings.
+    """
+
+    name = "solana"
+
+    def derive(self, seed: bytes) -> Keypair:
+        return Keypair.from_seed(seed)
+
+    def public_key(self, key: Keypair) -> bytes:
+        return bytes(key.pubkey())
+
+    def sign(self, key: Keypair, message: bytes) -> bytes:
+        return bytes(key.sign_message(message))
+
+    def sign_batch(self, key: Keypair, messages: Sequence[bytes]) -> List[bytes]:
+        sign_message = key.sign_message
+        return [bytes(sign_message(message)) for message in messages]
+
+    def verify(self, public_key: bytes, message: bytes, signature: bytes) -> bool:
+        try:
+            return Signature.from_bytes(signature).verify(Pubkey.from_bytes(public_key), message)
+        except ValueError:
+            return False
+
+    def encode_address(self, public_key: bytes) -> str:
+        return str(Pubkey.from_bytes(public_key))
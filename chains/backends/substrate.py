@@ -0,0 +1,77 @@
+from typing import List, Sequence
+
+import sr25519
+import ed25519_zebra
+from substrateinterface import Keypair, KeypairType
+
+from chains.backends.base import ChainKeyBackend
+from utilities.ss58 import encode_ss58_address_cached, encode_ss58_addresses
+
+
+class SubstrateBackend(ChainKeyBackend):
+    """
+    sr25519/ed25519 keys for Substrate chains, signing through the native bindings that
+    `substrateinterface.Keypair` wraps.
+    """
+
+    name = "substrate"
+
+    def __init__(self, crypto_type: int = KeypairType.SR25519, ss58_format: int = 42):
+        if crypto_type not in (KeypairType.SR25519, KeypairType.ED25519):
+            raise ValueError("Only sr25519 and ed25519 keys are supported")
+        self.crypto_type = crypto_type
+        self.ss58_format = ss58_format
+        if crypto_type == KeypairType.SR25519:
+            self._sign = lambda key, message: sr25519.sign((key.public_key, key.private_key), message)
+            self._verify = sr25519.verify
+        else:
+            self._sign = lambda key, message: ed25519_zebra.ed_sign(key.private_key, message)
+            self._verify = ed25519_zebra.ed_verify
+
+    def derive(self, seed: bytes) -> Keypair:
+        return Keypair.create_from_seed(
+            seed_hex=seed, ss58_format=self.ss58_format, crypto_type=self.crypto_type
+        )
+
+    def public_key(self, key: Keypair) -> bytes:
+        return key.public_key
+
+    def sign(self, key: Keypair, message: bytes) -> bytes:
+        return self._sign(key, message)
+
+    def sign_batch(self, key: Keypair, messages: Sequence[bytes]) -> List[bytes]:
+        # Resolve the key material once instead of going through Keypair.sign's
+        # per-call type checks and crypto type dispatch.
+        public_key, private_key = key.public_key, key.private_key
+        if self.crypto_type == KeypairType.SR25519:
+            keypair = (public_key, private_key)
+            return [sr25519.sign(keypair, message) for message in messages]
+        return [ed25519_zebra.ed_sign(private_key, message) for message in messages]
+
+    def verify(self, public_key: bytes, message: bytes, signature: bytes) -> bool:
+        try:
+            # Same fallback as Keypair.verify for signatures made by polkadot-js,
+            # which wraps the payload in <Bytes> tags.
+            return bool(
+                self._verify(signature, message, public_key)
+                or self._verify(signature, b"<Bytes>" + message + b"</Bytes>", public_key)
+            )
+        except (ValueError, TypeError):
+            return False
+
+    def encode_address(self, public_key: bytes) -> str:
+        return encode_ss58_address_cached(public_key, self.ss58_format)
+
+    def encode_addresses(self, public_keys: Sequence[bytes]) -> List[str]:
+        return encode_ss58_addresses(public_keys, self.ss58_format)
+
+
+class CommuneBackend(SubstrateBackend):
+    """
+    Commune keys: sr25519 with ss58 format 42.
+    """
+
+    name = "commune"
+
+    def __init__(self):
+        super().__init__(KeypairType.SR25519, 42)
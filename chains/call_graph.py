@@ -0,0 +1,278 @@
+import sys
+import json
+import argparse
+from collections import deque
+from pathlib import Path
+from typing import Dict, Iterable, List, Mapping, Optional, Sequence, Set, Tuple, Union
+import numpy as np
+
+from chains.code_index import DEFAULT_INDEX_PATH, CodeIndex
+
+
+class CallGraph:
+    """
+    An immutable call graph over function names, with adjacency in both directions.
+
+    Names are interned to integer ids. Each node keeps a tuple of the ids it calls and a
+    tuple of the ids calling it, so callers and callees are a dict lookup plus a tuple
+    read, and reachability is a breadth-first search over tuples. Graphs are saved as
+    compressed sparse rows (two offset/target array pairs) in one `.npz` file.
+
+    Calls are resolved by name only, as `parse_function` records them: `self.run()`
+    anywhere is an edge to every function named `run`. Names that are called but never
+    defined (builtins, library functions) are nodes with `defined` set to False.
+    """
+
+    def __init__(self, names: Sequence[str], edges: Iterable[Tuple[int, int]], defined: Iterable[int] = ()):
+        """
+        Builds the graph.
+
+        Args:
+            names (Sequence[str]): Node names; a node's id is its position.
+            edges (Iterable[Tuple[int, int]]): `(caller id, callee id)` pairs. Duplicates are dropped.
+            defined (Iterable[int]): Ids of the functions defined in the indexed code.
+        """
+        self.names = list(names)
+        self.ids: Dict[str, int] = {name: node for node, name in enumerate(self.names)}
+        forward: List[Set[int]] = [set() for _ in self.names]
+        reverse: List[Set[int]] = [set() for _ in self.names]
+        for caller, callee in edges:
+            forward[caller].add(callee)
+            reverse[callee].add(caller)
+        self._forward = [tuple(sorted(targets)) for targets in forward]
+        self._reverse = [tuple(sorted(sources)) for sources in reverse]
+        self.defined = np.zeros(len(self.names), dtype=bool)
+        self.defined[list(defined)] = True
+
+    @classmethod
+    def from_edges(cls, edges: Iterable[Tuple[str, str]], defined: Iterable[str] = ()) -> "CallGraph":
+        """
+        Builds a graph from `(caller, callee)` name pairs and the names of defined functions.
+        """
+        ids: Dict[str, int] = {}
+
+        def intern(name: str) -> int:
+            return ids.setdefault(name, len(ids))
+
+        pairs = [(intern(caller), intern(callee)) for caller, callee in edges]
+        defined_ids = [intern(name) for name in defined]
+        return cls(list(ids), pairs, defined_ids)
+
+    @classmethod
+    def from_index(cls, index: CodeIndex) -> "CallGraph":
+        """
+        Builds a graph from every call and definition in a `CodeIndex`.
+        """
+        return cls.from_edges(index.edges(), (definition.name for definition in index.definitions()))
+
+    @classmethod
+    def from_function_map(cls, function_map: Mapping[str, Mapping[str, object]]) -> "CallGraph":
+        """
+        Builds a graph from a `construct_function_map` JSON map. Such maps hold one call per function.
+        """
+        return cls.from_edges(
+            ((caller, str(entry["function"])) for caller, entry in function_map.items()), function_map.keys()
+        )
+
+    def _id(self, name: str) -> int:
+        try:
+            return self.ids[name]
+        except KeyError:
+            raise KeyError(f"Unknown function {name}") from None
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.ids
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    @property
+    def edge_count(self) -> int:
+        return sum(len(targets) for targets in self._forward)
+
+    def callees(self, name: str) -> List[str]:
+        """
+        Returns the functions `name` calls directly.
+        """
+        return [self.names[node] for node in self._forward[self._id(name)]]
+
+    def callers(self, name: str) -> List[str]:
+        """
+        Returns the functions that call `name` directly.
+        """
+        return [self.names[node] for node in self._reverse[self._id(name)]]
+
+    def _reach(self, starts: Iterable[int], adjacency: List[Tuple[int, ...]], max_depth: Optional[int]) -> Dict[int, int]:
+        depths = {start: 0 for start in starts}
+        queue = deque(depths)
+        while queue:
+            node = queue.popleft()
+            depth = depths[node] + 1
+            if max_depth is not None and depth > max_depth:
+                continue
+            for neighbour in adjacency[node]:
+                if neighbour not in depths:
+                    depths[neighbour] = depth
+                    queue.append(neighbour)
+        return depths
+
+    def reachable(self, name: str, reverse: bool = False, max_depth: Optional[int] = None) -> Dict[str, int]:
+        """
+        Returns every function transitively called by `name`, or with `reverse` every
+        function that transitively calls it, mapped to its distance in calls.
+
+        Args:
+            name (str): The starting function.
+            reverse (bool): Follow callers instead of callees. Defaults to False.
+            max_depth (Optional[int]): Stop after this many calls. Defaults to no limit.
+
+        Returns:
+            Dict[str, int]: Reached function names and distances, without `name` itself
+                unless it is part of a cycle.
+        """
+        start = self._id(name)
+        if max_depth is not None and max_depth < 1:
+            return {}
+        adjacency = self._reverse if reverse else self._forward
+        depths = self._reach(adjacency[start], adjacency, None if max_depth is None else max_depth - 1)
+        return {self.names[node]: depth + 1 for node, depth in depths.items()}
+
+    def path(self, source: str, target: str) -> Optional[List[str]]:
+        """
+        Returns the shortest call chain from `source` to `target`, or None if there is none.
+        """
+        start, goal = self._id(source), self._id(target)
+        parents: Dict[int, int] = {start: start}
+        queue = deque([start])
+        while queue:
+            node = queue.popleft()
+            if node == goal:
+                chain = [node]
+                while chain[-1] != start:
+                    chain.append(parents[chain[-1]])
+                return [self.names[step] for step in reversed(chain)]
+            for neighbour in self._forward[node]:
+                if neighbour not in parents:
+                    parents[neighbour] = node
+                    queue.append(neighbour)
+        return None
+
+    def unreachable(self, entry_points: Iterable[str]) -> List[str]:
+        """
+        Returns the defined functions that no entry point reaches: dead paths.
+        """
+        starts = [self._id(name) for name in entry_points]
+        reached = self._reach(starts, self._forward, None)
+        return sorted(self.names[node] for node in np.flatnonzero(self.defined) if node not in reached)
+
+    def uncalled(self) -> List[str]:
+        """
+        Returns the defined functions nothing in the indexed code calls.
+        """
+        return sorted(self.names[node] for node in np.flatnonzero(self.defined) if not self._reverse[node])
+
+    def hot(self, limit: int = 10, transitive: bool = False) -> List[Tuple[str, int]]:
+        """
+        Returns the defined functions with the most callers, most first.
+
+        Args:
+            limit (int): How many to return. Defaults to 10.
+            transitive (bool): Count every function that reaches it, not just direct
+                callers. Costs one search per defined function. Defaults to False.
+
+        Returns:
+            List[Tuple[str, int]]: `(name, caller count)` pairs.
+        """
+        counts = []
+        for node in np.flatnonzero(self.defined):
+            if transitive:
+                count = len(self._reach(self._reverse[node], self._reverse, None))
+            else:
+                count = len(self._reverse[node])
+            counts.append((count, self.names[node]))
+        counts.sort(key=lambda item: (-item[0], item[1]))
+        return [(name, count) for count, name in counts[:limit]]
+
+    def _csr(self, adjacency: List[Tuple[int, ...]]) -> Tuple[np.ndarray, np.ndarray]:
+        offsets = np.zeros(len(adjacency) + 1, dtype=np.int64)
+        offsets[1:] = np.cumsum([len(targets) for targets in adjacency])
+        targets = np.fromiter((node for row in adjacency for node in row), dtype=np.int32, count=int(offsets[-1]))
+        return offsets, targets
+
+    def save(self, path: Union[str, Path]) -> None:
+        """
+        Saves the graph as compressed sparse rows in a `.npz` file.
+        """
+        offsets, targets = self._csr(self._forward)
+        np.savez_compressed(
+            path,
+            names=np.array(self.names, dtype=object).astype(str),
+            offsets=offsets,
+            targets=targets,
+            defined=self.defined,
+        )
+
+    @classmethod
+    def load(cls, path: Union[str, Path]) -> "CallGraph":
+        with np.load(path) as data:
+            names, offsets, targets = data["names"].tolist(), data["offsets"], data["targets"].tolist()
+            defined = np.flatnonzero(data["defined"]).tolist()
+        edges = (
+            (caller, targets[position])
+            for caller in range(len(names))
+            for position in range(int(offsets[caller]), int(offsets[caller + 1]))
+        )
+        return cls(names, edges, defined)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Query the call graph of an indexed code base.")
+    parser.add_argument("--db", default=DEFAULT_INDEX_PATH, help="code index database built by chains.code_index")
+    parser.add_argument("--graph", help="load a graph saved with `save` instead of the index")
+    commands = parser.add_subparsers(dest="command", required=True)
+    for command in ("callers", "callees"):
+        commands.add_parser(command).add_argument("name")
+    reachable = commands.add_parser("reachable", help="functions transitively called by NAME")
+    reachable.add_argument("name")
+    reachable.add_argument("--reverse", action="store_true", help="functions transitively calling NAME")
+    reachable.add_argument("--max-depth", type=int, default=None)
+    path = commands.add_parser("path", help="shortest call chain from SOURCE to TARGET")
+    path.add_argument("source")
+    path.add_argument("target")
+    dead = commands.add_parser("dead", help="defined functions unreachable from the entry points")
+    dead.add_argument("entry_points", nargs="*", help="defaults to listing functions nothing calls")
+    hot = commands.add_parser("hot", help="functions with the most callers")
+    hot.add_argument("--limit", type=int, default=10)
+    hot.add_argument("--transitive", action="store_true")
+    save = commands.add_parser("save", help="save the graph to a .npz file")
+    save.add_argument("path")
+    args = parser.parse_args(argv)
+
+    if args.graph:
+        graph = CallGraph.load(args.graph)
+    else:
+        index = CodeIndex(args.db)
+        try:
+            graph = CallGraph.from_index(index)
+        finally:
+            index.close()
+
+    if args.command in ("callers", "callees"):
+        print("\n".join(getattr(graph, args.command)(args.name)))
+    elif args.command == "reachable":
+        reached = graph.reachable(args.name, reverse=args.reverse, max_depth=args.max_depth)
+        for name, depth in sorted(reached.items(), key=lambda item: (item[1], item[0])):
+            print(f"{depth} {name}")
+    elif args.command == "path":
+        chain = graph.path(args.source, args.target)
+        print(" -> ".join(chain) if chain else f"{args.target} is not reachable from {args.source}")
+    elif args.command == "dead":
+        print("\n".join(graph.unreachable(args.entry_points) if args.entry_points else graph.uncalled()))
+    elif args.command == "hot":
+        print(json.dumps(graph.hot(args.limit, args.transitive)))
+    elif args.command == "save":
+        graph.save(args.path)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,329 @@
+import os
+import sys
+import json
+import sqlite3
+import hashlib
+import argparse
+import threading
+from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Union
+from pydantic import BaseModel
+from loguru import logger
+
+from chains.parse_function import parse_code
+
+DEFAULT_INDEX_PATH = "data/instance_data/code_index.db"
+SKIPPED_DIRECTORIES = {".git", "__pycache__", ".venv", "venv", "node_modules", ".mypy_cache", ".pytest_cache"}
+# Below this many changed files, parsing in-process beats starting a process pool.
+PARALLEL_THRESHOLD = 32
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    id INTEGER PRIMARY KEY,
+    path TEXT UNIQUE NOT NULL,
+    hash TEXT NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    error TEXT
+);
+CREATE TABLE IF NOT EXISTS definitions (
+    file_id INTEGER NOT NULL REFERENCES files (id) ON DELETE CASCADE,
+    name TEXT NOT NULL,
+    qualname TEXT NOT NULL,
+    line INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS calls (
+    file_id INTEGER NOT NULL REFERENCES files (id) ON DELETE CASCADE,
+    caller TEXT NOT NULL,
+    caller_qualname TEXT NOT NULL,
+    callee TEXT NOT NULL,
+    arguments TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    line INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS definitions_name ON definitions (name);
+CREATE INDEX IF NOT EXISTS definitions_file ON definitions (file_id);
+CREATE INDEX IF NOT EXISTS calls_caller ON calls (caller);
+CREATE INDEX IF NOT EXISTS calls_callee ON calls (callee);
+CREATE INDEX IF NOT EXISTS calls_file ON calls (file_id);
+"""
+
+
+class CallRecord(BaseModel):
+    path: str
+    caller: str
+    caller_qualname: str
+    callee: str
+    arguments: List[str]
+    kind: str
+    line: int
+
+
+class DefinitionRecord(BaseModel):
+    path: str
+    name: str
+    qualname: str
+    line: int
+
+
+class IndexStats(BaseModel):
+    scanned: int = 0
+    parsed: int = 0
+    unchanged: int = 0
+    removed: int = 0
+    errors: int = 0
+
+
+def _parse_file(task: Tuple[str, Optional[str]]) -> Dict[str, Any]:
+    """
+    Reads and hashes one file and parses it unless its hash matches `known_hash`.
+    Runs in pool workers, so it only takes and returns plain data.
+
+    A file that cannot be read is recorded with its error, an empty hash and a zero
+    modification time, so the next update reads it again.
+    """
+    path, known_hash = task
+    result = {"path": path, "hash": "", "mtime_ns": 0, "size": 0, "error": None, "definitions": [], "calls": []}
+    try:
+        data = Path(path).read_bytes()
+        stat = os.stat(path)
+    except OSError as e:
+        result["error"] = f"{type(e).__name__}: {e}"
+        return result
+    result.update(
+        hash=hashlib.blake2b(data, digest_size=16).hexdigest(), mtime_ns=stat.st_mtime_ns, size=stat.st_size
+    )
+    if result["hash"] == known_hash:
+        result["unchanged"] = True
+        return result
+    try:
+        visitor = parse_code(data.decode("utf-8"))
+        result["definitions"] = visitor.definitions
+        result["calls"] = visitor.calls
+    except (SyntaxError, ValueError) as e:
+        result["error"] = f"{type(e).__name__}: {e}"
+    return result
+
+
+def iter_python_files(root: Union[str, Path]) -> Iterable[str]:
+    """
+    Yields the Python files under `root`, skipping VCS, cache and virtualenv directories.
+    """
+    for directory, directories, files in os.walk(root):
+        directories[:] = [name for name in directories if name not in SKIPPED_DIRECTORIES]
+        for name in files:
+            if name.endswith(".py"):
+                yield os.path.join(directory, name)
+
+
+class CodeIndex:
+    """
+    An incremental index of the functions and calls of a code base, kept in SQLite.
+
+    `update` only re-reads files whose size or modification time changed, and only
+    re-parses those whose content hash changed. Parsing runs in a process pool with the
+    single-pass `FunctionCallVisitor`. Everything is written in one transaction, and
+    queries go through indexes on caller, callee and name, so nothing needs to be loaded
+    into memory to answer them.
+    """
+
+    def __init__(self, path: Union[str, Path] = DEFAULT_INDEX_PATH):
+        """
+        Opens, or creates, the index at `path`. Use ":memory:" for a throwaway index.
+        """
+        self.path = str(path)
+        if self.path != ":memory:":
+            Path(self.path).expanduser().parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.RLock()
+        self._connection = sqlite3.connect(self.path, check_same_thread=False)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA foreign_keys=ON")
+        self._connection.executescript(SCHEMA)
+
+    def _known_files(self) -> Dict[str, Tuple[int, str, int, int]]:
+        rows = self._connection.execute("SELECT path, id, hash, mtime_ns, size FROM files")
+        return {path: (file_id, digest, mtime_ns, size) for path, file_id, digest, mtime_ns, size in rows}
+
+    def update(self, root: Union[str, Path], workers: Optional[int] = None) -> IndexStats:
+        """
+        Brings the index up to date with the Python files under `root`.
+
+        Args:
+            root (Union[str, Path]): The directory to index.
+            workers (Optional[int]): Parser processes. Defaults to the CPU count; 1 parses
+                in-process.
+
+        Returns:
+            IndexStats: How many files were scanned, parsed, unchanged, removed or failed to read or parse.
+        """
+        stats = IndexStats()
+        with self._lock:
+            known = self._known_files()
+            seen, tasks = set(), []
+            for path in iter_python_files(root):
+                seen.add(path)
+                stats.scanned += 1
+                entry = known.get(path)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                if entry is not None and (entry[2], entry[3]) == (stat.st_mtime_ns, stat.st_size):
+                    stats.unchanged += 1
+                    continue
+                tasks.append((path, entry[1] if entry else None))
+
+            results = self._parse(tasks, workers)
+            prefix = os.path.join(str(root), "")
+            removed = [
+                known[path][0] for path in known if path not in seen and (path.startswith(prefix) or path == str(root))
+            ]
+            with self._connection:
+                for result in results:
+                    if result.pop("unchanged", False):
+                        stats.unchanged += 1
+                        self._connection.execute(
+                            "UPDATE files SET mtime_ns = ?, size = ? WHERE path = ?",
+                            (result["mtime_ns"], result["size"], result["path"]),
+                        )
+                        continue
+                    stats.parsed += 1
+                    stats.errors += result["error"] is not None
+                    self._store(result, known.get(result["path"]))
+                self._connection.executemany("DELETE FROM files WHERE id = ?", [(file_id,) for file_id in removed])
+            stats.removed = len(removed)
+        logger.info(
+            f"Indexed {root}: {stats.parsed} parsed, {stats.unchanged} unchanged, "
+            f"{stats.removed} removed, {stats.errors} errors"
+        )
+        return stats
+
+    def _parse(self, tasks: List[Tuple[str, Optional[str]]], workers: Optional[int]) -> List[Dict[str, Any]]:
+        if workers == 1 or len(tasks) < PARALLEL_THRESHOLD:
+            return [_parse_file(task) for task in tasks]
+        workers = workers or os.cpu_count() or 1
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            return list(executor.map(_parse_file, tasks, chunksize=max(1, len(tasks) // (workers * 4))))
+
+    def _store(self, result: Dict[str, Any], entry: Optional[Tuple[int, str, int, int]]) -> None:
+        if entry is not None:
+            self._connection.execute("DELETE FROM files WHERE id = ?", (entry[0],))
+        file_id = self._connection.execute(
+            "INSERT INTO files (path, hash, mtime_ns, size, error) VALUES (?, ?, ?, ?, ?)",
+            (result["path"], result["hash"], result["mtime_ns"], result["size"], result["error"]),
+        ).lastrowid
+        self._connection.executemany(
+            "INSERT INTO definitions (file_id, name, qualname, line) VALUES (?, ?, ?, ?)",
+            [(file_id, *definition) for definition in result["definitions"]],
+        )
+        self._connection.executemany(
+            "INSERT INTO calls (file_id, caller, caller_qualname, callee, arguments, kind, line) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            [
+                (file_id, caller, qualname, callee, json.dumps(arguments), kind, line)
+                for caller, qualname, callee, arguments, kind, line in result["calls"]
+            ],
+        )
+
+    def _calls(self, where: str, parameters: Tuple[Any, ...]) -> List[CallRecord]:
+        rows = self._connection.execute(
+            "SELECT files.path, caller, caller_qualname, callee, arguments, kind, line "
+            f"FROM calls JOIN files ON files.id = calls.file_id WHERE {where} ORDER BY files.path, line",
+            parameters,
+        )
+        return [
+            CallRecord(
+                path=path,
+                caller=caller,
+                caller_qualname=qualname,
+                callee=callee,
+                arguments=json.loads(arguments),
+                kind=kind,
+                line=line,
+            )
+            for path, caller, qualname, callee, arguments, kind, line in rows
+        ]
+
+    def callers(self, name: str) -> List[CallRecord]:
+        """
+        Returns every call to a function or method named `name`.
+        """
+        with self._lock:
+            return self._calls("callee = ?", (name,))
+
+    def callees(self, name: str) -> List[CallRecord]:
+        """
+        Returns every call made inside functions or methods named `name`.
+        """
+        with self._lock:
+            return self._calls("caller = ?", (name,))
+
+    def calls_in(self, path: Union[str, Path]) -> List[CallRecord]:
+        with self._lock:
+            return self._calls("files.path = ?", (str(path),))
+
+    def definitions(self, name: Optional[str] = None) -> List[DefinitionRecord]:
+        """
+        Returns the definitions of functions named `name`, or all definitions.
+        """
+        query = "SELECT files.path, name, qualname, line FROM definitions JOIN files ON files.id = definitions.file_id"
+        parameters: Tuple[Any, ...] = ()
+        if name is not None:
+            query, parameters = f"{query} WHERE name = ?", (name,)
+        with self._lock:
+            rows = self._connection.execute(f"{query} ORDER BY files.path, line", parameters)
+            return [DefinitionRecord(path=path, name=name, qualname=qualname, line=line) for path, name, qualname, line in rows]
+
+    def edges(self) -> List[Tuple[str, str]]:
+        """
+        Returns the distinct `(caller, callee)` name pairs of all indexed calls.
+        """
+        with self._lock:
+            return self._connection.execute("SELECT DISTINCT caller, callee FROM calls").fetchall()
+
+    def errors(self) -> Dict[str, str]:
+        with self._lock:
+            return dict(self._connection.execute("SELECT path, error FROM files WHERE error IS NOT NULL"))
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                table: self._connection.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+                for table in ("files", "definitions", "calls")
+            }
+
+    def close(self) -> None:
+        self._connection.close()
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Index and query the functions and calls of a code base.")
+    parser.add_argument("--db", default=DEFAULT_INDEX_PATH, help="index database path")
+    commands = parser.add_subparsers(dest="command", required=True)
+    update = commands.add_parser("update", help="index the Python files under a directory")
+    update.add_argument("root", nargs="?", default=".")
+    update.add_argument("--workers", type=int, default=None)
+    for command in ("callers", "callees", "definitions"):
+        commands.add_parser(command).add_argument("name")
+    commands.add_parser("stats")
+    args = parser.parse_args(argv)
+
+    index = CodeIndex(args.db)
+    try:
+        if args.command == "update":
+            print(index.update(args.root, args.workers).model_dump_json())
+        elif args.command == "stats":
+            print(json.dumps(index.stats()))
+        elif args.command == "definitions":
+            for definition in index.definitions(args.name):
+                print(f"{definition.path}:{definition.line} {definition.qualname}")
+        else:
+            for call in getattr(index, args.command)(args.name):
+                print(f"{call.path}:{call.line} {call.caller_qualname} -> {call.callee}({', '.join(call.arguments)})")
+    finally:
+        index.close()
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,379 @@
+import os
+import time
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache, partial
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+from loguru import logger
+
+PipelineCall = Tuple[str, Sequence[Any], Dict[str, Any]]
+
+
+class ChainClientError(Exception):
+    """Exception raised when no chain node could serve a request."""
+
+
+class CommuneNodeClient:
+    """
+    Wraps a communex `CommuneClient` for one node URL and adds the nonce-aware
+    transaction submission that the pool and the registration pipeline rely on.
+    Every other attribute is delegated to the wrapped client.
+    """
+
+    def __init__(self, url: str, num_connections: int = 2, timeout: Optional[int] = None):
+        from communex.client import CommuneClient
+
+        self.url = url
+        self.client = CommuneClient(url, num_connections=num_connections, timeout=timeout)
+
+    def get_nonce(self, address: str) -> int:
+        with self.client.get_conn() as substrate:
+            return substrate.get_account_nonce(address)
+
+    def submit_call(
+        self,
+        fn: str,
+        params: Dict[str, Any],
+        key: Any,
+        module: str = "SubspaceModule",
+        nonce: Optional[int] = None,
+        wait_for_inclusion: bool = True,
+    ) -> Any:
+        """
+        Composes, signs with an explicit nonce when given, and submits an extrinsic.
+        """
+        from communex.errors import ChainTransactionError
+
+        with self.client.get_conn() as substrate:
+            call = substrate.compose_call(call_module=module, call_function=fn, call_params=params)
+            extrinsic = substrate.create_signed_extrinsic(call=call, keypair=key, nonce=nonce)
+            head = substrate.get_block_number(None)
+            response = substrate.submit_extrinsic(
+                extrinsic=extrinsic, wait_for_inclusion=wait_for_inclusion
+            )
+        if wait_for_inclusion and not response.is_success:
+            raise ChainTransactionError(response.error_message, response)
+        # Where `check_inclusion` starts looking for a receipt submitted without waiting.
+        response.submitted_block = head
+        return response
+
+    def check_inclusion(self, receipt: Any, from_block: int) -> Tuple[Optional[Any], int]:
+        """
+        Looks once for an extrinsic submitted with `wait_for_inclusion=False` in the
+        blocks from `from_block` up to the current head, without waiting for new blocks.
+
+        Returns:
+            Tuple[Optional[Any], int]: The receipt of the included extrinsic, or None if it
+                is not in a block yet, and the block to resume looking from.
+        """
+        from substrateinterface.exceptions import ExtrinsicNotFound
+
+        number = from_block
+        with self.client.get_conn() as substrate:
+            head = substrate.get_block_number(None)
+            while number <= head:
+                candidate = substrate.retrieve_extrinsic_by_hash(
+                    substrate.get_block_hash(number), receipt.extrinsic_hash
+                )
+                try:
+                    candidate.retrieve_extrinsic()
+                    return candidate, number
+                except ExtrinsicNotFound:
+                    number += 1
+        return None, number
+
+    def get_events(self, block: int) -> List[Dict[str, Any]]:
+        """
+        Returns the events of a block as `{"module", "event", "attributes"}` dicts.
+        """
+        with self.client.get_conn() as substrate:
+            records = substrate.get_events(substrate.get_block_hash(block))
+        events = []
+        for record in records:
+            event = record.value["event"]
+            attributes = event["attributes"]
+            if isinstance(attributes, dict):
+                attributes = list(attributes.values())
+            elif not isinstance(attributes, (list, tuple)):
+                attributes = [attributes]
+            events.append({"module": event["module_id"], "event": event["event_id"], "attributes": list(attributes)})
+        return events
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.client, name)
+
+
+class NodeEndpoint:
+    """
+    Health bookkeeping for one node URL. The client is created on first use.
+    """
+
+    def __init__(self, url: str):
+        self.url = url
+        self.client: Any = None
+        self.failures = 0
+        self.latency = 0.0
+        self.requests = 0
+        self.cooldown_until = 0.0
+        self.lock = threading.Lock()
+
+    def available(self, now: float) -> bool:
+        return self.cooldown_until <= now
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "url": self.url,
+            "connected": self.client is not None,
+            "failures": self.failures,
+            "latency_ms": round(self.latency * 1000, 3),
+            "requests": self.requests,
+            "cooling_down": self.cooldown_until > time.monotonic(),
+        }
+
+
+class ChainClientPool:
+    """
+    A lazily connected pool of chain clients across several node URLs.
+
+    Calls go to the healthiest node (fewest recent failures, then lowest latency) and
+    fail over to the next node when a read fails. A node that fails `failure_threshold`
+    times in a row is skipped for `cooldown` seconds. Async methods run the blocking
+    client calls on a shared thread pool, so many queries can be in flight at once
+    across the connections of every node.
+    """
+
+    def __init__(
+        self,
+        urls: Sequence[str],
+        client_factory: Optional[Callable[[str], Any]] = None,
+        connections_per_node: int = 2,
+        failure_threshold: int = 3,
+        cooldown: float = 30.0,
+        max_workers: Optional[int] = None,
+        inclusion_timeout: float = 120.0,
+        inclusion_interval: float = 2.0,
+    ):
+        """
+        Initializes the pool without connecting to any node.
+
+        Args:
+            urls (Sequence[str]): Node websocket URLs.
+            client_factory (Optional[Callable[[str], Any]]): Builds the client for a URL.
+                Defaults to `CommuneNodeClient` with `connections_per_node` connections.
+            connections_per_node (int): Connections opened per node. Defaults to 2.
+            failure_threshold (int): Consecutive failures before a node cools down. Defaults to 3.
+            cooldown (float): Seconds a failing node is skipped. Defaults to 30.
+            max_workers (Optional[int]): Size of the thread pool used by async calls.
+                Defaults to `connections_per_node` times the number of nodes.
+            inclusion_timeout (float): Seconds `wait_for_inclusion` waits for a block
+                containing the transaction. Defaults to 120.
+            inclusion_interval (float): Seconds between `wait_for_inclusion` polls. Defaults to 2.
+
+        Raises:
+            ValueError: If no URL is given.
+        """
+        if not urls:
+            raise ValueError("At least one node URL is required")
+        self.endpoints = [NodeEndpoint(url) for url in dict.fromkeys(urls)]
+        self.client_factory = client_factory or partial(
+            CommuneNodeClient, num_connections=connections_per_node
+        )
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.inclusion_timeout = inclusion_timeout
+        self.inclusion_interval = inclusion_interval
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers or connections_per_node * len(self.endpoints),
+            thread_name_prefix="chain-client",
+        )
+
+    def _ordered_endpoints(self) -> List[NodeEndpoint]:
+        now = time.monotonic()
+        available = [endpoint for endpoint in self.endpoints if endpoint.available(now)]
+        if not available:
+            # Every node is cooling down: try them all, the one that failed longest ago first.
+            return sorted(self.endpoints, key=lambda endpoint: endpoint.cooldown_until)
+        return sorted(available, key=lambda endpoint: (endpoint.failures, endpoint.latency))
+
+    def _client(self, endpoint: NodeEndpoint) -> Any:
+        if endpoint.client is None:
+            with endpoint.lock:
+                if endpoint.client is None:
+                    endpoint.client = self.client_factory(endpoint.url)
+        return endpoint.client
+
+    def _record(self, endpoint: NodeEndpoint, elapsed: Optional[float]) -> None:
+        with endpoint.lock:
+            endpoint.requests += 1
+            if elapsed is not None:
+                endpoint.failures = 0
+                endpoint.latency = elapsed if endpoint.latency == 0 else 0.8 * endpoint.latency + 0.2 * elapsed
+                return
+            endpoint.failures += 1
+            if endpoint.failures >= self.failure_threshold:
+                endpoint.cooldown_until = time.monotonic() + self.cooldown
+                # Drop the client so the next attempt reconnects.
+                endpoint.client = None
+
+    def call(self, method: str, *args: Any, idempotent: bool = True, **kwargs: Any) -> Any:
+        """
+        Calls a client method on the healthiest node, failing over between nodes.
+
+        Args:
+            method (str): The client method name, e.g. "query_map_key".
+            *args: Positional arguments for the method.
+            idempotent (bool): Retry on the next node after a failure. Pass False for
+                transaction submissions, which must not be sent twice. Defaults to True.
+            **kwargs: Keyword arguments for the method.
+
+        Returns:
+            Any: The method's result.
+
+        Raises:
+            ChainClientError: If every attempted node failed.
+        """
+        errors = []
+        for endpoint in self._ordered_endpoints():
+            start = time.perf_counter()
+            try:
+                result = getattr(self._client(endpoint), method)(*args, **kwargs)
+            except Exception as e:
+                self._record(endpoint, None)
+                logger.warning(f"Chain call {method} failed on {endpoint.url}: {e}")
+                errors.append(e)
+                if not idempotent:
+                    raise ChainClientError(f"{method} failed on {endpoint.url}") from e
+                continue
+            self._record(endpoint, time.perf_counter() - start)
+            return result
+        raise ChainClientError(f"{method} failed on every node") from errors[-1]
+
+    async def acall(self, method: str, *args: Any, idempotent: bool = True, **kwargs: Any) -> Any:
+        """
+        Async variant of `call`, run on the pool's thread pool.
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self._executor, partial(self.call, method, *args, idempotent=idempotent, **kwargs)
+        )
+
+    async def pipeline(self, calls: Iterable[PipelineCall]) -> List[Any]:
+        """
+        Sends many calls at once, without waiting for each reply before sending the next.
+
+        Args:
+            calls (Iterable[PipelineCall]): (method, args, kwargs) tuples.
+
+        Returns:
+            List[Any]: Results in call order. A failed call's ChainClientError is
+                returned in its place instead of cancelling the others.
+        """
+        return await asyncio.gather(
+            *[self.acall(method, *args, **kwargs) for method, args, kwargs in calls],
+            return_exceptions=True,
+        )
+
+    async def query(self, name: str, params: Optional[List[Any]] = None, module: str = "SubspaceModule") -> Any:
+        return await self.acall("query", name, params or [], module)
+
+    async def query_map(
+        self, name: str, params: Optional[List[Any]] = None, module: str = "SubspaceModule"
+    ) -> Dict[Any, Any]:
+        result = await self.acall("query_map", name, params or [], module)
+        return result[name]
+
+    async def get_balance(self, address: str) -> int:
+        return await self.acall("get_balance", address)
+
+    async def get_block_number(self) -> int:
+        block = await self.acall("get_block")
+        return int(block["header"]["number"])
+
+    async def get_nonce(self, address: str) -> int:
+        return await self.acall("get_nonce", address)
+
+    async def submit_call(
+        self,
+        fn: str,
+        params: Dict[str, Any],
+        key: Any,
+        module: str = "SubspaceModule",
+        nonce: Optional[int] = None,
+        wait_for_inclusion: bool = True,
+    ) -> Any:
+        return await self.acall(
+            "submit_call",
+            fn,
+            params,
+            key,
+            module=module,
+            nonce=nonce,
+            wait_for_inclusion=wait_for_inclusion,
+            idempotent=False,
+        )
+
+    async def wait_for_inclusion(self, receipt: Any) -> Any:
+        """
+        Waits until a transaction sent with `submit_call(..., wait_for_inclusion=False)`
+        is in a block, and returns its receipt.
+
+        The wait is a series of short `check_inclusion` calls with `asyncio.sleep` in
+        between, so a waiting transaction does not hold one of the pool's threads.
+        A failed check is not retried on other nodes.
+
+        Raises:
+            ChainTransactionError: If the transaction failed, or is not in a block
+                within `inclusion_timeout` seconds.
+            ChainClientError: If a node could not be asked.
+        """
+        from communex.errors import ChainTransactionError
+
+        included = receipt if getattr(receipt, "block_hash", None) is not None else None
+        number = receipt.submitted_block
+        deadline = time.monotonic() + self.inclusion_timeout
+        while included is None:
+            included, number = await self.acall("check_inclusion", receipt, number, idempotent=False)
+            if included is not None:
+                break
+            if time.monotonic() > deadline:
+                raise ChainTransactionError(
+                    f"Extrinsic {receipt.extrinsic_hash} not included after {self.inclusion_timeout:g}s", receipt
+                )
+            await asyncio.sleep(self.inclusion_interval)
+        if not included.is_success:
+            raise ChainTransactionError(included.error_message, included)
+        return included
+
+    def health(self) -> List[Dict[str, Any]]:
+        """
+        Returns the health of every node, healthiest first.
+        """
+        return [endpoint.snapshot() for endpoint in self._ordered_endpoints()]
+
+    def close(self) -> None:
+        self._executor.shutdown(wait=False)
+        for endpoint in self.endpoints:
+            endpoint.client = None
+
+
+def get_node_urls() -> List[str]:
+    """
+    Returns node URLs from the comma separated `COMMUNE_NODE_URLS` environment variable,
+    falling back to the communex default node list.
+    """
+    urls = [url.strip() for url in os.getenv("COMMUNE_NODE_URLS", "").split(",") if url.strip()]
+    if urls:
+        return urls
+    from communex._common import ComxSettings
+
+    return list(ComxSettings().NODE_URLS)
+
+
+@lru_cache(maxsize=None)
+def get_chain_client() -> ChainClientPool:
+    """
+    Returns the process-wide chain client pool, created on first use. No connection is
+    opened until the first query.
+    """
+    return ChainClientPool(get_node_urls())
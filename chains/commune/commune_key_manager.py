@@ -1,19 +1,16 @@
-import json
 from abc import ABC, abstractmethod
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict
 from typing import Dict, Any, Optional
 from pathlib import Path
 from base.base_miner import MinerConfig
-from substrateinterface import Keypair
-from communex._common import get_node_url
-from communex.client import CommuneClient
+from chains.commune.chain_client import ChainClientPool, get_chain_client
+from chains.commune.keyring import DEFAULT_KEY_FOLDER, Keyring, expand_path
+from chains.commune.registration import RegistrationResult, register_miners
 from dotenv import load_dotenv
 
 
 load_dotenv()
 
-comx = CommuneClient(get_node_url())
-
 
 class KeyManager(ABC):
     @abstractmethod
@@ -49,68 +46,115 @@ class KeyManager(ABC):
 
 
 class CommuneKeyManager(BaseModel, KeyManager):
-    keyring: Dict[str, Any]
-    miner_config: MinerConfig
-    miner_configs: Dict[str, MinerConfig]
-    miner_key_name: str
-    miner_key_path: str
-    miner_endpoint: str
-    miner_url: str
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    keyring: Keyring
+    miner_config: Optional[MinerConfig] = None
+    miner_key_name: Optional[str] = None
+    miner_key_path: Optional[str] = None
+    miner_endpoint: Optional[str] = None
+    miner_url: Optional[str] = None
 
     def __init__(
         self,
-        keyring: Dict[str, Any],
-        miner_config: MinerConfig,
-        miner_configs: Dict[str, MinerConfig],
-        miner_key_name: str,
-        miner_key_path: str,
-        miner_endpoint: str,
-        miner_url: str,
+        keyring: Optional[Keyring] = None,
+        miner_config: Optional[MinerConfig] = None,
+        miner_configs: Optional[Dict[str, Any]] = None,
+        miner_key_name: Optional[str] = None,
+        miner_key_path: Optional[str] = None,
+        miner_endpoint: Optional[str] = None,
+        miner_url: Optional[str] = None,
+        key_folder: str = DEFAULT_KEY_FOLDER,
     ):
-        self.keyring = keyring
-        self.miner_config = miner_config
-        self.miner_configs = miner_configs
-        self.miner_key_name = miner_key_name
-        self.miner_key_path = miner_key_path
-        self.miner_endpoint = miner_endpoint
-        self.miner_url = miner_url
+        """
+        Initializes the key manager.
+
+        Args:
+            keyring (Optional[Keyring]): The keyring. Defaults to one over `key_folder`
+                that stores miner configs in `miner_key_path`.
+            miner_config (Optional[MinerConfig]): The active miner config.
+            miner_configs (Optional[Dict[str, Any]]): Initial miner configs by key name.
+            miner_key_name (Optional[str]): The active miner key name.
+            miner_key_path (Optional[str]): JSON file the miner configs are saved to.
+            miner_endpoint (Optional[str]): The miner endpoint.
+            miner_url (Optional[str]): The miner URL.
+            key_folder (str): Folder of Commune key files. Defaults to ~/.commune/key.
+        """
+        keyring = keyring or Keyring(key_folder, miner_key_path)
+        for key_name, config in (miner_configs or {}).items():
+            keyring.configs[key_name] = config.model_dump() if isinstance(config, BaseModel) else config
+        super().__init__(
+            keyring=keyring,
+            miner_config=miner_config,
+            miner_key_name=miner_key_name,
+            miner_key_path=miner_key_path,
+            miner_endpoint=miner_endpoint,
+            miner_url=miner_url,
+        )
+
+    @property
+    def miner_configs(self) -> Dict[str, Any]:
+        return self.keyring.configs
+
+    def _use_keypath(self, miner_keypath: Optional[Path]) -> None:
+        if miner_keypath is not None:
+            self.keyring.configs_path = expand_path(miner_keypath)
 
     def add_miner_key(
         self,
         key_name: str,
-        miner_keypath: Path,
+        miner_keypath: Optional[Path] = None,
         miner_config: Optional[MinerConfig] = None,
     ):
-        with open(f"$HOME/.commune/{key_name}.json", "r") as f:
-            json_data = json.loads(f.read())["data"]
-            keypair = Keypair.from_uri(json_data)
-            keyring = self.keyring
-            keyring[key_name] = keypair
-            self.keyring = keyring
+        """
+        Loads key `key_name` from the key folder and saves its miner config.
+        """
+        self._use_keypath(miner_keypath)
+        if key_name not in self.keyring:
+            self.keyring.load_key(key_name)
+        if miner_config is not None:
             self.miner_config = miner_config
-            self.miner_configs[key_name] = miner_config
-            self._save_miner_keys(miner_keypath)
-
-    def _save_miner_keys(self, miner_keypath: Path):
-        with open(miner_keypath, "w") as f:
-            f.write(json.dumps(self.miner_configs, indent=4))
+            self.keyring.set_config(key_name, miner_config)
+
+    def add_miner_keys(self, miner_configs: Dict[str, MinerConfig], miner_keypath: Optional[Path] = None) -> None:
+        """
+        Adds many miner keys and saves their configs with a single write.
+        """
+        self._use_keypath(miner_keypath)
+        with self.keyring.batch():
+            for key_name, miner_config in miner_configs.items():
+                self.add_miner_key(key_name, miner_config=miner_config)
+
+    def load_key_folder(self, folder: Optional[str] = None) -> int:
+        """
+        Loads every key file of `folder`, or of the keyring's key folder, in parallel.
+        """
+        return self.keyring.load_folder(folder)
+
+    def _save_miner_keys(self, miner_keypath: Optional[Path] = None):
+        self.keyring.flush(miner_keypath)
 
-    def _update_miner_key(
-        self, key_name: str, miner_config: MinerConfig, miner_keypath: Path
+    def update_miner_key(
+        self, key_name: str, miner_config: MinerConfig, miner_keypath: Optional[Path] = None
     ) -> None:
         self.add_miner_key(key_name, miner_keypath, miner_config)
-        self._save_miner_keys(miner_keypath)
 
-    def get_miner_keys(self) -> Dict[str, Any]:
+    def get_miner_keys(self) -> Keyring:
         return self.keyring
 
+    @property
+    def chain_client(self) -> ChainClientPool:
+        return get_chain_client()
+
     def get_miner_key(self, key_name: str) -> Any:
+        """
+        Returns the Keypair for a key name or ss58 address.
+        """
         return self.keyring[key_name]
 
-    def remove_miner_key(self, key_name: str, miner_keypath: Path):
-        del self.keyring[key_name]
-        del self.miner_configs[key_name]
-        self._save_miner_keys(miner_keypath)
+    def remove_miner_key(self, key_name: str, miner_keypath: Optional[Path] = None):
+        self._use_keypath(miner_keypath)
+        self.keyring.remove(key_name)
 
-    def register_miner(self, miner_config: MinerConfig) -> None:
-        return super().register_miner(miner_config)
+    def register_miner(self, miner_config: MinerConfig) -> RegistrationResult:
+        return register_miners([miner_config], self.chain_client)[0]
@@ -0,0 +1,264 @@
+import os
+import json
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Union
+from loguru import logger
+
+from utilities.key_file import KeyringError, read_key_file
+
+DEFAULT_KEY_FOLDER = "~/.commune/key"
+
+
+def expand_path(path: Union[str, Path]) -> Path:
+    return Path(os.path.expandvars(os.path.expanduser(str(path))))
+
+
+def keypair_from_key_data(key_data: Dict[str, Any]) -> Any:
+    """
+    Builds a substrateinterface Keypair from the `data` of a Commune key file.
+
+    Args:
+        key_data (Dict[str, Any]): The decoded key data, with `private_key` or `mnemonic`.
+
+    Returns:
+        Keypair: The keypair.
+    """
+    from substrateinterface import Keypair
+
+    if not key_data.get("private_key") and key_data.get("mnemonic"):
+        return Keypair.create_from_mnemonic(key_data["mnemonic"], ss58_format=key_data.get("ss58_format", 42))
+    return Keypair(
+        ss58_address=key_data.get("ss58_address"),
+        public_key=key_data.get("public_key"),
+        private_key=key_data["private_key"],
+        ss58_format=key_data.get("ss58_format", 42),
+        crypto_type=key_data.get("crypto_type", 1),
+    )
+
+
+class KeyEntry:
+    """
+    One key of the keyring. The Keypair is only built, which derives the public key
+    from the secret, the first time `keypair` is read.
+    """
+
+    __slots__ = ("name", "path", "ss58_address", "key_data", "_keypair")
+
+    def __init__(self, name: str, path: Optional[Path], key_data: Dict[str, Any]):
+        self.name = name
+        self.path = path
+        self.ss58_address = key_data.get("ss58_address")
+        self.key_data = key_data
+        self._keypair = None
+
+    @property
+    def keypair(self) -> Any:
+        if self._keypair is None:
+            self._keypair = keypair_from_key_data(self.key_data)
+            self.ss58_address = self._keypair.ss58_address
+        return self._keypair
+
+    @property
+    def materialized(self) -> bool:
+        return self._keypair is not None
+
+
+class Keyring:
+    """
+    Keys from a Commune key folder, indexed by name and by ss58 address, plus the miner
+    configs stored alongside them.
+
+    `load_folder` reads and parses every key file on a thread pool. Keypairs are built
+    on first use. Config changes are written to `configs_path` atomically (temporary
+    file, then `os.replace`). Inside `batch()` they are coalesced into a single write
+    when the outermost batch exits.
+
+    The keyring is a read-only mapping from key name or ss58 address to Keypair.
+    """
+
+    def __init__(
+        self,
+        key_folder: Union[str, Path] = DEFAULT_KEY_FOLDER,
+        configs_path: Optional[Union[str, Path]] = None,
+    ):
+        """
+        Initializes the keyring and loads existing miner configs. Keys are not read
+        until `load_folder` or `load_key` is called.
+
+        Args:
+            key_folder (Union[str, Path]): Folder holding `<name>.json` key files.
+                Environment variables and ~ are expanded. Defaults to ~/.commune/key.
+            configs_path (Optional[Union[str, Path]]): JSON file of miner configs by key name.
+        """
+        self.key_folder = expand_path(key_folder)
+        self.configs_path = expand_path(configs_path) if configs_path else None
+        self.configs: Dict[str, Dict[str, Any]] = {}
+        self.flushes = 0
+        self._entries: Dict[str, KeyEntry] = {}
+        self._by_address: Dict[str, KeyEntry] = {}
+        self._batch_depth = 0
+        self._dirty = False
+        self._lock = threading.RLock()
+        if self.configs_path is not None and self.configs_path.exists():
+            self.configs = json.loads(self.configs_path.read_text(encoding="utf-8") or "{}")
+
+    def _index(self, entry: KeyEntry) -> None:
+        previous = self._entries.get(entry.name)
+        if previous is not None and previous.ss58_address:
+            self._by_address.pop(previous.ss58_address, None)
+        self._entries[entry.name] = entry
+        if entry.ss58_address:
+            self._by_address[entry.ss58_address] = entry
+
+    def load_key(self, name: str) -> KeyEntry:
+        """
+        Loads `<key_folder>/<name>.json` into the keyring.
+
+        Raises:
+            KeyringError: If the key file is missing, encrypted or malformed.
+        """
+        path = self.key_folder / f"{name}.json"
+        if not path.exists():
+            raise KeyringError(f"Key file {path} does not exist")
+        entry = KeyEntry(name, path, read_key_file(path))
+        with self._lock:
+            self._index(entry)
+        return entry
+
+    def load_folder(self, folder: Optional[Union[str, Path]] = None, max_workers: Optional[int] = None) -> int:
+        """
+        Loads every key file of a folder, reading files in parallel.
+
+        Encrypted and malformed files are skipped with a warning.
+
+        Args:
+            folder (Optional[Union[str, Path]]): The folder. Defaults to `key_folder`.
+            max_workers (Optional[int]): Reader threads. Defaults to the executor default.
+
+        Returns:
+            int: The number of keys loaded.
+        """
+        folder = expand_path(folder) if folder else self.key_folder
+        paths = sorted(folder.glob("*.json"))
+
+        def read(path: Path) -> Optional[KeyEntry]:
+            try:
+                return KeyEntry(path.stem, path, read_key_file(path))
+            except KeyringError as e:
+                logger.warning(f"Skipping key: {e}")
+                return None
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            entries = [entry for entry in executor.map(read, paths) if entry is not None]
+        with self._lock:
+            for entry in entries:
+                self._index(entry)
+        return len(entries)
+
+    def add(self, name: str, keypair: Any = None, key_data: Optional[Dict[str, Any]] = None) -> KeyEntry:
+        """
+        Adds a key held in memory, from a Keypair or from key data.
+        """
+        entry = KeyEntry(name, None, key_data or {"ss58_address": keypair.ss58_address})
+        entry._keypair = keypair
+        with self._lock:
+            self._index(entry)
+        return entry
+
+    def entry(self, name_or_address: str) -> KeyEntry:
+        entry = self._entries.get(name_or_address) or self._by_address.get(name_or_address)
+        if entry is None:
+            raise KeyError(name_or_address)
+        return entry
+
+    def get(self, name_or_address: str, default: Any = None) -> Any:
+        try:
+            return self[name_or_address]
+        except KeyError:
+            return default
+
+    def names(self) -> List[str]:
+        return list(self._entries)
+
+    def __getitem__(self, name_or_address: str) -> Any:
+        return self.entry(name_or_address).keypair
+
+    def __contains__(self, name_or_address: object) -> bool:
+        return name_or_address in self._entries or name_or_address in self._by_address
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(list(self._entries))
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def set_config(self, name: str, config: Any) -> None:
+        """
+        Stores the miner config for key `name`. Pydantic models are stored as dicts.
+        """
+        with self._lock:
+            self.configs[name] = config.model_dump() if hasattr(config, "model_dump") else config
+            self._changed()
+
+    def remove(self, name: str) -> None:
+        """
+        Removes key `name` and its miner config.
+
+        Raises:
+            KeyError: If the keyring has neither a key nor a config named `name`.
+        """
+        with self._lock:
+            entry = self._entries.pop(name, None)
+            if entry is not None and entry.ss58_address:
+                self._by_address.pop(entry.ss58_address, None)
+            config = self.configs.pop(name, None)
+            if entry is None and config is None:
+                raise KeyError(name)
+            self._changed()
+
+    def _changed(self) -> None:
+        self._dirty = True
+        if self._batch_depth == 0:
+            self.flush()
+
+    @contextmanager
+    def batch(self) -> Iterator["Keyring"]:
+        """
+        Defers config writes until the outermost batch exits, then flushes once.
+        """
+        with self._lock:
+            self._batch_depth += 1
+        try:
+            yield self
+        finally:
+            with self._lock:
+                self._batch_depth -= 1
+                if self._batch_depth == 0 and self._dirty:
+                    self.flush()
+
+    def flush(self, path: Optional[Union[str, Path]] = None) -> None:
+        """
+        Atomically writes the miner configs to `path`, or to `configs_path`.
+        Does nothing if neither is set.
+        """
+        target = expand_path(path) if path else self.configs_path
+        if target is None:
+            return
+        with self._lock:
+            target.parent.mkdir(parents=True, exist_ok=True)
+            descriptor, temporary = tempfile.mkstemp(dir=target.parent, prefix=f".{target.name}.", suffix=".tmp")
+            try:
+                with os.fdopen(descriptor, "w", encoding="utf-8") as f:
+                    json.dump(self.configs, f, indent=4)
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.replace(temporary, target)
+            except BaseException:
+                os.unlink(temporary)
+                raise
+            self._dirty = False
+            self.flushes += 1
@@ -0,0 +1,270 @@
+import asyncio
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+import numpy as np
+from loguru import logger
+
+from chains.commune.chain_client import ChainClientPool, get_chain_client
+
+# SubspaceModule events (netuid, ...) that change a subnet's keys or addresses.
+MEMBERSHIP_EVENTS = {"ModuleRegistered", "ModuleDeregistered", "ModuleUpdated"}
+# SubspaceModule events (staker, module key, amount) that change a module's stake.
+STAKE_EVENTS = {"StakeAdded", "StakeRemoved"}
+
+
+class MetagraphSnapshot:
+    """
+    Immutable, columnar view of one subnet at one block.
+
+    Row `i` describes one registered module: `keys[i]` (ss58 address), `uids[i]`,
+    `stake[i]` (total stake in nano tokens) and `addresses[i]`. `index` maps a key to
+    its row, so every per-key lookup is a dict hit plus an array read.
+    """
+
+    __slots__ = ("netuid", "block", "keys", "addresses", "uids", "stake", "index")
+
+    def __init__(
+        self,
+        netuid: int,
+        block: int,
+        keys: Sequence[str],
+        uids: np.ndarray,
+        stake: np.ndarray,
+        addresses: Optional[Sequence[str]] = None,
+        index: Optional[Dict[str, int]] = None,
+    ):
+        self.netuid = netuid
+        self.block = block
+        self.keys = list(keys)
+        self.addresses = list(addresses) if addresses is not None else [""] * len(self.keys)
+        self.uids = uids
+        self.stake = stake
+        self.index = index if index is not None else {key: row for row, key in enumerate(self.keys)}
+
+    @classmethod
+    def empty(cls, netuid: int = 0) -> "MetagraphSnapshot":
+        return cls(netuid, -1, [], np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64))
+
+    def is_registered(self, key: str) -> bool:
+        return key in self.index
+
+    def uid_of(self, key: str) -> Optional[int]:
+        row = self.index.get(key)
+        return None if row is None else int(self.uids[row])
+
+    def stake_of(self, key: str) -> int:
+        row = self.index.get(key)
+        return 0 if row is None else int(self.stake[row])
+
+    def is_validator(self, key: str, min_stake: int = 0) -> bool:
+        """
+        Returns True if `key` is registered on the subnet with at least `min_stake`.
+        """
+        row = self.index.get(key)
+        return row is not None and int(self.stake[row]) >= min_stake
+
+    def top(self, count: int) -> List[str]:
+        """
+        Returns the keys of the `count` modules with the most stake, highest first.
+        """
+        rows = np.argsort(-self.stake, kind="stable")[:count]
+        return [self.keys[row] for row in rows]
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+
+class MetagraphService:
+    """
+    Keeps a fresh `MetagraphSnapshot` of one subnet in memory.
+
+    `refresh` reads the current block first and skips the subnet queries until at
+    least `refresh_blocks` new blocks have been produced. The first refresh, and any
+    after a gap of more than `max_event_blocks`, pulls keys, addresses and stake in
+    full. After that, refreshes are incremental: the events of the new blocks say what
+    changed. Registrations, deregistrations and module updates on the subnet re-read
+    the key and address maps. Stake events re-read the stake of the affected keys only,
+    instead of the chain-wide stake map. Blocks without relevant events cost one event
+    read each. Each refresh publishes a new snapshot by swapping one reference, so
+    readers in the request path never take a lock.
+    """
+
+    def __init__(
+        self,
+        netuid: int = 0,
+        client: Optional[ChainClientPool] = None,
+        interval: float = 8.0,
+        refresh_blocks: int = 1,
+        max_event_blocks: int = 64,
+    ):
+        """
+        Initializes the service with an empty snapshot.
+
+        Args:
+            netuid (int): The subnet to follow. Defaults to 0.
+            client (Optional[ChainClientPool]): The chain client. Defaults to the shared pool.
+            interval (float): Seconds between background refreshes. Defaults to 8, about one block.
+            refresh_blocks (int): New blocks needed before the subnet is queried again. Defaults to 1.
+            max_event_blocks (int): Most new blocks whose events are read for an incremental
+                refresh; larger gaps refresh in full. Defaults to 64.
+        """
+        self.netuid = netuid
+        self._client = client
+        self.interval = interval
+        self.refresh_blocks = refresh_blocks
+        self.max_event_blocks = max_event_blocks
+        self.snapshot = MetagraphSnapshot.empty(netuid)
+        self.refreshes = 0
+        self.full_refreshes = 0
+        self.skipped = 0
+        self._task: Optional[asyncio.Task] = None
+
+    @classmethod
+    def from_miner_config(cls, miner_config: Any, **options: Any) -> "MetagraphService":
+        return cls(netuid=miner_config.netuid or 0, **options)
+
+    @property
+    def client(self) -> ChainClientPool:
+        if self._client is None:
+            self._client = get_chain_client()
+        return self._client
+
+    async def refresh(self, force: bool = False) -> MetagraphSnapshot:
+        """
+        Updates the snapshot if enough blocks have passed and publishes it.
+
+        Args:
+            force (bool): Query the subnet in full even if the block has not advanced. Defaults to False.
+
+        Returns:
+            MetagraphSnapshot: The current snapshot.
+        """
+        block = await self.client.get_block_number()
+        previous = self.snapshot
+        if not force and previous.block >= 0 and block - previous.block < self.refresh_blocks:
+            self.skipped += 1
+            return previous
+
+        snapshot = None
+        if not force and previous.block >= 0 and block - previous.block <= self.max_event_blocks:
+            snapshot = await self._apply_events(previous, block)
+        if snapshot is None:
+            snapshot = await self._pull(previous, block)
+        self.snapshot = snapshot
+        self.refreshes += 1
+        return snapshot
+
+    async def _pull(self, previous: MetagraphSnapshot, block: int) -> MetagraphSnapshot:
+        keys, addresses, stake_from = await asyncio.gather(
+            self.client.acall("query_map_key", self.netuid),
+            self.client.acall("query_map_address", self.netuid),
+            self.client.acall("query_map_stakefrom"),
+        )
+        uids, ordered_keys, ordered_addresses, index = self._members(keys, addresses, previous)
+        stake = np.fromiter(
+            (sum(amount for _, amount in stake_from.get(key, ())) for key in ordered_keys),
+            dtype=np.int64,
+            count=len(ordered_keys),
+        )
+        self.full_refreshes += 1
+        return MetagraphSnapshot(self.netuid, block, ordered_keys, uids, stake, ordered_addresses, index)
+
+    async def _apply_events(self, previous: MetagraphSnapshot, block: int) -> Optional[MetagraphSnapshot]:
+        """
+        Applies the events of the blocks after `previous` to it. Returns None when an
+        event or stake read failed, so the caller pulls the subnet in full instead.
+        """
+        blocks = await self.client.pipeline(
+            [("get_events", [number], {}) for number in range(previous.block + 1, block + 1)]
+        )
+        if any(isinstance(events, BaseException) for events in blocks):
+            logger.warning(f"Reading events for subnet {self.netuid} failed, refreshing in full")
+            return None
+        members_changed, staked = False, set()
+        for events in blocks:
+            for event in events:
+                name, attributes = event["event"], event["attributes"]
+                if event["module"] != "SubspaceModule":
+                    continue
+                if name in MEMBERSHIP_EVENTS and attributes and attributes[0] == self.netuid:
+                    members_changed = True
+                elif name in STAKE_EVENTS and len(attributes) >= 2:
+                    staked.add(attributes[1])
+
+        if members_changed:
+            keys, addresses = await asyncio.gather(
+                self.client.acall("query_map_key", self.netuid),
+                self.client.acall("query_map_address", self.netuid),
+            )
+            uids, ordered_keys, ordered_addresses, index = self._members(keys, addresses, previous)
+        else:
+            uids, ordered_keys, ordered_addresses, index = previous.uids, previous.keys, previous.addresses, previous.index
+        if index is None:
+            index = {key: row for row, key in enumerate(ordered_keys)}
+        stale = [key for key in ordered_keys if key in staked or key not in previous.index]
+
+        stake_from = await self.client.pipeline([("get_stakefrom", [key], {}) for key in stale])
+        if any(isinstance(stakers, BaseException) for stakers in stake_from):
+            logger.warning(f"Reading stake for subnet {self.netuid} failed, refreshing in full")
+            return None
+        if index is previous.index:
+            stake = previous.stake.copy()
+        else:
+            stake = np.fromiter((previous.stake_of(key) for key in ordered_keys), dtype=np.int64, count=len(ordered_keys))
+        for key, stakers in zip(stale, stake_from):
+            stake[index[key]] = sum(stakers.values())
+        return MetagraphSnapshot(self.netuid, block, ordered_keys, uids, stake, ordered_addresses, index)
+
+    @staticmethod
+    def _members(
+        keys: Dict[int, str], addresses: Dict[int, str], previous: MetagraphSnapshot
+    ) -> Tuple[np.ndarray, List[str], List[str], Optional[Dict[str, int]]]:
+        """
+        Orders the key and address maps by uid. If the key set is unchanged since the
+        previous snapshot, its key index is reused.
+        """
+        uids = np.fromiter(sorted(keys), dtype=np.int64, count=len(keys))
+        ordered_keys = [keys[uid] for uid in uids.tolist()]
+        ordered_addresses = [addresses.get(uid, "") for uid in uids.tolist()]
+        return uids, ordered_keys, ordered_addresses, previous.index if ordered_keys == previous.keys else None
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self.refresh()
+            except Exception as e:
+                logger.warning(f"Metagraph refresh for subnet {self.netuid} failed: {e}")
+            await asyncio.sleep(self.interval)
+
+    def start(self) -> asyncio.Task:
+        """
+        Starts refreshing in the background on the running event loop.
+        """
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run())
+        return self._task
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def is_validator(self, key: str, min_stake: int = 0) -> bool:
+        return self.snapshot.is_validator(key, min_stake)
+
+    def stake_of(self, key: str) -> int:
+        return self.snapshot.stake_of(key)
+
+    def require_validator(self, min_stake: int = 0) -> Callable[[str], bool]:
+        """
+        Returns a caller check for `SignatureMiddleware(authorize=...)` that admits only
+        keys registered on the subnet with at least `min_stake`.
+        """
+
+        def authorize(caller: str) -> bool:
+            return self.snapshot.is_validator(caller, min_stake)
+
+        return authorize
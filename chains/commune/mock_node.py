@@ -0,0 +1,245 @@
+import time
+import threading
+from collections import defaultdict
+from typing import Any, Dict, List, Optional, Tuple
+
+
+class MockNodeError(Exception):
+    """Exception raised by a mock node that is down or rejects a transaction."""
+
+
+class MockChainState:
+    """
+    In-memory chain state shared by every `MockCommuneNode`, so several mock nodes
+    behave like one network seen through different endpoints.
+    """
+
+    def __init__(self, block: int = 1, burn: int = 0, existential_deposit: int = 1):
+        self.block = block
+        self.burn = burn
+        self.existential_deposit = existential_deposit
+        self.balances: Dict[str, int] = defaultdict(int)
+        self.nonces: Dict[str, int] = defaultdict(int)
+        # netuid -> {"names": {name: uid}, "keys": {uid: ss58}, "addresses": {uid: address},
+        #            "stake": {ss58: [(staker, amount)]}}
+        self.subnets: Dict[int, Dict[str, Any]] = {}
+        self.subnet_names: Dict[str, int] = {}
+        # block -> events of the transactions included in it, see `emit`
+        self.events: Dict[int, List[Dict[str, Any]]] = defaultdict(list)
+        self.lock = threading.Lock()
+
+    def emit(self, event: str, *attributes: Any, module: str = "SubspaceModule") -> None:
+        """
+        Records an event for the next block, the block a transaction sent now lands in.
+        Callers hold `lock`.
+        """
+        self.events[self.block + 1].append({"module": module, "event": event, "attributes": list(attributes)})
+
+    def add_subnet(self, name: str, netuid: Optional[int] = None) -> int:
+        with self.lock:
+            if name in self.subnet_names:
+                return self.subnet_names[name]
+            netuid = len(self.subnets) if netuid is None else netuid
+            self.subnets[netuid] = {"names": {}, "keys": {}, "addresses": {}, "stake": defaultdict(list)}
+            self.subnet_names[name] = netuid
+            return netuid
+
+    def add_module(self, netuid: int, ss58_address: str, name: str, address: str = "", stake: int = 0) -> int:
+        with self.lock:
+            return self._add_module(netuid, ss58_address, name, address, stake)
+
+    def _add_module(self, netuid: int, ss58_address: str, name: str, address: str, stake: int) -> int:
+        subnet = self.subnets[netuid]
+        if name in subnet["names"]:
+            raise MockNodeError(f"Module name {name} is already registered on subnet {netuid}")
+        uid = len(subnet["keys"])
+        subnet["names"][name] = uid
+        subnet["keys"][uid] = ss58_address
+        subnet["addresses"][uid] = address
+        self.emit("ModuleRegistered", netuid, uid, ss58_address)
+        if stake:
+            self._add_stake(netuid, ss58_address, ss58_address, stake)
+        return uid
+
+    def add_stake(self, netuid: int, ss58_address: str, staker: str, amount: int) -> None:
+        with self.lock:
+            self._add_stake(netuid, ss58_address, staker, amount)
+
+    def _add_stake(self, netuid: int, ss58_address: str, staker: str, amount: int) -> None:
+        self.subnets[netuid]["stake"][ss58_address].append((staker, amount))
+        self.emit("StakeAdded", staker, ss58_address, amount)
+
+    def advance(self, blocks: int = 1) -> int:
+        with self.lock:
+            self.block += blocks
+            return self.block
+
+
+class MockReceipt:
+    """Mimics the `is_success` / `error_message` / `extrinsic_hash` of a substrate receipt."""
+
+    def __init__(self, extrinsic_hash: str, block: int, included_at: float = 0.0):
+        self.extrinsic_hash = extrinsic_hash
+        self.block = block
+        self.submitted_block = block
+        # `time.monotonic()` from which `check_inclusion` reports the receipt as included.
+        self.included_at = included_at
+        self.is_success = True
+        self.error_message = None
+
+
+class MockCommuneNode:
+    """
+    A local stand-in for a Commune node, exposing the `CommuneNodeClient` methods the
+    chain client pool calls. Each call sleeps for `latency` seconds to model the round
+    trip, and raises `MockNodeError` while `down` is set.
+
+    Supported transactions are `transfer_keep_alive`, `register` and `add_stake`. They
+    check and increment the signer's nonce like the real chain, so nonce handling in
+    callers can be tested. They apply on submission, and `check_inclusion` reports them
+    included `block_time` seconds later, to model waiting for the next block.
+    """
+
+    def __init__(
+        self,
+        url: str = "mock://node",
+        state: Optional[MockChainState] = None,
+        latency: float = 0.0,
+        block_time: float = 0.0,
+    ):
+        self.url = url
+        self.state = state or MockChainState()
+        self.latency = latency
+        self.block_time = block_time
+        self.down = False
+        self.calls: Dict[str, int] = defaultdict(int)
+
+    def _enter(self, method: str) -> None:
+        self.calls[method] += 1
+        if self.latency:
+            time.sleep(self.latency)
+        if self.down:
+            raise MockNodeError(f"{self.url} is unreachable")
+
+    def get_block(self) -> Dict[str, Any]:
+        self._enter("get_block")
+        return {"header": {"number": self.state.block}}
+
+    def get_balance(self, addr: str) -> int:
+        self._enter("get_balance")
+        return self.state.balances[addr]
+
+    def get_burn(self, netuid: int = 0) -> int:
+        self._enter("get_burn")
+        return self.state.burn
+
+    def get_nonce(self, address: str) -> int:
+        self._enter("get_nonce")
+        return self.state.nonces[address]
+
+    def query_map_key(self, netuid: int = 0) -> Dict[int, str]:
+        self._enter("query_map_key")
+        return dict(self.state.subnets[netuid]["keys"])
+
+    def query_map_address(self, netuid: int = 0) -> Dict[int, str]:
+        self._enter("query_map_address")
+        return dict(self.state.subnets[netuid]["addresses"])
+
+    def query_map_stakefrom(self, netuid: int = 0) -> Dict[str, List[Tuple[str, int]]]:
+        self._enter("query_map_stakefrom")
+        return {key: list(stakes) for key, stakes in self.state.subnets[netuid]["stake"].items()}
+
+    def get_stakefrom(self, key: str) -> Dict[str, int]:
+        self._enter("get_stakefrom")
+        with self.state.lock:
+            stakers: Dict[str, int] = defaultdict(int)
+            for subnet in self.state.subnets.values():
+                for staker, amount in subnet["stake"].get(key, ()):
+                    stakers[staker] += amount
+            return dict(stakers)
+
+    def get_events(self, block: int) -> List[Dict[str, Any]]:
+        self._enter("get_events")
+        with self.state.lock:
+            return list(self.state.events.get(block, ()))
+
+    def query(self, name: str, params: Optional[List[Any]] = None, module: str = "SubspaceModule") -> Any:
+        self._enter("query")
+        params = params or []
+        if name == "Burn":
+            return self.state.burn
+        if name == "SubnetNames":
+            return {netuid: subnet for subnet, netuid in self.state.subnet_names.items()}.get(params[0])
+        if name == "Account":
+            return {"nonce": self.state.nonces[params[0]], "data": {"free": self.state.balances[params[0]]}}
+        raise MockNodeError(f"Unsupported query {module}.{name}")
+
+    def query_map(self, name: str, params: Optional[List[Any]] = None, module: str = "SubspaceModule") -> Dict[Any, Any]:
+        self._enter("query_map")
+        netuid = (params or [0])[0]
+        if name == "Keys":
+            return {name: dict(self.state.subnets[netuid]["keys"])}
+        if name == "Address":
+            return {name: dict(self.state.subnets[netuid]["addresses"])}
+        raise MockNodeError(f"Unsupported query map {module}.{name}")
+
+    def submit_call(
+        self,
+        fn: str,
+        params: Dict[str, Any],
+        key: Any,
+        module: str = "SubspaceModule",
+        nonce: Optional[int] = None,
+        wait_for_inclusion: bool = True,
+    ) -> MockReceipt:
+        self._enter("submit_call")
+        signer = key.ss58_address
+        state = self.state
+        with state.lock:
+            expected = state.nonces[signer]
+            if nonce is not None and nonce != expected:
+                raise MockNodeError(f"Invalid nonce {nonce} for {signer}, expected {expected}")
+            if fn == "transfer_keep_alive":
+                self._debit(signer, params["value"])
+                state.balances[params["dest"]] += params["value"]
+            elif fn == "register":
+                netuid = state.subnet_names.get(params["network_name"])
+                if netuid is None:
+                    raise MockNodeError(f"Unknown subnet {params['network_name']}")
+                if params["name"] in state.subnets[netuid]["names"]:
+                    raise MockNodeError(f"Module name {params['name']} is already registered on subnet {netuid}")
+                self._debit(signer, state.burn)
+                state._add_module(netuid, params["module_key"], params["name"], params["address"], 0)
+            elif fn == "add_stake":
+                self._debit(signer, params["amount"])
+                state._add_stake(params.get("netuid", 0), params["module_key"], signer, params["amount"])
+            else:
+                raise MockNodeError(f"Unsupported call {module}.{fn}")
+            state.nonces[signer] = expected + 1
+            return MockReceipt(f"0x{signer}:{expected}", state.block, time.monotonic() + self.block_time)
+
+    def check_inclusion(self, receipt: MockReceipt, from_block: int) -> Tuple[Optional[MockReceipt], int]:
+        self._enter("check_inclusion")
+        if time.monotonic() < receipt.included_at:
+            return None, from_block
+        return receipt, from_block
+
+    def _debit(self, signer: str, amount: int) -> None:
+        if self.state.balances[signer] < amount:
+            raise MockNodeError(f"Insufficient balance for {signer}")
+        self.state.balances[signer] -= amount
+
+    def transfer(self, key: Any, amount: int, dest: str) -> MockReceipt:
+        return self.submit_call("transfer_keep_alive", {"dest": dest, "value": amount}, key, module="Balances")
+
+    def register_module(
+        self, key: Any, name: str, address: Optional[str] = None, subnet: str = "Rootnet", metadata: Optional[str] = None
+    ) -> MockReceipt:
+        params = {
+            "network_name": subnet,
+            "address": address,
+            "name": name,
+            "module_key": key.ss58_address,
+            "metadata": metadata,
+        }
+        return self.submit_call("register", params, key)
@@ -0,0 +1,278 @@
+import asyncio
+from collections import defaultdict
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Sequence
+from loguru import logger
+from pydantic import BaseModel
+
+from chains.commune.chain_client import ChainClientPool, get_chain_client
+from chains.commune.keyring import (
+    DEFAULT_KEY_FOLDER,
+    KeyringError,
+    expand_path,
+    keypair_from_key_data,
+    read_key_file,
+)
+
+NANO = 10**9
+
+
+class RegistrationError(Exception):
+    """Exception raised when a miner cannot be registered."""
+
+
+class RegistrationResult(BaseModel):
+    miner_name: Optional[str] = None
+    ss58_address: Optional[str] = None
+    netuid: Optional[int] = None
+    status: str = "failed"
+    funded: int = 0
+    staked: int = 0
+    uid: Optional[int] = None
+    extrinsic_hash: Optional[str] = None
+    error: Optional[str] = None
+
+
+def to_nano(amount: Optional[float]) -> int:
+    return int(round((amount or 0) * NANO))
+
+
+def load_keypair(key: str) -> Any:
+    """
+    Loads a Commune key from a key file path or from a key name in ~/.commune/key.
+
+    Args:
+        key (str): A key file path (environment variables and ~ are expanded) or key name.
+
+    Returns:
+        Keypair: The loaded substrateinterface Keypair.
+
+    Raises:
+        RegistrationError: If the key file does not exist or is encrypted.
+    """
+    path = expand_path(key)
+    if not path.exists():
+        path = expand_path(DEFAULT_KEY_FOLDER) / f"{key}.json"
+    if not path.exists():
+        raise RegistrationError(f"Key file not found for {key}")
+    try:
+        return keypair_from_key_data(read_key_file(path))
+    except KeyringError as e:
+        raise RegistrationError(str(e)) from e
+
+
+class NonceManager:
+    """
+    Hands out account nonces locally so one signer can send several transactions
+    without re-reading its nonce from the chain before each one.
+
+    Submissions from the same signer are serialized by a per-signer lock, in nonce
+    order; different signers proceed concurrently. The lock covers assigning the nonce
+    and submitting only, so callers wait for inclusion after leaving `reserve` and
+    several transactions from one signer can be in flight at once. The nonce is read
+    from the chain once and then incremented locally, and re-read after a failed submission.
+    """
+
+    def __init__(self, client: ChainClientPool):
+        self.client = client
+        self._locks: Dict[str, asyncio.Lock] = defaultdict(asyncio.Lock)
+        self._next: Dict[str, int] = {}
+
+    @asynccontextmanager
+    async def reserve(self, address: str) -> AsyncIterator[int]:
+        async with self._locks[address]:
+            if address not in self._next:
+                self._next[address] = await self.client.get_nonce(address)
+            nonce = self._next[address]
+            try:
+                yield nonce
+            except BaseException:
+                self._next.pop(address, None)
+                raise
+            self._next[address] = nonce + 1
+
+
+class MinerRegistrar:
+    """
+    Registers miners on the Commune chain in-process.
+
+    For each `MinerConfig` the registrar loads the miner key, tops up its balance from
+    `funding_key` to cover the subnet burn, `stake` and `funding_modifier` (a fee
+    buffer), registers the module at `external_address or miner_host` and `miner_port`,
+    then stakes `stake` on it. Stake and modifier are in tokens, as in `MinerConfig`.
+
+    A batch shares its chain reads: subnet names and burns are read once per netuid,
+    and key maps and balances are pipelined. Transactions for different miners are
+    submitted concurrently, with nonces handed out by `NonceManager`, so funding
+    transfers from a shared funding key are queued rather than colliding.
+    """
+
+    def __init__(
+        self,
+        client: Optional[ChainClientPool] = None,
+        key_loader: Callable[[str], Any] = load_keypair,
+    ):
+        self.client = client or get_chain_client()
+        self.key_loader = key_loader
+        self.nonces = NonceManager(self.client)
+
+    async def _load_keys(self, names: Sequence[str]) -> Dict[str, Any]:
+        loop = asyncio.get_running_loop()
+        unique = list(dict.fromkeys(name for name in names if name))
+        results = await asyncio.gather(
+            *[loop.run_in_executor(None, self.key_loader, name) for name in unique], return_exceptions=True
+        )
+        return dict(zip(unique, results))
+
+    async def _submit(self, key: Any, fn: str, params: Dict[str, Any], module: str = "SubspaceModule") -> Any:
+        async with self.nonces.reserve(key.ss58_address) as nonce:
+            receipt = await self.client.submit_call(
+                fn, params, key, module=module, nonce=nonce, wait_for_inclusion=False
+            )
+        return await self.client.wait_for_inclusion(receipt)
+
+    async def _subnet(self, netuid: int) -> Dict[str, Any]:
+        name, burn, keys = await asyncio.gather(
+            self.client.query("SubnetNames", [netuid]),
+            self.client.acall("get_burn", netuid),
+            self.client.acall("query_map_key", netuid),
+            return_exceptions=True,
+        )
+        if name is None:
+            raise RegistrationError(f"Subnet {netuid} does not exist")
+        for value in (name, burn, keys):
+            if isinstance(value, BaseException):
+                raise value
+        return {"name": name, "burn": burn, "registered": {key: uid for uid, key in keys.items()}}
+
+    async def register_many(self, miner_configs: Sequence[Any], fund: bool = True) -> List[RegistrationResult]:
+        """
+        Registers many miners concurrently.
+
+        Args:
+            miner_configs (Sequence[MinerConfig]): The miners to register.
+            fund (bool): Top up miner balances from their funding keys. Defaults to True.
+
+        Returns:
+            List[RegistrationResult]: One result per config, in order. Failures are
+                reported in the result instead of aborting the rest of the batch.
+        """
+        keys = await self._load_keys(
+            [config.miner_keypath for config in miner_configs] + [config.funding_key for config in miner_configs]
+        )
+        netuids = sorted({config.netuid or 0 for config in miner_configs})
+        subnets = await asyncio.gather(*[self._subnet(netuid) for netuid in netuids], return_exceptions=True)
+        subnets = dict(zip(netuids, subnets))
+        miner_keys = [keys.get(config.miner_keypath) for config in miner_configs]
+        addresses = [key.ss58_address for key in miner_keys if hasattr(key, "ss58_address")]
+        balances = await self.client.pipeline([("get_balance", [address], {}) for address in addresses])
+        balances = dict(zip(addresses, balances))
+
+        results = await asyncio.gather(
+            *[
+                self._register(config, key, keys.get(config.funding_key), subnets[config.netuid or 0], balances, fund)
+                for config, key in zip(miner_configs, miner_keys)
+            ]
+        )
+
+        registered = sorted({result.netuid for result in results if result.status == "registered"})
+        if registered:
+            key_maps = await self.client.pipeline([("query_map_key", [netuid], {}) for netuid in registered])
+            uids = {
+                netuid: {key: uid for uid, key in key_map.items()}
+                for netuid, key_map in zip(registered, key_maps)
+                if isinstance(key_map, dict)
+            }
+            for result in results:
+                if result.status == "registered":
+                    result.uid = uids.get(result.netuid, {}).get(result.ss58_address)
+        return list(results)
+
+    async def _register(
+        self,
+        miner_config: Any,
+        key: Any,
+        funding_key: Any,
+        subnet: Any,
+        balances: Dict[str, Any],
+        fund: bool,
+    ) -> RegistrationResult:
+        result = RegistrationResult(miner_name=miner_config.miner_name, netuid=miner_config.netuid or 0)
+        try:
+            for value in (key, subnet, balances.get(getattr(key, "ss58_address", None))):
+                if isinstance(value, BaseException):
+                    raise value
+            if key is None:
+                raise RegistrationError("miner_keypath is required")
+            result.ss58_address = key.ss58_address
+            if key.ss58_address in subnet["registered"]:
+                result.status = "already_registered"
+                result.uid = subnet["registered"][key.ss58_address]
+                return result
+
+            stake = to_nano(miner_config.stake)
+            required = subnet["burn"] + stake + to_nano(miner_config.funding_modifier)
+            shortfall = required - balances[key.ss58_address]
+            if shortfall > 0:
+                if not fund or funding_key is None:
+                    raise RegistrationError(f"Balance is {shortfall} nano short and no funding key was used")
+                if isinstance(funding_key, BaseException):
+                    raise funding_key
+                await self._submit(
+                    funding_key, "transfer_keep_alive", {"dest": key.ss58_address, "value": shortfall}, "Balances"
+                )
+                result.funded = shortfall
+
+            address = f"{miner_config.external_address or miner_config.miner_host}:{miner_config.miner_port}"
+            params = {
+                "network_name": subnet["name"],
+                "address": address,
+                "name": miner_config.miner_name,
+                "module_key": key.ss58_address,
+                "metadata": None,
+            }
+            receipt = await self._submit(key, "register", params)
+            result.extrinsic_hash = getattr(receipt, "extrinsic_hash", None)
+            if stake:
+                await self._submit(key, "add_stake", {"amount": stake, "module_key": key.ss58_address})
+                result.staked = stake
+            result.status = "registered"
+        except Exception as e:
+            logger.error(f"Registering {miner_config.miner_name} failed: {e}")
+            result.error = str(e)
+        return result
+
+
+async def aregister_miners(
+    miner_configs: Sequence[Any], client: Optional[ChainClientPool] = None, **options: Any
+) -> List[RegistrationResult]:
+    """
+    Async entry point for `MinerRegistrar.register_many`, for callers already running an
+    event loop, such as the server or the supervisor.
+
+    Args:
+        miner_configs (Sequence[MinerConfig]): The miners to register.
+        client (Optional[ChainClientPool]): The chain client. Defaults to the shared pool.
+        **options: Extra `MinerRegistrar` options, e.g. `key_loader`.
+
+    Returns:
+        List[RegistrationResult]: One result per config, in order.
+    """
+    registrar = MinerRegistrar(client, **options)
+    return await registrar.register_many(miner_configs)
+
+
+def register_miners(
+    miner_configs: Sequence[Any], client: Optional[ChainClientPool] = None, **options: Any
+) -> List[RegistrationResult]:
+    """
+    Synchronous entry point for `MinerRegistrar.register_many`, see `aregister_miners`.
+
+    Raises:
+        RegistrationError: If called from a running event loop; await `aregister_miners` there.
+    """
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(aregister_miners(miner_configs, client, **options))
+    raise RegistrationError("register_miners was called from a running event loop; await aregister_miners instead")
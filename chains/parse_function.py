@@ -2,71 +2,139 @@ import json
 import ast
 import os
 from pathlib import Path
+from typing import Any, Dict, List, Tuple
 from dotenv import load_dotenv
-from mining_ops.data_parsing.data_models import CODE_PATH, FUNCTION_PATH
 
 load_dotenv()
 
+CODE_PATH = os.getenv("CODE_PATH")
+FUNCTION_PATH = os.getenv("FUNCTION_PATH", "data/instance_data/api_functions.json")
 
-def extract_function_calls(code):
-    class FunctionCallVisitor(ast.NodeVisitor):
-        def __init__(self):
-            """
-            Extracts function calls from the given code by parsing the Abstract Syntax Tree (AST) of the code.
-
-            Args:
-                code (str): The code to extract function calls from.
-
-            Returns:
-                list: A list of tuples containing the function name, the called function, and the arguments passed to the function.
-            """
-            self.results = []
-
-        def visit_FunctionDef(self, node):
-            """
-            Visits a function definition node in the abstract syntax tree (AST) and extracts function calls
-            made within the function. The function name, the called function, and the arguments passed to the
-            function are stored in a list.
-
-            Args:
-                node (ast.FunctionDef): The function definition node to visit.
-
-            Returns:
-                None
-            """
-            functionname = node.name
-            for child in ast.walk(node):
-                if (
-                    isinstance(child, ast.Call)
-                    and isinstance(child.func, ast.Attribute)
-                    and (
-                        isinstance(child.func.value, ast.Name)
-                        and child.func.value.id == "self"
-                    )
-                ):
-                    args = []
-                    for arg in child.args:
-                        if isinstance(arg, ast.Constant):
-                            args.append(repr(arg.value))
-                        elif isinstance(arg, ast.Name):
-                            args.append(arg.id)
-                    for kwarg in child.keywords:
-                        if isinstance(kwarg.value, ast.Constant):
-                            ast_constant_name = f"{kwarg.arg}={repr(kwarg.value)}"
-                            if "ast.Constant object at" in ast_constant_name:
-                                ast_constant_name = (
-                                    f"{kwarg.arg}={repr(kwarg.value.value)}"
-                                )
-                            args.append(ast_constant_name)
-                        elif isinstance(kwarg.value, ast.Name):
-                            args.append(f"{kwarg.arg}={kwarg.value.id}")
-                    calledfunction = child.func.attr
-                    self.results.append((functionname, calledfunction, args))
-
-    tree = ast.parse(code)
+
+def format_arguments(call: ast.Call) -> List[str]:
+    """
+    Formats the constant and name arguments of a call, e.g. `["'a'", "x", "key=1"]`.
+    Other argument expressions are left out.
+    """
+    args = []
+    for arg in call.args:
+        if isinstance(arg, ast.Constant):
+            args.append(repr(arg.value))
+        elif isinstance(arg, ast.Name):
+            args.append(arg.id)
+    for kwarg in call.keywords:
+        if isinstance(kwarg.value, ast.Constant):
+            args.append(f"{kwarg.arg}={repr(kwarg.value.value)}")
+        elif isinstance(kwarg.value, ast.Name):
+            args.append(f"{kwarg.arg}={kwarg.value.id}")
+    return args
+
+
+class FunctionCallVisitor(ast.NodeVisitor):
+    """
+    Collects function definitions and the calls made inside them in a single pass.
+
+    Each node is visited once. Calls are attributed to the innermost enclosing function,
+    so nested functions and methods get their own entries and deep nesting stays linear.
+
+    Attributes:
+        definitions (List[Tuple[str, str, int]]): `(name, qualified name, line)` of every
+            function and method.
+        calls (List[Tuple[str, str, str, List[str], str, int]]): `(caller, caller qualified
+            name, called function, arguments, kind, line)`. `kind` is "self" for
+            `self.method()`, "name" for `function()` and "attribute" for `obj.method()`.
+    """
+
+    def __init__(self):
+        self.definitions: List[Tuple[str, str, int]] = []
+        self.calls: List[Tuple[str, str, str, List[str], str, int]] = []
+        self._names: List[str] = []
+        self._functions: List[Tuple[str, str]] = []
+
+    def visit(self, node: ast.AST) -> None:
+        # An explicit stack instead of recursive NodeVisitor dispatch: same pre-order,
+        # source-order traversal, without a method lookup and call per node.
+        stack: List[Any] = [node]
+        function_types = (ast.FunctionDef, ast.AsyncFunctionDef)
+        while stack:
+            node = stack.pop()
+            if node is _END_FUNCTION:
+                self._functions.pop()
+                self._names.pop()
+                continue
+            if node is _END_CLASS:
+                self._names.pop()
+                continue
+            if isinstance(node, ast.Call):
+                self._visit_call(node)
+            elif isinstance(node, function_types):
+                self._names.append(node.name)
+                qualname = ".".join(self._names)
+                self.definitions.append((node.name, qualname, node.lineno))
+                self._functions.append((node.name, qualname))
+                stack.append(_END_FUNCTION)
+            elif isinstance(node, ast.ClassDef):
+                self._names.append(node.name)
+                stack.append(_END_CLASS)
+            children = list(ast.iter_child_nodes(node))
+            children.reverse()
+            stack.extend(children)
+
+    def _visit_call(self, node: ast.Call) -> None:
+        function = node.func
+        if isinstance(function, ast.Attribute):
+            is_self = isinstance(function.value, ast.Name) and function.value.id == "self"
+            called, kind = function.attr, "self" if is_self else "attribute"
+        elif isinstance(function, ast.Name):
+            called, kind = function.id, "name"
+        else:
+            return
+        if self._functions:
+            caller, qualname = self._functions[-1]
+            self.calls.append((caller, qualname, called, format_arguments(node), kind, node.lineno))
+
+
+_END_FUNCTION, _END_CLASS = object(), object()
+
+
+def parse_code(code: str) -> FunctionCallVisitor:
+    """
+    Parses code once and returns the visitor holding its definitions and calls.
+
+    Raises:
+        SyntaxError: If the code cannot be parsed.
+    """
     visitor = FunctionCallVisitor()
-    visitor.visit(tree)
-    return visitor.results
+    visitor.visit(ast.parse(code))
+    return visitor
+
+
+def extract_function_calls(code):
+    """
+    Extracts the `self.method(...)` calls made inside each function of the given code.
+
+    Args:
+        code (str): The code to extract function calls from.
+
+    Returns:
+        list: A list of tuples containing the function name, the called function, and the arguments passed to the function.
+    """
+    return [
+        (caller, called, args)
+        for caller, _, called, args, kind, _ in parse_code(code).calls
+        if kind == "self"
+    ]
+
+
+def build_function_map(results: List[Tuple[str, str, List[str]]]) -> Dict[str, Dict[str, Any]]:
+    """
+    Collapses `extract_function_calls` results into `{function: {"function": called, "arguments": args}}`,
+    keeping the last call of each function.
+    """
+    function_dict = {}
+    for functionname, calledfunction, args in results:
+        function_dict[functionname] = {"function": calledfunction, "arguments": args}
+    return function_dict
 
 
 def construct_function_map(code_path, save_path):
@@ -83,23 +151,11 @@ def construct_function_map(code_path, save_path):
     """
     with open(code_path, "r", encoding="utf-8") as f:
         code = f.read()
-    results = extract_function_calls(code)
-
-    function_dict = {}
-    for function in results:
-        functionname, calledfunction, args = function
-        function_dict[functionname] = {"function": calledfunction, "arguments": args}
+    function_dict = build_function_map(extract_function_calls(code))
 
     with open(save_path, "w", encoding="utf-8") as f:
         f.write(json.dumps(function_dict, indent=4))
 
 
 if __name__ == "__main__":
-    filepath = Path(CODE_PATH)
-    results = extract_function_calls(filepath.read_text())
-    for result in results:
-        function_name, called_function, arguments = result
-
-    save_path = Path(FUNCTION_PATH)
-
-    construct_function_map(CODE_PATH, FUNCTION_PATH)
+    construct_function_map(Path(CODE_PATH), Path(FUNCTION_PATH))
@@ -2,11 +2,15 @@ import os
 import json
 import base64
 import requests
-import subprocess
+from pathlib import Path
 from importlib import import_module
 from typing import Dict, Any, Optional
 from pydantic import BaseModel
 from data_models import MinerConfig, ModuleConfig, BaseModule, app
+from base.supervisor import MINER_CONFIGS_PATH, MinerSupervisor, serve_miners
+from base.module_sandbox import ModuleSandbox
+from base.setup_engine import SetupError, get_setup_engine
+from base.dispatch import find_miner_class, write_dispatch_table
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -106,7 +110,7 @@ class ModuleManager:
             - It installs the module using the provided `module_config`.
             - It saves the `module_config` in `self.module_configs`.
             - It saves the module configurations.
-            - It imports the module.
+            - It imports the module, or starts its sandbox.
             - It saves the module in `self.modules`.
             - It sets the module as the current module.
             - It saves the module in the module registry.
@@ -131,12 +135,16 @@ class ModuleManager:
         self.save_configs()
         return self.install_module(module_config)
 
-    def install_module(self, module_config: ModuleConfig):
+    def install_module(self, module_config: ModuleConfig, sandboxed: Optional[bool] = None, **sandbox_options):
         """
         Installs a module based on the provided `ModuleConfig`.
 
         Args:
             module_config (ModuleConfig): The configuration for the module to install.
+            sandboxed (Optional[bool]): Run the module in worker subprocesses through a
+                `ModuleSandbox` instead of importing it into this process. Defaults to
+                the `MODULE_SANDBOX` environment variable.
+            **sandbox_options: Extra `ModuleSandbox` options such as `workers` or `memory_limit`.
 
         Returns:
             module: The installed module.
@@ -149,6 +157,7 @@ class ModuleManager:
             - It installs the module using the provided `module_config`.
             - It saves the `module_config` in `self.module_configs`.
             - It saves the module configurations.
+            - It writes the dispatch table of the module's miner class.
             - It imports the module.
             - It saves the module in `self.modules`.
             - It sets the module as the current module.
@@ -161,9 +170,21 @@ class ModuleManager:
         self.module_configs[module_config.module_name] = module_config.model_dump()
         self.save_configs()
 
-        module = import_module(
-            f"modules.{module_config.module_name}.{module_config.module_name}"
-        )
+        module_path = f"modules.{module_config.module_name}.{module_config.module_name}"
+        # The table is loaded for the miner class in `<name>_module.py`, see `BaseMiner.add_dispatch_routes`.
+        miner_source = Path("modules", module_config.module_name, f"{module_config.module_name}_module.py")
+        miner_class = find_miner_class(miner_source.read_text(encoding="utf-8")) if miner_source.is_file() else None
+        if miner_class is not None:
+            write_dispatch_table(miner_source, module_config.module_name, miner_class)
+        if sandboxed is None:
+            sandboxed = os.getenv("MODULE_SANDBOX", "").lower() in ("1", "true", "yes")
+        if sandboxed:
+            site_packages = get_setup_engine().site_packages(module_config)
+            sandbox_options.setdefault("paths", [site_packages] if site_packages else [])
+            module = ModuleSandbox(module_path, name=module_config.module_name, **sandbox_options)
+        else:
+            get_setup_engine().activate(module_config)
+            module = import_module(module_path)
         self.modules[module_config.module_name] = module
         self.module = module
         self.save_module(module_config, module)
@@ -207,22 +228,15 @@ class ModuleManager:
         """
         Runs the setup process for the specified module configuration.
 
+        The module's scripts run in a cached virtualenv keyed by its lockfile, and
+        setup is skipped when the module is unchanged, see `ModuleSetupEngine`.
+
         Args:
             module_config (ModuleConfig): The configuration for the module.
-
-        Raises:
-            subprocess.CalledProcessError: If an error occurs during the setup process.
         """
         try:
-            subprocess.run(
-                [
-                    "python",
-                    "-m",
-                    f"modules.{module_config.module_name}.setup_{module_config.module_name}",
-                ],
-                check=True,
-            )
-        except subprocess.CalledProcessError as e:
+            return get_setup_engine().setup(module_config)
+        except SetupError as e:
             print(f"Error setting up module: {e}")
 
     def remove_module(self, module_config: ModuleConfig):
@@ -325,10 +339,31 @@ class ModuleManager:
         for i, available_module in enumerate(self.modules.keys(), start=1):
             print(f"{i}: {available_module}.")
     
-    def serve_module(self, module_config):
-        module = import_module(f"modules.{module_config.module_name}.{module_config.module_name}_module")
-        miner = module.TranslationMiner(miner_config=module.miner_settings, module_config=module.module_settings)
-        miner.serve_miner(miner_config, reload=True, register=False)
+    def serve_module(self, module_config: ModuleConfig):
+        """
+        Serves the miner of the given module with the miner configuration from the environment.
+
+        Args:
+            module_config (ModuleConfig): The configuration of the module to serve.
+
+        Returns:
+            None
+        """
+        config = miner_config.model_copy(update={"module_name": module_config.module_name})
+        MinerSupervisor([config]).run()
+
+    def serve_miners(self, module_config: Optional[ModuleConfig] = None):
+        """
+        Serves every miner in 'modules/miner_configs.json' from this process, sharing each
+        loaded module between the miners that use it.
+
+        Args:
+            module_config (Optional[ModuleConfig]): Unused; accepted for the CLI.
+
+        Returns:
+            None
+        """
+        serve_miners(MINER_CONFIGS_PATH)
 
     def cli(self):
         """
@@ -342,7 +377,8 @@ class ModuleManager:
             "4": ("List Modules", self.list_modules),
             "5": ("Remove Module", self.remove_module),
             "6": ("Serve Module", self.serve_module),
-            "7": ("Exit", exit),
+            "7": ("Serve All Miners", self.serve_miners),
+            "8": ("Exit", exit),
         }
 
         while True:
@@ -0,0 +1,95 @@
+import numpy as np
+import pytest
+from base.artifact_store import ArtifactStore
+from base.base_module import BaseModule, ModuleConfig
+
+
+@pytest.fixture
+def store(tmp_path):
+    module_dir = tmp_path / "modules" / "whisper"
+    (module_dir / "weights").mkdir(parents=True)
+    np.arange(12, dtype=np.float32).tofile(module_dir / "weights" / "model.bin")
+    (module_dir / "vocab.txt").write_bytes(b"hello world")
+    (module_dir / "empty.bin").write_bytes(b"")
+    store = ArtifactStore(tmp_path / "modules")
+    yield store
+    store.close()
+
+
+def test_buffer_is_zero_copy(store):
+    # Act
+    artifact = store.open("whisper", "vocab.txt")
+    buffer = artifact.buffer()
+    word = artifact.buffer(6, 5)
+
+    # Assert
+    assert bytes(buffer) == b"hello world"
+    assert bytes(word) == b"world"
+    assert buffer.readonly
+    assert store.open("whisper", "vocab.txt") is artifact
+
+
+def test_array_view(store):
+    # Act
+    artifact = store.open("whisper", "weights/model.bin")
+    weights = artifact.array(np.float32, shape=(3, 4))
+    tail = artifact.array(np.float32, offset=8 * 4)
+
+    # Assert
+    assert weights.tolist() == np.arange(12, dtype=np.float32).reshape(3, 4).tolist()
+    assert tail.tolist() == [8.0, 9.0, 10.0, 11.0]
+    assert not weights.flags.writeable
+    with pytest.raises(ValueError):
+        weights[0, 0] = 1.0
+
+
+@pytest.mark.parametrize(
+    "path, error",
+    [("../other/secret", ValueError), ("/etc/passwd", ValueError), ("missing.bin", FileNotFoundError)],
+    ids=["parent", "absolute", "missing"],
+)
+def test_rejected_paths(store, path, error):
+    # Act / Assert
+    with pytest.raises(error):
+        store.open("whisper", path)
+
+
+def test_empty_file_and_listing(store):
+    # Act
+    empty = store.open("whisper", "empty.bin")
+
+    # Assert
+    assert bytes(empty.buffer()) == b""
+    assert store.list("whisper") == ["empty.bin", "vocab.txt", "weights/model.bin"]
+    assert store.list("whisper", "weights/*.bin") == ["weights/model.bin"]
+    with pytest.raises(ValueError, match="outside"):
+        empty.buffer(0, 1)
+
+
+def test_stats_and_close(store):
+    # Arrange
+    artifact = store.open("whisper", "vocab.txt")
+    store.open("whisper", "weights/model.bin")
+
+    # Act
+    stats = store.stats()
+    store.close()
+
+    # Assert
+    assert stats == {"artifacts": 2, "mapped_bytes": 11 + 48}
+    assert artifact.closed
+    assert not store.open("whisper", "vocab.txt").closed
+
+
+def test_base_module_get_artifact(store, tmp_path, monkeypatch):
+    # Arrange
+    monkeypatch.setattr("base.base_module.get_artifact_store", lambda: store)
+    module_path = str(tmp_path / "modules" / "whisper")
+    module = BaseModule(ModuleConfig(module_name="whisper", module_path=module_path))
+
+    # Act
+    buffer = module.get_artifact("vocab.txt")
+
+    # Assert
+    assert bytes(buffer) == b"hello world"
+    assert module.open_artifact("vocab.txt").buffer().obj is buffer.obj
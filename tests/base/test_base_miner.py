@@ -5,6 +5,7 @@ from typing import Any
 from base.base_miner import BaseMiner
 from base.base_module import BaseModule
 from base.base_miner import MinerConfig, MinerRequest
+from chains.commune.registration import RegistrationResult
 
 
 class TestBaseMiner(BaseMiner):
@@ -127,28 +128,15 @@ def test_serve_miner(reload, register, base_miner, miner_config):
 
 def test_register_miner(base_miner, miner_config):
     # Arrange
-    with patch("subprocess.run") as mock_run:
+    result = RegistrationResult(miner_name=miner_config.miner_name, status="registered")
+    with patch("base.base_miner.register_miners", return_value=[result]) as mock_register_miners:
 
         # Act
-        base_miner.register_miner(miner_config)
+        registered = base_miner.register_miner(miner_config)
 
         # Assert
-        mock_run.assert_called_once_with(
-            [
-                "bash",
-                "chains/commune/register_miner.sh",
-                "register",
-                miner_config.miner_name,
-                miner_config.miner_keypath,
-                miner_config.miner_host,
-                str(miner_config.port),
-                str(miner_config.netuid),
-                str(miner_config.stake),
-                miner_config.funding_key,
-                str(miner_config.modifier),
-            ],
-            check=True,
-        )
+        mock_register_miners.assert_called_once_with([miner_config])
+        assert registered == result
 
 
 def test_process(base_miner):
@@ -146,17 +146,16 @@ def test_save_module(base_module):
     mock_write_text.assert_called_once_with("module content", encoding="utf-8")
 
 
-def test_setup_module(base_module):
+def test_setup_module(base_module, module_config):
     # Arrange
-    with patch("subprocess.run") as mock_run:
+    with patch("base.setup_engine.get_setup_engine") as mock_engine:
 
         # Act
-        base_module.setup_module()
+        result = base_module.setup_module()
 
     # Assert
-    mock_run.assert_called_once_with(
-        ["python", "-m", "test_path.setup_test_module"], check=True
-    )
+    mock_engine.return_value.setup.assert_called_once_with(module_config)
+    assert result is mock_engine.return_value.setup.return_value
 
 
 def test_update_module(base_module, module_config):
@@ -174,14 +173,12 @@ def test_install_module(base_module, module_config):
     # Arrange
     with patch.object(base_module, "get_module") as mock_get_module, patch.object(
         base_module, "setup_module"
-    ) as mock_setup_module, patch("subprocess.run") as mock_run:
+    ) as mock_setup_module:
 
         # Act
-        base_module.install_module(module_config)
+        result = base_module.install_module(module_config)
 
     # Assert
     mock_get_module.assert_called_once()
     mock_setup_module.assert_called_once()
-    mock_run.assert_called_once_with(
-        ["bash", "test_path/install_test_module.sh"], check=True
-    )
+    assert result is mock_setup_module.return_value
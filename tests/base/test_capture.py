@@ -0,0 +1,74 @@
+import gzip
+import pytest
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+from base.capture import CaptureMiddleware, CaptureWriter, load_capture, read_capture
+
+
+def make_client(path, **options):
+    app = FastAPI()
+
+    @app.post("/modules/echo/process")
+    async def process(request: Request):
+        return {"data": (await request.json())["data"]}
+
+    @app.get("/health/live")
+    async def live():
+        return {"status": "ok"}
+
+    writer = CaptureWriter(path, flush_interval=0.05)
+    app.add_middleware(CaptureMiddleware, writer=writer, **options)
+    return TestClient(app), writer
+
+
+def test_captures_requests_and_responses(tmp_path):
+    # Arrange
+    path = tmp_path / "capture.jsonl.gz"
+    client, writer = make_client(path, sample_rate=1.0)
+
+    # Act
+    for index in range(5):
+        client.post("/modules/echo/process", json={"data": index}, headers={"X-Key": "5Caller", "X-Signature": "00"})
+    client.get("/health/live")
+    writer.close()
+    records = load_capture(path)
+
+    # Assert
+    assert [record.body_bytes() for record in records] == [b'{"data": %d}' % index for index in range(5)]
+    assert all(record.path == "/modules/echo/process" and record.status == 200 for record in records)
+    assert records[0].response == '{"data":0}'
+    assert records[0].headers == {"x-key": "5Caller", "content-type": "application/json"}
+    assert records[0].route == "echo/process"
+    assert records[0].duration > 0
+
+
+@pytest.mark.parametrize(
+    "options",
+    [{"sample_rate": 0.0}, {"sample_rate": 1.0, "max_body": 4}, {"sample_rate": 1.0, "prefixes": ["/other/"]}],
+    ids=["unsampled", "truncated", "other_prefix"],
+)
+def test_skipped_requests(tmp_path, options):
+    # Arrange
+    path = tmp_path / "capture.jsonl.gz"
+    client, writer = make_client(path, **options)
+
+    # Act
+    client.post("/modules/echo/process", json={"data": "x" * 100})
+    writer.close()
+
+    # Assert
+    assert not path.exists() or load_capture(path) == []
+
+
+def test_incomplete_last_batch_is_ignored(tmp_path):
+    # Arrange
+    path = tmp_path / "capture.jsonl.gz"
+    line = b'{"t":1.0,"duration":0.1,"method":"POST","path":"/modules/echo/process"}\n'
+    member = gzip.compress(line, mtime=0)
+    path.write_bytes(member + member + member[: len(member) // 2])
+
+    # Act
+    records = list(read_capture(path))
+
+    # Assert
+    assert len(records) == 2
@@ -0,0 +1,258 @@
+import sys
+import json
+import time
+import asyncio
+import types
+import importlib
+import httpx
+import pytest
+from typing import Optional
+from pydantic import BaseModel
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from base.base_miner import BaseMiner, MinerConfig
+from base.dispatch import (
+    DISPATCH_FILE,
+    add_dispatch_routes,
+    analyze_source,
+    bind,
+    find_miner_class,
+    load_dispatch_table,
+    write_dispatch_table,
+)
+
+SOURCE = '''
+from base.base_miner import BaseMiner
+
+
+class Helper:
+    def run(self):
+        pass
+
+
+class TextMiner(BaseMiner):
+    def process(self, miner_request):
+        return miner_request.data
+
+    def count(self, text: str, limit: int = 10, *, strict: bool = False):
+        return min(len(text), limit)
+
+    async def echo(self, **values):
+        return values
+
+    def _private(self):
+        pass
+
+    @staticmethod
+    def helper():
+        pass
+
+    def serve_miner(self, miner_config):
+        pass
+'''
+
+
+class Point(BaseModel):
+    x: int
+    y: int
+
+
+class DispatchMiner(BaseMiner):
+    def __init__(self, miner_config):
+        self.miner_config = miner_config
+        self.module = None
+
+    def process(self, miner_request):
+        return {"echo": miner_request.data}
+
+    def add(self, a: int, b: int = 1):
+        return a + b
+
+    def norm(self, point: Point):
+        return abs(point.x) + abs(point.y)
+
+    def greet(self, name: Optional[str]):
+        return f"hello {name}"
+
+    async def wait(self, value: float):
+        return value * 2
+
+
+@pytest.fixture
+def client():
+    app = FastAPI()
+    miner = DispatchMiner(MinerConfig(miner_name="miner", module_name="dispatch"))
+    miner.add_dispatch_routes(app)
+    return TestClient(app)
+
+
+def test_analyze_source_finds_public_methods():
+    # Act
+    table = analyze_source(SOURCE, "text")
+
+    # Assert
+    assert table.target == "TextMiner"
+    assert sorted(table.methods) == ["count", "echo", "process"]
+    count = table.methods["count"]
+    assert [(param.name, param.annotation, param.required) for param in count.params] == [
+        ("text", "str", True),
+        ("limit", "int", False),
+        ("strict", "bool", False),
+    ]
+    assert count.body == "kwargs"
+    assert table.methods["process"].body == "model"
+    assert table.methods["echo"].is_async and table.methods["echo"].var_keyword
+
+
+def test_analyze_source_without_class_exposes_functions():
+    # Act
+    table = analyze_source("def run(x: int):\n    return x\n\ndef _hidden():\n    pass\n", "plain")
+
+    # Assert
+    assert table.target is None
+    assert list(table.methods) == ["run"]
+
+
+def test_written_table_is_reused_until_source_changes(tmp_path):
+    # Arrange
+    source = tmp_path / "text.py"
+    source.write_text(SOURCE, encoding="utf-8")
+    written = write_dispatch_table(source, "text")
+    saved = json.loads((tmp_path / DISPATCH_FILE).read_text(encoding="utf-8"))
+    saved["methods"].pop("echo")
+    (tmp_path / DISPATCH_FILE).write_text(json.dumps(saved), encoding="utf-8")
+
+    # Act
+    loaded = load_dispatch_table(source, "text")
+    source.write_text(SOURCE + "\n", encoding="utf-8")
+    reanalyzed = load_dispatch_table(source, "text")
+
+    # Assert
+    assert sorted(loaded.methods) == ["count", "process"]
+    assert sorted(reanalyzed.methods) == sorted(written.methods)
+
+
+def test_install_time_table_is_used_by_the_miner(tmp_path, monkeypatch):
+    # Arrange
+    source = tmp_path / "text_module.py"
+    source.write_text(SOURCE, encoding="utf-8")
+    write_dispatch_table(source, "text", find_miner_class(SOURCE))
+    saved = json.loads((tmp_path / DISPATCH_FILE).read_text(encoding="utf-8"))
+    saved["methods"].pop("echo")
+    (tmp_path / DISPATCH_FILE).write_text(json.dumps(saved), encoding="utf-8")
+    monkeypatch.syspath_prepend(str(tmp_path))
+    module = importlib.import_module("text_module")
+    miner = object.__new__(module.TextMiner)
+    miner.miner_config = MinerConfig(miner_name="miner", module_name="text")
+    app = FastAPI()
+
+    # Act
+    miner.add_dispatch_routes(app)
+    sys.modules.pop("text_module")
+
+    # Assert
+    assert find_miner_class(SOURCE) == "TextMiner"
+    assert sorted(app.state.dispatch["text"]) == ["count", "process"]
+
+
+def test_bind_rejects_missing_method():
+    # Arrange
+    table = analyze_source(SOURCE, "text")
+
+    # Act / Assert
+    with pytest.raises(LookupError):
+        bind(table, DispatchMiner(MinerConfig()))
+
+
+@pytest.mark.parametrize(
+    "method, body, status, expected",
+    [
+        ("process", {"data": "hi"}, 200, {"echo": "hi"}),
+        ("process", None, 200, {"echo": None}),
+        ("add", {"a": 2, "b": 3}, 200, 5),
+        ("add", {"a": 2}, 200, 3),
+        ("add", {"b": 2}, 422, None),
+        ("add", {"a": "2"}, 422, None),
+        ("add", {"a": True}, 422, None),
+        ("add", {"a": 1, "c": 2}, 422, None),
+        ("add", [1, 2], 422, None),
+        ("norm", {"x": 3, "y": -4}, 200, 7),
+        ("norm", {"x": 3}, 422, None),
+        ("greet", {"name": "ada"}, 200, "hello ada"),
+        ("wait", {"value": 2}, 200, 4),
+        ("missing", {}, 404, None),
+        ("add_dispatch_routes", {}, 404, None),
+    ],
+    ids=[
+        "process",
+        "process_empty_body",
+        "kwargs",
+        "default_argument",
+        "missing_argument",
+        "wrong_type",
+        "bool_is_not_int",
+        "unexpected_argument",
+        "not_an_object",
+        "model",
+        "invalid_model",
+        "typing_annotation",
+        "async",
+        "unknown_method",
+        "lifecycle_method",
+    ],
+)
+def test_dispatch_routes(client, method, body, status, expected):
+    # Act
+    response = client.post(f"/modules/dispatch/{method}", json=body)
+
+    # Assert
+    assert response.status_code == status
+    if expected is not None:
+        assert response.json() == expected
+
+
+def test_dispatch_routes_serve_several_modules(client):
+    # Arrange
+    app = client.app
+    module = types.ModuleType("other")
+    exec("def ping(times: int = 1):\n    return 'pong' * times\n", vars(module))
+    add_dispatch_routes(app, "other", bind(analyze_source("def ping(times: int = 1):\n    pass\n", "other"), module))
+
+    # Act
+    other = client.post("/modules/other/ping", json={"times": 2})
+    dispatch = client.post("/modules/dispatch/add", json={"a": 1})
+    unknown = client.post("/modules/unknown/add", json={"a": 1})
+
+    # Assert
+    assert other.json() == "pongpong"
+    assert dispatch.json() == 2
+    assert unknown.status_code == 404
+    assert [route.path for route in app.routes].count("/modules/{module_name}/{method}") == 1
+
+
+def test_sync_methods_do_not_block_the_loop(client):
+    # Arrange
+    app = client.app
+    module = types.ModuleType("slow")
+    source = "import time\n\ndef slow(seconds: float):\n    time.sleep(seconds)\n    return seconds\n\nasync def ping():\n    return 'pong'\n"
+    exec(source, vars(module))
+    add_dispatch_routes(app, "slow", bind(analyze_source(source, "slow"), module))
+
+    async def main():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://miner") as http:
+            start = time.perf_counter()
+            slow = [asyncio.create_task(http.post("/modules/slow/slow", json={"seconds": 0.3})) for _ in range(2)]
+            await asyncio.sleep(0.05)
+            ping = await http.post("/modules/slow/ping")
+            ping_time = time.perf_counter() - start
+            await asyncio.gather(*slow)
+            return ping.json(), ping_time, time.perf_counter() - start
+
+    # Act
+    pong, ping_time, total = asyncio.run(main())
+
+    # Assert
+    assert pong == "pong"
+    assert ping_time < 0.25
+    assert total < 0.55
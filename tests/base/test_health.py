@@ -0,0 +1,108 @@
+import asyncio
+import threading
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from base.base_miner import BaseMiner, MinerConfig, MinerRequest
+from base.health import FAILED, READY, Readiness, add_health_routes
+
+
+class WarmMiner(BaseMiner):
+    def __init__(self, miner_config, gate=None):
+        self.miner_config = miner_config
+        self.module = None
+        self.gate = gate
+        self.processed = []
+
+    def warmup_requests(self):
+        return [MinerRequest(data="warm")]
+
+    def process(self, miner_request):
+        if self.gate is not None:
+            self.gate.wait(5)
+        self.processed.append(miner_request.data)
+        return miner_request.data
+
+
+@pytest.fixture
+def readiness(monkeypatch):
+    readiness = Readiness()
+    monkeypatch.setattr("base.base_miner.get_readiness", lambda: readiness)
+    monkeypatch.setattr("base.health.get_readiness", lambda: readiness)
+    return readiness
+
+
+def fail():
+    raise RuntimeError("no model")
+
+
+async def async_warmup():
+    await asyncio.sleep(0)
+
+
+@pytest.mark.parametrize(
+    "warmup, state, error",
+    [(None, READY, None), (lambda: 1, READY, None), (async_warmup, READY, None), (fail, FAILED, "no model")],
+    ids=["none", "sync", "async", "failure"],
+)
+def test_run_records_outcome(warmup, state, error):
+    # Arrange
+    readiness = Readiness()
+    readiness.register("module")
+    assert not readiness.is_ready()
+
+    # Act
+    status = readiness.run("module", warmup)
+
+    # Assert
+    assert status.state == state
+    assert status.duration >= 0
+    assert (error is None and status.error is None) or error in status.error
+    assert readiness.is_ready() == (state == READY)
+
+
+def test_ready_endpoint_scoped_to_app_components(readiness):
+    # Arrange
+    readiness.run("whisper")
+    readiness.register("llama")
+    app = FastAPI()
+    add_health_routes(app, ["whisper"])
+    client = TestClient(app)
+
+    # Act
+    ready = client.get("/health/ready")
+    add_health_routes(app, ["llama"])
+    warming = client.get("/health/ready")
+
+    # Assert
+    assert client.get("/health/live").json() == {"status": "alive"}
+    assert ready.status_code == 200
+    assert warming.status_code == 503
+    assert warming.json()["components"]["llama"]["state"] == "pending"
+    assert warming.json()["components"]["whisper"]["state"] == READY
+
+
+def test_miner_is_ready_after_warmup(readiness):
+    # Arrange
+    gate = threading.Event()
+    miner = WarmMiner(MinerConfig(miner_name="warm"), gate)
+    app = FastAPI()
+    miner.add_health_routes(app)
+
+    with TestClient(app) as client:
+        # Act
+        live = client.get("/health/live")
+        warming = client.get("/health/ready")
+        gate.set()
+        for _ in range(100):
+            ready = client.get("/health/ready")
+            if ready.status_code == 200:
+                break
+            threading.Event().wait(0.02)
+
+    # Assert
+    assert live.status_code == 200
+    assert warming.status_code == 503
+    assert ready.status_code == 200
+    assert ready.json()["components"]["warm"]["duration"] > 0
+    assert miner.processed == ["warm"]
@@ -0,0 +1,128 @@
+import time
+import asyncio
+import httpx
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from base.debug import add_debug_routes
+from base.loop_monitor import LoopMonitor, add_loop_monitor, module_of
+
+
+def block(seconds):
+    time.sleep(seconds)
+
+
+def make_app(monitor):
+    app = FastAPI()
+
+    @app.post("/modules/echo/process")
+    async def process():
+        block(0.3)
+        return {"ok": True}
+
+    @app.post("/modules/echo/fast")
+    async def fast():
+        await asyncio.sleep(0.01)
+        return {"ok": True}
+
+    add_loop_monitor(app, monitor)
+    return app
+
+
+async def drive(monitor, app, paths):
+    monitor.start()
+    try:
+        await asyncio.sleep(0.05)
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://miner") as client:
+            for path in paths:
+                await client.post(path)
+        await asyncio.sleep(0.05)
+    finally:
+        await monitor.stop()
+
+
+def test_blocking_call_is_attributed_to_route_and_call_site():
+    # Arrange
+    monitor = LoopMonitor(interval=0.01, threshold=0.05)
+    app = make_app(monitor)
+
+    # Act
+    asyncio.run(drive(monitor, app, ["/modules/echo/fast", "/modules/echo/process"]))
+
+    # Assert
+    [event] = list(monitor.events)
+    assert (event.route, event.module) == ("/modules/echo/process", "echo")
+    assert event.call_site.startswith(f"{__name__}:block:")
+    assert event.stack[-1] == event.call_site
+    assert 0.25 <= event.duration < 1.0
+    assert monitor.lag.total_count > 5
+    assert monitor.top_call_sites()[0].count == 1
+
+
+def test_block_outside_requests_is_unattributed():
+    # Arrange
+    monitor = LoopMonitor(interval=0.01, threshold=0.05)
+
+    async def main():
+        monitor.start()
+        await asyncio.sleep(0.05)
+        block(0.2)
+        await asyncio.sleep(0.05)
+        await monitor.stop()
+
+    # Act
+    asyncio.run(main())
+
+    # Assert
+    assert [event.route for event in monitor.events] == ["<loop>"]
+    assert "echo" not in monitor.blocked and monitor.blocked["<loop>"].total_count == 1
+
+
+def test_prometheus_metrics():
+    # Arrange
+    monitor = LoopMonitor(interval=0.01, threshold=0.05)
+    asyncio.run(drive(monitor, make_app(monitor), ["/modules/echo/process"]))
+
+    # Act
+    metrics = monitor.prometheus().splitlines()
+
+    # Assert
+    assert f'miner_event_loop_lag_seconds_bucket{{le="+Inf"}} {monitor.lag.total_count}' in metrics
+    assert 'miner_event_loop_blocked_seconds_bucket{module="echo",le="0.1"} 0' in metrics
+    assert 'miner_event_loop_blocked_seconds_bucket{module="echo",le="0.5"} 1' in metrics
+    [calls] = [line for line in metrics if line.startswith("miner_event_loop_blocking_calls_total{")]
+    assert 'route="/modules/echo/process",module="echo",call_site="' in calls and calls.endswith(" 1")
+
+
+def test_debug_routes_serve_report(monkeypatch):
+    # Arrange
+    monkeypatch.setenv("MINER_DEBUG_TOKEN", "secret")
+    monitor = LoopMonitor(interval=0.01, threshold=0.05)
+    app = make_app(monitor)
+    add_debug_routes(app)
+    headers = {"X-Debug-Token": "secret"}
+
+    # Act
+    with TestClient(app) as client:
+        client.post("/modules/echo/process")
+        time.sleep(0.05)
+        report = client.get("/debug/loop", headers=headers).json()
+        metrics = client.get("/debug/metrics", headers=headers)
+
+    # Assert
+    assert report["top_call_sites"][0]["module"] == "echo"
+    assert report["blocked_ms"]["echo"]["count"] == 1
+    assert metrics.status_code == 200 and "miner_event_loop_lag_seconds_count" in metrics.text
+
+
+@pytest.mark.parametrize(
+    "path, expected",
+    [("/modules/echo/process", "echo"), ("/modules/", None), ("/health/live", None)],
+    ids=["module", "empty", "other"],
+)
+def test_module_of(path, expected):
+    # Act
+    result = module_of(path)
+
+    # Assert
+    assert result == expected
@@ -0,0 +1,134 @@
+import asyncio
+import tracemalloc
+import httpx
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from base.debug import add_debug_routes
+from base.memory_profiler import MemoryProfiler, MemorySample, add_memory_profiler
+
+retained = []
+
+
+@pytest.fixture
+def profiler():
+    profiler = MemoryProfiler(mode="full", frames=4, sample_rate=1.0)
+    yield profiler
+    profiler.set_mode("off")
+    retained.clear()
+
+
+def make_app(profiler):
+    app = FastAPI()
+
+    @app.post("/modules/leaky/process")
+    async def leaky():
+        retained.append(bytearray(1 << 20))
+        return {"ok": True}
+
+    @app.post("/modules/slow/process")
+    async def slow():
+        await asyncio.sleep(0.05)
+        return {"ok": True}
+
+    add_memory_profiler(app, profiler)
+    return app
+
+
+async def post_all(app, paths):
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://miner") as client:
+        await asyncio.gather(*(client.post(path) for path in paths))
+
+
+def test_mode_switches_tracing(profiler):
+    # Act
+    full = (tracemalloc.is_tracing(), tracemalloc.get_traceback_limit())
+    profiler.set_mode("sampled")
+    sampled = (tracemalloc.is_tracing(), tracemalloc.get_traceback_limit())
+    profiler.set_mode("rss")
+
+    # Assert
+    assert (full, sampled) == ((True, 4), (True, 1))
+    assert not tracemalloc.is_tracing()
+    with pytest.raises(ValueError):
+        profiler.set_mode("verbose")
+
+
+def test_requests_charged_to_module(profiler):
+    # Arrange
+    app = make_app(profiler)
+
+    # Act
+    asyncio.run(post_all(app, ["/modules/leaky/process"]))
+    asyncio.run(post_all(app, ["/modules/leaky/process"]))
+    asyncio.run(post_all(app, ["/modules/slow/process", "/modules/slow/process"]))
+
+    # Assert
+    leaky = profiler.modules["leaky"]
+    assert leaky.calls == 2
+    assert 2 << 20 <= leaky.retained < 3 << 20
+    assert profiler.modules["slow"].contended == 2
+
+
+def test_snapshot_diff_shows_allocation_site(profiler):
+    # Arrange
+    base = profiler.snapshot()
+
+    # Act
+    retained.append([object() for _ in range(20000)])
+    differences = profiler.diff(base)
+
+    # Assert
+    assert differences[0]["location"].startswith(__file__)
+    assert differences[0]["size_diff"] > 100000
+    with pytest.raises(KeyError):
+        profiler.diff("missing")
+
+
+def test_leak_suspects_grow_across_summaries(profiler):
+    # Act
+    for _ in range(3):
+        retained.append(bytearray(256 * 1024))
+        profiler.summarize()
+    suspects = profiler.leak_suspects(min_growth=400 * 1024)
+
+    # Assert
+    assert suspects[0].location.startswith(__file__)
+    assert suspects[0].growth >= 512 * 1024
+    assert suspects[0].snapshots == 3
+
+
+def test_rss_samples_and_trend(profiler):
+    # Act
+    sample = profiler.sample_rss()
+    profiler.samples.clear()
+    profiler.samples.extend(MemorySample(t=seconds, rss=1000 + seconds, pss=0) for seconds in range(10))
+
+    # Assert
+    assert sample.rss > 0
+    assert profiler.rss_trend() == pytest.approx(3600)
+
+
+def test_debug_memory_routes(profiler, monkeypatch):
+    # Arrange
+    monkeypatch.setenv("MINER_DEBUG_TOKEN", "secret")
+    app = make_app(profiler)
+    add_debug_routes(app)
+    client = TestClient(app, headers={"X-Debug-Token": "secret"})
+
+    # Act
+    base = client.post("/debug/memory/snapshot").json()["snapshot"]
+    client.post("/modules/leaky/process")
+    diff = client.get("/debug/memory/diff", params={"base": base})
+    report = client.get("/debug/memory").json()
+    invalid = client.post("/debug/memory/mode", params={"mode": "verbose"})
+    off = client.post("/debug/memory/mode", params={"mode": "off"})
+    snapshot_while_off = client.post("/debug/memory/snapshot")
+
+    # Assert
+    assert diff.status_code == 200 and diff.json()[0]["size_diff"] >= 1 << 20
+    assert report["mode"] == "full" and report["modules"]["leaky"]["calls"] == 1
+    assert report["workers"]["total_rss"] > 0
+    assert invalid.status_code == 422
+    assert off.json()["mode"] == "off"
+    assert snapshot_while_off.status_code == 409
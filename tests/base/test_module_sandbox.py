@@ -0,0 +1,261 @@
+import sys
+import asyncio
+import textwrap
+import pytest
+from base.module_sandbox import ModuleSandbox, RingAllocator, SandboxCpuLimit, SandboxError, SandboxTimeout
+
+MODULE_SOURCE = """
+import os
+import time
+
+
+def echo(value):
+    return value
+
+
+def fail(message):
+    raise ValueError(message)
+
+
+def crash():
+    os._exit(3)
+
+
+def sleep(seconds):
+    time.sleep(seconds)
+    return seconds
+
+
+def allocate(size):
+    return len(bytearray(size))
+
+
+def spin(seconds):
+    end = time.process_time() + seconds
+    while time.process_time() < end:
+        pass
+    return seconds
+
+
+async def pid():
+    return os.getpid()
+"""
+
+
+@pytest.fixture(scope="module")
+def module_package(tmp_path_factory):
+    root = tmp_path_factory.mktemp("sandbox")
+    package = root / "sandboxed_modules"
+    package.mkdir()
+    (package / "__init__.py").write_text("", encoding="utf-8")
+    (package / "echo.py").write_text(textwrap.dedent(MODULE_SOURCE), encoding="utf-8")
+    sys.path.insert(0, str(root))
+    yield "sandboxed_modules.echo"
+    sys.path.remove(str(root))
+
+
+@pytest.fixture(scope="module")
+def sandbox(module_package):
+    sandbox = ModuleSandbox(module_package, workers=2, ring_size=2**16, timeout=10)
+    yield sandbox
+    sandbox.close()
+
+
+@pytest.mark.parametrize(
+    "sizes, released, size, expected",
+    [
+        ([], 0, 10, 0),
+        ([40, 40], 0, 20, 80),
+        ([40, 40], 0, 30, None),
+        ([40, 40], 1, 30, 0),
+        ([40, 40, 20], 1, 30, 0),
+        ([60, 30], 1, 20, 0),
+        ([], 0, 101, None),
+    ],
+    ids=["empty", "append", "full", "wrap", "wrap-after-tail", "wrap-into-gap", "too-large"],
+)
+def test_ring_allocator(sizes, released, size, expected):
+    # Arrange
+    ring = RingAllocator(100)
+    for allocation in sizes:
+        assert ring.allocate(allocation) is not None
+    ring.release(released)
+
+    # Act
+    offset = ring.allocate(size)
+
+    # Assert
+    assert offset == expected
+
+
+def test_ring_allocator_between_wrapped_regions():
+    # Arrange
+    ring = RingAllocator(100)
+    ring.allocate(50)
+    ring.allocate(40)
+    ring.release()
+    ring.allocate(30)
+
+    # Act / Assert
+    assert ring.allocate(20) == 30
+    assert ring.allocate(1) is None
+
+
+@pytest.mark.parametrize(
+    "value",
+    [{"data": "hello"}, b"x" * 2**15, b"y" * 2**18, list(range(1000))],
+    ids=["small", "ring", "inline", "list"],
+)
+def test_call_round_trip(sandbox, value):
+    # Act
+    result = sandbox.call("echo", value)
+
+    # Assert
+    assert result == value
+
+
+def test_module_exception_is_reraised(sandbox):
+    # Act / Assert
+    with pytest.raises(ValueError, match="bad input"):
+        sandbox.call("fail", "bad input")
+    assert sandbox.call("echo", 1) == 1
+
+
+def test_async_calls_spread_over_workers(sandbox):
+    # Arrange
+    async def main():
+        echoes = await asyncio.gather(*(sandbox.echo(index) for index in range(200)))
+        pids = {await sandbox.pid() for _ in range(20)}
+        return echoes, pids
+
+    # Act
+    echoes, pids = asyncio.run(main())
+
+    # Assert
+    assert echoes == list(range(200))
+    assert pids <= set(sandbox.stats()["workers"])
+
+
+def test_cancelled_call_keeps_worker_usable(module_package):
+    # Arrange
+    sandbox = ModuleSandbox(module_package, workers=1, timeout=5)
+
+    async def main():
+        with pytest.raises(asyncio.TimeoutError):
+            await asyncio.wait_for(sandbox.acall("sleep", 0.3), 0.05)
+        await asyncio.sleep(0.4)
+        return await sandbox.acall("echo", "after")
+
+    # Act
+    try:
+        result = asyncio.run(main())
+        [worker] = sandbox.workers
+        reader_alive = worker._reader.is_alive()
+    finally:
+        sandbox.close()
+
+    # Assert
+    assert result == "after"
+    assert reader_alive
+
+
+def test_stats(sandbox):
+    # Arrange
+    calls = sandbox.stats()["calls"]
+
+    # Act
+    sandbox.call("echo", 1)
+    stats = sandbox.stats()
+
+    # Assert
+    assert stats["calls"] == calls + 1
+    assert stats["in_flight"] == 0
+    assert 0 < stats["latency_p50"] <= stats["latency_p99"]
+
+
+def test_crashed_worker_is_restarted(module_package):
+    # Arrange
+    sandbox = ModuleSandbox(module_package, workers=1, timeout=10)
+    first_pid = sandbox.call("pid")
+
+    try:
+        # Act
+        with pytest.raises(SandboxError, match="exited with code 3"):
+            sandbox.call("crash")
+        second_pid = sandbox.call("pid")
+
+        # Assert
+        assert second_pid != first_pid
+        assert sandbox.restarts == 1
+    finally:
+        sandbox.close()
+
+
+def test_timeout_restarts_worker(module_package):
+    # Arrange
+    sandbox = ModuleSandbox(module_package, workers=1, timeout=0.5)
+
+    try:
+        # Act / Assert
+        with pytest.raises(SandboxTimeout):
+            sandbox.call("sleep", 5)
+        assert sandbox.call("sleep", 0) == 0
+        assert sandbox.restarts == 1
+    finally:
+        sandbox.close()
+
+
+def test_memory_limit(module_package):
+    # Arrange
+    sandbox = ModuleSandbox(module_package, workers=1, memory_limit=2**30, timeout=10)
+
+    try:
+        # Act / Assert
+        assert sandbox.call("allocate", 2**20) == 2**20
+        with pytest.raises(MemoryError):
+            sandbox.call("allocate", 2**31)
+    finally:
+        sandbox.close()
+
+
+def test_cpu_limit_applies_per_call(module_package):
+    # Arrange
+    sandbox = ModuleSandbox(module_package, workers=1, cpu_limit=1, timeout=10)
+    first_pid = sandbox.call("pid")
+
+    try:
+        # Act / Assert
+        assert [sandbox.call("spin", 0.6) for _ in range(3)] == [0.6] * 3
+        with pytest.raises(SandboxCpuLimit):
+            sandbox.call("spin", 5)
+        assert sandbox.call("spin", 0.1) == 0.1
+        assert sandbox.call("pid") == first_pid
+        assert sandbox.restarts == 0
+    finally:
+        sandbox.close()
+
+
+def test_call_timeout_raises_sandbox_timeout(module_package, monkeypatch):
+    # Arrange
+    import concurrent.futures
+
+    sandbox = ModuleSandbox(module_package, workers=1, timeout=0.5)
+
+    def result(self, timeout=None):
+        raise concurrent.futures.TimeoutError()
+
+    monkeypatch.setattr(concurrent.futures.Future, "result", result)
+
+    try:
+        # Act / Assert
+        with pytest.raises(SandboxTimeout):
+            sandbox.call("echo", 1)
+    finally:
+        monkeypatch.undo()
+        sandbox.close()
+
+
+def test_missing_target_fails_to_start():
+    # Act / Assert
+    with pytest.raises(SandboxError, match="failed to start"):
+        ModuleSandbox("sandboxed_modules_missing.echo", workers=1)
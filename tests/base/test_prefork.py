@@ -0,0 +1,156 @@
+import os
+import sys
+import json
+import time
+import signal
+import textwrap
+import subprocess
+import httpx
+import pytest
+from base.prefork import memory_report, memory_usage
+
+SERVER_SCRIPT = """
+import gc, os, sys
+from fastapi import FastAPI
+from base.prefork import PreforkServer
+from base.supervisor import ModuleCache
+
+app = FastAPI()
+
+
+@app.get("/state")
+def state():
+    module = sys.modules["prefork_modules.heavy.heavy_module"]
+    return {"pid": os.getpid(), "frozen": gc.get_freeze_count(), "warm": module.WARM, "rows": len(module.TABLE)}
+
+
+PreforkServer(
+    app,
+    host="127.0.0.1",
+    port=0,
+    workers=2,
+    preload=["heavy"],
+    module_cache=ModuleCache("prefork_modules"),
+    pid_file=sys.argv[1],
+    report_after=0.2,
+    log_level="warning",
+).run()
+"""
+
+CRASHING_SCRIPT = """
+import sys, time
+from fastapi import FastAPI
+from base.prefork import PreforkServer
+
+
+def crash(index):
+    with open(sys.argv[2], "a", encoding="utf-8") as f:
+        f.write(f"{time.monotonic()}\\n")
+    raise RuntimeError("broken worker")
+
+
+PreforkServer(
+    FastAPI(),
+    host="127.0.0.1",
+    port=0,
+    workers=1,
+    pid_file=sys.argv[1],
+    on_worker_start=crash,
+    restart_delay=0.1,
+    max_restarts=3,
+    report_after=60,
+).run()
+"""
+
+MODULE_SOURCE = """
+TABLE = [str(index) for index in range(100000)]
+WARM = False
+
+
+def warmup():
+    global WARM
+    WARM = True
+"""
+
+
+@pytest.fixture
+def server_files(tmp_path):
+    package = tmp_path / "prefork_modules"
+    (package / "heavy").mkdir(parents=True)
+    (package / "__init__.py").write_text("", encoding="utf-8")
+    (package / "heavy" / "__init__.py").write_text("", encoding="utf-8")
+    (package / "heavy" / "heavy_module.py").write_text(textwrap.dedent(MODULE_SOURCE), encoding="utf-8")
+    script = tmp_path / "server.py"
+    script.write_text(textwrap.dedent(SERVER_SCRIPT), encoding="utf-8")
+    return script, tmp_path / "workers.json"
+
+
+def test_memory_usage():
+    # Act
+    usage = memory_usage(os.getpid())
+    report = memory_report([os.getpid()])
+
+    # Assert
+    assert usage["rss"] > 0
+    assert report["total_rss"] == report["processes"][os.getpid()]["rss"]
+
+
+@pytest.mark.skipif(not hasattr(os, "fork"), reason="requires fork")
+def test_workers_share_preloaded_modules(server_files, tmp_path):
+    # Arrange
+    script, pid_file = server_files
+    environment = {**os.environ, "PYTHONPATH": os.pathsep.join([os.getcwd(), str(tmp_path)])}
+    master = subprocess.Popen(
+        [sys.executable, str(script), str(pid_file)], env=environment, stderr=subprocess.PIPE, text=True
+    )
+
+    try:
+        deadline = time.monotonic() + 20
+        while not pid_file.exists() and time.monotonic() < deadline:
+            time.sleep(0.05)
+        pids = json.loads(pid_file.read_text(encoding="utf-8"))
+
+        # Act
+        states = []
+        while len(states) < 4 and time.monotonic() < deadline:
+            try:
+                states.append(httpx.get(f"http://127.0.0.1:{pids['port']}/state", timeout=2).json())
+            except httpx.TransportError:
+                time.sleep(0.05)
+    finally:
+        master.send_signal(signal.SIGTERM)
+        _, errors = master.communicate(timeout=20)
+
+    # Assert
+    assert pids["master"] == master.pid and len(pids["workers"]) == 2
+    assert states and all(state["pid"] in pids["workers"] for state in states)
+    assert all(state["frozen"] > 0 and state["warm"] and state["rows"] == 100000 for state in states)
+    assert "total pss" in errors
+    assert master.returncode == 0
+    assert not pid_file.exists()
+
+
+@pytest.mark.skipif(not hasattr(os, "fork"), reason="requires fork")
+def test_crashing_worker_backs_off_and_gives_up(tmp_path):
+    # Arrange
+    script, starts_file = tmp_path / "crashing.py", tmp_path / "starts.txt"
+    script.write_text(textwrap.dedent(CRASHING_SCRIPT), encoding="utf-8")
+    environment = {**os.environ, "PYTHONPATH": os.getcwd()}
+
+    # Act
+    master = subprocess.run(
+        [sys.executable, str(script), str(tmp_path / "workers.json"), str(starts_file)],
+        env=environment,
+        capture_output=True,
+        text=True,
+        timeout=30,
+    )
+
+    # Assert
+    starts = [float(line) for line in starts_file.read_text(encoding="utf-8").split()]
+    delays = [later - earlier for earlier, later in zip(starts, starts[1:])]
+    assert len(starts) == 4
+    assert all(delay >= 0.1 * 2**attempt for attempt, delay in enumerate(delays))
+    assert delays[2] > delays[0] + 0.2
+    assert "not restarting it" in master.stderr
+    assert master.returncode == 0
@@ -0,0 +1,147 @@
+import os
+import json
+import time
+import asyncio
+import threading
+import multiprocessing
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from base.debug import add_debug_routes
+from base.profiler import (
+    Profile,
+    StackSampler,
+    filter_stacks,
+    install_signal_handler,
+    merge_stacks,
+    profile_workers,
+    to_collapsed,
+    to_speedscope,
+)
+
+
+def busy_loop(stop):
+    while not stop.is_set():
+        sum(range(1000))
+
+
+@pytest.fixture
+def busy_thread():
+    stop = threading.Event()
+    thread = threading.Thread(target=busy_loop, args=(stop,), name="busy")
+    thread.start()
+    yield thread
+    stop.set()
+    thread.join()
+
+
+@pytest.fixture
+def profile_env(tmp_path, monkeypatch):
+    monkeypatch.setenv("MINER_PROFILE_DIR", str(tmp_path / "profiles"))
+    monkeypatch.setenv("PREFORK_PID_FILE", str(tmp_path / "workers.json"))
+    monkeypatch.setenv("MINER_DEBUG_TOKEN", "secret")
+    return tmp_path
+
+
+def test_sampler_counts_busy_stacks(busy_thread):
+    # Act
+    sampler = StackSampler(0.002).start()
+    time.sleep(0.2)
+    profile = sampler.stop()
+
+    # Assert
+    busy = sum(
+        count for stack, count in profile.stacks.items() if stack.startswith("busy;") and stack.endswith(":busy_loop")
+    )
+    assert profile.samples > 10
+    assert busy >= profile.samples // 2
+
+
+def test_filter_and_formats():
+    # Arrange
+    stacks = {
+        "MainThread;api:main;modules.echo.echo:Echo.process": 3,
+        "MainThread;api:main;base.dispatch:dispatch": 2,
+        "MainThread;api:main;selectors:EpollSelector.select": 5,
+    }
+    profiles = [Profile(pid=1, duration=1.0, interval=0.01, samples=10, stacks=stacks)]
+
+    # Act
+    echo = filter_stacks(stacks, module="echo")
+    collapsed = to_collapsed(merge_stacks(profiles + [Profile(pid=2, duration=1.0, interval=0.01, samples=1)]))
+    speedscope = to_speedscope(profiles, include_idle=True)
+
+    # Assert
+    assert list(echo) == ["MainThread;api:main;modules.echo.echo:Echo.process"]
+    assert collapsed.splitlines() == [
+        "pid 1;MainThread;api:main;base.dispatch:dispatch 2",
+        "pid 1;MainThread;api:main;modules.echo.echo:Echo.process 3",
+    ]
+    assert [frame["name"] for frame in speedscope["shared"]["frames"]] == [
+        "main",
+        "Echo.process",
+        "dispatch",
+        "EpollSelector.select",
+    ]
+    assert speedscope["profiles"][0]["weights"] == pytest.approx([0.03, 0.02, 0.05])
+
+
+def worker(ready, stop):
+    install_signal_handler()
+    ready.set()
+    busy_loop(stop)
+
+
+def test_profile_workers_signals_other_workers(profile_env):
+    # Arrange
+    context = multiprocessing.get_context("fork")
+    ready, stop = context.Event(), context.Event()
+    child = context.Process(target=worker, args=(ready, stop))
+    child.start()
+    ready.wait(10)
+    (profile_env / "workers.json").write_text(json.dumps({"master": 0, "workers": [os.getpid(), child.pid]}))
+
+    # Act
+    try:
+        profiles = asyncio.run(profile_workers(0.3, 0.005))
+    finally:
+        stop.set()
+        child.join(10)
+
+    # Assert
+    assert [profile.pid for profile in profiles] == [os.getpid(), child.pid]
+    assert any(stack.endswith(":busy_loop") for stack in profiles[1].stacks)
+    assert list((profile_env / "profiles").iterdir()) == [profile_env / "profiles" / "request.json"]
+
+
+@pytest.mark.parametrize(
+    "headers, status",
+    [({}, 401), ({"X-Debug-Token": "wrong"}, 401), ({"Authorization": "Bearer secret"}, 200)],
+    ids=["missing", "wrong", "bearer"],
+)
+def test_profile_endpoint_requires_token(profile_env, headers, status):
+    # Arrange
+    app = FastAPI()
+    add_debug_routes(app)
+    client = TestClient(app)
+
+    # Act
+    response = client.get("/debug/profile", params={"seconds": 0.05, "idle": True}, headers=headers)
+
+    # Assert
+    assert response.status_code == status
+    if status == 200:
+        assert all(line.rsplit(" ", 1)[1].isdigit() for line in response.text.splitlines())
+
+
+def test_profile_endpoint_disabled_without_token(profile_env, monkeypatch):
+    # Arrange
+    monkeypatch.delenv("MINER_DEBUG_TOKEN")
+    app = FastAPI()
+    add_debug_routes(app)
+
+    # Act
+    response = TestClient(app).get("/debug/profile", headers={"X-Debug-Token": ""})
+
+    # Assert
+    assert response.status_code == 404
@@ -0,0 +1,181 @@
+import sys
+import importlib.util
+import subprocess
+from pathlib import Path
+import pytest
+from base.base_module import ModuleConfig
+from base.setup_engine import ModuleSetupEngine, SetupError, dependency_hash
+
+LOCKFILE = "numpy==1.26.4\ntorch==2.2.0  # cpu\n"
+
+
+class FakeRunner:
+    def __init__(self, fail_on=None):
+        self.commands = []
+        self.fail_on = fail_on
+
+    def __call__(self, command, check=True, **kwargs):
+        self.commands.append(command)
+        if self.fail_on and self.fail_on in command:
+            raise subprocess.CalledProcessError(1, command)
+        if command[1:3] == ["-m", "venv"]:
+            (Path(command[3]) / "bin").mkdir(parents=True)
+            (Path(command[3]) / "bin" / "python").write_text("", encoding="utf-8")
+
+    def count(self, word):
+        return sum(word in command for command in self.commands)
+
+
+def make_module(name, lockfile=LOCKFILE, setup_source="print('setup')"):
+    directory = Path("modules") / name
+    directory.mkdir(parents=True, exist_ok=True)
+    (directory / f"setup_{name}.py").write_text(setup_source, encoding="utf-8")
+    (directory / f"install_{name}.sh").write_text("echo install", encoding="utf-8")
+    if lockfile is not None:
+        (directory / "requirements.lock").write_text(lockfile, encoding="utf-8")
+    return ModuleConfig(module_name=name, module_path=str(directory))
+
+
+@pytest.fixture
+def engine(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    return ModuleSetupEngine(cache_dir=tmp_path / "cache", python="python3", runner=FakeRunner())
+
+
+@pytest.mark.parametrize(
+    "other, same",
+    [
+        ("# pinned\ntorch==2.2.0\n\nnumpy==1.26.4\n", True),
+        ("numpy == 1.26.4\ntorch==2.2.0\n", False),
+        ("numpy==1.26.5\ntorch==2.2.0\n", False),
+    ],
+    ids=["reordered-with-comments", "spacing", "different-pin"],
+)
+def test_dependency_hash(tmp_path, other, same):
+    # Arrange
+    (tmp_path / "a.lock").write_text(LOCKFILE, encoding="utf-8")
+    (tmp_path / "b.lock").write_text(other, encoding="utf-8")
+
+    # Act / Assert
+    assert (dependency_hash(tmp_path / "a.lock") == dependency_hash(tmp_path / "b.lock")) == same
+
+
+def test_setup_builds_env_then_skips(engine):
+    # Arrange
+    config = make_module("whisper")
+
+    # Act
+    first = engine.setup(config)
+    commands = len(engine.runner.commands)
+    second = engine.setup(config)
+
+    # Assert
+    assert not first.skipped and not first.env_reused
+    assert second.skipped and second.env_path == first.env_path
+    assert len(engine.runner.commands) == commands
+    python = str(Path(first.env_path) / "bin" / "python")
+    assert [python, "-m", "modules.whisper.setup_whisper"] in engine.runner.commands
+    assert engine.runner.count("--no-index") == 1
+
+
+def test_identical_dependencies_share_env(engine):
+    # Arrange
+    whisper = make_module("whisper")
+    llama = make_module("llama", lockfile="torch==2.2.0\nnumpy==1.26.4\n")
+
+    # Act
+    first = engine.setup(whisper)
+    second = engine.setup(llama)
+
+    # Assert
+    assert second.env_path == first.env_path
+    assert second.env_reused
+    assert engine.runner.count("venv") == 1
+    assert [str(Path(first.env_path) / "bin" / "python"), "-m", "modules.llama.setup_llama"] in engine.runner.commands
+
+
+def test_changed_script_reruns_setup_only(engine):
+    # Arrange
+    config = make_module("whisper")
+    engine.setup(config)
+    make_module("whisper", setup_source="print('setup v2')")
+
+    # Act
+    result = engine.setup(config)
+
+    # Assert
+    assert not result.skipped and result.env_reused
+    assert engine.runner.count("venv") == 1
+    assert engine.runner.count("modules.whisper.setup_whisper") == 2
+
+
+def test_failed_build_is_rebuilt(engine):
+    # Arrange
+    config = make_module("whisper")
+    engine.runner.fail_on = "--no-index"
+
+    # Act
+    with pytest.raises(SetupError, match="exit code 1"):
+        engine.setup(config)
+    engine.runner.fail_on = None
+    result = engine.setup(config)
+
+    # Assert
+    assert not result.skipped
+    assert engine.runner.count("venv") == 2
+    assert engine.site_packages(config) is None
+
+
+def test_module_without_lockfile_uses_shared_interpreter(engine):
+    # Arrange
+    config = make_module("echo", lockfile=None)
+
+    # Act
+    result = engine.setup(config)
+    again = engine.setup(config)
+
+    # Assert
+    assert result.env_path is None and again.skipped
+    assert engine.runner.commands == [
+        ["python", "-m", "modules.echo.setup_echo"],
+        ["bash", "modules/echo/install_echo.sh"],
+    ]
+
+
+def test_prune(engine):
+    # Arrange
+    first = engine.setup(make_module("whisper"))
+    engine.setup(make_module("llama", lockfile="requests==2.31.0\n"))
+
+    # Act
+    removed = engine.prune(keep=[Path(first.env_path).name])
+
+    # Assert
+    assert len(removed) == 1
+    assert Path(first.env_path).is_dir()
+
+
+def test_activate_puts_env_on_sys_path(engine, monkeypatch):
+    # Arrange
+    monkeypatch.setattr(sys, "path", list(sys.path))
+    config = make_module("whisper")
+    result = engine.setup(config)
+    site_packages = Path(result.env_path) / "lib" / "python3.11" / "site-packages"
+    site_packages.mkdir(parents=True)
+    (site_packages / "whisper_dependency.py").write_text("VALUE = 1", encoding="utf-8")
+    (site_packages / "loguru.py").write_text("SHADOWED = True", encoding="utf-8")
+
+    # Act
+    activated = engine.activate(config)
+    engine.activate(config)
+    import whisper_dependency
+
+    sys.modules.pop("whisper_dependency")
+
+    # Assert
+    assert activated == site_packages
+    assert sys.path.count(str(site_packages)) == 1
+    assert sys.path[-1] == str(site_packages)
+    assert whisper_dependency.VALUE == 1
+    assert importlib.util.find_spec("loguru").origin != str(site_packages / "loguru.py")
+    assert engine.activate(make_module("echo", lockfile=None)) is None
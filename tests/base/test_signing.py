@@ -0,0 +1,242 @@
+import asyncio
+import json
+import time
+import httpx
+import pytest
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+from fastapi.testclient import TestClient
+from base.signing import (
+    BatchVerifier,
+    SignatureCache,
+    SignatureCacheFull,
+    SignatureMiddleware,
+    build_message,
+    sign_request_headers,
+)
+from chains.backends import get_backend
+
+
+@pytest.fixture
+def backend():
+    return get_backend("commune")
+
+
+@pytest.fixture
+def caller_key(backend):
+    return backend.derive(b"\x01" * 32)
+
+
+@pytest.fixture
+def miner_key(backend):
+    return backend.derive(b"\x02" * 32)
+
+
+@pytest.fixture
+def client(miner_key):
+    app = FastAPI()
+
+    @app.post("/modules/echo/process")
+    async def process(request: Request):
+        return {"caller": request.state.caller, "data": (await request.json())["data"]}
+
+    @app.get("/health/live")
+    @app.get("/debug/anything")
+    async def live():
+        return {"status": "ok"}
+
+    app.add_middleware(SignatureMiddleware, keypair=miner_key, window=5)
+    return TestClient(app)
+
+
+def signed_post(client, caller_key, body, **kwargs):
+    payload = json.dumps(body).encode()
+    headers = sign_request_headers(caller_key, "POST", "/modules/echo/process", payload, **kwargs)
+    return client.post("/modules/echo/process", content=payload, headers=headers)
+
+
+def test_signed_request_is_accepted_and_response_signed(client, caller_key, miner_key, backend):
+    # Act
+    response = signed_post(client, caller_key, {"data": "hello"})
+
+    # Assert
+    assert response.status_code == 200
+    assert response.json() == {"caller": caller_key.ss58_address, "data": "hello"}
+    assert response.headers["x-key"] == miner_key.ss58_address
+    message = build_message(200, "/modules/echo/process", response.headers["x-timestamp"], response.content)
+    assert backend.verify(miner_key.public_key, message, bytes.fromhex(response.headers["x-signature"]))
+
+
+@pytest.mark.parametrize(
+    "tamper, detail",
+    [
+        ("missing", "Missing request signature"),
+        ("body", "Invalid request signature"),
+        ("stale", "Request timestamp outside the replay window"),
+        ("malformed", "Malformed signature headers"),
+    ],
+    ids=["missing", "tampered_body", "stale_timestamp", "malformed"],
+)
+def test_rejected_requests(client, caller_key, tamper, detail):
+    # Arrange
+    payload = b'{"data": "hello"}'
+    timestamp = time.time() - 60 if tamper == "stale" else None
+    headers = sign_request_headers(caller_key, "POST", "/modules/echo/process", payload, timestamp=timestamp)
+    if tamper == "missing":
+        headers = {}
+    if tamper == "body":
+        payload = b'{"data": "other"}'
+    if tamper == "malformed":
+        headers["X-Signature"] = "not-hex"
+
+    # Act
+    response = client.post("/modules/echo/process", content=payload, headers=headers)
+
+    # Assert
+    assert response.status_code == 401
+    assert response.json() == {"detail": detail}
+
+
+def test_replay_is_rejected(client, caller_key):
+    # Arrange
+    payload = b'{"data": "hello"}'
+    headers = sign_request_headers(caller_key, "POST", "/modules/echo/process", payload)
+
+    # Act
+    first = client.post("/modules/echo/process", content=payload, headers=headers)
+    second = client.post("/modules/echo/process", content=payload, headers=headers)
+
+    # Assert
+    assert first.status_code == 200
+    assert second.status_code == 401
+    assert second.json() == {"detail": "Replayed request signature"}
+
+
+def test_concurrent_replays_are_rejected(miner_key, caller_key):
+    # Arrange
+    calls = []
+
+    async def handler(scope, receive, send):
+        calls.append(scope["path"])
+        await JSONResponse({"ok": True})(scope, receive, send)
+
+    app = SignatureMiddleware(handler, keypair=miner_key, window=5)
+    payload = b'{"data": "hello"}'
+    headers = sign_request_headers(caller_key, "POST", "/modules/echo/process", payload)
+
+    async def main():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://miner") as client:
+            return await asyncio.gather(
+                *(client.post("/modules/echo/process", content=payload, headers=headers) for _ in range(5))
+            )
+
+    # Act
+    responses = asyncio.run(main())
+
+    # Assert
+    assert sorted(response.status_code for response in responses) == [200, 401, 401, 401, 401]
+    assert len(calls) == 1
+
+
+def test_query_string_is_signed(client, caller_key):
+    # Arrange
+    payload = b'{"data": "hello"}'
+    path = "/modules/echo/process"
+    signed = sign_request_headers(caller_key, "POST", path, payload, query="limit=1")
+    tampered = sign_request_headers(caller_key, "POST", path, payload, query="limit=1")
+
+    # Act
+    accepted = client.post(f"{path}?limit=1", content=payload, headers=signed)
+    rejected = client.post(f"{path}?limit=1000", content=payload, headers=tampered)
+
+    # Assert
+    assert accepted.status_code == 200
+    assert rejected.status_code == 401
+    assert rejected.json() == {"detail": "Invalid request signature"}
+
+
+@pytest.mark.parametrize("path", ["/health/live", "/debug/anything"], ids=["path", "prefix"])
+def test_exempt_path_skips_verification(client, path):
+    # Act
+    response = client.get(path)
+
+    # Assert
+    assert response.status_code == 200
+    assert "x-signature" not in response.headers
+
+
+def test_cached_signature_is_not_reused_for_other_keys(miner_key, caller_key, backend):
+    # Arrange
+    app = FastAPI()
+
+    @app.post("/modules/echo/process")
+    async def process(request: Request):
+        return {"caller": request.state.caller}
+
+    app.add_middleware(SignatureMiddleware, keypair=miner_key, window=5, reject_replays=False)
+    client = TestClient(app)
+    payload = b'{"data": "hello"}'
+    headers = sign_request_headers(caller_key, "POST", "/modules/echo/process", payload)
+    attacker = backend.derive(b"\x04" * 32)
+    forged = {**headers, "X-Key": attacker.ss58_address}
+
+    # Act
+    first = client.post("/modules/echo/process", content=payload, headers=headers)
+    replayed = client.post("/modules/echo/process", content=payload, headers=headers)
+    stolen = client.post("/modules/echo/process", content=b'{"data": "evil"}', headers=forged)
+
+    # Assert
+    assert first.status_code == replayed.status_code == 200
+    assert stolen.status_code == 401
+
+
+def test_full_cache_refuses_instead_of_evicting():
+    # Arrange
+    cache = SignatureCache(window=10, maxsize=2)
+    cache.reserve(b"a", timestamp=100.0, now=100.0)
+    cache.reserve(b"b", timestamp=100.0, now=100.0)
+
+    # Act / Assert
+    with pytest.raises(SignatureCacheFull):
+        cache.reserve(b"c", timestamp=100.0, now=101.0)
+    assert not cache.add(b"c", timestamp=100.0, now=101.0)
+    assert not cache.reserve(b"a", timestamp=100.0, now=101.0)
+    assert cache.reserve(b"c", timestamp=105.0, now=111.0)
+
+
+def test_signature_cache_expires():
+    # Arrange
+    cache = SignatureCache(window=10)
+
+    # Act
+    cache.add(b"sig", timestamp=100.0, now=100.0)
+
+    # Assert
+    assert cache.contains(b"sig", now=105.0)
+    assert not cache.contains(b"sig", now=111.0)
+
+
+def test_batch_verifier_groups_concurrent_requests(backend, caller_key):
+    # Arrange
+    messages = [f"message {index}".encode() for index in range(50)]
+    signatures = backend.sign_batch(caller_key, messages)
+    verifier = BatchVerifier(backend, max_in_flight=1)
+
+    pairs = [
+        (message, signatures[index] if index % 2 == 0 else signatures[index - 1])
+        for index, message in enumerate(messages)
+    ]
+
+    async def verify_all():
+        return await asyncio.gather(
+            *[verifier.verify(caller_key.public_key, message, signature) for message, signature in pairs]
+        )
+
+    # Act
+    results = asyncio.run(verify_all())
+
+    # Assert
+    assert results == [index % 2 == 0 for index in range(50)]
+    assert verifier.verified == 50
+    assert verifier.batches < 50
@@ -0,0 +1,120 @@
+import sys
+import json
+import socket
+import asyncio
+import textwrap
+import httpx
+import pytest
+from base.base_miner import MinerConfig
+from base.supervisor import MinerSupervisor, ModuleCache, load_miner_configs
+
+MODULE_SOURCE = """
+from base.base_miner import BaseMiner
+from base.base_module import ModuleConfig
+
+LOADS = []
+LOADS.append("weights")
+module_settings = ModuleConfig(module_name="echo")
+
+
+class EchoMiner(BaseMiner):
+    def __init__(self, miner_config, module_config):
+        self.miner_config = miner_config
+        self.module_config = module_config
+
+    def process(self, miner_request):
+        return {"miner": self.miner_config.miner_name, "data": miner_request.data}
+"""
+
+
+@pytest.fixture
+def module_package(tmp_path, monkeypatch):
+    package = tmp_path / "supervised_modules"
+    (package / "echo").mkdir(parents=True)
+    (package / "__init__.py").write_text("", encoding="utf-8")
+    (package / "echo" / "__init__.py").write_text("", encoding="utf-8")
+    (package / "echo" / "echo_module.py").write_text(textwrap.dedent(MODULE_SOURCE), encoding="utf-8")
+    monkeypatch.syspath_prepend(str(tmp_path))
+    yield "supervised_modules"
+    for name in [name for name in sys.modules if name.startswith("supervised_modules")]:
+        del sys.modules[name]
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def miner_config(name, port):
+    return MinerConfig(miner_name=name, miner_host="127.0.0.1", miner_port=port, module_name="echo")
+
+
+@pytest.mark.parametrize(
+    "content, expected",
+    [
+        ('[{"miner_name": "a", "miner_port": 1}]', ["a"]),
+        ('{"a": {"miner_port": 1}, "b": {"miner_port": 2}}', ["a", "b"]),
+    ],
+    ids=["list", "mapping"],
+)
+def test_load_miner_configs(tmp_path, content, expected):
+    # Arrange
+    path = tmp_path / "miner_configs.json"
+    path.write_text(content, encoding="utf-8")
+
+    # Act
+    result = load_miner_configs(path)
+
+    # Assert
+    assert [config.miner_name for config in result] == expected
+    assert load_miner_configs(tmp_path / "missing.json") == []
+
+
+def test_module_is_loaded_once(module_package):
+    # Arrange
+    cache = ModuleCache(module_package)
+
+    # Act
+    supervisor = MinerSupervisor([miner_config("a", 9001), miner_config("b", 9002)], module_cache=cache)
+
+    # Assert
+    module = cache.get("echo")
+    assert module.LOADS == ["weights"]
+    assert supervisor.miners["a"] is not supervisor.miners["b"]
+    assert supervisor.miners["a"].module_config is supervisor.miners["b"].module_config is module.module_settings
+
+
+def test_duplicate_ports_are_rejected(module_package):
+    # Act / Assert
+    with pytest.raises(ValueError, match="both use 127.0.0.1:9001"):
+        MinerSupervisor([miner_config("a", 9001), miner_config("b", 9001)], module_cache=ModuleCache(module_package))
+
+
+def test_serves_miners_on_one_loop(module_package, tmp_path):
+    # Arrange
+    ports = {"a": free_port(), "b": free_port()}
+    path = tmp_path / "miner_configs.json"
+    path.write_text(json.dumps([miner_config(name, port).model_dump() for name, port in ports.items()]))
+    supervisor = MinerSupervisor.from_file(path, module_cache=ModuleCache(module_package), log_level="warning")
+
+    async def scenario():
+        task = asyncio.create_task(supervisor.serve())
+        while not supervisor.started:
+            await asyncio.sleep(0.01)
+        async with httpx.AsyncClient() as client:
+            responses = await asyncio.gather(
+                *[
+                    client.post(f"http://127.0.0.1:{port}/modules/echo/process", json={"data": name})
+                    for name, port in ports.items()
+                ]
+            )
+        supervisor.stop()
+        await task
+        return [response.json() for response in responses]
+
+    # Act
+    result = asyncio.run(scenario())
+
+    # Assert
+    assert result == [{"miner": "a", "data": "a"}, {"miner": "b", "data": "b"}]
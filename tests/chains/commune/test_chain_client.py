@@ -0,0 +1,181 @@
+import sys
+import time
+import asyncio
+import subprocess
+import pytest
+from types import SimpleNamespace
+from communex.errors import ChainTransactionError
+from chains.commune.chain_client import ChainClientError, ChainClientPool, get_node_urls
+from chains.commune.mock_node import MockChainState, MockCommuneNode, MockNodeError
+
+
+@pytest.fixture
+def state():
+    state = MockChainState(block=10)
+    state.add_subnet("Rootnet")
+    state.add_module(0, "5Validator", "validator", "1.2.3.4:8000", stake=100)
+    state.balances["5Alice"] = 1000
+    return state
+
+
+def build_pool(state, urls=("mock://a", "mock://b"), latency=0.0, **options):
+    nodes = {url: MockCommuneNode(url, state, latency) for url in urls}
+    pool = ChainClientPool(list(urls), client_factory=nodes.__getitem__, **options)
+    return pool, nodes
+
+
+def test_import_opens_no_connection():
+    # Act
+    result = subprocess.run(
+        [
+            sys.executable,
+            "-c",
+            "import sys, chains.commune.commune_key_manager; print('communex.client' in sys.modules)",
+        ],
+        capture_output=True,
+        text=True,
+    )
+
+    # Assert
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.strip().endswith("False")
+
+
+def test_node_urls_from_env(monkeypatch):
+    # Arrange
+    monkeypatch.setenv("COMMUNE_NODE_URLS", "wss://a, wss://b,,")
+
+    # Act / Assert
+    assert get_node_urls() == ["wss://a", "wss://b"]
+
+
+def test_failover_and_cooldown(state):
+    # Arrange
+    pool, nodes = build_pool(state, failure_threshold=1, cooldown=60)
+    nodes["mock://a"].down = True
+
+    # Act
+    first = pool.call("query_map_key", 0)
+    second = pool.call("query_map_key", 0)
+
+    # Assert
+    assert first == second == {0: "5Validator"}
+    assert nodes["mock://a"].calls["query_map_key"] == 1
+    assert [node["url"] for node in pool.health()] == ["mock://b"]
+
+
+def test_all_nodes_down(state):
+    # Arrange
+    pool, nodes = build_pool(state)
+    for node in nodes.values():
+        node.down = True
+
+    # Act / Assert
+    with pytest.raises(ChainClientError, match="every node") as error:
+        pool.call("get_block")
+    assert isinstance(error.value.__cause__, MockNodeError)
+
+
+def test_submission_is_not_retried(state):
+    # Arrange
+    pool, nodes = build_pool(state)
+    nodes["mock://a"].down = True
+    alice = SimpleNamespace(ss58_address="5Alice")
+
+    # Act / Assert
+    with pytest.raises(ChainClientError):
+        asyncio.run(pool.submit_call("transfer_keep_alive", {"dest": "5Bob", "value": 1}, alice, "Balances"))
+    assert nodes["mock://b"].calls["submit_call"] == 0
+
+
+def test_inclusion_waits_do_not_hold_threads(state):
+    # Arrange
+    node = MockCommuneNode("mock://a", state, block_time=0.3)
+    pool = ChainClientPool([node.url], client_factory=lambda url: node, max_workers=1, inclusion_interval=0.05)
+    state.balances.update({f"5Sender{index}": 10 for index in range(8)})
+    senders = [SimpleNamespace(ss58_address=f"5Sender{index}") for index in range(8)]
+
+    async def scenario():
+        receipts = [
+            await pool.submit_call("transfer_keep_alive", {"dest": "5Bob", "value": 1}, sender, "Balances")
+            for sender in senders
+        ]
+        return await asyncio.gather(*(pool.wait_for_inclusion(receipt) for receipt in receipts))
+
+    # Act
+    start = time.perf_counter()
+    included = asyncio.run(scenario())
+    elapsed = time.perf_counter() - start
+
+    # Assert
+    assert len(included) == 8
+    assert elapsed < 1.0
+
+
+def test_failed_transaction_is_not_retried(state):
+    # Arrange
+    pool, nodes = build_pool(state)
+    alice = SimpleNamespace(ss58_address="5Alice")
+
+    async def scenario():
+        receipt = await pool.submit_call("transfer_keep_alive", {"dest": "5Bob", "value": 1}, alice, "Balances")
+        receipt.is_success, receipt.error_message = False, "Balance too low"
+        return await pool.wait_for_inclusion(receipt)
+
+    # Act / Assert
+    with pytest.raises(ChainTransactionError, match="Balance too low"):
+        asyncio.run(scenario())
+    assert sum(node.calls["check_inclusion"] for node in nodes.values()) == 1
+
+
+def test_inclusion_timeout(state):
+    # Arrange
+    node = MockCommuneNode("mock://a", state, block_time=10)
+    pool = ChainClientPool([node.url], client_factory=lambda url: node, inclusion_timeout=0.1, inclusion_interval=0.05)
+    alice = SimpleNamespace(ss58_address="5Alice")
+
+    async def scenario():
+        receipt = await pool.submit_call("transfer_keep_alive", {"dest": "5Bob", "value": 1}, alice, "Balances")
+        return await pool.wait_for_inclusion(receipt)
+
+    # Act / Assert
+    with pytest.raises(ChainTransactionError, match="not included after 0.1s"):
+        asyncio.run(scenario())
+
+
+def test_async_queries(state):
+    # Arrange
+    pool, _ = build_pool(state)
+    alice = SimpleNamespace(ss58_address="5Alice")
+
+    async def scenario():
+        nonce = await pool.get_nonce("5Alice")
+        await pool.submit_call("transfer_keep_alive", {"dest": "5Bob", "value": 250}, alice, "Balances", nonce)
+        return (
+            await pool.get_balance("5Bob"),
+            await pool.get_block_number(),
+            await pool.query_map("Keys", [0]),
+            await pool.get_nonce("5Alice"),
+        )
+
+    # Act
+    result = asyncio.run(scenario())
+
+    # Assert
+    assert result == (250, 10, {0: "5Validator"}, 1)
+
+
+def test_pipeline_overlaps_round_trips(state):
+    # Arrange
+    pool, _ = build_pool(state, latency=0.05, connections_per_node=4)
+    calls = [("get_balance", ["5Alice"], {}) for _ in range(8)] + [("query", ["Unknown"], {})]
+
+    # Act
+    start = time.perf_counter()
+    results = asyncio.run(pool.pipeline(calls))
+    elapsed = time.perf_counter() - start
+
+    # Assert
+    assert results[:8] == [1000] * 8
+    assert isinstance(results[8], ChainClientError)
+    assert elapsed < 8 * 0.05
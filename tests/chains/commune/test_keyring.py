@@ -0,0 +1,121 @@
+import json
+import pytest
+from unittest.mock import patch
+from substrateinterface import Keypair
+from base.base_miner import MinerConfig
+from chains.commune.commune_key_manager import CommuneKeyManager
+from chains.commune.keyring import Keyring, KeyringError
+
+
+def write_key(folder, name, encrypted=False):
+    keypair = Keypair.create_from_uri(f"//{name}")
+    key_data = {
+        "path": name,
+        "ss58_address": keypair.ss58_address,
+        "public_key": keypair.public_key.hex(),
+        "private_key": keypair.private_key.hex(),
+        "ss58_format": 42,
+        "crypto_type": 1,
+    }
+    body = {"data": json.dumps(key_data), "encrypted": encrypted, "timestamp": 0}
+    (folder / f"{name}.json").write_text(json.dumps(body), encoding="utf-8")
+    return keypair
+
+
+@pytest.fixture
+def key_folder(tmp_path):
+    folder = tmp_path / "key"
+    folder.mkdir()
+    return folder
+
+
+def test_load_folder_is_lazy_and_indexed(key_folder):
+    # Arrange
+    keypairs = {name: write_key(key_folder, name) for name in ("alice", "bob", "carol")}
+    write_key(key_folder, "locked", encrypted=True)
+    (key_folder / "broken.json").write_text("{", encoding="utf-8")
+    keyring = Keyring(key_folder)
+
+    # Act
+    loaded = keyring.load_folder(max_workers=4)
+
+    # Assert
+    assert loaded == 3
+    assert keyring.names() == ["alice", "bob", "carol"]
+    assert not any(keyring.entry(name).materialized for name in keyring)
+    assert keyring["bob"].private_key == keypairs["bob"].private_key
+    assert keyring[keypairs["carol"].ss58_address].ss58_address == keypairs["carol"].ss58_address
+    assert keyring.entry("bob").materialized and not keyring.entry("alice").materialized
+    assert "locked" not in keyring and keyring.get("locked") is None
+
+
+def test_env_vars_in_key_folder_are_expanded(key_folder, monkeypatch):
+    # Arrange
+    write_key(key_folder, "alice")
+    monkeypatch.setenv("TEST_KEY_HOME", str(key_folder.parent))
+
+    # Act
+    keyring = Keyring("$TEST_KEY_HOME/key")
+
+    # Assert
+    assert keyring.load_key("alice").name == "alice"
+    with pytest.raises(KeyringError, match="does not exist"):
+        keyring.load_key("nobody")
+
+
+def test_batch_coalesces_writes(key_folder, tmp_path):
+    # Arrange
+    configs_path = tmp_path / "miner_configs.json"
+    keyring = Keyring(key_folder, configs_path)
+
+    # Act
+    with keyring.batch():
+        for index in range(50):
+            keyring.set_config(f"miner{index}", {"miner_port": 5000 + index})
+        with keyring.batch():
+            keyring.remove("miner0")
+    keyring.set_config("single", {"miner_port": 1})
+
+    # Assert
+    assert keyring.flushes == 2
+    saved = json.loads(configs_path.read_text(encoding="utf-8"))
+    assert len(saved) == 50 and "miner0" not in saved
+    assert Keyring(key_folder, configs_path).configs == saved
+    assert not list(tmp_path.glob("*.tmp"))
+
+
+def test_flush_is_atomic(key_folder, tmp_path):
+    # Arrange
+    configs_path = tmp_path / "miner_configs.json"
+    keyring = Keyring(key_folder, configs_path)
+    keyring.set_config("miner", {"miner_port": 1})
+
+    # Act
+    with patch("os.replace", side_effect=OSError("disk full")):
+        with pytest.raises(OSError):
+            keyring.set_config("miner", {"miner_port": 2})
+
+    # Assert
+    assert json.loads(configs_path.read_text(encoding="utf-8")) == {"miner": {"miner_port": 1}}
+    assert not list(tmp_path.glob("*.tmp"))
+
+
+def test_key_manager(key_folder, tmp_path):
+    # Arrange
+    alice = write_key(key_folder, "alice")
+    write_key(key_folder, "bob")
+    configs_path = tmp_path / "miner_configs.json"
+    manager = CommuneKeyManager(key_folder=str(key_folder), miner_key_path=str(configs_path))
+    configs = {name: MinerConfig(miner_name=name, miner_port=port) for name, port in (("alice", 1), ("bob", 2))}
+
+    # Act
+    manager.add_miner_keys(configs)
+    manager.update_miner_key("alice", MinerConfig(miner_name="alice", miner_port=3))
+    manager.remove_miner_key("bob")
+
+    # Assert
+    assert manager.get_miner_key(alice.ss58_address).ss58_address == alice.ss58_address
+    assert manager.keyring.flushes == 3
+    saved = json.loads(configs_path.read_text(encoding="utf-8"))
+    assert list(saved) == ["alice"] and saved["alice"]["miner_port"] == 3
+    assert manager.miner_configs == saved
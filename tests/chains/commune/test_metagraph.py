@@ -0,0 +1,141 @@
+import json
+import asyncio
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from base.signing import SignatureMiddleware, sign_request_headers
+from chains.backends import get_backend
+from chains.commune.chain_client import ChainClientPool
+from chains.commune.metagraph import MetagraphService
+from chains.commune.mock_node import MockChainState, MockCommuneNode
+
+
+@pytest.fixture
+def state():
+    state = MockChainState(block=100)
+    state.add_subnet("Rootnet")
+    state.add_module(0, "5Big", "big", "1.1.1.1:80", stake=500)
+    state.add_module(0, "5Small", "small", "2.2.2.2:80", stake=10)
+    state.add_module(0, "5Unstaked", "unstaked", "3.3.3.3:80")
+    state.advance()
+    return state
+
+
+@pytest.fixture
+def node(state):
+    return MockCommuneNode("mock://node", state)
+
+
+@pytest.fixture
+def service(node):
+    pool = ChainClientPool([node.url], client_factory=lambda url: node)
+    return MetagraphService(netuid=0, client=pool)
+
+
+def test_snapshot_lookups(service):
+    # Act
+    snapshot = asyncio.run(service.refresh())
+
+    # Assert
+    assert len(snapshot) == 3
+    assert snapshot.block == 101
+    assert snapshot.uid_of("5Small") == 1
+    assert snapshot.stake_of("5Big") == 500
+    assert snapshot.stake_of("5Nobody") == 0
+    assert snapshot.is_validator("5Unstaked") and not snapshot.is_validator("5Unstaked", min_stake=1)
+    assert not snapshot.is_validator("5Nobody")
+    assert snapshot.top(2) == ["5Big", "5Small"]
+    assert snapshot.addresses[2] == "3.3.3.3:80"
+
+
+def test_refresh_applies_block_events(service, node, state):
+    # Arrange
+    first = asyncio.run(service.refresh())
+
+    # Act
+    unchanged = asyncio.run(service.refresh())
+    state.add_stake(0, "5Small", "5Big", 90)
+    state.advance()
+    restaked = asyncio.run(service.refresh())
+    state.advance()
+    idle = asyncio.run(service.refresh())
+    state.add_module(0, "5New", "new", stake=7)
+    state.advance()
+    grown = asyncio.run(service.refresh())
+
+    # Assert
+    assert unchanged is first
+    assert service.skipped == 1 and service.full_refreshes == 1
+    assert node.calls["query_map_stakefrom"] == 1
+    assert node.calls["query_map_key"] == 2
+    assert node.calls["get_stakefrom"] == 2
+    assert restaked.stake_of("5Small") == 100 and restaked.stake_of("5Big") == 500
+    assert restaked.index is first.index
+    assert idle.block == 103 and idle.stake_of("5Small") == 100
+    assert grown.uid_of("5New") == 3 and grown.stake_of("5New") == 7
+    assert grown.stake_of("5Big") == 500 and grown.index is not first.index
+
+
+def test_large_gap_refreshes_in_full(service, node, state):
+    # Arrange
+    service.max_event_blocks = 4
+    asyncio.run(service.refresh())
+    state.add_stake(0, "5Small", "5Big", 90)
+
+    # Act
+    state.advance(10)
+    snapshot = asyncio.run(service.refresh())
+
+    # Assert
+    assert snapshot.stake_of("5Small") == 100
+    assert service.full_refreshes == 2
+    assert node.calls["get_events"] == 0
+
+
+def test_background_refresh(service, state):
+    # Arrange
+    service.interval = 0.01
+
+    async def scenario():
+        service.start()
+        await asyncio.sleep(0.05)
+        state.add_module(0, "5Late", "late", stake=1)
+        state.advance()
+        await asyncio.sleep(0.05)
+        await service.stop()
+
+    # Act
+    asyncio.run(scenario())
+
+    # Assert
+    assert service.is_validator("5Late")
+    assert service.refreshes == 2
+
+
+def test_middleware_requires_registered_caller(service, state):
+    # Arrange
+    backend = get_backend("commune")
+    validator, stranger = backend.derive(b"\x01" * 32), backend.derive(b"\x03" * 32)
+    state.add_module(0, validator.ss58_address, "validator", stake=50)
+    asyncio.run(service.refresh())
+    app = FastAPI()
+
+    @app.post("/modules/echo/process")
+    async def process():
+        return {"result": "ok"}
+
+    app.add_middleware(SignatureMiddleware, authorize=service.require_validator(min_stake=20))
+    client = TestClient(app)
+    payload = json.dumps({"data": "hello"}).encode()
+
+    def post(key):
+        headers = sign_request_headers(key, "POST", "/modules/echo/process", payload)
+        return client.post("/modules/echo/process", content=payload, headers=headers)
+
+    # Act
+    accepted, rejected = post(validator), post(stranger)
+
+    # Assert
+    assert accepted.status_code == 200
+    assert rejected.status_code == 403
+    assert rejected.json() == {"detail": "Caller is not authorized"}
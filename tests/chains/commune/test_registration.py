@@ -0,0 +1,196 @@
+import json
+import time
+import asyncio
+import pytest
+from types import SimpleNamespace
+from substrateinterface import Keypair
+from base.base_miner import MinerConfig
+from chains.commune.chain_client import ChainClientPool
+from chains.commune.mock_node import MockChainState, MockCommuneNode
+from chains.commune.registration import (
+    NANO,
+    MinerRegistrar,
+    NonceManager,
+    RegistrationError,
+    aregister_miners,
+    load_keypair,
+    register_miners,
+)
+
+
+@pytest.fixture
+def state():
+    state = MockChainState(burn=10 * NANO)
+    state.add_subnet("Rootnet")
+    state.add_subnet("Text", netuid=1)
+    state.balances["5Funder"] = 10_000 * NANO
+    return state
+
+
+@pytest.fixture
+def node(state):
+    return MockCommuneNode("mock://node", state, latency=0.001)
+
+
+@pytest.fixture
+def pool(node):
+    return ChainClientPool([node.url], client_factory=lambda url: node)
+
+
+def key_loader(name):
+    if name == "missing":
+        raise FileNotFoundError(name)
+    return SimpleNamespace(ss58_address=f"5{name}")
+
+
+def miner_config(name, netuid=0, **overrides):
+    options = dict(
+        miner_name=name,
+        miner_keypath=name,
+        miner_host="0.0.0.0",
+        external_address="1.2.3.4",
+        miner_port=5757,
+        stake=100.0,
+        netuid=netuid,
+        funding_key="Funder",
+        funding_modifier=5.0,
+    )
+    options.update(overrides)
+    return MinerConfig(**options)
+
+
+def test_register_many(pool, state, node):
+    # Arrange
+    configs = [miner_config(f"miner{index}", netuid=index % 2) for index in range(6)]
+
+    # Act
+    results = register_miners(configs, pool, key_loader=key_loader)
+
+    # Assert
+    assert [result.status for result in results] == ["registered"] * 6
+    assert [result.uid for result in results] == [0, 0, 1, 1, 2, 2]
+    assert all(result.funded == 115 * NANO and result.staked == 100 * NANO for result in results)
+    assert state.nonces["5Funder"] == 6
+    assert state.nonces["5miner0"] == 2
+    assert state.subnets[1]["addresses"][0] == "1.2.3.4:5757"
+    assert state.subnets[0]["stake"]["5miner0"] == [("5miner0", 100 * NANO)]
+    assert node.calls["get_nonce"] == 7
+    assert node.calls["get_burn"] == 2
+
+
+def test_partial_funding_and_already_registered(pool, state):
+    # Arrange
+    state.balances["5rich"] = 200 * NANO
+    state.balances["5short"] = 50 * NANO
+    state.add_module(0, "5old", "old")
+
+    # Act
+    results = register_miners(
+        [miner_config("rich"), miner_config("short"), miner_config("old")], pool, key_loader=key_loader
+    )
+
+    # Assert
+    assert [result.funded for result in results] == [0, 65 * NANO, 0]
+    assert [result.status for result in results] == ["registered", "registered", "already_registered"]
+    assert results[2].uid == 0
+
+
+@pytest.mark.parametrize(
+    "config, error",
+    [
+        (miner_config("missing"), "missing"),
+        (miner_config("lonely", funding_key=None), "no funding key"),
+        (miner_config("nowhere", netuid=7), "Subnet 7 does not exist"),
+    ],
+    ids=["missing_key", "no_funding_key", "unknown_subnet"],
+)
+def test_failures_do_not_abort_batch(pool, config, error):
+    # Act
+    results = register_miners([config, miner_config("fine")], pool, key_loader=key_loader)
+
+    # Assert
+    assert results[0].status == "failed" and error in results[0].error
+    assert results[1].status == "registered"
+
+
+def test_shared_funding_key_does_not_wait_for_each_inclusion(state):
+    # Arrange
+    node = MockCommuneNode("mock://node", state, block_time=0.2)
+    pool = ChainClientPool([node.url], client_factory=lambda url: node, max_workers=16, inclusion_interval=0.05)
+    configs = [miner_config(f"miner{index}", stake=0.0) for index in range(6)]
+
+    # Act
+    start = time.perf_counter()
+    results = register_miners(configs, pool, key_loader=key_loader)
+    elapsed = time.perf_counter() - start
+
+    # Assert
+    assert [result.status for result in results] == ["registered"] * 6
+    assert state.nonces["5Funder"] == 6
+    assert node.calls["check_inclusion"] >= 12
+    assert elapsed < 1.0
+
+
+def test_register_miners_inside_event_loop(pool):
+    # Arrange
+    async def main():
+        with pytest.raises(RegistrationError, match="aregister_miners"):
+            register_miners([miner_config("sync")], pool, key_loader=key_loader)
+        return await aregister_miners([miner_config("async")], pool, key_loader=key_loader)
+
+    # Act
+    results = asyncio.run(main())
+
+    # Assert
+    assert [result.status for result in results] == ["registered"]
+
+
+def test_nonce_is_reread_after_failure(pool, state):
+    # Arrange
+    nonces = NonceManager(pool)
+    funder = SimpleNamespace(ss58_address="5Funder")
+
+    async def scenario():
+        async with nonces.reserve("5Funder") as nonce:
+            await pool.submit_call("transfer_keep_alive", {"dest": "5a", "value": 1}, funder, "Balances", nonce)
+        with pytest.raises(RuntimeError):
+            async with nonces.reserve("5Funder"):
+                raise RuntimeError("submission failed")
+        async with nonces.reserve("5Funder") as nonce:
+            return nonce
+
+    # Act / Assert
+    assert asyncio.run(scenario()) == 1
+
+
+def test_load_keypair(tmp_path):
+    # Arrange
+    keypair = Keypair.create_from_uri("//Alice")
+    key_data = {
+        "crypto_type": 1,
+        "seed_hex": None,
+        "derive_path": None,
+        "path": "alice",
+        "ss58_format": 42,
+        "public_key": keypair.public_key.hex(),
+        "ss58_address": keypair.ss58_address,
+        "private_key": keypair.private_key.hex(),
+        "mnemonic": None,
+    }
+    path = tmp_path / "alice.json"
+    path.write_text(json.dumps({"data": json.dumps(key_data), "encrypted": False}), encoding="utf-8")
+
+    # Act
+    loaded = load_keypair(str(path))
+
+    # Assert
+    assert loaded.ss58_address == keypair.ss58_address
+    assert loaded.private_key == keypair.private_key
+
+
+def test_registrar_uses_given_client(pool):
+    # Act
+    registrar = MinerRegistrar(pool, key_loader=key_loader)
+
+    # Assert
+    assert registrar.client is pool and registrar.nonces.client is pool
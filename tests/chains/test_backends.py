@@ -0,0 +1,85 @@
+import subprocess
+import sys
+import pytest
+from chains.backends import ChainKeyBackend, available_backends, get_backend, register_backend
+from chains.backends import registry
+
+
+class EchoBackend(ChainKeyBackend):
+    name = "echo"
+
+    def derive(self, seed):
+        return seed
+
+    def public_key(self, key):
+        return key
+
+    def sign(self, key, message):
+        return key + message
+
+    def verify(self, public_key, message, signature):
+        return signature == public_key + message
+
+    def encode_address(self, public_key):
+        return public_key.hex()
+
+
+@pytest.fixture
+def echo_backend():
+    register_backend("echo", EchoBackend)
+    yield get_backend("echo")
+    registry._targets.pop("echo", None)
+    registry._instances.pop("echo", None)
+
+
+def test_registry_does_not_import_sdks():
+    # Arrange
+    code = (
+        "import sys; from chains.backends import available_backends; available_backends(); "
+        "print(any(name in sys.modules for name in ('substrateinterface', 'solders', 'bitcoinlib')))"
+    )
+
+    # Act
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+
+    # Assert
+    assert result.stdout.strip() == "False"
+
+
+def test_register_and_get_backend(echo_backend):
+    # Act
+    signatures = echo_backend.sign_batch(b"k", [b"a", b"b"])
+
+    # Assert
+    assert "echo" in available_backends()
+    assert get_backend("echo") is echo_backend
+    assert signatures == [b"ka", b"kb"]
+    assert echo_backend.verify_batch([(b"k", b"a", b"ka"), (b"k", b"b", b"ka")]) == [True, False]
+    with pytest.raises(ValueError):
+        register_backend("echo", EchoBackend)
+
+
+def test_unknown_backend():
+    # Act / Assert
+    with pytest.raises(KeyError):
+        get_backend("dogecoin")
+
+
+@pytest.mark.parametrize("name", ["substrate", "commune", "solana", "bitcoin"])
+def test_builtin_backends_sign_and_verify(name):
+    # Arrange
+    backend = get_backend(name)
+    key = backend.derive(b"\x07" * 32)
+    public_key = backend.public_key(key)
+
+    # Act
+    signatures = backend.sign_batch(key, [b"first", b"second"])
+
+    # Assert
+    assert backend.verify(public_key, b"first", signatures[0])
+    assert not backend.verify(public_key, b"second", signatures[0])
+    assert not backend.verify(public_key, b"first", b"garbage")
+    assert backend.verify_batch(
+        [(public_key, b"first", signatures[0]), (public_key, b"second", signatures[1])]
+    ) == [True, True]
+    assert backend.encode_addresses([public_key]) == [backend.encode_address(public_key)]
@@ -0,0 +1,102 @@
+import pytest
+from chains.call_graph import CallGraph, main
+from chains.code_index import CodeIndex
+
+EDGES = [
+    ("serve", "process"),
+    ("process", "validate"),
+    ("process", "run"),
+    ("run", "helper"),
+    ("helper", "str"),
+    ("retry", "run"),
+    ("loop_a", "loop_b"),
+    ("loop_b", "loop_a"),
+]
+DEFINED = ["serve", "process", "validate", "run", "helper", "retry", "loop_a", "loop_b", "unused"]
+
+
+@pytest.fixture
+def graph():
+    return CallGraph.from_edges(EDGES, DEFINED)
+
+
+def test_direct_queries(graph):
+    # Act / Assert
+    assert sorted(graph.callees("process")) == ["run", "validate"]
+    assert sorted(graph.callers("run")) == ["process", "retry"]
+    assert graph.callers("serve") == []
+    assert graph.edge_count == len(EDGES)
+    with pytest.raises(KeyError, match="Unknown function"):
+        graph.callees("missing")
+
+
+@pytest.mark.parametrize(
+    "name, reverse, max_depth, expected",
+    [
+        ("serve", False, None, {"process": 1, "validate": 2, "run": 2, "helper": 3, "str": 4}),
+        ("serve", False, 2, {"process": 1, "validate": 2, "run": 2}),
+        ("helper", True, None, {"run": 1, "process": 2, "retry": 2, "serve": 3}),
+        ("loop_a", False, None, {"loop_b": 1, "loop_a": 2}),
+        ("serve", False, 0, {}),
+    ],
+    ids=["callees", "max-depth", "callers", "cycle", "zero-depth"],
+)
+def test_reachable(graph, name, reverse, max_depth, expected):
+    # Act / Assert
+    assert graph.reachable(name, reverse=reverse, max_depth=max_depth) == expected
+
+
+def test_path(graph):
+    # Act / Assert
+    assert graph.path("serve", "helper") == ["serve", "process", "run", "helper"]
+    assert graph.path("helper", "serve") is None
+    assert graph.path("run", "run") == ["run"]
+
+
+def test_dead_and_hot(graph):
+    # Act / Assert
+    assert graph.unreachable(["serve"]) == ["loop_a", "loop_b", "retry", "unused"]
+    assert graph.uncalled() == ["retry", "serve", "unused"]
+    assert graph.hot(2) == [("run", 2), ("helper", 1)]
+    assert graph.hot(1, transitive=True) == [("helper", 4)]
+
+
+def test_save_and_load(graph, tmp_path):
+    # Arrange
+    path = tmp_path / "graph.npz"
+
+    # Act
+    graph.save(path)
+    loaded = CallGraph.load(path)
+
+    # Assert
+    assert loaded.names == graph.names
+    assert loaded.reachable("serve") == graph.reachable("serve")
+    assert loaded.uncalled() == graph.uncalled()
+
+
+def test_from_function_map():
+    # Act
+    graph = CallGraph.from_function_map({"process": {"function": "run", "arguments": []}})
+
+    # Assert
+    assert graph.callees("process") == ["run"]
+    assert graph.uncalled() == ["process"]
+
+
+def test_cli_from_index(tmp_path, capsys):
+    # Arrange
+    (tmp_path / "src").mkdir()
+    (tmp_path / "src" / "miner.py").write_text(
+        "def serve():\n    process()\n\ndef process():\n    run()\n\ndef run():\n    pass\n", encoding="utf-8"
+    )
+    database = str(tmp_path / "index.db")
+    index = CodeIndex(database)
+    index.update(tmp_path / "src", workers=1)
+    index.close()
+
+    # Act
+    main(["--db", database, "path", "serve", "run"])
+
+    # Assert
+    assert capsys.readouterr().out.strip() == "serve -> process -> run"
@@ -0,0 +1,136 @@
+import os
+import textwrap
+import pytest
+from pathlib import Path
+from chains import code_index
+from chains.code_index import CodeIndex, main
+
+MINER = """
+class Miner:
+    def process(self, request):
+        return self.run(request)
+
+    def run(self, request):
+        return helper(request)
+"""
+
+HELPERS = """
+def helper(value):
+    return str(value)
+"""
+
+
+@pytest.fixture
+def tree(tmp_path):
+    root = tmp_path / "project"
+    (root / "pkg").mkdir(parents=True)
+    (root / "__pycache__").mkdir()
+    (root / "pkg" / "miner.py").write_text(textwrap.dedent(MINER), encoding="utf-8")
+    (root / "helpers.py").write_text(textwrap.dedent(HELPERS), encoding="utf-8")
+    (root / "__pycache__" / "cached.py").write_text("def cached(): pass", encoding="utf-8")
+    return root
+
+
+@pytest.fixture
+def index():
+    index = CodeIndex(":memory:")
+    yield index
+    index.close()
+
+
+def test_update_and_query(index, tree):
+    # Act
+    stats = index.update(tree, workers=1)
+
+    # Assert
+    assert (stats.scanned, stats.parsed, stats.errors) == (2, 2, 0)
+    assert [(call.caller_qualname, call.line) for call in index.callers("helper")] == [("Miner.run", 7)]
+    assert [call.callee for call in index.callees("process")] == ["run"]
+    assert [definition.qualname for definition in index.definitions("run")] == ["Miner.run"]
+    assert sorted(index.edges()) == [("helper", "str"), ("process", "run"), ("run", "helper")]
+    assert index.stats() == {"files": 2, "definitions": 3, "calls": 3}
+
+
+def test_update_is_incremental(index, tree):
+    # Arrange
+    index.update(tree, workers=1)
+    helpers = tree / "helpers.py"
+    os.utime(helpers, ns=(0, 0))
+    (tree / "pkg" / "miner.py").write_text("def process(self):\n    self.other()\n", encoding="utf-8")
+    (tree / "new.py").write_text("def broken(:\n", encoding="utf-8")
+
+    # Act
+    stats = index.update(tree, workers=1)
+    again = index.update(tree, workers=1)
+
+    # Assert
+    assert (stats.parsed, stats.unchanged, stats.errors) == (2, 1, 1)
+    assert index.callers("helper") == []
+    assert [call.caller for call in index.callers("other")] == ["process"]
+    assert list(index.errors()) == [str(tree / "new.py")]
+    assert (again.parsed, again.unchanged) == (0, 3)
+
+
+def test_unreadable_file_is_recorded_and_retried(index, tree, monkeypatch):
+    # Arrange
+    read_bytes = Path.read_bytes
+
+    def unreadable(path):
+        if path.name == "helpers.py":
+            raise PermissionError(13, "Permission denied", str(path))
+        return read_bytes(path)
+
+    monkeypatch.setattr(Path, "read_bytes", unreadable)
+
+    # Act
+    stats = index.update(tree, workers=1)
+    errors = index.errors()
+    monkeypatch.undo()
+    again = index.update(tree, workers=1)
+
+    # Assert
+    assert (stats.parsed, stats.errors) == (2, 1)
+    assert "PermissionError" in errors[str(tree / "helpers.py")]
+    assert (again.parsed, again.unchanged, again.errors) == (1, 1, 0)
+    assert [definition.name for definition in index.definitions("helper")] == ["helper"]
+
+
+def test_removed_files_are_dropped(index, tree):
+    # Arrange
+    index.update(tree, workers=1)
+    (tree / "helpers.py").unlink()
+
+    # Act
+    stats = index.update(tree, workers=1)
+
+    # Assert
+    assert stats.removed == 1
+    assert index.definitions("helper") == []
+    assert index.stats()["files"] == 1
+
+
+def test_parallel_update_matches_serial(tree, monkeypatch):
+    # Arrange
+    monkeypatch.setattr(code_index, "PARALLEL_THRESHOLD", 1)
+    serial, parallel = CodeIndex(":memory:"), CodeIndex(":memory:")
+
+    # Act
+    serial.update(tree, workers=1)
+    parallel.update(tree, workers=2)
+
+    # Assert
+    assert parallel.edges() == serial.edges()
+    assert parallel.definitions() == serial.definitions()
+
+
+def test_cli(tree, tmp_path, capsys):
+    # Arrange
+    database = str(tmp_path / "index.db")
+    main(["--db", database, "update", str(tree), "--workers", "1"])
+    capsys.readouterr()
+
+    # Act
+    main(["--db", database, "callers", "run"])
+
+    # Assert
+    assert capsys.readouterr().out.strip().endswith("miner.py:4 Miner.process -> run(request)")
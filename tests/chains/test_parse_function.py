@@ -0,0 +1,81 @@
+import json
+import pytest
+from chains.parse_function import construct_function_map, extract_function_calls, parse_code
+
+CODE = """
+class Miner:
+    def process(self, request):
+        self.validate(request, strict=True)
+        result = self.run("fast", mode=MODE)
+
+        def callback():
+            self.notify(result)
+
+        return result
+
+    async def serve(self):
+        await self.process(None)
+        start()
+        app.run()
+"""
+
+
+def test_extract_function_calls():
+    # Act
+    results = extract_function_calls(CODE)
+
+    # Assert
+    assert results == [
+        ("process", "validate", ["request", "strict=True"]),
+        ("process", "run", ["'fast'", "mode=MODE"]),
+        ("callback", "notify", ["result"]),
+        ("serve", "process", ["None"]),
+    ]
+
+
+def test_parse_code_collects_definitions_and_call_kinds():
+    # Act
+    visitor = parse_code(CODE)
+
+    # Assert
+    assert visitor.definitions == [
+        ("process", "Miner.process", 3),
+        ("callback", "Miner.process.callback", 7),
+        ("serve", "Miner.serve", 12),
+    ]
+    assert [(call[1], call[2], call[4]) for call in visitor.calls[-2:]] == [
+        ("Miner.serve", "start", "name"),
+        ("Miner.serve", "run", "attribute"),
+    ]
+
+
+@pytest.mark.parametrize("depth", [10, 90], ids=["10", "90"])
+def test_deep_nesting_attributes_calls_once(depth):
+    # Arrange
+    lines = []
+    for level in range(depth):
+        lines.append("    " * level + f"def f{level}(self):")
+        lines.append("    " * (level + 1) + f"self.g{level}()")
+    code = "\n".join(lines)
+
+    # Act
+    results = extract_function_calls(code)
+
+    # Assert
+    assert results == [(f"f{level}", f"g{level}", []) for level in range(depth)]
+
+
+def test_construct_function_map(tmp_path):
+    # Arrange
+    code_path, save_path = tmp_path / "miner.py", tmp_path / "functions.json"
+    code_path.write_text(CODE, encoding="utf-8")
+
+    # Act
+    construct_function_map(code_path, save_path)
+
+    # Assert
+    assert json.loads(save_path.read_text(encoding="utf-8")) == {
+        "process": {"function": "run", "arguments": ["'fast'", "mode=MODE"]},
+        "callback": {"function": "notify", "arguments": ["result"]},
+        "serve": {"function": "process", "arguments": ["None"]},
+    }
@@ -0,0 +1,94 @@
+import sys
+import types
+import pytest
+from pathlib import Path
+from benchmarks import suite
+from benchmarks.suite import SuiteRun, append_history, compare_runs, load_history, main, run_suite, select_run
+
+
+def make_run(label=None, **results):
+    return SuiteRun(timestamp="2026-01-01T00:00:00+00:00", label=label, python="3", platform="test", results=results)
+
+
+@pytest.fixture
+def fake_benchmarks(monkeypatch):
+    working = types.ModuleType("benchmarks.bench_fake")
+    working.run = lambda size=10: {"op": size / 1000}
+    broken = types.ModuleType("benchmarks.bench_broken")
+    broken.run = lambda: 1 / 0
+    monkeypatch.setitem(sys.modules, "benchmarks.bench_fake", working)
+    monkeypatch.setitem(sys.modules, "benchmarks.bench_broken", broken)
+    monkeypatch.setattr(suite, "SUITE", {"fake": {"size": 5}, "broken": {}, "missing_dependency": {}})
+
+
+def test_run_suite_records_results_skips_and_failures(fake_benchmarks):
+    # Act
+    suite_run = run_suite(label="baseline")
+
+    # Assert
+    assert suite_run.results == {"fake": {"op": 0.005}}
+    assert list(suite_run.skipped) == ["missing_dependency"]
+    assert "ZeroDivisionError" in suite_run.failed["broken"]
+    assert suite_run.label == "baseline"
+
+
+def test_suite_lists_every_benchmark():
+    # Arrange
+    modules = Path(suite.__file__).parent.glob("bench_*.py")
+
+    # Act
+    names = {module.stem[len("bench_") :] for module in modules}
+
+    # Assert
+    assert names == set(suite.SUITE)
+
+
+def test_history_round_trip(tmp_path):
+    # Arrange
+    path = str(tmp_path / "history.jsonl")
+    runs = [make_run("baseline", fake={"op": 1.0}), make_run(fake={"op": 2.0})]
+
+    # Act
+    for suite_run in runs:
+        append_history(suite_run, path)
+    history = load_history(path)
+
+    # Assert
+    assert history == runs
+    assert select_run(history, "baseline") == runs[0]
+    assert select_run(history, "-1") == runs[1]
+    with pytest.raises(LookupError):
+        select_run(history, "nightly")
+
+
+@pytest.mark.parametrize(
+    "current, expected",
+    [(1.1, False), (1.3, True), (0.5, False)],
+    ids=["within_threshold", "regression", "improvement"],
+)
+def test_compare_runs(current, expected):
+    # Arrange
+    baseline = make_run(fake={"op": 1.0, "only_in_baseline": 1.0})
+
+    # Act
+    comparisons = compare_runs(baseline, make_run(fake={"op": current, "new": 1.0}), threshold=0.2)
+
+    # Assert
+    assert [(comparison.metric, comparison.regression) for comparison in comparisons] == [("op", expected)]
+    assert comparisons[0].change == pytest.approx(current - 1.0)
+
+
+def test_compare_command_exit_status(tmp_path, capsys):
+    # Arrange
+    path = str(tmp_path / "history.jsonl")
+    append_history(make_run("baseline", fake={"op": 1.0}), path)
+    append_history(make_run(fake={"op": 1.1}), path)
+    append_history(make_run(fake={"op": 2.0}), path)
+
+    # Act
+    within = main(["--history", path, "compare", "--baseline", "baseline", "--current", "1"])
+    regressed = main(["--history", path, "compare", "--baseline", "baseline"])
+
+    # Assert
+    assert (within, regressed) == (0, 1)
+    assert "REGRESSION" in capsys.readouterr().out
@@ -3,10 +3,10 @@ import os
 import json
 import base64
 import requests
-import subprocess
 from unittest.mock import patch, mock_open, MagicMock
 from module_manager import ModuleManager
 from data_models import MinerConfig, ModuleConfig, BaseModule
+from base.setup_engine import SetupError
 
 
 @pytest.fixture
@@ -137,9 +137,9 @@ def test_request_module(
 
 
 @pytest.mark.parametrize(
-    "subprocess_success", [True, False], ids=["success", "failure"]
+    "setup_success", [True, False], ids=["success", "failure"]
 )
-def test_setup_module(module_manager, subprocess_success):
+def test_setup_module(module_manager, setup_success):
     # Arrange
     module_config = ModuleConfig(
         module_name="module1",
@@ -147,27 +147,16 @@ def test_setup_module(module_manager, subprocess_success):
         module_endpoint="endpoint1",
         module_url="url1",
     )
-    with patch("subprocess.run") as mock_run:
-        mock_run.side_effect = (
-            subprocess.CalledProcessError(1, "cmd") if not subprocess_success else None
-        )
+    with patch("module_manager.get_setup_engine") as mock_engine:
+        mock_setup = mock_engine.return_value.setup
+        mock_setup.side_effect = None if setup_success else SetupError("setup failed")
 
         # Act
-        if subprocess_success:
-            module_manager.setup_module(module_config)
-        else:
-            with pytest.raises(subprocess.CalledProcessError):
-                module_manager.setup_module(module_config)
+        result = module_manager.setup_module(module_config)
 
         # Assert
-        mock_run.assert_called_once_with(
-            [
-                "python",
-                "-m",
-                f"modules.{module_config.module_name}.setup_{module_config.module_name}",
-            ],
-            check=True,
-        )
+        mock_setup.assert_called_once_with(module_config)
+        assert (result is mock_setup.return_value) == setup_success
 
 
 @pytest.mark.parametrize(
@@ -0,0 +1,125 @@
+import gzip
+import os
+import pytest
+from walkdir import Bundler, is_ignored, parse_ignore, scan
+
+
+def write(root, files):
+    for path, content in files.items():
+        target = root / path
+        target.parent.mkdir(parents=True, exist_ok=True)
+        target.write_text(content, encoding="utf-8")
+
+
+@pytest.fixture
+def tree(tmp_path):
+    root = tmp_path / "tree"
+    write(
+        root,
+        {
+            "a.py": "print('a')\n",
+            "b.txt": "not python\n",
+            "pkg/__init__.py": "",
+            "pkg/c.py": "C = 3\n",
+            "pkg/generated/d.py": "D = 4\n",
+            "pkg/.gitignore": "generated/\n",
+            "data/e.py": "E = 5\n",
+            ".git/hooks/f.py": "F = 6\n",
+            "venv/lib/g.py": "G = 7\n",
+            "build/h.py": "H = 8\n",
+            "build/keep.py": "KEEP = 9\n",
+            ".gitignore": "build/*\n!build/keep.py\n",
+        },
+    )
+    return root
+
+
+@pytest.mark.parametrize(
+    "patterns, path, is_directory, expected",
+    [
+        (["*.log"], "logs/app.log", False, True),
+        (["/build"], "build", True, True),
+        (["/build"], "src/build", True, False),
+        (["docs/"], "docs", False, False),
+        (["docs/"], "a/docs", True, True),
+        (["a/**/z.py"], "a/b/c/z.py", False, True),
+        (["*.py", "!keep.py"], "keep.py", False, False),
+        (["# comment", ""], "comment", False, False),
+        (["file?.py"], "file1.py", False, True),
+        (["[ab].py"], "c.py", False, False),
+    ],
+    ids=["glob", "anchored", "anchored_elsewhere", "directory_only_file", "directory_only", "double_star", "negation", "comment", "question_mark", "character_class"],
+)
+def test_is_ignored(patterns, path, is_directory, expected):
+    # Arrange
+    rules = parse_ignore(patterns)
+
+    # Act
+    result = is_ignored(rules, path, is_directory)
+
+    # Assert
+    assert result is expected
+
+
+def test_scan_prunes_ignored_directories(tree):
+    # Act
+    paths = [file.path for file in scan(str(tree))]
+
+    # Assert
+    assert paths == ["a.py", "build/keep.py", "pkg/__init__.py", "pkg/c.py"]
+
+
+def test_bundle_writes_every_file(tree, tmp_path):
+    # Arrange
+    output = tmp_path / "output.txt"
+
+    # Act
+    stats = Bundler(str(tree), str(output)).bundle()
+
+    # Assert
+    assert stats.files == stats.read == 4
+    text = output.read_text(encoding="utf-8")
+    assert text.startswith("File: ./a.py\n\nprint('a')\n\n\nFile: ./build/keep.py\n\n")
+    assert text.count("File: ") == 4
+
+
+def test_rebundle_reuses_unchanged_files(tree, tmp_path):
+    # Arrange
+    output = tmp_path / "output.txt"
+    Bundler(str(tree), str(output), buffer_size=1).bundle()
+    unchanged = Bundler(str(tree), str(output)).bundle()
+    (tree / "a.py").write_text("print('changed')\n", encoding="utf-8")
+    write(tree, {"pkg/new.py": "NEW = 1\n"})
+
+    # Act
+    stats = Bundler(str(tree), str(output)).bundle()
+    full = tmp_path / "full.txt"
+    Bundler(str(tree), str(full)).bundle()
+
+    # Assert
+    assert unchanged.outputs_kept == 1 and unchanged.read == 0
+    assert (stats.read, stats.copied) == (2, 3)
+    assert output.read_bytes() == full.read_bytes()
+
+
+def test_chunked_compressed_bundle(tree, tmp_path):
+    # Arrange
+    output = tmp_path / "output.txt"
+    bundler = Bundler(str(tree), str(output), chunk_size=40, compress=True)
+
+    # Act
+    first = bundler.bundle()
+    os.remove(tree / "pkg" / "c.py")
+    second = bundler.bundle()
+
+    # Assert
+    assert first.outputs_written == 4
+    assert second.outputs_kept == 3 and second.outputs_written == 0
+    chunks = sorted(path.name for path in tmp_path.glob("output.*.txt.gz"))
+    assert chunks == ["output.000.txt.gz", "output.001.txt.gz", "output.002.txt.gz"]
+    text = b"".join(gzip.decompress((tmp_path / name).read_bytes()) for name in chunks).decode("utf-8")
+    assert [line for line in text.splitlines() if line.startswith("File: ")] == [
+        "File: ./a.py",
+        "File: ./build/keep.py",
+        "File: ./pkg/__init__.py",
+    ]
@@ -0,0 +1,66 @@
+import pytest
+from benchmarks.bench_import_time import measure_import
+from utilities import encryption
+from utilities.encryption import KeyDataError
+
+
+def test_import_does_not_load_chain_sdks():
+    # Act
+    report = measure_import("utilities.encryption", runs=1)
+
+    # Assert
+    assert report["heavy"] == []
+
+
+@pytest.mark.parametrize(
+    "password, expected",
+    [("hunter2", b"hunter2"), (None, KeyDataError)],
+    ids=["password_set", "password_unset"],
+)
+def test_password_resolved_on_demand(monkeypatch, password, expected):
+    # Arrange
+    if password is None:
+        monkeypatch.delenv("PRIVATE_KEY_PASSWORD", raising=False)
+    else:
+        monkeypatch.setenv("PRIVATE_KEY_PASSWORD", password)
+
+    # Act / Assert
+    if password is None:
+        with pytest.raises(expected):
+            encryption.PASSWORD
+    else:
+        assert encryption.PASSWORD == expected
+
+
+def test_key_paths_follow_key_folder(monkeypatch, tmp_path):
+    # Arrange
+    monkeypatch.setenv("KEY_FOLDER", str(tmp_path))
+
+    # Act / Assert
+    assert encryption.PRIVATE_KEY == tmp_path / "private_key.pem"
+    assert encryption.get_key_store_path() == f"{tmp_path}/key_store.db"
+
+
+def test_derive_substrate_key_uses_backend():
+    # Act
+    keypair = encryption.derive_substrate_key(b"\x01" * 32)
+
+    # Assert
+    assert keypair.ss58_address.startswith("5")
+    assert keypair.verify(b"message", keypair.sign(b"message"))
+
+
+def test_construct_key_data_keeps_one_entry_per_key(tmp_path):
+    # Arrange
+    from utilities.key_store import KeyStore
+
+    store = KeyStore(tmp_path / "key_store.db", password="secret", iterations=1000)
+
+    # Act
+    for name in ("alpha", "beta"):
+        encryption.construct_key_data(b"rsa", b"rsa.pub", f"5{name}", "words", "0xpriv", f"0x{name}", key_store=store)
+
+    # Assert
+    assert [record.name for record in store.records()] == ["5alpha", "5beta"]
+    assert store.get("5beta")["public_key"] == "0xbeta"
+    store.close()
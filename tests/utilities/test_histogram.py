@@ -0,0 +1,87 @@
+import io
+import pytest
+import numpy as np
+from utilities.histogram import Histogram
+
+
+@pytest.fixture
+def latencies():
+    return np.random.default_rng(0).lognormal(8, 1, 20000).astype(np.int64)
+
+
+def test_percentiles_within_precision(latencies):
+    # Arrange
+    histogram = Histogram()
+
+    # Act
+    histogram.record_many(latencies)
+    result = histogram.percentiles([50, 99, 99.9])
+
+    # Assert
+    for percentile, value in result.items():
+        expected = np.percentile(latencies, percentile, method="inverted_cdf")
+        assert value == pytest.approx(expected, rel=1e-3)
+    assert histogram.percentile(100) == latencies.max()
+    assert histogram.mean == pytest.approx(latencies.mean())
+
+
+def test_record_many_matches_record(latencies):
+    # Arrange
+    single, batch = Histogram(), Histogram()
+
+    # Act
+    for value in latencies[:2000]:
+        single.record(int(value))
+    batch.record_many(latencies[:2000])
+
+    # Assert
+    assert np.array_equal(single.counts, batch.counts)
+    assert (single.min_value, single.max_value, single.total_count) == (batch.min_value, batch.max_value, batch.total_count)
+
+
+@pytest.mark.parametrize("value", [0, 2047, 2048, 4097, 10**6, 3_600_000_000], ids=["zero", "exact", "first_bucket", "odd", "million", "max"])
+def test_bucket_bounds_contain_value(value):
+    # Arrange
+    histogram = Histogram()
+
+    # Act
+    low, width = histogram.bucket_bounds(histogram._index(value))
+
+    # Assert
+    assert low <= value < low + width
+    assert width <= max(1, value / 1000)
+
+
+def test_merge_and_export(latencies):
+    # Arrange
+    first, second = Histogram(), Histogram()
+    first.record_many(latencies[:10000])
+    second.record_many(latencies[10000:])
+    output = io.StringIO()
+
+    # Act
+    first.merge(second)
+    first.export_hgrm(output)
+
+    # Assert
+    lines = output.getvalue().splitlines()
+    assert first.total_count == len(latencies)
+    assert lines[0].split() == ["Value", "Percentile", "TotalCount", "1/(1-Percentile)"]
+    assert lines[-4].split()[1:3] == ["1.000000000000", str(len(latencies))]
+    assert lines[-2].startswith("#[Max")
+    with pytest.raises(ValueError):
+        first.merge(Histogram(significant_figures=2))
+
+
+def test_count_at_or_below(latencies):
+    # Arrange
+    histogram = Histogram()
+    histogram.record_many(latencies)
+
+    # Act
+    counts = [histogram.count_at_or_below(value) for value in (-1, 1000, 10**7)]
+
+    # Assert
+    assert counts[0] == 0
+    assert counts[1] == pytest.approx((latencies <= 1000).sum(), rel=0.01)
+    assert counts[2] == len(latencies)
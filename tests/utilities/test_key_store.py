@@ -0,0 +1,130 @@
+import json
+import sqlite3
+import pytest
+from utilities.key_store import KeyStore, KeyStoreError
+
+
+@pytest.fixture
+def key_store(tmp_path):
+    store = KeyStore(tmp_path / "key_store.db", password="secret", iterations=1000)
+    yield store
+    store.close()
+
+
+def write_commune_key(folder, name, encrypted=False):
+    key_data = {
+        "path": name,
+        "mnemonic": f"{name} mnemonic",
+        "public_key": f"0x{name}",
+        "private_key": f"0x{name}private",
+        "ss58_address": f"5{name}",
+        "crypto_type": 1,
+    }
+    body = {"data": json.dumps(key_data), "encrypted": encrypted, "timestamp": 0}
+    (folder / f"{name}.json").write_text(json.dumps(body), encoding="utf-8")
+    return key_data
+
+
+def test_put_and_get(key_store):
+    # Arrange
+    key_data = {"ss58_address": "5Fake", "public_key": "0xab", "mnemonic": "words"}
+
+    # Act
+    record = key_store.put("miner", key_data)
+
+    # Assert
+    assert record.name == "miner"
+    assert record.ss58_address == "5Fake"
+    assert key_store.get("miner") == key_data
+    assert key_store.get("5Fake") == key_data
+
+
+def test_crypto_type_zero_is_indexed(key_store):
+    # Act
+    record = key_store.put("miner", {"ss58_address": "5Fake", "crypto_type": 1}, crypto_type=0)
+
+    # Assert
+    assert record.crypto_type == 0
+
+
+def test_secrets_are_not_stored_in_plaintext(key_store):
+    # Arrange
+    key_store.put("miner", {"ss58_address": "5Fake", "mnemonic": "very secret words"})
+
+    # Act
+    content = key_store.path.read_bytes()
+    for wal in key_store.path.parent.glob("*-wal"):
+        content += wal.read_bytes()
+
+    # Assert
+    assert b"very secret words" not in content
+
+
+def test_lookup_does_not_require_password(key_store):
+    # Arrange
+    key_store.put("miner", {"ss58_address": "5Fake"})
+    reader = KeyStore(key_store.path)
+
+    # Act
+    record = reader.lookup("5Fake")
+
+    # Assert
+    assert record.name == "miner"
+    assert "miner" in reader and "other" not in reader
+    with pytest.raises(KeyStoreError):
+        reader.get("miner")
+
+
+def test_wrong_password(key_store):
+    # Arrange
+    key_store.put("miner", {"ss58_address": "5Fake"})
+
+    # Act / Assert
+    with pytest.raises(KeyStoreError, match="Invalid key store password"):
+        KeyStore(key_store.path, password="wrong").get("miner")
+
+
+def test_tampered_entry_fails_authentication(key_store):
+    # Arrange
+    key_store.put("miner", {"ss58_address": "5Fake"})
+    key_store.put("other", {"ss58_address": "5Other"})
+    connection = sqlite3.connect(key_store.path)
+    with connection:
+        connection.execute(
+            "UPDATE keys SET ciphertext = (SELECT ciphertext FROM keys WHERE name = 'other') WHERE name = 'miner'"
+        )
+
+    # Act / Assert
+    with pytest.raises(KeyStoreError, match="failed authentication"):
+        key_store.get("miner")
+
+
+def test_import_commune_keys(key_store, tmp_path):
+    # Arrange
+    folder = tmp_path / "key"
+    folder.mkdir()
+    expected = {name: write_commune_key(folder, name) for name in ("alpha", "beta")}
+    write_commune_key(folder, "locked", encrypted=True)
+    (folder / "broken.json").write_text("{", encoding="utf-8")
+
+    # Act
+    imported = key_store.import_commune_keys(folder)
+    reimported = key_store.import_commune_keys(folder)
+
+    # Assert
+    assert imported == 2
+    assert reimported == 0
+    assert len(key_store) == 2
+    assert key_store.get("5beta") == expected["beta"]
+    assert [record.name for record in key_store.records()] == ["alpha", "beta"]
+
+
+def test_delete(key_store):
+    # Arrange
+    key_store.put("miner", {"ss58_address": "5Fake"})
+
+    # Act / Assert
+    assert key_store.delete("miner")
+    assert not key_store.delete("miner")
+    with pytest.raises(KeyError):
+        key_store.get("miner")
@@ -0,0 +1,129 @@
+import random
+import asyncio
+import httpx
+import pytest
+from fastapi import FastAPI, HTTPException, Request
+from base.signing import SignatureMiddleware
+from utilities.loadgen import LoadConfig, LoadGenerator, PayloadSizes, RequestSpec
+
+
+def make_app(signed=False):
+    app = FastAPI()
+    seen = []
+
+    @app.post("/modules/echo/{method}")
+    async def echo(method: str, request: Request):
+        # Yield like a handler awaiting I/O, so the in-process closed loop interleaves workers.
+        await asyncio.sleep(0)
+        body = await request.json()
+        seen.append((method, request.headers.get("X-Key"), len(body.get("data", ""))))
+        return {"length": len(body.get("data", ""))}
+
+    @app.post("/modules/broken/process")
+    async def broken():
+        raise HTTPException(status_code=500, detail="Module failed")
+
+    if signed:
+        app.add_middleware(SignatureMiddleware)
+    return app, seen
+
+
+def generate(app, **config):
+    generator = LoadGenerator(LoadConfig(url="http://miner", **config), transport=httpx.ASGITransport(app=app))
+    return generator, asyncio.run(generator.run())
+
+
+def test_closed_loop_mix_and_identities():
+    # Arrange
+    app, seen = make_app()
+    mix = [RequestSpec(module="echo", method="process", weight=3), RequestSpec(module="echo", method="add", weight=1)]
+
+    # Act
+    generator, report = generate(app, validators=4, concurrency=2, mix=mix, requests=200, duration=30, payload="fixed:64")
+
+    # Assert
+    assert report.requests == len(seen) == 200
+    assert report.errors == 0
+    assert set(report.routes) == {"echo/process", "echo/add"}
+    assert report.routes["echo/process"].requests > report.routes["echo/add"].requests
+    assert len({key for _, key, _ in seen}) == 4
+    assert all(key.startswith("5") for _, key, _ in seen)
+    assert {length for _, _, length in seen} == {64}
+    assert report.latency_ms["p99"] >= report.latency_ms["p50"] > 0
+
+
+def test_closed_loop_workers_keep_their_validator():
+    # Arrange
+    app, seen = make_app()
+
+    # Act
+    generate(app, validators=5, concurrency=1, requests=5, duration=30)
+
+    # Assert
+    assert len({key for _, key, _ in seen}) == 5
+
+
+def test_open_loop_sends_at_rate():
+    # Arrange
+    app, seen = make_app()
+
+    # Act
+    _, report = generate(app, mode="open", rate=200, arrival="constant", duration=0.5)
+
+    # Assert
+    assert 90 <= report.requests <= 101
+    assert report.dropped == 0
+
+
+def test_errors_counted_per_route(tmp_path):
+    # Arrange
+    app, _ = make_app()
+    mix = [RequestSpec(module="echo"), RequestSpec(module="broken")]
+
+    # Act
+    generator, report = generate(app, mix=mix, requests=50, duration=30)
+    paths = generator.export_histograms(str(tmp_path))
+
+    # Assert
+    assert report.routes["broken/process"].errors == report.routes["broken/process"].requests > 0
+    assert report.routes["echo/process"].errors == 0
+    assert report.status_codes["500"] == report.errors
+    assert sorted(path.name for path in paths) == ["broken_process.hgrm", "echo_process.hgrm"]
+
+
+def test_signed_requests_pass_signature_middleware():
+    # Arrange
+    app, seen = make_app(signed=True)
+
+    # Act
+    _, report = generate(app, validators=2, sign=True, requests=20, duration=30)
+
+    # Assert
+    assert report.errors == 0
+    assert len(seen) == 20
+
+
+@pytest.mark.parametrize(
+    "spec, allowed",
+    [("fixed:10", {10}), ("uniform:5:7", {5, 6, 7}), ("choice:1,100", {1, 100})],
+    ids=["fixed", "uniform", "choice"],
+)
+def test_payload_sizes(spec, allowed):
+    # Arrange
+    sizes = PayloadSizes(spec)
+    rng = random.Random(0)
+
+    # Act
+    sampled = {sizes.sample(rng) for _ in range(200)}
+
+    # Assert
+    assert sampled == allowed
+
+
+def test_request_spec_parse():
+    # Act
+    spec = RequestSpec.parse("echo/add=2.5")
+
+    # Assert
+    assert (spec.module, spec.method, spec.weight) == ("echo", "add", 2.5)
+    assert RequestSpec.parse("echo").route == "echo/process"
@@ -0,0 +1,118 @@
+import asyncio
+import httpx
+import pytest
+from fastapi import FastAPI, HTTPException, Request
+from base.capture import CapturedRequest
+from utilities.loadgen import LoadConfig, build_validators
+from utilities.replay import Replayer, schedule
+
+
+def make_record(t, data="x", status=200, in_flight=1, method="process"):
+    return CapturedRequest(
+        t=t,
+        duration=0.01,
+        method="POST",
+        path=f"/modules/echo/{method}",
+        headers={"content-type": "application/json", "x-key": "5Caller"},
+        body=f'{{"data":"{data}"}}',
+        status=status,
+        in_flight=in_flight,
+    )
+
+
+def make_app():
+    app = FastAPI()
+    seen = []
+    active = [0, 0]
+
+    @app.post("/modules/echo/{method}")
+    async def echo(method: str, request: Request):
+        active[0] += 1
+        active[1] = max(active)
+        seen.append((method, request.headers.get("x-key"), (await request.json())["data"]))
+        await asyncio.sleep(0.01)
+        active[0] -= 1
+        if method == "fail":
+            raise HTTPException(status_code=500)
+        return {"ok": True}
+
+    return app, seen, active
+
+
+def replay(app, records, **options):
+    replayer = Replayer(records, url="http://miner", transport=httpx.ASGITransport(app=app), **options)
+    return replayer, asyncio.run(replayer.run())
+
+
+@pytest.mark.parametrize(
+    "speed, expected",
+    [(1.0, [0.0, 0.5, 1.5]), (2.0, [0.0, 0.25, 0.75]), (None, [0.0, 0.0, 0.0])],
+    ids=["captured_pace", "double", "max"],
+)
+def test_schedule(speed, expected):
+    # Arrange
+    records = [make_record(100.0), make_record(100.5), make_record(160.0)]
+
+    # Act
+    offsets = schedule(records, speed, max_idle=1.0)
+
+    # Assert
+    assert offsets == pytest.approx(expected)
+
+
+def test_replay_at_speed_keeps_order_and_headers():
+    # Arrange
+    app, seen, _ = make_app()
+    records = [make_record(10 + index * 0.02, data=str(index)) for index in range(10)]
+
+    # Act
+    _, report = replay(app, records, speed=4.0)
+
+    # Assert
+    assert [data for _, _, data in seen] == [str(index) for index in range(10)]
+    assert {key for _, key, _ in seen} == {"5Caller"}
+    assert report.requests == 10 and report.errors == 0
+    assert report.routes["echo/process"].replayed_ms["p50"] >= 10
+
+
+def test_concurrency_limit_keeps_captured_pace():
+    # Arrange
+    app, seen, _ = make_app()
+    records = [make_record(10 + index * 0.1, data=str(index)) for index in range(5)]
+
+    # Act
+    _, report = replay(app, records, speed=1.0, concurrency=2)
+
+    # Assert
+    assert len(seen) == 5
+    assert report.duration >= 0.4
+    assert report.routes["echo/process"].replayed_ms["p50"] >= 10
+
+
+def test_max_speed_keeps_captured_concurrency():
+    # Arrange
+    app, seen, active = make_app()
+    records = [make_record(10.0, in_flight=3 if index == 5 else 1) for index in range(20)]
+
+    # Act
+    replayer, report = replay(app, records, speed=None)
+
+    # Assert
+    assert replayer.concurrency == 3
+    assert active[1] == 3
+    assert report.requests == len(seen) == 20
+
+
+def test_status_mismatches_and_signing():
+    # Arrange
+    app, seen, _ = make_app()
+    validator = build_validators(LoadConfig(validators=1, sign=True))[0]
+    records = [make_record(1.0), make_record(1.0, method="fail"), make_record(1.0, method="fail", status=500)]
+
+    # Act
+    _, report = replay(app, records, speed=None, validator=validator)
+
+    # Assert
+    assert report.errors == 2
+    assert report.routes["echo/fail"].status_mismatches == 1
+    assert {key for _, key, _ in seen} == {validator.identity}
@@ -0,0 +1,98 @@
+import os
+import pytest
+import numpy as np
+from scalecodec.utils.ss58 import ss58_encode
+from utilities.ss58 import (
+    Ss58AddressCache,
+    decode_ss58_addresses,
+    encode_ss58_address_cached,
+    encode_ss58_addresses,
+    validate_ss58_addresses,
+)
+
+
+@pytest.fixture
+def public_keys():
+    return [os.urandom(32) for _ in range(64)] + [b"\x00" * 32, b"\x00\x01" + b"\xff" * 30]
+
+
+@pytest.mark.parametrize(
+    "ss58_format", [42, 0, 63, 64, 16383], ids=["commune", "zero", "max_one_byte", "min_two_byte", "max"]
+)
+def test_encode_matches_per_call(public_keys, ss58_format):
+    # Act
+    result = encode_ss58_addresses(public_keys, ss58_format, cache=None)
+
+    # Assert
+    assert result == [ss58_encode(key, ss58_format) for key in public_keys]
+
+
+@pytest.mark.parametrize("ss58_format", [42, 0, 2000], ids=["commune", "zero", "two_byte"])
+def test_decode_round_trip(public_keys, ss58_format):
+    # Arrange
+    addresses = encode_ss58_addresses(public_keys, ss58_format, cache=None)
+
+    # Act
+    result = decode_ss58_addresses(addresses, ss58_format)
+
+    # Assert
+    assert [row.tobytes() for row in result] == public_keys
+
+
+def test_encode_accepts_numpy_and_hex(public_keys):
+    # Arrange
+    matrix = np.frombuffer(b"".join(public_keys), dtype=np.uint8).reshape(-1, 32)
+    hex_keys = ["0x" + key.hex() for key in public_keys]
+
+    # Act
+    from_matrix = encode_ss58_addresses(matrix, cache=None)
+    from_hex = encode_ss58_addresses(hex_keys, cache=None)
+
+    # Assert
+    assert from_matrix == from_hex == [ss58_encode(key, 42) for key in public_keys]
+
+
+def test_encode_rejects_wrong_length():
+    # Act / Assert
+    with pytest.raises(ValueError):
+        encode_ss58_addresses([b"\x01" * 31])
+
+
+def test_validate(public_keys):
+    # Arrange
+    address = encode_ss58_addresses(public_keys[:1], cache=None)[0]
+    tampered = address[:-1] + ("A" if address[-1] != "A" else "B")
+    candidates = [address, tampered, "", "0x" + public_keys[0].hex(), "l" * 48, "5" * 120]
+
+    # Act
+    result = validate_ss58_addresses(candidates)
+
+    # Assert
+    assert result.tolist() == [True, False, False, False, False, False]
+    assert not validate_ss58_addresses([address], valid_ss58_format=0).any()
+    with pytest.raises(ValueError, match="index 1"):
+        decode_ss58_addresses(candidates[:2])
+
+
+def test_cache_hits_and_eviction(public_keys):
+    # Arrange
+    cache = Ss58AddressCache(maxsize=4)
+
+    # Act
+    first = encode_ss58_addresses(public_keys[:4], cache=cache)
+    second = encode_ss58_addresses(public_keys[:4], cache=cache)
+    encode_ss58_addresses(public_keys[4:6], cache=cache)
+
+    # Assert
+    assert first == second
+    assert cache.info()["hits"] == 4
+    assert len(cache) == 4
+    assert cache.get(public_keys[0], 42) is None
+
+
+def test_encode_single_cached(public_keys):
+    # Act
+    result = encode_ss58_address_cached(public_keys[0].hex())
+
+    # Assert
+    assert result == ss58_encode(public_keys[0], 42)
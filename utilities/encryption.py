@@ -1,61 +1,117 @@
 import os
 import secrets
-import json
 import base64
+from functools import lru_cache
 from pathlib import Path
 from dotenv import load_dotenv
 from loguru import logger
 
-from mnemonic import Mnemonic
-from eth_hash.backends import pysha3
-from scalecodec.utils.ss58 import ss58_encode
-from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
-from cryptography.hazmat.primitives import hashes, padding, serialization
-from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
-from cryptography.hazmat.primitives.asymmetric import rsa
-from cryptography.hazmat.primitives import serialization
-from cryptography.hazmat.primitives.asymmetric import rsa
-from substrateinterface import Keypair as SubstrateKeypair
-from solders.keypair import Keypair as SolanaKeypair
-from bitcoinlib.wallets import Wallet
+from chains.backends import get_backend
 
 load_dotenv()
 
-KEY_FOLDER = os.getenv("KEY_FOLDER")
-PRIVATE_KEY = Path(f"{KEY_FOLDER}/private_key.pem")
-PUBLIC_KEY = Path(f"{KEY_FOLDER}/public_key.pem")
-PASSWORD = os.getenv("PRIVATE_KEY_PASSWORD").encode()
-KEY_DATA = f"{KEY_FOLDER}/key_data.json"
 
+class KeyDataError(Exception):
+    """Exception raised for errors retrieving key data."""
 
-NEMO = Mnemonic("english")
 
+def get_key_folder():
+    """
+    Returns the key folder from the `KEY_FOLDER` environment variable, read on every call.
+    """
+    return os.getenv("KEY_FOLDER")
 
-class KeyDataError(Exception):
-    """Exception raised for errors retrieving key data."""
+
+def get_private_key_path():
+    """
+    Returns the path of the password protected RSA private key inside the key folder.
+    """
+    return Path(f"{get_key_folder()}/private_key.pem")
+
+
+def get_public_key_path():
+    """
+    Returns the path of the RSA public key inside the key folder.
+    """
+    return Path(f"{get_key_folder()}/public_key.pem")
+
+
+def get_key_store_path():
+    """
+    Returns the path of the encrypted key store database inside the key folder.
+    """
+    return f"{get_key_folder()}/key_store.db"
+
+
+def get_password():
+    """
+    Returns the `PRIVATE_KEY_PASSWORD` environment variable as bytes.
+
+    Raises:
+        KeyDataError: If `PRIVATE_KEY_PASSWORD` is not set.
+    """
+    password = os.getenv("PRIVATE_KEY_PASSWORD")
+    if password is None:
+        raise KeyDataError("PRIVATE_KEY_PASSWORD is not set")
+    return password.encode()
+
+
+@lru_cache(maxsize=None)
+def get_mnemonic():
+    """
+    Returns the shared English `Mnemonic` word list, loading it on first use.
+    """
+    from mnemonic import Mnemonic
+
+    return Mnemonic("english")
+
+
+_LAZY_ATTRIBUTES = {
+    "KEY_FOLDER": get_key_folder,
+    "PRIVATE_KEY": get_private_key_path,
+    "PUBLIC_KEY": get_public_key_path,
+    "KEY_STORE": get_key_store_path,
+    "PASSWORD": get_password,
+    "NEMO": get_mnemonic,
+}
+
+
+def __getattr__(name):
+    """
+    Resolves the former module-level configuration constants when they are accessed.
+    """
+    if name in _LAZY_ATTRIBUTES:
+        return _LAZY_ATTRIBUTES[name]()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 def default_backend():
     """
     A function that returns the default backend function for keccak256 hashing.
     """
+    from eth_hash.backends import pysha3
+
     return pysha3.keccak256
 
 
-def derive_rsa_keypair_with_password(
-    private_path=PRIVATE_KEY, public_path=PUBLIC_KEY, password=PASSWORD
-):
+def derive_rsa_keypair_with_password(private_path=None, public_path=None, password=None):
     """
     Generates an RSA key pair with a specified private and public path and password for encryption.
 
     Args:
-        private_path (str): The path to save the private key. Defaults to the value of PRIVATE_KEY.
-        public_path (str): The path to save the public key. Defaults to the value of PUBLIC_KEY.
-        password (bytes): The password for encryption. Defaults to the value of PASSWORD.
+        private_path (str): The path to save the private key. Defaults to private_key.pem in KEY_FOLDER.
+        public_path (str): The path to save the public key. Defaults to public_key.pem in KEY_FOLDER.
+        password (bytes): The password for encryption. Defaults to PRIVATE_KEY_PASSWORD.
 
     Returns:
         tuple: A tuple containing the public key and private key generated.
     """
+    from cryptography.hazmat.primitives import serialization
+    from cryptography.hazmat.primitives.asymmetric import rsa
+
+    private_path = private_path or get_private_key_path()
+    public_path = public_path or get_public_key_path()
+    password = get_password() if password is None else password
     private_key = rsa.generate_private_key(
         public_exponent=65537, key_size=2048, backend=default_backend()
     )
@@ -81,12 +137,12 @@ def derive_rsa_keypair_with_password(
     return public_key, private_key
 
 
-def derive_rsa_key(password=PASSWORD, salt=os.urandom(16), length=32):
+def derive_rsa_key(password=None, salt=None, length=32):
     """
     Derives an RSA key from a given password using PBKDF2HMAC with SHA256 as the hash algorithm.
 
     Args:
-        password (bytes, optional): The password used to derive the RSA key. Defaults to the value of PASSWORD.
+        password (bytes, optional): The password used to derive the RSA key. Defaults to PRIVATE_KEY_PASSWORD.
         salt (bytes, optional): The salt used in the key derivation process. Defaults to a randomly generated 16-byte salt.
         length (int, optional): The desired length of the derived key. Defaults to 32.
 
@@ -102,13 +158,17 @@ def derive_rsa_key(password=PASSWORD, salt=os.urandom(16), length=32):
         - The key derivation process is performed 100,000 times.
         - The key is derived using the provided password, salt, and length.
     """
+    from cryptography.hazmat.primitives import hashes
+    from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
+
     kdf = PBKDF2HMAC(
         algorithm=hashes.SHA256(),
         length=length,
-        salt=salt,
+        salt=os.urandom(16) if salt is None else salt,
         iterations=100000,
-        backend=pysha3.keccak256,
+        backend=default_backend(),
     )
+    password = get_password() if password is None else password
     return kdf.derive(password)
 
 
@@ -122,7 +182,7 @@ def derive_substrate_key(seed):
     Returns:
         SubstrateKeypair: The SubstrateKeypair object created from the seed.
     """
-    return SubstrateKeypair.create_from_seed(seed)
+    return get_backend("substrate").derive(seed)
 
 
 def derive_solana_key(seed):
@@ -143,7 +203,7 @@ def derive_solana_key(seed):
         >>> derive_solana_key(seed)
         {'sol_private_key': b'my_private_key', 'sol_public_key': b'my_public_key'}
     """
-    sol = SolanaKeypair.from_seed(seed)
+    sol = get_backend("solana").derive(seed)
     return {"sol_private_key": sol.secret(), "sol_public_key": sol.pubkey()}
 
 
@@ -165,7 +225,7 @@ def derive_btc_key(seed):
         >>> derive_btc_key(seed)
         {'btc_private_key': b'my_private_key'}
     """
-    btcwallet = Wallet.create(name="test3", keys=seed, network="bitcoin")
+    btcwallet = get_backend("bitcoin").create_wallet(name="test3", seed=seed)
     return {"btc_private_key": btcwallet.get_key()}
 
 
@@ -183,6 +243,9 @@ def ecrypt_with_password(data, password):
     Raises:
         None
     """
+    from cryptography.hazmat.primitives import padding
+    from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
+
     salt = os.urandom(16)
     # Derive a key from the password
     key = derive_rsa_key(password, salt)
@@ -238,6 +301,9 @@ def decrypt_with_password(encrypted_data, password):
         >>> decrypt_with_password(encrypted_data, password)
         b'decrypted_data'
     """
+    from cryptography.hazmat.primitives import padding
+    from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
+
     encrypted_data = str(encrypted_data).encode()
     salt = encrypted_data[:16]
     iv = encrypted_data[16:32]
@@ -260,9 +326,9 @@ def decrypt_with_password(encrypted_data, password):
 
 def encrypt_with_rsa_file(
     data,
-    password=PASSWORD,
-    private_path=PRIVATE_KEY,
-    public_path=PUBLIC_KEY,
+    password=None,
+    private_path=None,
+    public_path=None,
     public_encryption=True,
     private_encryption=True,
 ):
@@ -271,9 +337,9 @@ def encrypt_with_rsa_file(
 
     Args:
         data (bytes): The data to be encrypted.
-        password (str, optional): The password used to derive the encryption keys. Defaults to PASSWORD.
-        private_path (Path, optional): The path to the private key file. Defaults to PRIVATE_KEY.
-        public_path (Path, optional): The path to the public key file. Defaults to PUBLIC_KEY.
+        password (str, optional): The password used to derive the encryption keys. Defaults to PRIVATE_KEY_PASSWORD.
+        private_path (Path, optional): The path to the private key file. Defaults to private_key.pem in KEY_FOLDER.
+        public_path (Path, optional): The path to the public key file. Defaults to public_key.pem in KEY_FOLDER.
         public_encryption (bool, optional): Whether to encrypt the data with the public key. Defaults to True.
         private_encryption (bool, optional): Whether to encrypt the data with the private key. Defaults to True.
 
@@ -313,8 +379,14 @@ def encrypt_with_rsa_file(
         >>> print(private_path, public_path)
         /path/to/private_key.pem /path/to/public_key.pem
     """
+    from cryptography.hazmat.primitives import hashes, serialization
+    from cryptography.hazmat.primitives.asymmetric import padding
+
+    password = get_password() if password is None else password
+    private_path = private_path or get_private_key_path()
+    public_path = public_path or get_public_key_path()
     if not public_path.exists() and not private_path.exists():
-        derive_rsa_keypair_with_password()
+        derive_rsa_keypair_with_password(private_path, public_path, password)
     decrypted_private_pem = decrypt_with_password(private_path.read_bytes(), password)
     public_key = serialization.load_pem_public_key(public_path.read_bytes())
     private_key = serialization.load_pem_private_key(decrypted_private_pem, password)
@@ -364,9 +436,9 @@ def encrypt_with_rsa_file(
 
 def decrypt_with_rsa_file(
     data,
-    password=PASSWORD,
-    private_path=PRIVATE_KEY,
-    public_path=PUBLIC_KEY,
+    password=None,
+    private_path=None,
+    public_path=None,
     public_encryption=True,
     private_encryption=True,
 ):
@@ -375,9 +447,9 @@ def decrypt_with_rsa_file(
 
     Args:
         data (bytes): The data to be decrypted.
-        password (str, optional): The password used to derive the encryption keys. Defaults to PASSWORD.
-        private_path (Path, optional): The path to the private key file. Defaults to PRIVATE_KEY.
-        public_path (Path, optional): The path to the public key file. Defaults to PUBLIC_KEY.
+        password (str, optional): The password used to derive the encryption keys. Defaults to PRIVATE_KEY_PASSWORD.
+        private_path (Path, optional): The path to the private key file. Defaults to private_key.pem in KEY_FOLDER.
+        public_path (Path, optional): The path to the public key file. Defaults to public_key.pem in KEY_FOLDER.
         public_encryption (bool, optional): Whether to decrypt the data with the public key. Defaults to True.
         private_encryption (bool, optional): Whether to decrypt the data with the private key. Defaults to True.
 
@@ -412,8 +484,14 @@ def decrypt_with_rsa_file(
         >>> password = 'my_password'
         >>> decrypted_data = decrypt_with_rsa_file(data, password)
     """
+    from cryptography.hazmat.primitives import hashes, serialization
+    from cryptography.hazmat.primitives.asymmetric import padding
+
+    password = get_password() if password is None else password
+    private_path = private_path or get_private_key_path()
+    public_path = public_path or get_public_key_path()
     if not private_path.exists():
-        derive_rsa_keypair_with_password(password)
+        derive_rsa_keypair_with_password(private_path, public_path, password)
 
     private_key_pem = decrypt_with_password(private_path.read_bytes(), password)
 
@@ -434,7 +512,7 @@ def decrypt_with_rsa_file(
     if private_encryption:
         private_key = serialization.load_pem_private_key(
             data=private_key_pem,
-            password=PASSWORD.encode("utf-8"),
+            password=password,
         )
         if public_encryption:
             decrypted_data["private"] = private_key.decrypt(
@@ -469,19 +547,23 @@ def generate_mnemonic(strength=256):
         str: The generated mnemonic phrase.
     """
     entropy = secrets.randbits(strength)
-    return NEMO.to_mnemonic(entropy.to_bytes(strength // 8, "big"))
+    return get_mnemonic().to_mnemonic(entropy.to_bytes(strength // 8, "big"))
 
 
-def generate_rsa_keypair_with_password(password=PASSWORD):
+def generate_rsa_keypair_with_password(password=None):
     """
     Generates an RSA key pair with a specified password for encryption.
 
     Args:
-        password (bytes): The password for encryption. Defaults to the value of PASSWORD.
+        password (bytes): The password for encryption. Defaults to PRIVATE_KEY_PASSWORD.
 
     Returns:
         tuple: A tuple containing the PEM-encoded private key and public key generated.
     """
+    from cryptography.hazmat.primitives import serialization
+    from cryptography.hazmat.primitives.asymmetric import rsa
+
+    password = get_password() if password is None else password
     private_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
     public_key = private_key.public_key()
 
@@ -494,8 +576,8 @@ def generate_rsa_keypair_with_password(password=PASSWORD):
         encoding=serialization.Encoding.PEM,
         format=serialization.PublicFormat.SubjectPublicKeyInfo,
     )
-    save_file(pem_private, PRIVATE_KEY)
-    save_file(pem_public, PUBLIC_KEY)
+    save_file(pem_private, get_private_key_path())
+    save_file(pem_public, get_public_key_path())
 
     return pem_private, pem_public
 
@@ -515,6 +597,9 @@ def extract_public_key_from_pem(pem_data):
         ValueError: If the provided PEM data is not a valid public key.
 
     """
+    from cryptography.hazmat.primitives import serialization
+    from cryptography.hazmat.primitives.asymmetric import rsa
+
     public_key = serialization.load_pem_public_key(pem_data)
     if not isinstance(public_key, rsa.RSAPublicKey):
         # For other key types, try the raw format
@@ -526,18 +611,22 @@ def extract_public_key_from_pem(pem_data):
     return numbers.n.to_bytes(256, byteorder="big")[-32:]  # Take the last 32 bytes
 
 
-def extract_private_key_from_pem(pem_data, password=PASSWORD):
+def extract_private_key_from_pem(pem_data, password=None):
     """
     Extracts the private key from a PEM-encoded data.
 
     Args:
         pem_data (bytes): The PEM-encoded data containing the private key.
-        password (bytes): The password for decryption. Defaults to the value of PASSWORD.
+        password (bytes): The password for decryption. Defaults to PRIVATE_KEY_PASSWORD.
 
     Returns:
         bytes: The extracted private key. If the key is not an RSA private key, it is returned in the raw format.
         If the key is an RSA private key, the modulus is extracted and returned as a 32-byte long byte string.
     """
+    from cryptography.hazmat.primitives import serialization
+    from cryptography.hazmat.primitives.asymmetric import rsa
+
+    password = get_password() if password is None else password
     private_key = serialization.load_pem_private_key(pem_data, password=password)
     if not isinstance(private_key, rsa.RSAPrivateKey):
         # For other key types, try the raw format
@@ -578,7 +667,8 @@ def save_file(pem, pem_path):
 
 def encode_ss58_address(public_key, prefix=42):
     """
-    Encodes a public key into an ss58 address.
+    Encodes a public key into an ss58 address. Recent conversions are served from the
+    shared cache in `utilities.ss58`; use `encode_ss58_addresses` for bulk encoding.
 
     Args:
         public_key (bytes or str): The public key to encode. If a string is provided, it is assumed to be a hexadecimal representation of the key.
@@ -590,13 +680,15 @@ def encode_ss58_address(public_key, prefix=42):
     Raises:
         ValueError: If the public key is not 32 bytes.
     """
+    from utilities.ss58 import encode_ss58_address_cached
+
     if isinstance(public_key, str):
         public_key = bytes.fromhex(public_key)
 
     if len(public_key) != 32:
         raise ValueError("Public key must be 32 bytes")
 
-    return ss58_encode(public_key, prefix)
+    return encode_ss58_address_cached(public_key, prefix)
 
 
 def construct_key_data(
@@ -607,14 +699,20 @@ def construct_key_data(
     private_key,
     public_key,
     ss58_prefix=42,
-    key_data_path=KEY_DATA,
+    key_data_path=None,
+    key_name=None,
+    key_store=None,
 ):
     """
     Constructs key data with RSA private and public keys, ss58key, mnemonic, private and public keys.
-    Optionally accepts ss58 prefix and key data path.
+    Optionally accepts ss58 prefix, key store path, key name and an open KeyStore.
+    The key data is saved as an encrypted entry of the key store, indexed by key name and ss58key.
+    The key name defaults to the ss58key, so each key gets its own entry.
     Returns the constructed key data.
     """
+    from utilities.key_store import KeyStore
 
+    key_data_path = key_data_path or get_key_store_path()
     key_data = {
         "rsa_private_key": base64.b64encode(rsa_private_key).decode("utf-8"),
         "rsa_public_key": base64.b64encode(rsa_public_key).decode("utf-8"),
@@ -625,9 +723,8 @@ def construct_key_data(
         "ss58_prefix": ss58_prefix,
         "path": key_data_path,
     }
-    key_path = Path(key_data_path)
-    key = {"data": json.dumps(key_data)}
-    key_path.write_text(json.dumps(key), encoding="utf-8")
+    store = key_store if key_store is not None else KeyStore(key_data_path, get_password())
+    store.put(key_name or ss58key, key_data, ss58_address=ss58key, public_key=public_key)
     return key_data
 
 
@@ -646,4 +743,4 @@ def encode_password(password):
 
 
 if __name__ == "__main__":
-    derive_rsa_keypair_with_password(PRIVATE_KEY, PUBLIC_KEY, PASSWORD)
+    derive_rsa_keypair_with_password()
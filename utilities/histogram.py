@@ -0,0 +1,213 @@
+import math
+import threading
+from pathlib import Path
+from typing import Dict, IO, Iterable, Iterator, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+# Latencies are recorded as integer microseconds; one hour is the default ceiling.
+DEFAULT_HIGHEST_VALUE = 3_600_000_000
+DEFAULT_SIGNIFICANT_FIGURES = 3
+
+
+class Histogram:
+    """
+    A high dynamic range histogram of non-negative integer values, such as latencies
+    in microseconds, with a fixed relative precision.
+
+    Values below `2 ** sub_bucket_bits` are counted exactly. Above that, each power of
+    two is split into `2 ** (sub_bucket_bits - 1)` equal buckets, so every value is
+    within `10 ** -significant_figures` of its bucket, however large it is. Counts are
+    a NumPy array, so recording a batch and merging histograms are vectorized, and
+    percentiles are one cumulative sum.
+
+    The layout follows HdrHistogram, and `export_hgrm` writes its percentile
+    distribution format, which HdrHistogram's plotting tools read.
+    """
+
+    def __init__(self, highest_value: int = DEFAULT_HIGHEST_VALUE, significant_figures: int = DEFAULT_SIGNIFICANT_FIGURES):
+        """
+        Args:
+            highest_value (int): The largest value to track; larger values are clamped to it.
+            significant_figures (int): Decimal digits of precision, 1 to 5. Defaults to 3.
+        """
+        if not 1 <= significant_figures <= 5:
+            raise ValueError("significant_figures must be between 1 and 5")
+        self.highest_value = int(highest_value)
+        self.significant_figures = significant_figures
+        self.sub_bucket_bits = math.ceil(math.log2(2 * 10**significant_figures))
+        self.sub_bucket_count = 1 << self.sub_bucket_bits
+        self.sub_bucket_half = self.sub_bucket_count // 2
+        self.counts = np.zeros(self._index(self.highest_value) + 1, dtype=np.int64)
+        self.total_count = 0
+        self.min_value: Optional[int] = None
+        self.max_value: Optional[int] = None
+        self._sum = 0
+        self._sum_of_squares = 0.0
+        self._lock = threading.Lock()
+
+    def _index(self, value: int) -> int:
+        if value < self.sub_bucket_count:
+            return value
+        shift = value.bit_length() - self.sub_bucket_bits
+        return self.sub_bucket_count + (shift - 1) * self.sub_bucket_half + (value >> shift) - self.sub_bucket_half
+
+    def _indexes(self, values: np.ndarray) -> np.ndarray:
+        # frexp's exponent is the bit length for integers below 2 ** 53.
+        bit_lengths = np.frexp(values.astype(np.float64))[1].astype(np.int64)
+        shifts = np.maximum(bit_lengths - self.sub_bucket_bits, 0)
+        large = self.sub_bucket_count + (shifts - 1) * self.sub_bucket_half + (values >> shifts) - self.sub_bucket_half
+        return np.where(values < self.sub_bucket_count, values, large)
+
+    def bucket_bounds(self, index: int) -> Tuple[int, int]:
+        """
+        Returns the lowest value counted at `index` and the width of its bucket.
+        """
+        if index < self.sub_bucket_count:
+            return index, 1
+        offset = index - self.sub_bucket_count
+        shift = offset // self.sub_bucket_half + 1
+        return (offset % self.sub_bucket_half + self.sub_bucket_half) << shift, 1 << shift
+
+    def record(self, value: Union[int, float], count: int = 1) -> None:
+        """
+        Records `value` `count` times. Negative values count as 0.
+        """
+        value = min(max(int(value), 0), self.highest_value)
+        with self._lock:
+            self.counts[self._index(value)] += count
+            self._update(value, value, count, value * count, float(value) * value * count)
+
+    def record_many(self, values: Iterable[Union[int, float]]) -> None:
+        """
+        Records a batch of values.
+        """
+        array = np.clip(np.asarray(list(values) if not isinstance(values, np.ndarray) else values), 0, self.highest_value)
+        if array.size == 0:
+            return
+        array = array.astype(np.int64)
+        indexes = self._indexes(array)
+        with self._lock:
+            np.add.at(self.counts, indexes, 1)
+            as_float = array.astype(np.float64)
+            self._update(int(array.min()), int(array.max()), int(array.size), int(array.sum()), float(np.dot(as_float, as_float)))
+
+    def _update(self, low: int, high: int, count: int, total: int, squares: float) -> None:
+        self.total_count += count
+        self.min_value = low if self.min_value is None else min(self.min_value, low)
+        self.max_value = high if self.max_value is None else max(self.max_value, high)
+        self._sum += total
+        self._sum_of_squares += squares
+
+    def merge(self, other: "Histogram") -> None:
+        """
+        Adds the counts of a histogram with the same layout.
+        """
+        if (other.sub_bucket_bits, len(other.counts)) != (self.sub_bucket_bits, len(self.counts)):
+            raise ValueError("Histograms have different layouts")
+        if other.total_count == 0:
+            return
+        with self._lock:
+            self.counts += other.counts
+            self._update(other.min_value, other.max_value, other.total_count, other._sum, other._sum_of_squares)
+
+    def reset(self) -> None:
+        with self._lock:
+            self.counts[:] = 0
+            self.total_count, self.min_value, self.max_value = 0, None, None
+            self._sum, self._sum_of_squares = 0, 0.0
+
+    @property
+    def mean(self) -> float:
+        return self._sum / self.total_count if self.total_count else 0.0
+
+    @property
+    def stdev(self) -> float:
+        if not self.total_count:
+            return 0.0
+        return math.sqrt(max(self._sum_of_squares / self.total_count - self.mean**2, 0.0))
+
+    def percentiles(self, percentiles: Sequence[float]) -> Dict[float, int]:
+        """
+        Returns the value at or below which each percentile (0 to 100) of recorded
+        values fall, as the highest value of its bucket, capped at the recorded maximum.
+        """
+        if not self.total_count:
+            return {percentile: 0 for percentile in percentiles}
+        cumulative = np.cumsum(self.counts)
+        results = {}
+        for percentile in percentiles:
+            rank = max(1, math.ceil(min(max(percentile, 0.0), 100.0) / 100 * self.total_count))
+            index = int(np.searchsorted(cumulative, rank))
+            low, width = self.bucket_bounds(index)
+            results[percentile] = min(low + width - 1, self.max_value)
+        return results
+
+    def count_at_or_below(self, value: Union[int, float]) -> int:
+        """
+        Returns how many recorded values are at or below `value`, to bucket precision.
+        """
+        if value < 0:
+            return 0
+        return int(self.counts[: self._index(min(int(value), self.highest_value)) + 1].sum())
+
+    def percentile(self, percentile: float) -> int:
+        return self.percentiles([percentile])[percentile]
+
+    def summary(self, percentiles: Sequence[float] = (50, 95, 99, 99.9)) -> Dict[str, float]:
+        """
+        Returns count, min, mean, max and the given percentiles, keyed like `p99.9`.
+        """
+        result: Dict[str, float] = {
+            "count": self.total_count,
+            "min": self.min_value or 0,
+            "mean": self.mean,
+            "max": self.max_value or 0,
+        }
+        for percentile, value in self.percentiles(percentiles).items():
+            result[f"p{percentile:g}"] = value
+        return result
+
+    def _reporting_levels(self, ticks_per_half_distance: int) -> Iterator[float]:
+        level = 0.0
+        while level < 100.0:
+            yield level
+            half_distance = 2 ** (math.floor(math.log2(100.0 / (100.0 - level))) + 1)
+            level += 100.0 / (ticks_per_half_distance * half_distance)
+            if 100.0 - level < 1e-9:
+                break
+        yield 100.0
+
+    def export_hgrm(self, output: Union[str, Path, IO[str]], unit_ratio: float = 1000.0, ticks_per_half_distance: int = 5) -> None:
+        """
+        Writes the percentile distribution in HdrHistogram's `.hgrm` text format.
+
+        Args:
+            output (Union[str, Path, IO[str]]): A path or an open text file.
+            unit_ratio (float): Divides values for display; 1000 shows microseconds as milliseconds.
+            ticks_per_half_distance (int): Reporting points per halving of the remaining percentiles.
+        """
+        lines: List[str] = [f"{'Value':>12} {'Percentile':>14} {'TotalCount':>10} {'1/(1-Percentile)':>14}", ""]
+        if self.total_count:
+            cumulative = np.cumsum(self.counts)
+            levels = list(self._reporting_levels(ticks_per_half_distance))
+            values = self.percentiles(levels)
+            for level in levels:
+                value = values[level]
+                count = int(cumulative[self._index(value)])
+                fraction = level / 100
+                inverse = f"{1 / (1 - fraction):14.2f}" if fraction < 1 else ""
+                lines.append(f"{value / unit_ratio:12.3f} {fraction:14.12f} {count:10d} {inverse}".rstrip())
+                if count == self.total_count and fraction < 1:
+                    # Every value is reported; close with the 100th percentile like HdrHistogram.
+                    lines.append(f"{value / unit_ratio:12.3f} {1:14.12f} {count:10d}")
+                    break
+        lines.append(f"#[Mean    = {self.mean / unit_ratio:12.3f}, StdDeviation   = {self.stdev / unit_ratio:12.3f}]")
+        lines.append(f"#[Max     = {(self.max_value or 0) / unit_ratio:12.3f}, Total count    = {self.total_count:12d}]")
+        buckets = (len(self.counts) - self.sub_bucket_count) // self.sub_bucket_half + 1
+        lines.append(f"#[Buckets = {buckets:12d}, SubBuckets     = {self.sub_bucket_count:12d}]")
+        text = "\n".join(lines) + "\n"
+        if isinstance(output, (str, Path)):
+            Path(output).write_text(text, encoding="utf-8")
+        else:
+            output.write(text)
@@ -0,0 +1,27 @@
+import json
+from pathlib import Path
+from typing import Any, Dict
+
+
+class KeyringError(Exception):
+    """Exception raised when a key cannot be loaded from the keyring."""
+
+
+def read_key_file(path: Path) -> Dict[str, Any]:
+    """
+    Reads an unencrypted Commune key file and returns its decoded key data.
+
+    Raises:
+        KeyringError: If the file is encrypted or malformed.
+    """
+    try:
+        body = json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError) as e:
+        raise KeyringError(f"Cannot read key file {path}: {e}") from e
+    if body.get("encrypted"):
+        raise KeyringError(f"Key file {path} is encrypted")
+    data = body.get("data")
+    key_data = json.loads(data) if isinstance(data, str) else data
+    if not isinstance(key_data, dict):
+        raise KeyringError(f"Key file {path} has no key data")
+    return key_data
@@ -0,0 +1,350 @@
+import os
+import json
+import time
+import sqlite3
+import threading
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Union
+from pydantic import BaseModel
+from loguru import logger
+
+from cryptography.exceptions import InvalidTag
+from cryptography.hazmat.primitives import hashes
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
+
+from utilities.key_file import KeyringError, read_key_file
+
+DEFAULT_KEY_STORE_PATH = Path(
+    os.getenv("KEY_STORE_PATH", "~/.commune/key_store.db")
+).expanduser()
+COMMUNE_KEY_FOLDER = Path("~/.commune/key").expanduser()
+KDF_ITERATIONS = 100000
+NONCE_LENGTH = 12
+VERIFIER = b"module-miner-key-store"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    name TEXT PRIMARY KEY,
+    value BLOB NOT NULL
+);
+CREATE TABLE IF NOT EXISTS keys (
+    name TEXT PRIMARY KEY,
+    ss58_address TEXT,
+    public_key TEXT,
+    crypto_type INTEGER,
+    wrapped_key BLOB NOT NULL,
+    ciphertext BLOB NOT NULL,
+    created_at INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS keys_ss58_address ON keys (ss58_address);
+"""
+
+
+class KeyStoreError(Exception):
+    """Exception raised for errors reading or writing the key store."""
+
+
+class KeyRecord(BaseModel):
+    """Plaintext index entry of a stored key. Reading it never decrypts anything."""
+
+    name: str
+    ss58_address: Optional[str] = None
+    public_key: Optional[str] = None
+    crypto_type: Optional[int] = None
+    created_at: int
+
+
+class KeyStore:
+    """
+    An encrypted key store kept in a single SQLite database.
+
+    Every entry is sealed with its own random AES-256-GCM data key, and that data key is
+    wrapped with a key-encryption key derived once from the store password (envelope
+    encryption). Name and ss58 address are indexed in plaintext, so lookups and listings
+    need neither the password nor any decryption; `get` decrypts only the requested entry.
+    """
+
+    def __init__(
+        self,
+        path: Union[str, Path] = DEFAULT_KEY_STORE_PATH,
+        password: Optional[Union[str, bytes]] = None,
+        iterations: int = KDF_ITERATIONS,
+    ):
+        """
+        Opens, or creates, the key store at `path`.
+
+        Args:
+            path (Union[str, Path]): The SQLite database file. Defaults to DEFAULT_KEY_STORE_PATH.
+            password (Optional[Union[str, bytes]]): The store password. Only required to add
+                or decrypt entries. Defaults to None.
+            iterations (int): PBKDF2 iterations used when the store is created. Defaults to 100000.
+        """
+        self.path = Path(path).expanduser()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._password = password.encode("utf-8") if isinstance(password, str) else password
+        self._kek: Optional[AESGCM] = None
+        self._lock = threading.RLock()
+        self._connection = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.executescript(SCHEMA)
+        self._iterations = int(self._meta("iterations") or iterations)
+
+    def _meta(self, name: str) -> Optional[bytes]:
+        row = self._connection.execute(
+            "SELECT value FROM meta WHERE name = ?", (name,)
+        ).fetchone()
+        return row[0] if row else None
+
+    def _key_encryption_key(self) -> AESGCM:
+        """
+        Derives the key-encryption key on first use and verifies it against the store.
+
+        Raises:
+            KeyStoreError: If no password was given or the password is wrong.
+        """
+        if self._kek is not None:
+            return self._kek
+        if not self._password:
+            raise KeyStoreError("A password is required to encrypt or decrypt keys")
+
+        with self._lock:
+            salt = self._meta("salt")
+            created = salt is None
+            if created:
+                salt = os.urandom(16)
+            kdf = PBKDF2HMAC(
+                algorithm=hashes.SHA256(),
+                length=32,
+                salt=salt,
+                iterations=self._iterations,
+            )
+            kek = AESGCM(kdf.derive(self._password))
+            if created:
+                nonce = os.urandom(NONCE_LENGTH)
+                with self._connection:
+                    self._connection.executemany(
+                        "INSERT INTO meta (name, value) VALUES (?, ?)",
+                        [
+                            ("salt", salt),
+                            ("iterations", str(self._iterations).encode()),
+                            ("verifier", nonce + kek.encrypt(nonce, VERIFIER, None)),
+                        ],
+                    )
+            else:
+                verifier = self._meta("verifier")
+                try:
+                    kek.decrypt(verifier[:NONCE_LENGTH], verifier[NONCE_LENGTH:], None)
+                except InvalidTag as e:
+                    raise KeyStoreError("Invalid key store password") from e
+            self._kek = kek
+        return kek
+
+    def _seal(self, name: str, key_data: Dict[str, Any]) -> Tuple[bytes, bytes]:
+        kek = self._key_encryption_key()
+        data_key = AESGCM.generate_key(bit_length=256)
+        aad = name.encode("utf-8")
+        data_nonce, wrap_nonce = os.urandom(NONCE_LENGTH), os.urandom(NONCE_LENGTH)
+        ciphertext = data_nonce + AESGCM(data_key).encrypt(
+            data_nonce, json.dumps(key_data).encode("utf-8"), aad
+        )
+        wrapped_key = wrap_nonce + kek.encrypt(wrap_nonce, data_key, aad)
+        return wrapped_key, ciphertext
+
+    def _open(self, name: str, wrapped_key: bytes, ciphertext: bytes) -> Dict[str, Any]:
+        kek = self._key_encryption_key()
+        aad = name.encode("utf-8")
+        try:
+            data_key = kek.decrypt(wrapped_key[:NONCE_LENGTH], wrapped_key[NONCE_LENGTH:], aad)
+            plaintext = AESGCM(data_key).decrypt(
+                ciphertext[:NONCE_LENGTH], ciphertext[NONCE_LENGTH:], aad
+            )
+        except InvalidTag as e:
+            raise KeyStoreError(f"Key entry '{name}' failed authentication") from e
+        return json.loads(plaintext)
+
+    def _row(self, name: str, key_data: Dict[str, Any], **index: Any) -> Tuple[Any, ...]:
+        wrapped_key, ciphertext = self._seal(name, key_data)
+        crypto_type = index.get("crypto_type")
+        return (
+            name,
+            index.get("ss58_address") or key_data.get("ss58_address") or key_data.get("ss58key"),
+            index.get("public_key") or key_data.get("public_key"),
+            crypto_type if crypto_type is not None else key_data.get("crypto_type"),
+            wrapped_key,
+            ciphertext,
+            int(time.time()),
+        )
+
+    def put(
+        self,
+        name: str,
+        key_data: Dict[str, Any],
+        ss58_address: Optional[str] = None,
+        public_key: Optional[str] = None,
+        crypto_type: Optional[int] = None,
+    ) -> KeyRecord:
+        """
+        Encrypts and stores a key entry, replacing any entry with the same name.
+
+        Args:
+            name (str): The key name.
+            key_data (Dict[str, Any]): The JSON-serializable secret key data.
+            ss58_address (Optional[str]): Indexed address. Taken from `key_data` if omitted.
+            public_key (Optional[str]): Indexed public key. Taken from `key_data` if omitted.
+            crypto_type (Optional[int]): Indexed crypto type. Taken from `key_data` if omitted.
+
+        Returns:
+            KeyRecord: The plaintext index entry of the stored key.
+        """
+        self.put_many(
+            [(name, key_data)],
+            ss58_address=ss58_address,
+            public_key=public_key,
+            crypto_type=crypto_type,
+        )
+        return self.lookup(name)
+
+    def put_many(self, entries: Iterable[Tuple[str, Dict[str, Any]]], **index: Any) -> int:
+        """
+        Encrypts and stores many key entries in a single transaction.
+
+        Args:
+            entries (Iterable[Tuple[str, Dict[str, Any]]]): (name, key_data) pairs.
+            **index: Index values applied to every entry, see `put`.
+
+        Returns:
+            int: The number of entries written.
+        """
+        rows = [self._row(name, key_data, **index) for name, key_data in entries]
+        with self._lock, self._connection:
+            self._connection.executemany(
+                "INSERT OR REPLACE INTO keys (name, ss58_address, public_key, crypto_type, "
+                "wrapped_key, ciphertext, created_at) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+        return len(rows)
+
+    def lookup(self, name_or_address: str) -> Optional[KeyRecord]:
+        """
+        Resolves a key by name or ss58 address through the index, without decrypting it.
+
+        Args:
+            name_or_address (str): A key name or ss58 address.
+
+        Returns:
+            Optional[KeyRecord]: The index entry, or None if no key matches.
+        """
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT name, ss58_address, public_key, crypto_type, created_at FROM keys "
+                "WHERE name = ? UNION ALL "
+                "SELECT name, ss58_address, public_key, crypto_type, created_at FROM keys "
+                "WHERE ss58_address = ? LIMIT 1",
+                (name_or_address, name_or_address),
+            ).fetchone()
+        if row is None:
+            return None
+        return KeyRecord(
+            name=row[0],
+            ss58_address=row[1],
+            public_key=row[2],
+            crypto_type=row[3],
+            created_at=row[4],
+        )
+
+    def get(self, name_or_address: str) -> Dict[str, Any]:
+        """
+        Decrypts and returns a single key entry.
+
+        Args:
+            name_or_address (str): A key name or ss58 address.
+
+        Returns:
+            Dict[str, Any]: The decrypted key data.
+
+        Raises:
+            KeyError: If no key matches.
+            KeyStoreError: If the password is missing or wrong, or the entry was tampered with.
+        """
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT name, wrapped_key, ciphertext FROM keys WHERE name = ? UNION ALL "
+                "SELECT name, wrapped_key, ciphertext FROM keys WHERE ss58_address = ? LIMIT 1",
+                (name_or_address, name_or_address),
+            ).fetchone()
+        if row is None:
+            raise KeyError(name_or_address)
+        return self._open(*row)
+
+    def delete(self, name: str) -> bool:
+        """
+        Removes a key entry. Returns True if an entry was removed.
+        """
+        with self._lock, self._connection:
+            cursor = self._connection.execute("DELETE FROM keys WHERE name = ?", (name,))
+        return cursor.rowcount > 0
+
+    def records(self) -> List[KeyRecord]:
+        """
+        Lists the index entries of every stored key, ordered by name.
+        """
+        with self._lock:
+            rows = self._connection.execute(
+                "SELECT name, ss58_address, public_key, crypto_type, created_at FROM keys ORDER BY name"
+            ).fetchall()
+        return [
+            KeyRecord(name=name, ss58_address=address, public_key=public, crypto_type=crypto, created_at=created)
+            for name, address, public, crypto, created in rows
+        ]
+
+    def import_commune_keys(
+        self, folder: Union[str, Path] = COMMUNE_KEY_FOLDER, overwrite: bool = False
+    ) -> int:
+        """
+        Bulk imports unencrypted keys from the classic `~/.commune/key/*.json` layout.
+
+        Files are read in parallel and written in one transaction. Keys already in the
+        store are skipped unless `overwrite` is set; encrypted or malformed files are
+        skipped with a warning.
+
+        Args:
+            folder (Union[str, Path]): The commune key folder. Defaults to COMMUNE_KEY_FOLDER.
+            overwrite (bool): Replace entries that already exist. Defaults to False.
+
+        Returns:
+            int: The number of keys imported.
+        """
+        paths = sorted(Path(folder).expanduser().glob("*.json"))
+        if not overwrite:
+            existing = {record.name for record in self.records()}
+            paths = [path for path in paths if path.stem not in existing]
+
+        with ThreadPoolExecutor() as executor:
+            loaded = list(executor.map(_read_commune_key, paths))
+
+        entries = [(path.stem, key_data) for path, key_data in zip(paths, loaded) if key_data]
+        return self.put_many(entries)
+
+    def close(self):
+        self._connection.close()
+
+    def __contains__(self, name_or_address: str) -> bool:
+        return self.lookup(name_or_address) is not None
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._connection.execute("SELECT COUNT(*) FROM keys").fetchone()[0]
+
+
+def _read_commune_key(path: Path) -> Optional[Dict[str, Any]]:
+    """
+    Reads a classic commune key file with `read_key_file`, or returns None with a
+    warning if it is encrypted or unreadable.
+    """
+    try:
+        return read_key_file(path)
+    except (KeyringError, ValueError) as e:
+        logger.warning(f"Skipping key file {path}: {e}")
+        return None
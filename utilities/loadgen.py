@@ -0,0 +1,394 @@
+"""
+Simulates validator traffic against a running miner and reports per-module throughput
+and latency percentiles, with HdrHistogram `.hgrm` exports.
+
+Usage:
+    python -m utilities.loadgen --url http://127.0.0.1:5757 --validators 16 \\
+        --mix echo/process=3 --mix echo/add=1 --payload lognormal:6:1 \\
+        --mode open --rate 200 --duration 30 --hgrm-dir reports/
+
+Open-loop mode sends requests at `rate` per second, with Poisson or constant arrivals,
+regardless of how fast the miner answers, and measures latency from each request's
+scheduled send time, so a stalled miner shows up as latency rather than as fewer
+requests. Closed-loop mode runs `concurrency` requests at a time per validator, each
+validator sending its next request when the previous one completes (after `think_time`).
+"""
+import sys
+import json
+import time
+import random
+import asyncio
+import argparse
+from hashlib import sha256
+from pathlib import Path
+from typing import Any, Dict, List, Literal, Optional, Tuple
+
+import httpx
+from pydantic import BaseModel
+
+from base.signing import sign_request_headers
+from chains.backends import get_backend
+from utilities.histogram import Histogram
+
+DEFAULT_URL = "http://127.0.0.1:5757"
+PERCENTILES = (50, 95, 99, 99.9)
+
+
+class RequestSpec(BaseModel):
+    module: str
+    method: str = "process"
+    weight: float = 1.0
+    # Extra JSON fields sent with every request of this kind.
+    body: Dict[str, Any] = {}
+    # The field holding the generated payload, or None to send no payload.
+    payload_field: Optional[str] = "data"
+
+    @property
+    def route(self) -> str:
+        return f"{self.module}/{self.method}"
+
+    @classmethod
+    def parse(cls, text: str) -> "RequestSpec":
+        """
+        Parses `module[/method][=weight]`, e.g. `echo/process=3`.
+        """
+        route, _, weight = text.partition("=")
+        module, _, method = route.partition("/")
+        return cls(module=module, method=method or "process", weight=float(weight or 1.0))
+
+
+class PayloadSizes:
+    """
+    A payload size distribution in bytes, parsed from a spec:
+
+    - `fixed:N`
+    - `uniform:LOW:HIGH`
+    - `lognormal:MU:SIGMA` (of the natural log of the size)
+    - `choice:A,B,C` (equally likely)
+    """
+
+    def __init__(self, spec: str = "fixed:256"):
+        self.spec = spec
+        kind, _, arguments = spec.partition(":")
+        if kind == "fixed":
+            size = int(arguments)
+            self._sample = lambda rng: size
+        elif kind == "uniform":
+            low, high = (int(value) for value in arguments.split(":"))
+            self._sample = lambda rng: rng.randint(low, high)
+        elif kind == "lognormal":
+            mu, sigma = (float(value) for value in arguments.split(":"))
+            self._sample = lambda rng: int(rng.lognormvariate(mu, sigma))
+        elif kind == "choice":
+            sizes = [int(value) for value in arguments.split(",")]
+            self._sample = lambda rng: rng.choice(sizes)
+        else:
+            raise ValueError(f"Unknown payload distribution {spec}")
+
+    def sample(self, rng: random.Random) -> int:
+        return max(0, self._sample(rng))
+
+
+class LoadConfig(BaseModel):
+    url: str = DEFAULT_URL
+    validators: int = 8
+    # ss58 addresses to send as X-Key; derived from `seed` when empty.
+    identities: List[str] = []
+    mix: List[RequestSpec] = [RequestSpec(module="echo")]
+    payload: str = "fixed:256"
+    mode: Literal["open", "closed"] = "closed"
+    # Open loop: requests per second across all validators.
+    rate: float = 100.0
+    arrival: Literal["poisson", "constant"] = "poisson"
+    # Closed loop: requests in flight per validator, and the pause between them.
+    concurrency: int = 1
+    think_time: float = 0.0
+    duration: float = 10.0
+    # Stop after this many requests, even before `duration`.
+    requests: Optional[int] = None
+    # Open loop: requests beyond this many in flight are dropped and counted.
+    max_in_flight: int = 10000
+    timeout: float = 30.0
+    # Sign requests as SignatureMiddleware expects, with keys derived from `seed`.
+    sign: bool = False
+    seed: int = 0
+
+
+class RouteReport(BaseModel):
+    route: str
+    requests: int
+    errors: int
+    throughput: float
+    latency_ms: Dict[str, float]
+
+
+class LoadReport(BaseModel):
+    mode: str
+    duration: float
+    requests: int
+    errors: int
+    dropped: int
+    throughput: float
+    routes: Dict[str, RouteReport]
+    latency_ms: Dict[str, float]
+    status_codes: Dict[str, int]
+
+
+class Validator:
+    """
+    One simulated validator: its identity, and its key when requests are signed.
+    """
+
+    def __init__(self, identity: str, keypair: Any = None):
+        self.identity = identity
+        self.keypair = keypair
+
+    def headers(self, path: str, body: bytes, method: str = "POST", query: str = "") -> Dict[str, str]:
+        if self.keypair is not None:
+            return sign_request_headers(self.keypair, method, path, body, query=query)
+        return {"X-Key": self.identity}
+
+
+def build_validators(config: LoadConfig) -> List[Validator]:
+    """
+    Returns `config.validators` validators, using `config.identities` in turn or keys
+    derived deterministically from `config.seed`.
+    """
+    if config.identities and not config.sign:
+        return [Validator(config.identities[index % len(config.identities)]) for index in range(config.validators)]
+    backend = get_backend("commune")
+    validators = []
+    for index in range(config.validators):
+        keypair = backend.derive(sha256(f"loadgen-{config.seed}-{index}".encode("utf-8")).digest())
+        identity = backend.encode_address(backend.public_key(keypair))
+        validators.append(Validator(identity, keypair if config.sign else None))
+    return validators
+
+
+class LoadGenerator:
+    """
+    Drives a miner with the traffic described by a `LoadConfig` and records latencies
+    in one histogram per route.
+    """
+
+    def __init__(self, config: LoadConfig, transport: Optional[httpx.AsyncBaseTransport] = None):
+        """
+        Args:
+            config (LoadConfig): The traffic to generate.
+            transport (Optional[httpx.AsyncBaseTransport]): A custom transport, e.g.
+                `httpx.ASGITransport(app=app)` to drive an app in-process.
+        """
+        self.config = config
+        self.transport = transport
+        self.rng = random.Random(config.seed)
+        self.validators = build_validators(config)
+        self.payloads = PayloadSizes(config.payload)
+        self.weights = [spec.weight for spec in config.mix]
+        self.histograms: Dict[str, Histogram] = {spec.route: Histogram() for spec in config.mix}
+        self.errors: Dict[str, int] = {spec.route: 0 for spec in config.mix}
+        self.status_codes: Dict[str, int] = {}
+        self.dropped = 0
+        self._payload_cache: Dict[int, str] = {}
+
+    def _next_request(self, validator: Optional[Validator] = None) -> Tuple[Validator, RequestSpec, str, bytes]:
+        if validator is None:
+            validator = self.rng.choice(self.validators)
+        spec = self.rng.choices(self.config.mix, self.weights)[0] if len(self.config.mix) > 1 else self.config.mix[0]
+        body = dict(spec.body)
+        if spec.payload_field is not None:
+            size = self.payloads.sample(self.rng)
+            payload = self._payload_cache.get(size)
+            if payload is None:
+                payload = "x" * size
+                if len(self._payload_cache) < 4096:
+                    self._payload_cache[size] = payload
+            body[spec.payload_field] = payload
+        return validator, spec, f"/modules/{spec.module}/{spec.method}", json.dumps(body).encode("utf-8")
+
+    async def _send(self, client: httpx.AsyncClient, scheduled: float, validator: Optional[Validator] = None) -> None:
+        validator, spec, path, body = self._next_request(validator)
+        headers = validator.headers(path, body)
+        headers["Content-Type"] = "application/json"
+        try:
+            response = await client.post(path, content=body, headers=headers)
+            status = str(response.status_code)
+            failed = response.status_code >= 400
+        except httpx.HTTPError as e:
+            status, failed = type(e).__name__, True
+        latency = time.perf_counter() - scheduled
+        self.status_codes[status] = self.status_codes.get(status, 0) + 1
+        if failed:
+            self.errors[spec.route] += 1
+        else:
+            self.histograms[spec.route].record(latency * 1e6)
+
+    def _client(self) -> httpx.AsyncClient:
+        limits = httpx.Limits(max_connections=None, max_keepalive_connections=None)
+        return httpx.AsyncClient(
+            base_url=self.config.url, transport=self.transport, timeout=self.config.timeout, limits=limits
+        )
+
+    async def _open_loop(self, client: httpx.AsyncClient, deadline: float, limit: Optional[int]) -> None:
+        in_flight: set = set()
+        next_time = time.perf_counter()
+        sent = 0
+        while (limit is None or sent < limit) and next_time < deadline:
+            delay = next_time - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            if len(in_flight) >= self.config.max_in_flight:
+                self.dropped += 1
+            else:
+                task = asyncio.create_task(self._send(client, next_time))
+                in_flight.add(task)
+                task.add_done_callback(in_flight.discard)
+            sent += 1
+            interval = 1.0 / self.config.rate
+            next_time += self.rng.expovariate(self.config.rate) if self.config.arrival == "poisson" else interval
+        if in_flight:
+            await asyncio.gather(*in_flight)
+
+    async def _closed_loop(self, client: httpx.AsyncClient, deadline: float, limit: Optional[int]) -> None:
+        remaining = [limit]
+
+        # Each worker is one of a validator's `concurrency` connections and always
+        # sends as that validator.
+        async def worker(validator: Validator) -> None:
+            while time.perf_counter() < deadline:
+                if remaining[0] is not None:
+                    if remaining[0] <= 0:
+                        return
+                    remaining[0] -= 1
+                await self._send(client, time.perf_counter(), validator)
+                if self.config.think_time:
+                    await asyncio.sleep(self.config.think_time)
+
+        await asyncio.gather(
+            *(worker(validator) for validator in self.validators for _ in range(self.config.concurrency))
+        )
+
+    async def run(self) -> LoadReport:
+        """
+        Generates the load until `duration` passes or `requests` have been sent, then
+        returns the report.
+        """
+        async with self._client() as client:
+            start = time.perf_counter()
+            deadline = start + self.config.duration
+            if self.config.mode == "open":
+                await self._open_loop(client, deadline, self.config.requests)
+            else:
+                await self._closed_loop(client, deadline, self.config.requests)
+            elapsed = time.perf_counter() - start
+        return self.report(elapsed)
+
+    def report(self, elapsed: float) -> LoadReport:
+        total = Histogram()
+        routes = {}
+        for route, histogram in self.histograms.items():
+            total.merge(histogram)
+            completed = histogram.total_count + self.errors[route]
+            routes[route] = RouteReport(
+                route=route,
+                requests=completed,
+                errors=self.errors[route],
+                throughput=completed / elapsed if elapsed else 0.0,
+                latency_ms=latency_summary(histogram),
+            )
+        requests = sum(route.requests for route in routes.values())
+        return LoadReport(
+            mode=self.config.mode,
+            duration=elapsed,
+            requests=requests,
+            errors=sum(self.errors.values()),
+            dropped=self.dropped,
+            throughput=requests / elapsed if elapsed else 0.0,
+            routes=routes,
+            latency_ms=latency_summary(total),
+            status_codes=dict(sorted(self.status_codes.items())),
+        )
+
+    def export_histograms(self, directory: str) -> List[Path]:
+        """
+        Writes one `<module>_<method>.hgrm` file per route, in milliseconds.
+        """
+        output = Path(directory)
+        output.mkdir(parents=True, exist_ok=True)
+        paths = []
+        for route, histogram in self.histograms.items():
+            path = output / f"{route.replace('/', '_')}.hgrm"
+            histogram.export_hgrm(path)
+            paths.append(path)
+        return paths
+
+
+def latency_summary(histogram: Histogram) -> Dict[str, float]:
+    summary = histogram.summary(PERCENTILES)
+    return {name: value / 1000 for name, value in summary.items() if name != "count"}
+
+
+def format_report(report: LoadReport) -> str:
+    columns = ["route", "requests", "errors", "req/s"] + [f"p{percentile:g} ms" for percentile in PERCENTILES] + ["max ms"]
+    rows = [columns]
+    for route in list(report.routes.values()) + [
+        RouteReport(route="total", requests=report.requests, errors=report.errors, throughput=report.throughput, latency_ms=report.latency_ms)
+    ]:
+        rows.append(
+            [route.route, str(route.requests), str(route.errors), f"{route.throughput:.1f}"]
+            + [f"{route.latency_ms[f'p{percentile:g}']:.2f}" for percentile in PERCENTILES]
+            + [f"{route.latency_ms['max']:.2f}"]
+        )
+    widths = [max(len(row[column]) for row in rows) for column in range(len(columns))]
+    lines = ["  ".join(cell.rjust(width) for cell, width in zip(row, widths)) for row in rows]
+    lines.append(f"{report.mode} loop, {report.duration:.1f} s, dropped {report.dropped}, status {report.status_codes}")
+    return "\n".join(lines)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Simulate validator load against a miner.")
+    parser.add_argument("--url", default=DEFAULT_URL)
+    parser.add_argument("--validators", type=int, default=8)
+    parser.add_argument("--identities", help="file with one ss58 address per line to send as X-Key")
+    parser.add_argument("--mix", action="append", help="module[/method][=weight]; repeat for a mix (default echo/process)")
+    parser.add_argument("--payload", default="fixed:256", help="fixed:N, uniform:A:B, lognormal:MU:SIGMA or choice:A,B,C")
+    parser.add_argument("--mode", choices=["open", "closed"], default="closed")
+    parser.add_argument("--rate", type=float, default=100.0, help="open loop requests per second")
+    parser.add_argument("--arrival", choices=["poisson", "constant"], default="poisson")
+    parser.add_argument("--concurrency", type=int, default=1, help="closed loop requests in flight per validator")
+    parser.add_argument("--think-time", type=float, default=0.0)
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--requests", type=int, default=None)
+    parser.add_argument("--sign", action="store_true", help="sign requests for SignatureMiddleware")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--hgrm-dir", help="write one HdrHistogram .hgrm file per route here")
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    args = parser.parse_args(argv)
+
+    identities = []
+    if args.identities:
+        identities = [line.strip() for line in Path(args.identities).read_text(encoding="utf-8").splitlines() if line.strip()]
+    config = LoadConfig(
+        url=args.url,
+        validators=args.validators,
+        identities=identities,
+        mix=[RequestSpec.parse(text) for text in args.mix or ["echo/process"]],
+        payload=args.payload,
+        mode=args.mode,
+        rate=args.rate,
+        arrival=args.arrival,
+        concurrency=args.concurrency,
+        think_time=args.think_time,
+        duration=args.duration,
+        requests=args.requests,
+        sign=args.sign,
+        seed=args.seed,
+    )
+    generator = LoadGenerator(config)
+    report = asyncio.run(generator.run())
+    if args.hgrm_dir:
+        generator.export_histograms(args.hgrm_dir)
+    print(report.model_dump_json(indent=2) if args.json else format_report(report))
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
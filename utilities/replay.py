@@ -0,0 +1,256 @@
+"""
+Replays traffic captured by `base.capture.CaptureMiddleware` against a miner and
+compares the latencies with those measured when it was captured.
+
+Usage:
+    python -m utilities.replay data/instance_data/capture.jsonl.gz --url http://127.0.0.1:5757 \\
+        [--speed 1 | --speed 4 | --speed max] [--concurrency N] [--prefix /modules/echo/] \\
+        [--limit N] [--sign] [--hgrm-dir reports/] [--json]
+
+At a numeric speed, requests are sent at their captured offsets divided by the speed,
+so the captured concurrency is reproduced at 1x and scaled with it. Idle gaps longer
+than `--max-idle` seconds are shortened to it. At `max` speed requests are sent as
+fast as the miner answers, with at most as many in flight as were ever in flight
+while capturing, or `--concurrency`. Latency is measured from each request's scheduled
+time, so a miner that falls behind shows it in the percentiles.
+"""
+import sys
+import time
+import asyncio
+import argparse
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import httpx
+from pydantic import BaseModel
+
+from base.capture import CapturedRequest, load_capture
+from utilities.histogram import Histogram
+from utilities.loadgen import DEFAULT_URL, PERCENTILES, LoadConfig, Validator, build_validators, latency_summary
+
+
+class ReplayRoute(BaseModel):
+    route: str
+    requests: int
+    errors: int
+    # Replayed responses whose status differs from the captured one.
+    status_mismatches: int
+    captured_ms: Dict[str, float]
+    replayed_ms: Dict[str, float]
+
+
+class ReplayReport(BaseModel):
+    speed: Optional[float]
+    concurrency: int
+    duration: float
+    captured_duration: float
+    requests: int
+    errors: int
+    status_mismatches: int
+    throughput: float
+    routes: Dict[str, ReplayRoute]
+
+
+def schedule(records: List[CapturedRequest], speed: Optional[float], max_idle: float = 1.0) -> List[float]:
+    """
+    Returns the offset in seconds at which each record is replayed: its captured offset,
+    with idle gaps capped at `max_idle` and divided by `speed`, or all 0 at max speed.
+    """
+    if speed is None:
+        return [0.0] * len(records)
+    offsets, offset = [], 0.0
+    previous = records[0].t if records else 0.0
+    for record in records:
+        offset += min(record.t - previous, max_idle)
+        previous = record.t
+        offsets.append(offset / speed)
+    return offsets
+
+
+class Replayer:
+    """
+    Sends captured requests to a miner at the captured pace, a multiple of it, or as fast
+    as possible, recording replayed and captured latencies per route.
+    """
+
+    def __init__(
+        self,
+        records: List[CapturedRequest],
+        url: str = DEFAULT_URL,
+        speed: Optional[float] = 1.0,
+        concurrency: Optional[int] = None,
+        max_idle: float = 1.0,
+        timeout: float = 30.0,
+        validator: Optional[Validator] = None,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+    ):
+        """
+        Args:
+            records (List[CapturedRequest]): The requests, in arrival order, e.g. from `load_capture`.
+            url (str): The miner's base URL.
+            speed (Optional[float]): Pace multiplier; None replays as fast as possible.
+            concurrency (Optional[int]): Most requests in flight. Defaults to unlimited at a
+                numeric speed, and to the captured peak at max speed.
+            max_idle (float): Longest gap between two requests, in captured seconds.
+            timeout (float): Request timeout in seconds.
+            validator (Optional[Validator]): Signs every request, or sets X-Key, instead
+                of the captured X-Key header.
+            transport (Optional[httpx.AsyncBaseTransport]): A custom transport, e.g.
+                `httpx.ASGITransport(app=app)` to replay in-process.
+        """
+        self.records = records
+        self.url = url
+        self.speed = speed
+        peak = max((record.in_flight for record in records), default=1)
+        self.concurrency = concurrency or (peak if speed is None else 0)
+        self.max_idle = max_idle
+        self.timeout = timeout
+        self.validator = validator
+        self.transport = transport
+        routes = {record.route for record in records}
+        self.replayed = {route: Histogram() for route in routes}
+        self.captured = {route: Histogram() for route in routes}
+        self.errors = dict.fromkeys(routes, 0)
+        self.mismatches = dict.fromkeys(routes, 0)
+
+    async def _send(self, client: httpx.AsyncClient, record: CapturedRequest, scheduled: float) -> None:
+        body = record.body_bytes()
+        headers = dict(record.headers)
+        if self.validator is not None:
+            headers = {key: value for key, value in headers.items() if key.lower() != "x-key"}
+            headers.update(self.validator.headers(record.path, body, record.method, record.query))
+        url = f"{record.path}?{record.query}" if record.query else record.path
+        try:
+            response = await client.request(record.method, url, content=body, headers=headers)
+            status = response.status_code
+        except httpx.HTTPError:
+            status = 0
+        latency = time.perf_counter() - scheduled
+        self.captured[record.route].record(record.duration * 1e6)
+        if status == 0 or status >= 400:
+            self.errors[record.route] += 1
+        else:
+            self.replayed[record.route].record(latency * 1e6)
+        if status != record.status:
+            self.mismatches[record.route] += 1
+
+    async def run(self) -> ReplayReport:
+        offsets = schedule(self.records, self.speed, self.max_idle)
+        limits = httpx.Limits(max_connections=None, max_keepalive_connections=None)
+        semaphore = asyncio.Semaphore(self.concurrency) if self.concurrency else None
+        async with httpx.AsyncClient(
+            base_url=self.url, transport=self.transport, timeout=self.timeout, limits=limits
+        ) as client:
+            start = time.perf_counter()
+            tasks = []
+            for record, offset in zip(self.records, offsets):
+                scheduled = start + offset
+                delay = scheduled - time.perf_counter()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                if semaphore is not None:
+                    await semaphore.acquire()
+                    if self.speed is None:
+                        # At max speed the request is due as soon as a slot frees up.
+                        scheduled = max(scheduled, time.perf_counter())
+                task = asyncio.create_task(self._send(client, record, scheduled))
+                if semaphore is not None:
+                    task.add_done_callback(lambda _: semaphore.release())
+                tasks.append(task)
+            await asyncio.gather(*tasks)
+            elapsed = time.perf_counter() - start
+        return self.report(elapsed)
+
+    def report(self, elapsed: float) -> ReplayReport:
+        routes = {}
+        for route in sorted(self.replayed):
+            captured = self.captured[route]
+            routes[route] = ReplayRoute(
+                route=route,
+                requests=captured.total_count,
+                errors=self.errors[route],
+                status_mismatches=self.mismatches[route],
+                captured_ms=latency_summary(captured),
+                replayed_ms=latency_summary(self.replayed[route]),
+            )
+        captured_duration = (self.records[-1].t - self.records[0].t) if self.records else 0.0
+        return ReplayReport(
+            speed=self.speed,
+            concurrency=self.concurrency,
+            duration=elapsed,
+            captured_duration=captured_duration,
+            requests=len(self.records),
+            errors=sum(self.errors.values()),
+            status_mismatches=sum(self.mismatches.values()),
+            throughput=len(self.records) / elapsed if elapsed else 0.0,
+            routes=routes,
+        )
+
+    def export_histograms(self, directory: str) -> List[Path]:
+        """
+        Writes one `<module>_<method>.hgrm` file of replayed latencies per route, in milliseconds.
+        """
+        output = Path(directory)
+        output.mkdir(parents=True, exist_ok=True)
+        paths = []
+        for route, histogram in self.replayed.items():
+            path = output / f"{route.replace('/', '_')}.hgrm"
+            histogram.export_hgrm(path)
+            paths.append(path)
+        return paths
+
+
+def format_report(report: ReplayReport) -> str:
+    columns = ["route", "requests", "errors", "mismatches"]
+    for percentile in PERCENTILES:
+        columns += [f"p{percentile:g} captured", f"p{percentile:g} replayed"]
+    rows = [columns]
+    for route in report.routes.values():
+        row = [route.route, str(route.requests), str(route.errors), str(route.status_mismatches)]
+        for percentile in PERCENTILES:
+            key = f"p{percentile:g}"
+            row += [f"{route.captured_ms[key]:.2f}", f"{route.replayed_ms[key]:.2f}"]
+        rows.append(row)
+    widths = [max(len(row[column]) for row in rows) for column in range(len(columns))]
+    lines = ["  ".join(cell.rjust(width) for cell, width in zip(row, widths)) for row in rows]
+    speed = "max" if report.speed is None else f"{report.speed:g}x"
+    lines.append(
+        f"{report.requests} requests at {speed} in {report.duration:.1f} s "
+        f"(captured over {report.captured_duration:.1f} s), {report.throughput:.1f} req/s, latencies in ms"
+    )
+    return "\n".join(lines)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Replay captured miner traffic.")
+    parser.add_argument("capture", help="capture file written by CaptureMiddleware")
+    parser.add_argument("--url", default=DEFAULT_URL)
+    parser.add_argument("--speed", default="1", help="pace multiplier, or max")
+    parser.add_argument("--concurrency", type=int, default=None, help="most requests in flight")
+    parser.add_argument("--max-idle", type=float, default=1.0, help="longest captured gap replayed, in seconds")
+    parser.add_argument("--prefix", action="append", default=[], help="replay only paths with this prefix")
+    parser.add_argument("--limit", type=int, default=None)
+    parser.add_argument("--sign", action="store_true", help="sign requests with a key derived from --seed")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--hgrm-dir", help="write one HdrHistogram .hgrm file per route here")
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    args = parser.parse_args(argv)
+
+    records = load_capture(args.capture, args.prefix, args.limit)
+    validator = build_validators(LoadConfig(validators=1, sign=True, seed=args.seed))[0] if args.sign else None
+    replayer = Replayer(
+        records,
+        url=args.url,
+        speed=None if args.speed == "max" else float(args.speed),
+        concurrency=args.concurrency,
+        max_idle=args.max_idle,
+        validator=validator,
+    )
+    report = asyncio.run(replayer.run())
+    if args.hgrm_dir:
+        replayer.export_histograms(args.hgrm_dir)
+    print(report.model_dump_json(indent=2) if args.json else format_report(report))
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
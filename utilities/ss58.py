@@ -0,0 +1,373 @@
+import os
+import threading
+from collections import OrderedDict
+from hashlib import blake2b
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+PublicKeyLike = Union[bytes, bytearray, memoryview, str]
+PublicKeys = Union[Sequence[PublicKeyLike], np.ndarray]
+
+SS58_PREFIX = b"SS58PRE"
+BASE58_ALPHABET = b"123456789ABCDEFGHJKLMNPQRSTUVWXYZabcdefghijkmnopqrstuvwxyz"
+RESERVED_SS58_FORMATS = (46, 47)
+PUBLIC_KEY_LENGTH = 32
+CHECKSUM_LENGTH = 2
+
+# Payloads are at most 2 format bytes + 32 key bytes + 2 checksum bytes. They
+# are held as nine big-endian 32-bit limbs inside uint64 lanes so that a limb
+# multiplied or divided by 58**5 never overflows.
+_PAYLOAD_BYTES = 36
+_LIMBS = _PAYLOAD_BYTES // 4
+_MAX_DIGITS = 50
+_CHUNK_DIGITS = 5
+_CHUNK_BASE = 58**_CHUNK_DIGITS
+_LIMB_MASK = np.uint64(0xFFFFFFFF)
+_LIMB_SHIFT = np.uint64(32)
+
+_DIGIT_VALUES = np.full(256, 255, dtype=np.uint8)
+_DIGIT_VALUES[np.frombuffer(BASE58_ALPHABET, dtype=np.uint8)] = np.arange(58)
+_ALPHABET = np.frombuffer(BASE58_ALPHABET, dtype=np.uint8)
+
+
+class Ss58AddressCache:
+    """
+    A thread-safe LRU cache of recent (public key, ss58 format) -> address conversions.
+
+    `functools.lru_cache` cannot be probed for a batch of keys at once, so the bulk
+    encoder uses this instead to split a request into hits and misses.
+    """
+
+    def __init__(self, maxsize: int = 65536):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[Tuple[bytes, int], str]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, public_key: bytes, ss58_format: int) -> Optional[str]:
+        with self._lock:
+            address = self._entries.get((public_key, ss58_format))
+            if address is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end((public_key, ss58_format))
+            self.hits += 1
+            return address
+
+    def put_many(self, items: Iterable[Tuple[bytes, str]], ss58_format: int) -> None:
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            for public_key, address in items:
+                self._entries[(public_key, ss58_format)] = address
+                self._entries.move_to_end((public_key, ss58_format))
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def info(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+            }
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+ADDRESS_CACHE = Ss58AddressCache(int(os.getenv("SS58_CACHE_SIZE", "65536")))
+
+
+def _format_bytes(ss58_format: int) -> bytes:
+    """
+    Returns the one or two byte ss58 format prefix used in front of the public key.
+
+    Raises:
+        ValueError: If the format is out of range or reserved.
+    """
+    if ss58_format < 0 or ss58_format > 16383 or ss58_format in RESERVED_SS58_FORMATS:
+        raise ValueError("Invalid value for ss58_format")
+    if ss58_format < 64:
+        return bytes([ss58_format])
+    return bytes(
+        [
+            ((ss58_format & 0b0000_0000_1111_1100) >> 2) | 0b0100_0000,
+            (ss58_format >> 8) | ((ss58_format & 0b0000_0000_0000_0011) << 6),
+        ]
+    )
+
+
+def _public_key_matrix(public_keys: PublicKeys) -> np.ndarray:
+    """
+    Coerces a list of public keys, or a NumPy byte array, into an (n, 32) uint8 matrix.
+
+    Args:
+        public_keys: A sequence of 32-byte keys (bytes or hex strings with an optional
+            '0x' prefix), or a uint8 array of shape (n, 32) or (32,).
+
+    Returns:
+        np.ndarray: A C-contiguous (n, 32) uint8 array.
+
+    Raises:
+        ValueError: If any public key is not 32 bytes.
+    """
+    if isinstance(public_keys, np.ndarray):
+        matrix = np.ascontiguousarray(public_keys, dtype=np.uint8)
+        if matrix.ndim == 1:
+            matrix = matrix.reshape(1, -1)
+        if matrix.ndim != 2 or matrix.shape[1] != PUBLIC_KEY_LENGTH:
+            raise ValueError("Public key array must have shape (n, 32)")
+        return matrix
+
+    raw = []
+    for public_key in public_keys:
+        if isinstance(public_key, str):
+            public_key = bytes.fromhex(public_key[2:] if public_key.startswith("0x") else public_key)
+        public_key = bytes(public_key)
+        if len(public_key) != PUBLIC_KEY_LENGTH:
+            raise ValueError("Public key must be 32 bytes")
+        raw.append(public_key)
+    if not raw:
+        return np.empty((0, PUBLIC_KEY_LENGTH), dtype=np.uint8)
+    return np.frombuffer(b"".join(raw), dtype=np.uint8).reshape(-1, PUBLIC_KEY_LENGTH)
+
+
+def _b58encode_matrix(payloads: np.ndarray) -> List[str]:
+    """
+    Base58 encodes every row of an (n, k) uint8 matrix, k <= 36, in one vectorized pass.
+    """
+    count, width = payloads.shape
+    padded = np.zeros((count, _PAYLOAD_BYTES), dtype=np.uint8)
+    padded[:, _PAYLOAD_BYTES - width :] = payloads
+    limbs = padded.view(">u4").astype(np.uint64)
+
+    # Repeated long division by 58**5 yields five base58 digits per pass.
+    chunk_base = np.uint64(_CHUNK_BASE)
+    digits = np.empty((count, _MAX_DIGITS), dtype=np.uint8)
+    for chunk in range(_MAX_DIGITS // _CHUNK_DIGITS):
+        remainder = np.zeros(count, dtype=np.uint64)
+        for limb in range(_LIMBS):
+            current = (remainder << _LIMB_SHIFT) | limbs[:, limb]
+            limbs[:, limb] = current // chunk_base
+            remainder = current % chunk_base
+        end = _MAX_DIGITS - chunk * _CHUNK_DIGITS
+        for position in range(_CHUNK_DIGITS):
+            digits[:, end - 1 - position] = remainder % np.uint64(58)
+            remainder //= np.uint64(58)
+
+    encoded = _ALPHABET[digits]
+    leading_zero_digits = np.argmax(digits != 0, axis=1)
+    leading_zero_digits[~digits.any(axis=1)] = _MAX_DIGITS
+    leading_zero_bytes = np.argmax(payloads != 0, axis=1)
+    leading_zero_bytes[~payloads.any(axis=1)] = width
+
+    text = encoded.tobytes().decode("ascii")
+    return [
+        "1" * int(zero_bytes) + text[row * _MAX_DIGITS + int(zero_digits) : (row + 1) * _MAX_DIGITS]
+        for row, (zero_bytes, zero_digits) in enumerate(zip(leading_zero_bytes, leading_zero_digits))
+    ]
+
+
+def _b58decode_group(addresses: List[bytes]) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Base58 decodes equal-length addresses into right-aligned 36-byte payloads.
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: The (n, 36) payload matrix and a mask of rows that
+            only contained base58 characters and fit in 36 bytes.
+    """
+    count, length = len(addresses), len(addresses[0])
+    chars = np.frombuffer(b"".join(addresses), dtype=np.uint8).reshape(count, length)
+    values = _DIGIT_VALUES[chars]
+    valid = (values != 255).all(axis=1) & (length <= _MAX_DIGITS)
+    values = np.where(values == 255, 0, values).astype(np.uint64)
+
+    limbs = np.zeros((count, _LIMBS), dtype=np.uint64)
+    overflow = np.zeros(count, dtype=bool)
+    for start in range(0, length, _CHUNK_DIGITS):
+        block = values[:, start : start + _CHUNK_DIGITS]
+        carry = np.zeros(count, dtype=np.uint64)
+        for column in range(block.shape[1]):
+            carry = carry * np.uint64(58) + block[:, column]
+        multiplier = np.uint64(58 ** block.shape[1])
+        for limb in range(_LIMBS - 1, -1, -1):
+            current = limbs[:, limb] * multiplier + carry
+            limbs[:, limb] = current & _LIMB_MASK
+            carry = current >> _LIMB_SHIFT
+        overflow |= carry != 0
+
+    payloads = limbs.astype(">u4").view(np.uint8).reshape(count, _PAYLOAD_BYTES)
+    return payloads, valid & ~overflow
+
+
+def _verify_payloads(
+    addresses: List[bytes], payloads: np.ndarray, valid: np.ndarray, valid_ss58_format: Optional[int]
+) -> np.ndarray:
+    """
+    Checks the decoded length, ss58 format and blake2b checksum of every decoded row.
+    """
+    leading_ones = np.array([len(address) - len(address.lstrip(b"1")) for address in addresses])
+    value_bytes = _PAYLOAD_BYTES - np.argmax(payloads != 0, axis=1)
+    value_bytes[~payloads.any(axis=1)] = 0
+    total = leading_ones + value_bytes
+
+    two_byte_format = (payloads[:, 0] & 0b0100_0000) != 0
+    one_byte_format = (payloads[:, 1] & 0b0100_0000) == 0
+    valid = valid & (
+        ((total == _PAYLOAD_BYTES - 1) & (payloads[:, 0] == 0) & one_byte_format)
+        | ((total == _PAYLOAD_BYTES) & two_byte_format)
+    )
+
+    ss58_formats = np.where(
+        total == _PAYLOAD_BYTES,
+        ((payloads[:, 0].astype(np.int64) & 0b0011_1111) << 2)
+        | (payloads[:, 1].astype(np.int64) >> 6)
+        | ((payloads[:, 1].astype(np.int64) & 0b0011_1111) << 8),
+        payloads[:, 1].astype(np.int64),
+    )
+    valid &= ~np.isin(ss58_formats, RESERVED_SS58_FORMATS)
+    if valid_ss58_format is not None:
+        valid &= ss58_formats == valid_ss58_format
+
+    body_end = _PAYLOAD_BYTES - CHECKSUM_LENGTH
+    for row in np.flatnonzero(valid):
+        payload = payloads[row]
+        body = payload[_PAYLOAD_BYTES - int(total[row]) : body_end].tobytes()
+        checksum = blake2b(SS58_PREFIX + body).digest()[:CHECKSUM_LENGTH]
+        valid[row] = checksum == payload[body_end:].tobytes()
+    return valid
+
+
+def _decode(addresses: Sequence[str], valid_ss58_format: Optional[int]) -> Tuple[np.ndarray, np.ndarray]:
+    public_keys = np.zeros((len(addresses), PUBLIC_KEY_LENGTH), dtype=np.uint8)
+    valid = np.zeros(len(addresses), dtype=bool)
+
+    groups: Dict[int, List[int]] = {}
+    encoded: List[bytes] = []
+    for row, address in enumerate(addresses):
+        try:
+            raw = address.encode("ascii")
+        except (AttributeError, UnicodeEncodeError):
+            raw = b""
+        encoded.append(raw)
+        if raw and not raw.startswith(b"0x"):
+            groups.setdefault(len(raw), []).append(row)
+
+    for rows in groups.values():
+        group = [encoded[row] for row in rows]
+        payloads, group_valid = _b58decode_group(group)
+        group_valid = _verify_payloads(group, payloads, group_valid, valid_ss58_format)
+        public_keys[rows] = payloads[:, 2 : 2 + PUBLIC_KEY_LENGTH]
+        valid[rows] = group_valid
+    public_keys[~valid] = 0
+    return public_keys, valid
+
+
+def encode_ss58_addresses(
+    public_keys: PublicKeys, ss58_format: int = 42, cache: Optional[Ss58AddressCache] = ADDRESS_CACHE
+) -> List[str]:
+    """
+    Encodes many public keys into ss58 addresses in a single vectorized pass.
+
+    Args:
+        public_keys (PublicKeys): 32-byte public keys as bytes or hex strings, or a uint8
+            NumPy array of shape (n, 32).
+        ss58_format (int, optional): The ss58 address format. Defaults to 42.
+        cache (Optional[Ss58AddressCache], optional): Cache consulted before encoding and
+            filled with the new conversions. Pass None to bypass it. Defaults to ADDRESS_CACHE.
+
+    Returns:
+        List[str]: The ss58 addresses, in the same order as the input keys.
+
+    Raises:
+        ValueError: If a public key is not 32 bytes or the ss58 format is invalid.
+    """
+    prefix = _format_bytes(ss58_format)
+    matrix = _public_key_matrix(public_keys)
+    raw_keys = [row.tobytes() for row in matrix]
+
+    addresses: List[Optional[str]] = [None] * len(raw_keys)
+    missing: Dict[bytes, List[int]] = {}
+    for row, raw_key in enumerate(raw_keys):
+        address = cache.get(raw_key, ss58_format) if cache is not None else None
+        if address is None:
+            missing.setdefault(raw_key, []).append(row)
+        else:
+            addresses[row] = address
+    if not missing:
+        return addresses
+
+    unique_keys = list(missing)
+    bodies = [prefix + raw_key for raw_key in unique_keys]
+    payloads = np.frombuffer(
+        b"".join(body + blake2b(SS58_PREFIX + body).digest()[:CHECKSUM_LENGTH] for body in bodies),
+        dtype=np.uint8,
+    ).reshape(len(bodies), -1)
+    encoded = _b58encode_matrix(payloads)
+
+    for raw_key, address in zip(unique_keys, encoded):
+        for row in missing[raw_key]:
+            addresses[row] = address
+    if cache is not None:
+        cache.put_many(zip(unique_keys, encoded), ss58_format)
+    return addresses
+
+
+def encode_ss58_address_cached(public_key: PublicKeyLike, ss58_format: int = 42) -> str:
+    """
+    Encodes a single public key into an ss58 address through the shared conversion cache.
+
+    Args:
+        public_key (PublicKeyLike): The 32-byte public key, as bytes or a hex string.
+        ss58_format (int, optional): The ss58 address format. Defaults to 42.
+
+    Returns:
+        str: The ss58 address.
+    """
+    return encode_ss58_addresses([public_key], ss58_format)[0]
+
+
+def decode_ss58_addresses(addresses: Sequence[str], valid_ss58_format: Optional[int] = None) -> np.ndarray:
+    """
+    Decodes many ss58 addresses back to their 32-byte public keys.
+
+    Args:
+        addresses (Sequence[str]): The ss58 addresses to decode.
+        valid_ss58_format (Optional[int], optional): If given, every address must use this format.
+
+    Returns:
+        np.ndarray: A uint8 array of shape (n, 32); use `row.tobytes()` or `row.tobytes().hex()`
+            to get a single key.
+
+    Raises:
+        ValueError: If any address is invalid. The message names the first offending index.
+    """
+    public_keys, valid = _decode(addresses, valid_ss58_format)
+    if not valid.all():
+        index = int(np.argmin(valid))
+        raise ValueError(f"Invalid ss58 address at index {index}: {addresses[index]!r}")
+    return public_keys
+
+
+def validate_ss58_addresses(addresses: Sequence[str], valid_ss58_format: Optional[int] = None) -> np.ndarray:
+    """
+    Checks many ss58 addresses at once.
+
+    Args:
+        addresses (Sequence[str]): The values to check.
+        valid_ss58_format (Optional[int], optional): If given, addresses must use this format.
+
+    Returns:
+        np.ndarray: A boolean array, True where the address is a valid 32-byte account ss58 address.
+    """
+    return _decode(addresses, valid_ss58_format)[1]
@@ -1,24 +1,520 @@
+"""
+Bundles the Python sources of a tree into one text file, or a series of chunks.
+
+Each file is written as `File: <path>`, a blank line, its contents and two newlines.
+The tree is walked with `os.scandir`, pruning whatever `.gitignore` files (and the
+default excludes) ignore, and files are read by a thread pool into a bounded window
+while the output is written in path order.
+
+A manifest next to the output records each file's mtime, size, hash and position.
+Re-running with the same options skips outputs whose files are all unchanged and, for
+uncompressed outputs, copies unchanged files from the previous output instead of
+re-opening them.
+
+Usage:
+    python walkdir.py [root] [-o output.txt] [--chunk-size BYTES] [--compress] [--full]
+"""
 import os
+import re
+import sys
+import gzip
+import json
+import hashlib
+import argparse
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, BinaryIO, Callable, Deque, Dict, Iterator, List, NamedTuple, Optional, Sequence, Tuple
+from pydantic import BaseModel
+from loguru import logger
+
+DEFAULT_OUTPUT = "output.txt"
+DEFAULT_SUFFIXES = (".py",)
+# Pruned in addition to what .gitignore files say, in .gitignore syntax.
+DEFAULT_EXCLUDES = (".git/", "data/", ".venv/", "venv/", "env/", "node_modules/", "__pycache__/", "*.egg-info/")
+# Bytes of file contents read ahead of the writer.
+DEFAULT_BUFFER_SIZE = 32 * 1024 * 1024
+# Files read per thread pool task: one task per small file costs more than reading it.
+READ_BATCH_FILES = 64
+READ_BATCH_BYTES = 1024 * 1024
+WRITE_BUFFER_SIZE = 1024 * 1024
+MANIFEST_VERSION = 1
+FOOTER = b"\n\n"
+
+
+class IgnoreRule:
+    """
+    One .gitignore pattern, compiled to a regular expression over paths relative to
+    the directory of its .gitignore.
+    """
+
+    __slots__ = ("base", "negate", "directory_only", "regex")
+
+    def __init__(self, pattern: str, base: str = ""):
+        self.base = base
+        self.negate = pattern.startswith("!")
+        if self.negate:
+            pattern = pattern[1:]
+        self.directory_only = pattern.endswith("/")
+        pattern = pattern.rstrip("/")
+        # Patterns with a slash before the end match from the .gitignore directory,
+        # others match a name at any depth.
+        anchored = "/" in pattern
+        pattern = pattern.lstrip("/")
+        prefix = re.escape(f"{base}/") if base else ""
+        self.regex = re.compile(prefix + ("" if anchored else "(?:.*/)?") + _translate(pattern) + "$")
+
+    def matches(self, path: str, is_directory: bool) -> bool:
+        if self.directory_only and not is_directory:
+            return False
+        return self.regex.match(path) is not None
+
+
+def _translate(pattern: str) -> str:
+    parts, index = [], 0
+    while index < len(pattern):
+        if pattern.startswith("**/", index):
+            parts.append("(?:.*/)?")
+            index += 3
+        elif pattern.startswith("/**", index) and index + 3 == len(pattern):
+            parts.append("/.*")
+            index += 3
+        elif pattern[index] == "*":
+            parts.append("[^/]*")
+            index += 1
+        elif pattern[index] == "?":
+            parts.append("[^/]")
+            index += 1
+        elif pattern[index] == "[":
+            end = pattern.find("]", index + 1)
+            if end == -1:
+                parts.append(re.escape("["))
+                index += 1
+            else:
+                body = pattern[index + 1 : end]
+                parts.append("[" + ("^" + body[1:] if body.startswith("!") else body) + "]")
+                index = end + 1
+        elif pattern[index] == "\\" and index + 1 < len(pattern):
+            parts.append(re.escape(pattern[index + 1]))
+            index += 2
+        else:
+            parts.append(re.escape(pattern[index]))
+            index += 1
+    return "".join(parts)
+
+
+def parse_ignore(lines: Sequence[str], base: str = "") -> List[IgnoreRule]:
+    """
+    Compiles .gitignore lines. Blank lines and comments are skipped.
+    """
+    rules = []
+    for line in lines:
+        line = line.rstrip("\n").rstrip("\r")
+        if not line.strip() or line.startswith("#"):
+            continue
+        if not line.endswith("\\ "):
+            line = line.rstrip()
+        rules.append(IgnoreRule(line, base))
+    return rules
+
+
+def is_ignored(rules: Sequence[IgnoreRule], path: str, is_directory: bool) -> bool:
+    """
+    Returns whether the last rule matching `path` ignores it.
+    """
+    for rule in reversed(rules):
+        if rule.matches(path, is_directory):
+            return not rule.negate
+    return False
+
+
+def compile_ignore(rules: Sequence[IgnoreRule]) -> Callable[[str, bool], bool]:
+    """
+    Returns an `is_ignored` for a fixed rule list. Without negations, where the order of
+    rules does not matter, all rules are folded into one regular expression per entry type.
+    """
+    if any(rule.negate for rule in rules):
+        rules = list(rules)
+        return lambda path, is_directory: is_ignored(rules, path, is_directory)
+    if not rules:
+        return lambda path, is_directory: False
+    directories = re.compile("|".join(f"(?:{rule.regex.pattern})" for rule in rules))
+    file_rules = [rule for rule in rules if not rule.directory_only]
+    files = re.compile("|".join(f"(?:{rule.regex.pattern})" for rule in file_rules)) if file_rules else None
+    return lambda path, is_directory: (
+        directories.match(path) is not None if is_directory else files is not None and files.match(path) is not None
+    )
+
+
+class SourceFile(NamedTuple):
+    path: str
+    mtime_ns: int
+    size: int
+
+
+def scan(
+    root: str,
+    suffixes: Sequence[str] = DEFAULT_SUFFIXES,
+    excludes: Sequence[str] = DEFAULT_EXCLUDES,
+    use_gitignore: bool = True,
+) -> Iterator[SourceFile]:
+    """
+    Yields the files under `root` ending in one of `suffixes`, in sorted path order.
+
+    Ignored directories are pruned without being listed. Each directory's .gitignore
+    applies below it, after the rules of its parents.
+
+    Args:
+        root (str): The directory to walk.
+        suffixes (Sequence[str]): File name endings to keep.
+        excludes (Sequence[str]): Extra .gitignore patterns applied from `root`.
+        use_gitignore (bool): Read .gitignore files. Defaults to True.
+
+    Yields:
+        SourceFile: The path relative to `root`, with its mtime and size.
+    """
+    suffixes = tuple(suffixes)
+    base_rules = parse_ignore(excludes)
+    stack: List[Tuple[str, List[IgnoreRule], Callable[[str, bool], bool]]] = [("", base_rules, compile_ignore(base_rules))]
+    while stack:
+        relative, rules, ignored = stack.pop()
+        directory = os.path.join(root, relative) if relative else root
+        if use_gitignore:
+            try:
+                with open(os.path.join(directory, ".gitignore"), encoding="utf-8") as f:
+                    rules = rules + parse_ignore(f.readlines(), relative)
+                ignored = compile_ignore(rules)
+            except OSError:
+                pass
+        try:
+            with os.scandir(directory) as entries:
+                entries = sorted(entries, key=lambda entry: entry.name)
+        except OSError as e:
+            logger.warning(f"Skipping {directory}: {e}")
+            continue
+        subdirectories = []
+        for entry in entries:
+            is_directory = entry.is_dir(follow_symlinks=False)
+            if not is_directory and not entry.name.endswith(suffixes):
+                continue
+            path = f"{relative}/{entry.name}" if relative else entry.name
+            if ignored(path, is_directory):
+                continue
+            if is_directory:
+                subdirectories.append(path)
+            elif entry.is_file():
+                stat = entry.stat()
+                yield SourceFile(path, stat.st_mtime_ns, stat.st_size)
+        # Reversed so the stack pops subdirectories in sorted order.
+        stack.extend((path, rules, ignored) for path in reversed(subdirectories))
+
+
+class ManifestEntry(NamedTuple):
+    mtime_ns: int
+    size: int
+    hash: str
+    output: int
+    # Position of the file's contents in its output; only kept for uncompressed outputs.
+    offset: Optional[int] = None
+
+
+class Manifest(BaseModel):
+    version: int = MANIFEST_VERSION
+    options: Dict[str, Any] = {}
+    outputs: List[List[str]] = []
+    files: Dict[str, ManifestEntry] = {}
+
+
+class BundleStats(BaseModel):
+    files: int = 0
+    read: int = 0
+    copied: int = 0
+    outputs_written: int = 0
+    outputs_kept: int = 0
+    bytes_written: int = 0
+
+
+def header(path: str) -> bytes:
+    return f"File: ./{path}\n\n".encode("utf-8")
+
+
+def output_paths(output: str, count: int, chunked: bool, compress: bool) -> List[str]:
+    """
+    Returns the output file names: `output` itself, or `stem.000.suffix`, ... when chunked,
+    with `.gz` appended when compressed.
+    """
+    path = Path(output)
+    names = [str(path.with_name(f"{path.stem}.{index:03d}{path.suffix}")) for index in range(count)] if chunked else [output]
+    return [f"{name}.gz" if compress else name for name in names]
+
+
+def plan_chunks(files: Sequence[SourceFile], chunk_size: Optional[int]) -> List[List[SourceFile]]:
+    """
+    Splits the files, in order, into outputs of about `chunk_size` bytes. A file is
+    never split, so a chunk holding one large file may exceed `chunk_size`.
+    """
+    if not chunk_size:
+        return [list(files)]
+    chunks: List[List[SourceFile]] = [[]]
+    size = 0
+    for file in files:
+        length = len(header(file.path)) + file.size + len(FOOTER)
+        if chunks[-1] and size + length > chunk_size:
+            chunks.append([])
+            size = 0
+        chunks[-1].append(file)
+        size += length
+    return chunks
+
+
+def _read_batch(root: str, paths: Sequence[str]) -> List[bytes]:
+    contents = []
+    for path in paths:
+        with open(os.path.join(root, path), "rb") as f:
+            contents.append(f.read())
+    return contents
+
+
+class Bundler:
+    """
+    Writes the bundle, reusing what it can from the previous run's manifest.
+    """
+
+    def __init__(
+        self,
+        root: str = "./",
+        output: str = DEFAULT_OUTPUT,
+        chunk_size: Optional[int] = None,
+        compress: bool = False,
+        suffixes: Sequence[str] = DEFAULT_SUFFIXES,
+        excludes: Sequence[str] = DEFAULT_EXCLUDES,
+        workers: Optional[int] = None,
+        buffer_size: int = DEFAULT_BUFFER_SIZE,
+        manifest_path: Optional[str] = None,
+    ):
+        """
+        Args:
+            root (str): The directory to bundle. Defaults to the working directory.
+            output (str): The output file. Defaults to output.txt.
+            chunk_size (Optional[int]): Split the output into files of about this many bytes.
+            compress (bool): Gzip each output. Defaults to False.
+            suffixes (Sequence[str]): File name endings to bundle. Defaults to `.py`.
+            excludes (Sequence[str]): .gitignore patterns to skip besides .gitignore files.
+            workers (Optional[int]): Reader threads. Defaults to min(32, CPU count + 4).
+            buffer_size (int): Bytes read ahead of the writer at most, unless one file is larger.
+            manifest_path (Optional[str]): Defaults to `<output>.manifest.json`.
+        """
+        self.root = root
+        self.output = output
+        self.chunk_size = chunk_size
+        self.compress = compress
+        self.suffixes = tuple(suffixes)
+        self.excludes = tuple(excludes) + (f"/{Path(output).name}*",)
+        self.workers = workers or min(32, (os.cpu_count() or 1) + 4)
+        self.buffer_size = buffer_size
+        self.manifest_path = manifest_path or f"{output}.manifest.json"
+
+    @property
+    def options(self) -> Dict[str, Any]:
+        return {
+            "root": os.path.abspath(self.root),
+            "chunk_size": self.chunk_size,
+            "compress": self.compress,
+            "suffixes": list(self.suffixes),
+            "excludes": list(self.excludes),
+        }
+
+    def load_manifest(self) -> Manifest:
+        try:
+            manifest = Manifest.model_validate_json(Path(self.manifest_path).read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return Manifest()
+        if manifest.version != MANIFEST_VERSION or manifest.options != self.options:
+            return Manifest()
+        return manifest
+
+    def bundle(self, full: bool = False) -> BundleStats:
+        """
+        Writes the bundle.
+
+        Args:
+            full (bool): Ignore the manifest and rewrite every output. Defaults to False.
+
+        Returns:
+            BundleStats: Files bundled, read from the tree or copied from the previous
+                output, and outputs written or kept.
+        """
+        previous = Manifest() if full else self.load_manifest()
+        files = list(scan(self.root, self.suffixes, self.excludes))
+        chunks = plan_chunks(files, self.chunk_size)
+        paths = output_paths(self.output, len(chunks), bool(self.chunk_size), self.compress)
+        manifest = Manifest(options=self.options, outputs=[[file.path for file in chunk] for chunk in chunks])
+        stats = BundleStats(files=len(files))
+
+        def unchanged(file: SourceFile) -> bool:
+            entry = previous.files.get(file.path)
+            return entry is not None and (entry.mtime_ns, entry.size) == (file.mtime_ns, file.size)
+
+        previous_paths = output_paths(self.output, len(previous.outputs), bool(self.chunk_size), self.compress)
+        handles: Dict[int, BinaryIO] = {}
+        written: List[Tuple[str, str]] = []
+        try:
+            with ThreadPoolExecutor(max_workers=self.workers) as executor:
+                for index, (chunk, path) in enumerate(zip(chunks, paths)):
+                    keep = (
+                        index < len(previous.outputs)
+                        and previous.outputs[index] == manifest.outputs[index]
+                        and os.path.exists(path)
+                        and all(unchanged(file) for file in chunk)
+                    )
+                    if keep:
+                        for file in chunk:
+                            manifest.files[file.path] = previous.files[file.path]
+                        stats.outputs_kept += 1
+                        continue
+                    # Unchanged files are copied out of the previous uncompressed outputs,
+                    # which stay in place until every new output is written.
+                    reuse = {}
+                    if not self.compress:
+                        reuse = {file.path: previous.files[file.path] for file in chunk if unchanged(file)}
+                        for entry in reuse.values():
+                            if entry.output not in handles:
+                                handles[entry.output] = open(previous_paths[entry.output], "rb")
+                    temporary = f"{path}.tmp"
+                    written.append((temporary, path))
+                    self._write(self._contents(executor, chunk, reuse, handles), temporary, index, manifest, stats)
+                    stats.outputs_written += 1
+        except BaseException:
+            for temporary, _ in written:
+                if os.path.exists(temporary):
+                    os.remove(temporary)
+            raise
+        finally:
+            for handle in handles.values():
+                handle.close()
+        for temporary, path in written:
+            os.replace(temporary, path)
+
+        for stale in previous_paths[len(paths) :]:
+            if os.path.exists(stale):
+                os.remove(stale)
+        self._save_manifest(manifest)
+        logger.info(
+            f"Bundled {stats.files} files into {len(paths)} outputs: {stats.read} read, {stats.copied} copied, "
+            f"{stats.outputs_kept} outputs unchanged"
+        )
+        return stats
+
+    def _contents(
+        self,
+        executor: ThreadPoolExecutor,
+        chunk: Sequence[SourceFile],
+        reuse: Dict[str, ManifestEntry],
+        handles: Dict[int, BinaryIO],
+    ) -> Iterator[Tuple[SourceFile, bytes, Optional[ManifestEntry]]]:
+        """
+        Yields each file of the chunk with its contents, in order, and its previous
+        manifest entry if it was copied from the previous output.
+
+        Files are read from the tree by the executor at most `buffer_size` bytes ahead
+        of the writer; copies from the previous output are read inline when their turn comes.
+        """
+        pending: Deque[Tuple[List[SourceFile], Optional[Future]]] = deque()
+        batch: List[SourceFile] = []
+        batch_bytes = buffered = 0
+        try:
+            for position, file in enumerate(chunk):
+                last = position == len(chunk) - 1
+                if file.path in reuse:
+                    pending.append(([file], None))
+                else:
+                    batch.append(file)
+                    batch_bytes += file.size
+                # A batch is sent before a copy queued behind it, so output order holds.
+                if batch and (last or len(batch) >= READ_BATCH_FILES or batch_bytes >= READ_BATCH_BYTES or file.path in reuse):
+                    future = executor.submit(_read_batch, self.root, [item.path for item in batch])
+                    if file.path in reuse:
+                        pending.insert(len(pending) - 1, (batch, future))
+                    else:
+                        pending.append((batch, future))
+                    buffered += batch_bytes
+                    batch, batch_bytes = [], 0
+                while pending and (last or buffered > self.buffer_size or pending[0][1] is None):
+                    files, future = pending.popleft()
+                    if future is None:
+                        entry = reuse[files[0].path]
+                        handle = handles[entry.output]
+                        handle.seek(entry.offset)
+                        yield files[0], handle.read(entry.size), entry
+                        continue
+                    buffered -= sum(item.size for item in files)
+                    yield from ((item, data, None) for item, data in zip(files, future.result()))
+        finally:
+            for _, future in pending:
+                if future is not None:
+                    future.cancel()
+
+    def _write(
+        self,
+        contents: Iterator[Tuple[SourceFile, bytes, Optional[ManifestEntry]]],
+        path: str,
+        index: int,
+        manifest: Manifest,
+        stats: BundleStats,
+    ) -> None:
+        files = manifest.files
+        copied_count = 0
+        with open(path, "wb", buffering=WRITE_BUFFER_SIZE) as raw:
+            out: BinaryIO = gzip.GzipFile(fileobj=raw, mode="wb", compresslevel=6, mtime=0) if self.compress else raw
+            offset = 0
+            for file, data, copied in contents:
+                prefix = header(file.path)
+                out.write(b"".join((prefix, data, FOOTER)))
+                if copied is not None:
+                    digest = copied.hash
+                    copied_count += 1
+                else:
+                    digest = hashlib.blake2b(data, digest_size=16).hexdigest()
+                content_offset = offset + len(prefix)
+                files[file.path] = ManifestEntry(
+                    file.mtime_ns, len(data), digest, index, None if self.compress else content_offset
+                )
+                offset = content_offset + len(data) + len(FOOTER)
+            if self.compress:
+                out.close()
+            stats.bytes_written += raw.tell()
+        stats.copied += copied_count
+        stats.read += len(manifest.outputs[index]) - copied_count
+
+    def _save_manifest(self, manifest: Manifest) -> None:
+        temporary = f"{self.manifest_path}.tmp"
+        Path(temporary).write_text(manifest.model_dump_json(), encoding="utf-8")
+        os.replace(temporary, self.manifest_path)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Bundle the Python sources of a tree into one text file.")
+    parser.add_argument("root", nargs="?", default="./")
+    parser.add_argument("-o", "--output", default=DEFAULT_OUTPUT)
+    parser.add_argument("--chunk-size", type=int, default=None, help="split the output into files of about this many bytes")
+    parser.add_argument("--compress", action="store_true", help="gzip the output files")
+    parser.add_argument("--suffix", action="append", dest="suffixes", help="file endings to bundle (default .py)")
+    parser.add_argument("--exclude", action="append", default=[], help="extra .gitignore-style pattern to skip")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--full", action="store_true", help="rewrite everything instead of reusing unchanged outputs")
+    args = parser.parse_args(argv)
+
+    bundler = Bundler(
+        args.root,
+        args.output,
+        chunk_size=args.chunk_size,
+        compress=args.compress,
+        suffixes=args.suffixes or DEFAULT_SUFFIXES,
+        excludes=DEFAULT_EXCLUDES + tuple(args.exclude),
+        workers=args.workers,
+    )
+    print(json.dumps(bundler.bundle(full=args.full).model_dump()))
+
 
-# Set the directory to start from
-start_dir = "./"
-
-# Create or open the output file
-with open("output.txt", "w", encoding="utf-8") as output_file:
-    # Walk through the directory and subdirectories
-    for dirpath, dirnames, filenames in os.walk(start_dir):
-        # Loop over the files in the current directory
-        for filename in filenames:
-            # Check if the file is a Python file
-            if filename.endswith(".py"):
-                # Construct the full file path
-                file_path = os.path.join(dirpath, filename)
-                
-                # Open the Python file and read its contents
-                with open(file_path, "r", encoding="utf-8") as py_file:
-                    contents = py_file.read()
-                
-                # Write the file contents to the output file
-                output_file.write(f"File: {file_path}\n\n")
-                output_file.write(contents)
-                output_file.write("\n\n")
+if __name__ == "__main__":
+    main(sys.argv[1:])